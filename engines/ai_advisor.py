@@ -3,6 +3,8 @@
 import json
 import anthropic
 
+from engines.roi_engine import driver_sensitivities, sensitivity_grid, sensitivity_summary
+
 
 MARKET_ASSESSMENT_PROMPT = """\
 You are an expert business analyst and market strategist.
@@ -33,7 +35,8 @@ Return your analysis as a JSON object with exactly these fields:
     "confidence": "<High|Medium|Low>",
     "reasoning": "2-3 sentence justification."
   }},
-  "sensitivity_notes": "Brief notes on which assumptions the ROI is most sensitive to."
+  "sensitivity_notes": "Brief notes on which assumptions the ROI is most sensitive to, citing the computed \
+sensitivity figures below (swings, breakevens, probability of loss). Do not estimate sensitivities yourself."
 }}
 
 IMPORTANT: Return ONLY the JSON object, no other text.
@@ -69,12 +72,21 @@ SCENARIO RESULTS (Optimistic):
 
 SCENARIO RESULTS (Pessimistic):
 - ROI: {pess_roi}% | NPV: ${pess_npv:,.0f}
+
+COMPUTED SENSITIVITY (exact model outputs, one driver varied at a time):
+{sensitivity}
 """
 
 
-def get_ai_assessment(inputs, scenarios: dict, api_key: str) -> dict:
-    """Get AI-powered market assessment and recommendations."""
+def get_ai_assessment(inputs, scenarios: dict, api_key: str, sensitivity: str | None = None) -> dict:
+    """Get AI-powered market assessment and recommendations.
+
+    ``sensitivity`` is ``roi_engine.sensitivity_summary`` text; it is computed
+    with the default ranges when not supplied.
+    """
     client = anthropic.Anthropic(api_key=api_key)
+    if sensitivity is None:
+        sensitivity = sensitivity_summary(inputs, driver_sensitivities(inputs), sensitivity_grid(inputs))
 
     ml = scenarios["most_likely"]
     opt = scenarios["optimistic"]
@@ -103,6 +115,7 @@ def get_ai_assessment(inputs, scenarios: dict, api_key: str) -> dict:
         opt_npv=opt.npv,
         pess_roi=pess.roi_pct,
         pess_npv=pess.npv,
+        sensitivity=sensitivity,
     )
 
     message = client.messages.create(
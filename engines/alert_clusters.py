@@ -0,0 +1,325 @@
+"""Local alert parsing, templating, and time-window/entity clustering for incident triage."""
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+ALERT_LINE_RE = re.compile(
+    r"^\s*(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?)\S*\s*\|\s*([^|]+?)\s*\|\s*([^|]+?)\s*\|\s*(.+?)\s*$"
+)
+
+SEVERITY_RANK = {
+    "CRITICAL": 4, "FATAL": 4, "EMERGENCY": 4, "SEV1": 4,
+    "HIGH": 3, "ERROR": 3, "MAJOR": 3, "SEV2": 3,
+    "WARNING": 2, "WARN": 2, "MEDIUM": 2, "SEV3": 2,
+    "LOW": 1, "INFO": 1, "NOTICE": 1, "SEV4": 1,
+}
+SEVERITY_LABELS = {4: "CRITICAL", 3: "HIGH", 2: "WARNING", 1: "INFO", 0: "UNKNOWN"}
+
+HOST_RE = re.compile(
+    r"\b(?:(?:prod|production|stg|staging|dev|qa|test|uat)-[a-z0-9]+(?:-[a-z0-9]+)*"
+    r"|ip-\d+-\d+-\d+-\d+|[a-z0-9-]+\.(?:internal|local|compute\.amazonaws\.com))\b",
+    re.IGNORECASE,
+)
+SERVICE_RE = re.compile(r"\b([a-z][a-z0-9]*(?:-[a-z0-9]+)*-(?:service|svc|api|worker|gateway))(?:-[a-z0-9]{4,10})?\b", re.IGNORECASE)
+ENDPOINT_RE = re.compile(r"(?<![\w.])/(?:[a-z0-9_.-]+/)*[a-z0-9_.-]+", re.IGNORECASE)
+IP_RE = re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b")
+ID_RE = re.compile(r"\b(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|0x[0-9a-f]+|[0-9a-f]{12,})\b", re.IGNORECASE)
+POD_SUFFIX_RE = re.compile(r"(-(?:service|svc|api|worker|gateway))-[a-z0-9]{4,10}(?:-[a-z0-9]{5})?\b", re.IGNORECASE)
+NUMBER_RE = re.compile(r"(?<![A-Za-z0-9<.])[-+]?\d+(?:[.,]\d+)*(?:ms|s|m|h|%|/min|/s|[kKmMgG][bB]?)?\b")
+QUOTED_RE = re.compile(r"\"[^\"]*\"|'[^']*'")
+
+WINDOW_MINUTES = 5
+MAX_PROMPT_CLUSTERS = 15
+MAX_TEMPLATES_PER_CLUSTER = 8
+MAX_UNPARSED_LINES = 40
+
+
+@dataclass
+class Alert:
+    timestamp: datetime
+    source: str
+    severity: int
+    message: str
+    template: str
+    entities: frozenset
+
+
+def severity_rank(label: str) -> int:
+    return SEVERITY_RANK.get(label.strip().upper(), 0)
+
+
+def extract_entities(message: str) -> frozenset:
+    """Hosts, services, and endpoints named in an alert, as ``kind:name`` strings."""
+    entities = {f"host:{h.lower()}" for h in HOST_RE.findall(message)}
+    rest = HOST_RE.sub(" ", message)
+    entities |= {f"service:{s.lower()}" for s in SERVICE_RE.findall(rest)}
+    entities |= {f"endpoint:{e.lower()}" for e in ENDPOINT_RE.findall(rest) if e.count("/") >= 2}
+    return frozenset(entities)
+
+
+def message_template(message: str) -> str:
+    """Mask variable parts (ids, hosts, numbers, quoted values) so repeats collapse to one template."""
+    t = ID_RE.sub("<id>", message)
+    t = IP_RE.sub("<ip>", t)
+    t = POD_SUFFIX_RE.sub(r"\1-<pod>", t)
+    t = HOST_RE.sub("<host>", t)
+    t = QUOTED_RE.sub("<str>", t)
+    t = NUMBER_RE.sub("<num>", t)
+    return re.sub(r"\s+", " ", t).strip()
+
+
+@lru_cache(maxsize=65536)
+def _analyze(message: str) -> tuple[str, frozenset]:
+    # Alert storms repeat the same messages, so templating is memoized.
+    return message_template(message), extract_entities(message)
+
+
+def parse_alert(line: str) -> Alert | None:
+    """Parse one ``TIMESTAMP | SOURCE | SEVERITY | ALERT`` line; returns None for anything else."""
+    m = ALERT_LINE_RE.match(line)
+    if not m:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(m.group(1).replace("T", " "))
+    except ValueError:
+        return None
+    message = m.group(4)
+    template, entities = _analyze(message)
+    return Alert(
+        timestamp=timestamp,
+        source=m.group(2),
+        severity=severity_rank(m.group(3)),
+        message=message,
+        template=template,
+        entities=entities,
+    )
+
+
+def parse_alerts(text: str) -> tuple[list[Alert], list[str]]:
+    """Split an alert dump into parsed alerts and the lines that are not alerts (headers, traces)."""
+    alerts, other = [], []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        alert = parse_alert(line)
+        if alert is not None:
+            alerts.append(alert)
+        elif not line.lstrip().upper().startswith("TIMESTAMP"):
+            other.append(line.rstrip())
+    return alerts, other
+
+
+@dataclass
+class TemplateStats:
+    template: str
+    example: str
+    source: str
+    severity: int
+    count: int
+    first_seen: datetime
+    last_seen: datetime
+
+
+@dataclass
+class AlertCluster:
+    cluster_id: int
+    first_seen: datetime
+    last_seen: datetime
+    count: int = 0
+    severity: int = 0
+    entities: Counter = field(default_factory=Counter)
+    sources: Counter = field(default_factory=Counter)
+    templates: dict[str, TemplateStats] = field(default_factory=dict)
+
+    @property
+    def score(self) -> float:
+        """Rank by worst severity, then volume and breadth."""
+        return 10 * self.severity + math.log2(1 + self.count) + len(self.templates) + 0.5 * len(self.entities)
+
+    def add(self, alert: Alert):
+        self.count += 1
+        self.severity = max(self.severity, alert.severity)
+        self.first_seen = min(self.first_seen, alert.timestamp)
+        self.last_seen = max(self.last_seen, alert.timestamp)
+        self.entities.update(alert.entities)
+        self.sources[alert.source] += 1
+        stats = self.templates.get(alert.template)
+        if stats is None:
+            self.templates[alert.template] = TemplateStats(
+                alert.template, alert.message, alert.source, alert.severity, 1, alert.timestamp, alert.timestamp
+            )
+        else:
+            stats.count += 1
+            stats.severity = max(stats.severity, alert.severity)
+            stats.first_seen = min(stats.first_seen, alert.timestamp)
+            stats.last_seen = max(stats.last_seen, alert.timestamp)
+
+    def absorb(self, other: "AlertCluster"):
+        self.count += other.count
+        self.severity = max(self.severity, other.severity)
+        self.first_seen = min(self.first_seen, other.first_seen)
+        self.last_seen = max(self.last_seen, other.last_seen)
+        self.entities.update(other.entities)
+        self.sources.update(other.sources)
+        for key, stats in other.templates.items():
+            mine = self.templates.get(key)
+            if mine is None:
+                self.templates[key] = stats
+            else:
+                mine.count += stats.count
+                mine.severity = max(mine.severity, stats.severity)
+                mine.first_seen = min(mine.first_seen, stats.first_seen)
+                mine.last_seen = max(mine.last_seen, stats.last_seen)
+
+    def to_dict(self) -> dict:
+        return {
+            "cluster_id": self.cluster_id,
+            "first_seen": self.first_seen.isoformat(sep=" "),
+            "last_seen": self.last_seen.isoformat(sep=" "),
+            "count": self.count,
+            "severity": SEVERITY_LABELS[self.severity],
+            "entities": [e for e, _ in self.entities.most_common()],
+            "sources": dict(self.sources.most_common()),
+            "templates": [
+                {"template": t.template, "example": t.example, "count": t.count,
+                 "severity": SEVERITY_LABELS[t.severity], "source": t.source}
+                for t in sorted(self.templates.values(), key=lambda t: (-t.severity, -t.count))
+            ],
+        }
+
+
+class AlertClusterer:
+    """Incrementally groups alerts that share an entity within a sliding time window.
+
+    An alert joins every open cluster that saw one of its entities within
+    ``window``; if it links several clusters they are merged. Alerts with no
+    entities group by template instead. Lookups go through an entity index,
+    so each alert costs O(number of its entities).
+    """
+
+    def __init__(self, window: timedelta = timedelta(minutes=WINDOW_MINUTES)):
+        self.window = window
+        self.clusters: dict[int, AlertCluster] = {}
+        self._merged_into: dict[int, int] = {}
+        self._index: dict[str, tuple[int, datetime]] = {}
+        self._next_id = 1
+        self.alert_count = 0
+        self.latest = None
+        self._last_prune = None
+
+    def _resolve(self, cluster_id: int) -> int:
+        # Merged clusters leave a forwarding entry so stale index keys still resolve.
+        while cluster_id in self._merged_into:
+            cluster_id = self._merged_into[cluster_id]
+        return cluster_id
+
+    def add(self, alert: Alert) -> int:
+        """Place one alert and return the id of the cluster it landed in."""
+        self.alert_count += 1
+        keys = alert.entities or frozenset({f"template:{alert.template}"})
+        matches = set()
+        for key in keys:
+            hit = self._index.get(key)
+            if hit is not None and abs(alert.timestamp - hit[1]) <= self.window:
+                matches.add(self._resolve(hit[0]))
+
+        if not matches:
+            cluster_id = self._next_id
+            self._next_id += 1
+            self.clusters[cluster_id] = AlertCluster(cluster_id, alert.timestamp, alert.timestamp)
+        else:
+            cluster_id = min(matches)
+            for other in matches - {cluster_id}:
+                self.clusters[cluster_id].absorb(self.clusters.pop(other))
+                self._merged_into[other] = cluster_id
+
+        self.clusters[cluster_id].add(alert)
+        for key in keys:
+            self._index[key] = (cluster_id, alert.timestamp)
+        if self.latest is None or alert.timestamp > self.latest:
+            self.latest = alert.timestamp
+        return cluster_id
+
+    def prune(self, retention: timedelta):
+        """Drop clusters idle for longer than ``retention`` (at least one window) before the newest alert.
+
+        Runs at most once per window, so calling it after every batch is cheap.
+        """
+        if self.latest is None:
+            return
+        if self._last_prune is not None and self.latest - self._last_prune < self.window:
+            return
+        self._last_prune = self.latest
+        cutoff = self.latest - max(retention, self.window)
+        self.clusters = {cid: c for cid, c in self.clusters.items() if c.last_seen >= cutoff}
+        self._index = {k: v for k, v in self._index.items() if v[1] >= cutoff}
+        live_refs = {cid for cid, _ in self._index.values()}
+        self._merged_into = {old: new for old, new in self._merged_into.items() if old in live_refs or new in live_refs}
+
+    def extend(self, alerts) -> int:
+        for alert in alerts:
+            self.add(alert)
+        return self.alert_count
+
+    def ranked(self) -> list[AlertCluster]:
+        return sorted(self.clusters.values(), key=lambda c: (-c.score, c.first_seen))
+
+
+def cluster_alerts(alerts: list[Alert], window_minutes: float = WINDOW_MINUTES) -> list[AlertCluster]:
+    """Cluster a batch of alerts (in timestamp order) and return clusters ranked by score."""
+    clusterer = AlertClusterer(timedelta(minutes=window_minutes))
+    clusterer.extend(sorted(alerts, key=lambda a: a.timestamp))
+    return clusterer.ranked()
+
+
+def _cluster_lines(cluster: AlertCluster, rank: int, max_templates: int) -> list[str]:
+    entities = ", ".join(e for e, _ in cluster.entities.most_common(6)) or "no shared entity"
+    lines = [
+        f"CLUSTER {rank} | {SEVERITY_LABELS[cluster.severity]} | {cluster.count:,} alerts, "
+        f"{len(cluster.templates)} distinct | {cluster.first_seen:%Y-%m-%d %H:%M:%S} -> "
+        f"{cluster.last_seen:%H:%M:%S} | entities: {entities} | sources: "
+        + ", ".join(f"{s} ({n})" for s, n in cluster.sources.most_common(4))
+    ]
+    ordered = sorted(cluster.templates.values(), key=lambda t: (-t.severity, -t.count, t.first_seen))
+    for t in ordered[:max_templates]:
+        lines.append(
+            f"  - {t.count:,}x {SEVERITY_LABELS[t.severity]} {t.first_seen:%H:%M:%S}-{t.last_seen:%H:%M:%S} "
+            f"[{t.source}] {t.example}"
+        )
+    if len(ordered) > max_templates:
+        rest = sum(t.count for t in ordered[max_templates:])
+        lines.append(f"  - ... {len(ordered) - max_templates} more templates ({rest:,} alerts)")
+    return lines
+
+
+def clusters_for_prompt(
+    clusters: list[AlertCluster],
+    total_alerts: int,
+    other_lines: list[str] = (),
+    max_clusters: int = MAX_PROMPT_CLUSTERS,
+    max_templates: int = MAX_TEMPLATES_PER_CLUSTER,
+) -> str:
+    """Render ranked clusters as bounded-size prompt text.
+
+    Each template shows one verbatim example with its count and first/last
+    seen times; lines that were not alerts (stack traces, notes) are appended
+    up to ``MAX_UNPARSED_LINES``.
+    """
+    lines = [
+        f"CORRELATED ALERT CLUSTERS ({total_alerts:,} alerts -> {len(clusters):,} clusters, "
+        f"ranked by severity and volume; top {min(len(clusters), max_clusters)} shown):",
+    ]
+    for rank, cluster in enumerate(clusters[:max_clusters], 1):
+        lines += _cluster_lines(cluster, rank, max_templates)
+    if len(clusters) > max_clusters:
+        rest = clusters[max_clusters:]
+        lines.append(f"... {len(rest):,} lower-ranked clusters ({sum(c.count for c in rest):,} alerts) omitted")
+    if other_lines:
+        lines += ["", "OTHER LOG LINES:"] + list(other_lines[:MAX_UNPARSED_LINES])
+        if len(other_lines) > MAX_UNPARSED_LINES:
+            lines.append(f"... {len(other_lines) - MAX_UNPARSED_LINES:,} more lines omitted")
+    return "\n".join(lines)
@@ -0,0 +1,193 @@
+"""Live tail ingestion and change detection for incremental incident triage."""
+
+import os
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+
+from engines.alert_clusters import (
+    MAX_PROMPT_CLUSTERS,
+    SEVERITY_LABELS,
+    WINDOW_MINUTES,
+    AlertClusterer,
+    parse_alert,
+)
+
+READ_CHUNK_BYTES = 4 * 1024 * 1024
+MAX_PENDING_LINES = 500_000
+RETENTION_MINUTES = 120
+
+# What counts as a material change in the cluster picture.
+TOP_CLUSTERS_WATCHED = 10
+GROWTH_FACTOR = 2.0
+MIN_GROWTH_ALERTS = 50
+MIN_RETRIAGE_SECONDS = 60
+
+# Live tail only reads files under this directory; override with ALERT_LOG_DIR.
+ALERT_LOG_DIR = os.getenv("ALERT_LOG_DIR", "examples")
+
+
+def resolve_log_path(name: str, root: str = ALERT_LOG_DIR) -> str:
+    """Resolve ``name`` inside ``root``, rejecting absolute paths, traversal and symlinks that escape it."""
+    base = Path(root).resolve()
+    if not name.strip() or Path(name).is_absolute():
+        raise ValueError(f"Give a file name inside {root}/")
+    path = (base / name).resolve()
+    if not path.is_relative_to(base):
+        raise ValueError(f"{name} is outside the alert log directory {root}/")
+    if not path.is_file():
+        raise ValueError(f"Log file not found: {name} in {root}/")
+    return str(path)
+
+
+class FileTail:
+    """Reads lines appended to a file since the last call.
+
+    Tracks a byte offset, keeps a trailing partial line until it is
+    completed, and starts over if the file shrinks (truncation or rotation).
+    """
+
+    def __init__(self, path: str, from_start: bool = True):
+        self.path = path
+        self.offset = 0 if from_start else os.path.getsize(path)
+        self._partial = b""
+
+    def read_new(self) -> list[str]:
+        size = os.path.getsize(self.path)
+        if size < self.offset:
+            self.offset, self._partial = 0, b""
+        if size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read(min(size - self.offset, READ_CHUNK_BYTES))
+        self.offset += len(data)
+        data, sep, self._partial = (self._partial + data).rpartition(b"\n")
+        if not sep:
+            return []
+        return data.decode("utf-8", errors="replace").splitlines()
+
+
+class StreamTail:
+    """Drains a text stream (stdin by default) on a daemon thread into a bounded buffer.
+
+    Lets ``tail -f app.log | streamlit run app.py`` feed the live view; lines
+    beyond ``MAX_PENDING_LINES`` between reads are dropped oldest-first.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdin
+        self._buffer: deque[str] = deque(maxlen=MAX_PENDING_LINES)
+        self._lock = threading.Lock()
+        self.closed = False
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        for line in self.stream:
+            with self._lock:
+                self._buffer.append(line.rstrip("\n"))
+        self.closed = True
+
+    def read_new(self) -> list[str]:
+        with self._lock:
+            lines = list(self._buffer)
+            self._buffer.clear()
+        return lines
+
+
+@dataclass
+class ClusterSnapshot:
+    """Rank, severity, and size of the top clusters at the time of a triage call."""
+    clusters: dict[int, tuple[int, int, int]] = field(default_factory=dict)  # id -> (rank, severity, count)
+    templates: dict[int, set[str]] = field(default_factory=dict)
+
+
+@dataclass
+class LiveTriageSession:
+    """Local cluster state for one live incident, plus what the last triage saw."""
+    window_minutes: float = WINDOW_MINUTES
+    retention_minutes: float = RETENTION_MINUTES
+    clusterer: AlertClusterer | None = None
+    other_lines: deque = field(default_factory=lambda: deque(maxlen=200))
+    last_snapshot: ClusterSnapshot | None = None
+    last_result: dict | None = None
+    last_triage_at: float = 0.0
+    triage_count: int = 0
+
+    def __post_init__(self):
+        if self.clusterer is None:
+            self.clusterer = AlertClusterer(timedelta(minutes=self.window_minutes))
+
+    def ingest(self, lines: list[str]) -> int:
+        """Parse and cluster new lines; returns how many were alerts."""
+        added = 0
+        add = self.clusterer.add
+        for line in lines:
+            alert = parse_alert(line)
+            if alert is not None:
+                add(alert)
+                added += 1
+            elif line.strip() and not line.lstrip().upper().startswith("TIMESTAMP"):
+                self.other_lines.append(line)
+        if added:
+            self.clusterer.prune(timedelta(minutes=self.retention_minutes))
+        return added
+
+    def snapshot(self, top_n: int = TOP_CLUSTERS_WATCHED) -> ClusterSnapshot:
+        ranked = self.clusterer.ranked()[:top_n]
+        return ClusterSnapshot(
+            clusters={c.cluster_id: (rank, c.severity, c.count) for rank, c in enumerate(ranked, 1)},
+            templates={c.cluster_id: set(c.templates) for c in ranked},
+        )
+
+    def changes(self, current: ClusterSnapshot | None = None) -> list[str]:
+        """Describe material changes since the last triage; empty means nothing worth a new call.
+
+        Material: a new cluster enters the top list, a watched cluster's
+        severity escalates, it grows by ``GROWTH_FACTOR`` (and at least
+        ``MIN_GROWTH_ALERTS``), or it shows a new HIGH-or-worse alert template.
+        """
+        current = current or self.snapshot()
+        previous = self.last_snapshot
+        if previous is None:
+            return ["Initial triage"] if current.clusters else []
+        clusters = {c.cluster_id: c for c in self.clusterer.ranked()[:TOP_CLUSTERS_WATCHED]}
+        notes = []
+        for cid, (rank, severity, count) in current.clusters.items():
+            cluster = clusters[cid]
+            top = max(cluster.templates.values(), key=lambda t: (t.severity, t.count), default=None)
+            headline = top.example if top else ""
+            before = previous.clusters.get(cid)
+            if before is None:
+                if severity >= 3 or rank <= 3:
+                    notes.append(f"New cluster #{rank} ({SEVERITY_LABELS[severity]}, {count:,} alerts): {headline}")
+                continue
+            _, old_severity, old_count = before
+            if severity > old_severity:
+                notes.append(f"Cluster #{rank} escalated {SEVERITY_LABELS[old_severity]} -> {SEVERITY_LABELS[severity]}")
+            if count >= GROWTH_FACTOR * old_count and count - old_count >= MIN_GROWTH_ALERTS:
+                notes.append(f"Cluster #{rank} grew from {old_count:,} to {count:,} alerts")
+            for template in cluster.templates.keys() - previous.templates.get(cid, set()):
+                stats = cluster.templates[template]
+                if stats.severity >= 3:
+                    notes.append(f"Cluster #{rank} new {SEVERITY_LABELS[stats.severity]} alert: {stats.example}")
+        return notes
+
+    def should_retriage(self, notes: list[str], now: float | None = None, min_interval: float = MIN_RETRIAGE_SECONDS) -> bool:
+        now = time.time() if now is None else now
+        if not notes:
+            return False
+        return self.last_result is None or now - self.last_triage_at >= min_interval
+
+    def record_triage(self, result: dict, snapshot: ClusterSnapshot, now: float | None = None):
+        self.last_result = result
+        self.last_snapshot = snapshot
+        self.last_triage_at = time.time() if now is None else now
+        self.triage_count += 1
+
+    def top_clusters(self, limit: int = MAX_PROMPT_CLUSTERS):
+        return self.clusterer.ranked()[:limit]
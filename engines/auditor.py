@@ -1,7 +1,20 @@
 """AI-powered compliance audit engine."""
 
 import json
+
 import anthropic
+import pandas as pd
+
+from engines.control_tests import (
+    MAX_OTHER_LINES,
+    control_exceptions,
+    exceptions_for_prompt,
+    normalize_activity,
+    parse_activity_log,
+    policy_from_text,
+    run_controls,
+    summarize_controls,
+)
 
 
 AUDIT_PROMPT = """\
@@ -72,10 +85,48 @@ ADDITIONAL CONTEXT:
 """
 
 
-def run_audit(config: dict, api_key: str) -> dict:
-    """Run AI compliance audit."""
+PRECHECKED_NOTE = """\
+Expense and GL records in these logs have already been run through deterministic \
+control tests (approval limits, approver authority, self-approval, split purchases, \
+purchase orders, duplicates, late submissions, personal charges) using the policy \
+thresholds shown. Treat the control counts as authoritative. Explain the exceptions \
+as findings (group related rows, cite line numbers as evidence) rather than re-testing \
+the records; review the remaining non-financial activity lines as usual."""
+
+
+def _precheck_activity(config: dict, activity: pd.DataFrame | None):
+    """Run control tests over money records; returns (records, flags, activity_text) or None."""
+    text = config.get("activity_text", "")
+    if activity is not None:
+        records, other = normalize_activity(activity), [text] if text.strip() else []
+    else:
+        records, other = parse_activity_log(text)
+    if records.empty:
+        return None
+    policy = policy_from_text(config.get("policy_text", ""))
+    flags = run_controls(records, policy)
+    activity_text = f"{PRECHECKED_NOTE}\n\n{exceptions_for_prompt(records, flags, policy)}"
+    if other:
+        shown = "\n".join(other[:MAX_OTHER_LINES])
+        more = f"\n... {len(other) - MAX_OTHER_LINES:,} more lines omitted" if len(other) > MAX_OTHER_LINES else ""
+        activity_text += f"\n\nOTHER ACTIVITY:\n{shown}{more}"
+    return records, flags, activity_text
+
+
+def run_audit(config: dict, api_key: str, activity: pd.DataFrame | None = None) -> dict:
+    """Run AI compliance audit.
+
+    Money records (a GL frame, or EXPENSE rows in the activity text) are
+    control-tested locally first; the model explains the exceptions and reviews
+    the rest of the activity. Logs without money records are sent as-is.
+    """
     client = anthropic.Anthropic(api_key=api_key)
 
+    prechecked = _precheck_activity(config, activity)
+    if prechecked is not None:
+        records, flags, activity_text = prechecked
+        config = dict(config, activity_text=activity_text)
+
     # Truncate if needed
     for key in ("policy_text", "activity_text"):
         if len(config.get(key, "")) > 40_000:
@@ -95,4 +146,14 @@ def run_audit(config: dict, api_key: str) -> dict:
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
 
-    return json.loads(text)
+    result = json.loads(text)
+
+    if prechecked is not None:
+        result["control_summary"] = summarize_controls(records, flags)
+        exceptions = control_exceptions(records, flags).assign(
+            date=lambda d: d["date"].dt.strftime("%Y-%m-%d"),
+            controls=lambda d: d["controls"].str.join(", "),
+        )
+        exceptions = exceptions.drop(columns=["notes"]).astype(object)
+        result["control_exceptions"] = exceptions.where(exceptions.notna(), None).to_dict(orient="records")
+    return result
@@ -0,0 +1,235 @@
+"""Vectorized batch underwriting: ratios and rule-based pre-decisions over application files."""
+
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+from engines.fair_lending import detect_group_columns
+from engines.record_batches import fan_out
+from engines.underwriter import ESTIMATE_APR_PCT, analyze_application
+
+COLUMN_ALIASES = {
+    "app_id": "app_id", "application_id": "app_id", "application id": "app_id", "id": "app_id", "loan_id": "app_id",
+    "applicant_name": "applicant_name", "applicant": "applicant_name", "name": "applicant_name",
+    "loan_purpose": "loan_purpose", "purpose": "loan_purpose",
+    "requested_amount": "requested_amount", "loan_amount": "requested_amount", "amount": "requested_amount",
+    "requested_term": "requested_term", "term": "requested_term", "term_months": "requested_term",
+    "property_value": "property_value", "collateral_value": "property_value", "appraised_value": "property_value",
+    "annual_income": "annual_income", "income": "annual_income",
+    "employment_status": "employment_status", "employment_duration": "employment_duration", "employer": "employer",
+    "monthly_debts": "monthly_debts", "monthly_debt": "monthly_debts", "monthly_debt_obligations": "monthly_debts",
+    "credit_score": "credit_score", "fico": "credit_score", "score": "credit_score",
+    "credit_history_years": "credit_history_years", "open_accounts": "open_accounts",
+    "late_payments": "late_payments", "collections": "collections", "bankruptcies": "bankruptcies",
+    "total_debt": "total_debt", "additional_info": "additional_info", "notes": "additional_info",
+    "interest_rate_pct": "interest_rate_pct", "rate": "interest_rate_pct", "apr": "interest_rate_pct",
+}
+REQUIRED_COLUMNS = ["requested_amount", "requested_term", "annual_income", "monthly_debts", "credit_score"]
+NUMERIC_DEFAULTS = {
+    "property_value": 0, "credit_history_years": 0, "open_accounts": 0, "late_payments": 0,
+    "collections": 0, "bankruptcies": 0, "total_debt": 0,
+}
+TEXT_DEFAULTS = {
+    "applicant_name": "", "loan_purpose": "Not specified", "employment_status": "Not specified",
+    "employment_duration": "Not specified", "employer": "Not specified", "additional_info": "",
+}
+DECISIONS = ["Auto-Approve", "Refer", "Auto-Decline"]
+MAX_AI_REVIEWS = 200
+AI_WORKERS = 8
+
+
+@dataclass
+class DecisionRules:
+    """Thresholds for pre-decisioning; anything neither auto-approved nor auto-declined is referred."""
+    approve_min_credit_score: int = 720
+    approve_max_dti_pct: float = 36.0
+    approve_max_ltv_pct: float = 80.0
+    approve_max_pti_pct: float = 28.0
+    approve_max_late_payments: int = 0
+    decline_min_credit_score: int = 580
+    decline_max_dti_pct: float = 50.0
+    decline_max_ltv_pct: float = 100.0
+    decline_min_disposable_income: float = 0.0
+    decline_max_collections: int = 3
+    decline_employment_statuses: tuple = ("Unemployed",)
+
+    def describe(self) -> str:
+        return "; ".join(f"{k.replace('_', ' ')}: {v}" for k, v in asdict(self).items())
+
+
+def normalize_applications(df: pd.DataFrame) -> pd.DataFrame:
+    """Map an application export onto the underwriting fields with numeric types and defaults."""
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Application file needs {', '.join(missing)} column(s).")
+
+    apps = pd.DataFrame(index=df.index)
+    apps["app_id"] = (df["app_id"].astype(str) if "app_id" in df.columns
+                      else pd.Series([f"ROW-{i + 2}" for i in df.index], index=df.index))
+    for col in REQUIRED_COLUMNS + list(NUMERIC_DEFAULTS):
+        values = df[col] if col in df.columns else pd.Series(NUMERIC_DEFAULTS.get(col, 0), index=df.index)
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values.astype(str).str.replace(r"[$,%\s]", "", regex=True), errors="coerce")
+        apps[col] = values.astype(float).fillna(NUMERIC_DEFAULTS.get(col, np.nan))
+    for col, default in TEXT_DEFAULTS.items():
+        values = df[col].astype(object) if col in df.columns else pd.Series(default, index=df.index, dtype=object)
+        apps[col] = values.where(values.notna(), default).astype(str)
+    apps["interest_rate_pct"] = (pd.to_numeric(df["interest_rate_pct"], errors="coerce")
+                                 if "interest_rate_pct" in df.columns else np.nan)
+    # Protected-class fields ride along for fair-lending monitoring only; no rule or prompt reads them.
+    for col in detect_group_columns(df.columns):
+        if col not in apps.columns:
+            apps[col] = df[col]
+    return apps
+
+
+def compute_ratios(apps: pd.DataFrame, apr_pct: float = ESTIMATE_APR_PCT) -> pd.DataFrame:
+    """Payment, DTI, LTV, PTI and disposable income for every row (same formulas as ``calculate_basic_ratios``)."""
+    amount = apps["requested_amount"].to_numpy(float)
+    term = np.maximum(apps["requested_term"].to_numpy(float), 1)
+    rate = apps["interest_rate_pct"].fillna(apr_pct).to_numpy(float) / 1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = (1 + rate) ** term
+        payment = np.where(rate > 0, amount * rate * growth / (growth - 1), amount / term)
+        income = apps["annual_income"].to_numpy(float) / 12
+        debts = apps["monthly_debts"].to_numpy(float)
+        value = apps["property_value"].to_numpy(float)
+        dti = np.where(income > 0, (debts + payment) / income * 100, 999.0)
+        pti = np.where(income > 0, payment / income * 100, 999.0)
+        ltv = np.where(value > 0, amount / value * 100, np.nan)
+    return pd.DataFrame({
+        "monthly_payment_est": payment.round(2), "dti_pct": dti.round(1), "ltv_pct": ltv.round(1),
+        "pti_pct": pti.round(1), "disposable_after_payment": (income - debts - payment).round(2),
+    }, index=apps.index)
+
+
+def _reasons(checks: list[tuple[np.ndarray, str]], n: int) -> np.ndarray:
+    """Join the labels of the checks each row fails; rows share few combinations, so label per bitmask."""
+    codes = np.zeros(n, dtype=np.int64)
+    for bit, (mask, _) in enumerate(checks):
+        codes |= mask.astype(np.int64) << bit
+    unique, inverse = np.unique(codes, return_inverse=True)
+    labels = np.array(["; ".join(label for bit, (_, label) in enumerate(checks) if code >> bit & 1)
+                       for code in unique], dtype=object)
+    return labels[inverse]
+
+
+def pre_decide(apps: pd.DataFrame, ratios: pd.DataFrame, rules: DecisionRules | None = None) -> pd.DataFrame:
+    """Rule-based decision per row, with the rules that fired.
+
+    Decline rules win over approval; a file is auto-approved only when every
+    approval rule passes, otherwise it is referred for model and human review.
+    Only financial factors are used.
+    """
+    rules = rules or DecisionRules()
+    score, ltv = apps["credit_score"].to_numpy(), ratios["ltv_pct"].to_numpy()
+    dti, pti = ratios["dti_pct"].to_numpy(), ratios["pti_pct"].to_numpy()
+    has_ltv = ~np.isnan(ltv)
+    decline = [
+        (score < rules.decline_min_credit_score, f"credit score < {rules.decline_min_credit_score}"),
+        (dti > rules.decline_max_dti_pct, f"DTI > {rules.decline_max_dti_pct:g}%"),
+        (has_ltv & (ltv > rules.decline_max_ltv_pct), f"LTV > {rules.decline_max_ltv_pct:g}%"),
+        (ratios["disposable_after_payment"].to_numpy() < rules.decline_min_disposable_income,
+         f"disposable income < ${rules.decline_min_disposable_income:,.0f}"),
+        (apps["collections"].to_numpy() > rules.decline_max_collections, f"collections > {rules.decline_max_collections}"),
+        (apps["employment_status"].isin(rules.decline_employment_statuses).to_numpy(), "no employment income"),
+    ]
+    approve_fail = [
+        (score < rules.approve_min_credit_score, f"credit score < {rules.approve_min_credit_score}"),
+        (dti > rules.approve_max_dti_pct, f"DTI > {rules.approve_max_dti_pct:g}%"),
+        (has_ltv & (ltv > rules.approve_max_ltv_pct), f"LTV > {rules.approve_max_ltv_pct:g}%"),
+        (pti > rules.approve_max_pti_pct, f"PTI > {rules.approve_max_pti_pct:g}%"),
+        (apps["late_payments"].to_numpy() > rules.approve_max_late_payments, "recent late payments"),
+        (apps["collections"].to_numpy() > 0, "collections on file"),
+        (apps["bankruptcies"].to_numpy() > 0, "bankruptcy on file"),
+    ]
+    # Comparisons with NaN are all False, so incomplete rows would otherwise pass every rule; refer them instead.
+    missing = [(apps[col].isna().to_numpy(), col) for col in REQUIRED_COLUMNS]
+    missing.append((ratios[["dti_pct", "pti_pct", "disposable_after_payment"]].isna().any(axis=1).to_numpy()
+                    & ~np.logical_or.reduce([m for m, _ in missing]), "ratios not computable"))
+    incomplete = np.logical_or.reduce([m for m, _ in missing])
+    declined = np.logical_or.reduce([m for m, _ in decline]) & ~incomplete
+    approvable = ~np.logical_or.reduce([m for m, _ in approve_fail]) & ~incomplete
+    n = len(apps)
+    decline_reasons, refer_reasons = _reasons(decline, n), _reasons(approve_fail, n)
+    missing_reasons = np.char.add("missing data: ", _reasons(missing, n).astype(str))
+    return pd.DataFrame({
+        "pre_decision": np.where(declined, "Auto-Decline", np.where(approvable, "Auto-Approve", "Refer")),
+        "decision_reasons": np.where(incomplete, missing_reasons,
+                                     np.where(declined, decline_reasons,
+                                              np.where(approvable, "all approval rules met", refer_reasons))),
+    }, index=apps.index)
+
+
+def screen_applications(df: pd.DataFrame, rules: DecisionRules | None = None, apr_pct: float = ESTIMATE_APR_PCT) -> pd.DataFrame:
+    """Normalize, compute ratios, and pre-decide a whole application file locally."""
+    apps = normalize_applications(df)
+    ratios = compute_ratios(apps, apr_pct)
+    return pd.concat([apps, ratios, pre_decide(apps, ratios, rules)], axis=1)
+
+
+def _pct(value) -> str:
+    return "n/a" if pd.isna(value) else f"{value}%"
+
+
+def _application(row: dict) -> dict:
+    app = {k: row[k] for k in ("app_id", "applicant_name", "loan_purpose", "employment_status", "employment_duration",
+                               "employer", "additional_info")}
+    # The prompt formats these as numbers, so missing values go in as 0 and are named in the pre-screen note.
+    missing = [k for k in REQUIRED_COLUMNS + list(NUMERIC_DEFAULTS) if pd.isna(row[k])]
+    for k in REQUIRED_COLUMNS + list(NUMERIC_DEFAULTS):
+        app[k] = 0.0 if k in missing else float(row[k])
+    for k in ("requested_term", "credit_score", "credit_history_years", "open_accounts", "late_payments",
+              "collections", "bankruptcies"):
+        app[k] = int(app[k])
+    not_provided = f" Not provided in the file (shown as 0): {', '.join(missing)}." if missing else ""
+    app["additional_info"] = (f"{app['additional_info']}\nPre-screen: referred because {row['decision_reasons']}."
+                              f"{not_provided} "
+                              f"DTI {_pct(row['dti_pct'])}, PTI {_pct(row['pti_pct'])}, LTV {_pct(row['ltv_pct'])}.").strip()
+    monitoring = {k: row[k] for k in detect_group_columns(row)}
+    if monitoring:
+        app["monitoring"] = {k: None if pd.isna(v) else v for k, v in monitoring.items()}
+    return app
+
+
+def review_referrals(screened: pd.DataFrame, api_key: str, max_reviews: int = MAX_AI_REVIEWS,
+                     max_workers: int = AI_WORKERS, on_result=None) -> pd.DataFrame:
+    """Send referred files (up to ``max_reviews``, weakest-but-not-declined first) to ``analyze_application``.
+
+    Returns the screened frame with ``ai_*`` columns filled for reviewed rows
+    and the full model results in ``screened.attrs["ai_results"]`` (app_id ->
+    result). ``on_result(done, total, result)`` fires as each review completes.
+    """
+    referred = screened[screened["pre_decision"] == "Refer"]
+    referred = referred.sort_values(["dti_pct", "credit_score"], ascending=[False, True]).head(max_reviews)
+    apps = [_application(row) for row in referred.to_dict(orient="records")]
+
+    def report(done, total, i, result):
+        if on_result:
+            on_result(done, total, dict(result, app_data=apps[i]))
+
+    results = fan_out(apps, lambda app: analyze_application(app, api_key), max_workers, report)
+    out = screened.copy()
+    for col in ("ai_decision", "ai_risk", "ai_confidence", "ai_summary"):
+        out[col] = pd.Series(pd.NA, index=out.index, dtype=object)
+    fields = {"ai_decision": "preliminary_decision", "ai_risk": "risk_classification",
+              "ai_confidence": "confidence", "ai_summary": "summary"}
+    for col, key in fields.items():
+        out.loc[referred.index, col] = [r.get(key, r.get("error")) if key == "summary" else r.get(key) for r in results]
+    out.attrs["ai_results"] = {app["app_id"]: dict(result, app_data=app) for app, result in zip(apps, results)}
+    return out
+
+
+def batch_summary(screened: pd.DataFrame) -> dict:
+    counts = screened["pre_decision"].value_counts()
+    return {
+        "applications": int(len(screened)),
+        **{d: int(counts.get(d, 0)) for d in DECISIONS},
+        "requested_total": float(screened["requested_amount"].sum()),
+        "median_dti_pct": float(screened["dti_pct"].median()) if len(screened) else 0.0,
+        "auto_decided_pct": round(float((screened["pre_decision"] != "Refer").mean() * 100), 1) if len(screened) else 0.0,
+    }
@@ -1,7 +1,21 @@
 """Billing Compliance engine - reviews billing logs against guidelines."""
 
 import json
+
 import anthropic
+import pandas as pd
+
+from engines.billing_rules import (
+    MAX_PROMPT_ROWS,
+    findings_for_prompt,
+    flagged_entries,
+    local_flagged_table,
+    normalize_entries,
+    parse_billing_log,
+    rules_from_guidelines,
+    run_rules,
+    summarize_findings,
+)
 
 REVIEW_PROMPT = """\
 You are an expert legal billing compliance auditor. Review the billing log entries \
@@ -84,9 +98,41 @@ BILLING LOG:
 REVIEW CONTEXT: {context}
 """
 
+PRECHECKED_NOTE = """\
+The billing log below has already been checked by deterministic rules over \
+every entry. Use the precomputed counts and per-attorney/client totals as given. \
+Return one flagged_items entry per FLAGGED ENTRY listed (same order), using the \
+listed rules as violation_type and explaining the issue and a compliant rewrite. \
+Base attorney_summary, client_summary, trends, and recommendations on the \
+aggregates, not only on the listed rows."""
+
+
+def review_billing(config: dict, api_key: str, entries: pd.DataFrame | None = None) -> dict:
+    """Review billing log against guidelines.
+
+    Entries (a parsed frame, or the pipe-delimited ``billing_log``) are run
+    through the local rule checks first; the model only sees flagged rows and
+    aggregates. Logs that do not parse as a table are sent as-is.
+
+    ``flagged_items`` holds only the rows the model reviewed. Flagged rows
+    beyond ``MAX_PROMPT_ROWS`` are returned as a DataFrame under
+    ``local_flagged`` (with ``local_flagged_count``); pop it before
+    serializing the result.
+    """
+    if entries is None:
+        try:
+            entries = parse_billing_log(config["billing_log"])
+        except (ValueError, KeyError, pd.errors.ParserError):
+            entries = None
+    else:
+        entries = normalize_entries(entries)
+
+    flags = None
+    if entries is not None and len(entries):
+        flags = run_rules(entries, rules_from_guidelines(config["guidelines"]))
+        findings = findings_for_prompt(entries, flags)
+        config = dict(config, billing_log=f"{PRECHECKED_NOTE}\n\n{findings}")
 
-def review_billing(config: dict, api_key: str) -> dict:
-    """Review billing log against guidelines."""
     client = anthropic.Anthropic(api_key=api_key)
     prompt = REVIEW_PROMPT.format(**config)
     message = client.messages.create(
@@ -99,4 +145,16 @@ def review_billing(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+
+    if flags is not None:
+        local = summarize_findings(entries, flags)
+        summary = result.setdefault("summary", {})
+        for key in ("total_entries", "total_hours", "total_amount", "compliant_entries",
+                    "flagged_entries", "violation_rate_pct"):
+            summary[key] = local[key]
+        summary.setdefault("estimated_write_off", local["flagged_amount"])
+        result["rule_hits"] = local["rule_hits"]
+        result["local_flagged"] = local_flagged_table(flagged_entries(entries, flags).iloc[MAX_PROMPT_ROWS:])
+        result["local_flagged_count"] = len(result["local_flagged"])
+    return result
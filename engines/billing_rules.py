@@ -0,0 +1,224 @@
+"""Vectorized legal billing rule checks run locally before LLM review."""
+
+import io
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+COLUMN_ALIASES = {
+    "date": "date", "work date": "date",
+    "attorney": "attorney", "timekeeper": "attorney", "name": "attorney",
+    "client": "client",
+    "matter": "matter",
+    "hours": "hours", "time": "hours",
+    "rate": "rate", "hourly rate": "rate",
+    "description": "description", "narrative": "description", "task": "description",
+}
+REQUIRED_COLUMNS = ["date", "attorney", "hours", "rate", "description"]
+
+VAGUE_TERMS = [
+    "research", "phone call", "call", "calls", "email", "emails", "worked on", "work on", "various",
+    "tasks", "admin", "administrative", "stuff", "misc", "miscellaneous", "review", "reviewed email",
+    "meeting", "internal meeting", "continued", "work", "follow up", "attention to", "file",
+]
+TASK_RE = (
+    r"\b(?:\w{3,}ed|draft(?:ing)?|review(?:ing)?|prepar(?:e|ing)|calls?|emails?|meetings?|research|"
+    r"revis(?:e|ing)|conferences?)\b"
+)
+SEPARATOR_RE = r"[;,/]|\band\b|\bthen\b"
+INTERNAL_MEETING_RE = r"\binternal (?:meeting|conference|call)\b"
+
+RULE_LABELS = {
+    "vague_description": "Vague Description",
+    "block_billing": "Block Billing",
+    "daily_client_cap": "Excessive Hours",
+    "daily_total_cap": "Excessive Hours",
+    "internal_meeting": "Prohibited Charge",
+    "rate_mismatch": "Rate Violation",
+    "duplicate_entry": "Duplicate Entry",
+    "min_increment": "Minimum Increment",
+}
+RULE_SEVERITY = {
+    "vague_description": "Medium",
+    "block_billing": "Medium",
+    "daily_client_cap": "High",
+    "daily_total_cap": "High",
+    "internal_meeting": "Medium",
+    "rate_mismatch": "High",
+    "duplicate_entry": "High",
+    "min_increment": "Low",
+}
+
+# Flagged rows sent to the model for rewrites; the rest are reported from local checks only.
+MAX_PROMPT_ROWS = 40
+
+
+@dataclass
+class BillingRules:
+    """Thresholds for the local checks; defaults mirror examples/sample_billing_guidelines.txt."""
+    min_increment: float = 0.25
+    max_daily_hours_per_client: float = 10.0
+    max_daily_hours_total: float = 12.0
+    max_internal_meeting_hours: float = 1.0
+    min_rate: float = 150.0
+    max_rate: float = 600.0
+    vague_terms: list[str] = field(default_factory=lambda: list(VAGUE_TERMS))
+
+
+def rules_from_guidelines(guidelines: str) -> BillingRules:
+    """Pick numeric thresholds out of guideline text, keeping defaults for anything not found."""
+    rules = BillingRules()
+    text = guidelines.lower()
+    if m := re.search(r"minimum billable increment[^0-9]*([\d.]+)", text):
+        rules.min_increment = float(m.group(1))
+    if m := re.search(r"more than ([\d.]+) hours per day to a single client", text):
+        rules.max_daily_hours_per_client = float(m.group(1))
+    if m := re.search(r"total daily billing[^0-9]*([\d.]+) hours", text):
+        rules.max_daily_hours_total = float(m.group(1))
+    if m := re.search(r"internal meetings exceeding ([\d.]+) hours", text):
+        rules.max_internal_meeting_hours = float(m.group(1))
+    rates = [float(r.replace(",", "")) for r in re.findall(r"\$([\d,]+)\s*-\s*\$[\d,]+/hour", text)]
+    rates += [float(r.replace(",", "")) for r in re.findall(r"\$[\d,]+\s*-\s*\$([\d,]+)/hour", text)]
+    if rates:
+        rules.min_rate, rules.max_rate = min(rates), max(rates)
+    return rules
+
+
+def _to_number(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.astype(str).str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+
+
+def normalize_entries(df: pd.DataFrame) -> pd.DataFrame:
+    """Map column names onto the canonical schema and coerce types."""
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n}).copy()
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Billing data is missing columns: {', '.join(missing)}")
+    for col in ("client", "matter"):
+        if col not in df.columns:
+            df[col] = ""
+    df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
+    for col in ("attorney", "client", "matter", "description"):
+        df[col] = df[col].astype(str).str.strip()
+    df["hours"] = _to_number(df["hours"])
+    df["rate"] = _to_number(df["rate"])
+    df["amount"] = (df["hours"] * df["rate"]).round(2)
+    return df.reset_index(drop=True)
+
+
+def parse_billing_log(text: str) -> pd.DataFrame:
+    """Parse a pipe-delimited billing log with a header row (see examples/sample_billing_log.txt)."""
+    df = pd.read_csv(io.StringIO(text.strip()), sep="|", skipinitialspace=True, dtype=str)
+    df.columns = [c.strip() for c in df.columns]
+    return normalize_entries(df)
+
+
+def run_rules(entries: pd.DataFrame, rules: BillingRules | None = None) -> pd.DataFrame:
+    """Evaluate every rule over all entries at once; returns one boolean column per rule."""
+    rules = rules or BillingRules()
+    desc = entries["description"].str.lower().str.strip(" .")
+    words = desc.str.count(r"\S+")
+
+    vague_re = "|".join(re.escape(t) for t in sorted(rules.vague_terms, key=len, reverse=True))
+    mentions_vague = desc.str.contains(rf"\b(?:{vague_re})\b", regex=True)
+    is_only_vague = desc.str.fullmatch(rf"(?:(?:{vague_re})(?:\s+(?:and|&|re|on)\s+)?)+", case=False)
+    vague = is_only_vague | (mentions_vague & (words <= 4)) | desc.str.contains(r"\b(?:stuff|various tasks)\b")
+
+    task_count = desc.str.count(TASK_RE)
+    block = desc.str.contains(SEPARATOR_RE, regex=True) & (task_count >= 2)
+
+    hours = entries["hours"]
+    day_client = entries.groupby(["date", "attorney", "client"])["hours"].transform("sum")
+    day_total = entries.groupby(["date", "attorney"])["hours"].transform("sum")
+
+    steps = hours / rules.min_increment
+    min_increment = (hours < rules.min_increment) | ((steps - steps.round()).abs() > 1e-6)
+
+    modal_rate = entries.groupby("attorney")["rate"].transform(lambda r: r.mode().iat[0] if r.notna().any() else r)
+    rate_mismatch = (entries["rate"] != modal_rate) | ~entries["rate"].between(rules.min_rate, rules.max_rate)
+
+    dup_cols = ["date", "attorney", "client", "matter", "hours", "description"]
+    return pd.DataFrame({
+        "vague_description": vague,
+        "block_billing": block,
+        "daily_client_cap": day_client > rules.max_daily_hours_per_client,
+        "daily_total_cap": day_total > rules.max_daily_hours_total,
+        "internal_meeting": desc.str.contains(INTERNAL_MEETING_RE) & (hours > rules.max_internal_meeting_hours),
+        "rate_mismatch": rate_mismatch,
+        "duplicate_entry": entries.duplicated(subset=dup_cols, keep="first"),
+        "min_increment": min_increment,
+    }).fillna(False)
+
+
+def summarize_findings(entries: pd.DataFrame, flags: pd.DataFrame) -> dict:
+    """Aggregate rule hits into the summary numbers the page displays."""
+    flagged = flags.any(axis=1)
+    total = len(entries)
+    return {
+        "total_entries": total,
+        "total_hours": round(float(entries["hours"].sum()), 2),
+        "total_amount": round(float(entries["amount"].sum()), 2),
+        "compliant_entries": int((~flagged).sum()),
+        "flagged_entries": int(flagged.sum()),
+        "violation_rate_pct": round(100 * float(flagged.sum()) / total, 1) if total else 0.0,
+        "rule_hits": {rule: int(flags[rule].sum()) for rule in flags.columns},
+        "flagged_amount": round(float(entries.loc[flagged, "amount"].sum()), 2),
+    }
+
+
+def flagged_entries(entries: pd.DataFrame, flags: pd.DataFrame) -> pd.DataFrame:
+    """Flagged rows, largest amounts first, with the rules each one broke."""
+    flagged = flags.any(axis=1)
+    names = list(flags.columns)
+    rules = [[names[j] for j in row.nonzero()[0]] for row in flags[flagged].to_numpy()]
+    return entries[flagged].assign(rules=rules).sort_values("amount", ascending=False, kind="stable")
+
+
+def local_flagged_table(flagged: pd.DataFrame) -> pd.DataFrame:
+    """Flagged rows the model did not review, as a compact table with severity and rule labels."""
+    order = ["Low", "Medium", "High"]
+    severity = [order[max(order.index(RULE_SEVERITY[r]) for r in rules)] for rules in flagged["rules"]]
+    labels = [", ".join(dict.fromkeys(RULE_LABELS[r] for r in rules)) for rules in flagged["rules"]]
+    columns = ["date", "attorney", "client", "matter", "description", "hours", "rate", "amount"]
+    return flagged[columns].assign(severity=severity, violations=labels).reset_index(drop=True)
+
+
+def findings_for_prompt(entries: pd.DataFrame, flags: pd.DataFrame, max_rows: int = MAX_PROMPT_ROWS) -> str:
+    """Render rule hits, per-attorney/client aggregates, and flagged rows as prompt text.
+
+    Only flagged entries are listed, largest amounts first; beyond
+    ``max_rows`` they are counted rather than shown.
+    """
+    summary = summarize_findings(entries, flags)
+    flagged = flags.any(axis=1)
+    frame = entries.assign(flagged=flagged, amount_flagged=entries["amount"].where(flagged, 0))
+    aggregations = dict(
+        hours=("hours", "sum"), billed=("amount", "sum"), violations=("flagged", "sum"), at_risk=("amount_flagged", "sum")
+    )
+    by_attorney = frame.groupby("attorney").agg(**aggregations)
+    by_client = frame.groupby("client").agg(**aggregations)
+
+    lines = [
+        "PRECOMPUTED RULE CHECKS (authoritative counts over all entries):",
+        f"- Entries: {summary['total_entries']:,} | Hours: {summary['total_hours']:,.2f} | "
+        f"Billed: ${summary['total_amount']:,.2f} | Flagged: {summary['flagged_entries']:,} "
+        f"(${summary['flagged_amount']:,.2f})",
+        "- Rule hits: " + ", ".join(f"{k}={v:,}" for k, v in summary["rule_hits"].items()),
+        "",
+        "BY ATTORNEY (hours | billed | flagged entries | amount at risk):",
+    ]
+    lines += [f"- {a}: {r.hours:,.2f} | ${r.billed:,.2f} | {int(r.violations)} | ${r.at_risk:,.2f}" for a, r in by_attorney.iterrows()]
+    lines += ["", "BY CLIENT (hours | billed | flagged entries | amount at risk):"]
+    lines += [f"- {c}: {r.hours:,.2f} | ${r.billed:,.2f} | {int(r.violations)} | ${r.at_risk:,.2f}" for c, r in by_client.iterrows()]
+
+    rows = flagged_entries(entries, flags)
+    lines += ["", f"FLAGGED ENTRIES ({len(rows):,}; largest {min(len(rows), max_rows)} shown):",
+              "DATE | ATTORNEY | CLIENT | MATTER | HOURS | RATE | DESCRIPTION | RULES"]
+    for r in rows.head(max_rows).itertuples(index=False):
+        rules = ", ".join(RULE_LABELS[rule] + f" [{rule}]" for rule in r.rules)
+        lines.append(f"{r.date} | {r.attorney} | {r.client} | {r.matter} | {r.hours} | ${r.rate:,.0f} | {r.description} | {rules}")
+    if len(rows) > max_rows:
+        lines.append(f"... {len(rows) - max_rows:,} more flagged entries omitted")
+    return "\n".join(lines)
@@ -0,0 +1,194 @@
+"""Bulk ranking of many resumes against one job description."""
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from engines.resume_analyzer import analyze_resume
+from engines.resume_parser import extract_text
+from engines.resume_scorer import extract_skills, extract_terms, idf_weights, select_keywords
+
+CHECKPOINT_DIR = os.getenv("BULK_CHECKPOINT_DIR", ".checkpoints")
+PARSE_WORKERS = os.cpu_count() or 2
+LLM_WORKERS = 4
+
+# Local score blend: TF-IDF cosine similarity, weighted keyword coverage, skills coverage.
+LOCAL_WEIGHTS = (0.4, 0.3, 0.3)
+
+
+def _digest(data: bytes | str) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def _parse_one(item: tuple[str, bytes]) -> tuple[str, str, str | None]:
+    """Process-pool worker: returns (file_name, text, error)."""
+    name, data = item
+    try:
+        return name, extract_text(name, data), None
+    except Exception as e:
+        return name, "", str(e)
+
+
+def parse_resumes(files: list[tuple[str, bytes]], max_workers: int = PARSE_WORKERS) -> list[dict]:
+    """Extract text from many resume files in a process pool."""
+    if len(files) < 2 or max_workers <= 1:
+        results = [_parse_one(f) for f in files]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_parse_one, files, chunksize=16))
+    return [
+        {"file": name, "resume_id": _digest(data), "text": text, "error": error}
+        for (name, text, error), (_, data) in zip(results, files)
+    ]
+
+
+class Checkpoint:
+    """Append-only JSONL log of parsed resumes and finished analyses for one job description.
+
+    Records are keyed by resume content hash, so re-running the same
+    requisition skips files already parsed and resumes already analyzed.
+    Only successes are logged; files that failed to parse and analyses that
+    failed are retried on the next run.
+    """
+
+    def __init__(self, job_description: str, directory: str = CHECKPOINT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"bulk_{_digest(job_description)}.jsonl")
+        self.parsed: dict[str, dict] = {}
+        self.analyses: dict[str, dict] = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # tail of a write interrupted mid-line
+                    if record["kind"] == "parsed":
+                        if not record["data"].get("error"):  # older logs also hold failures
+                            self.parsed[record["resume_id"]] = record["data"]
+                    else:
+                        self.analyses[record["resume_id"]] = record["data"]
+
+    def _append(self, records: list[dict]):
+        with open(self.path, "a") as f:
+            f.writelines(json.dumps(r) + "\n" for r in records)
+
+    def save_parsed(self, parsed: list[dict]):
+        for p in parsed:
+            self.parsed[p["resume_id"]] = p
+        self._append([{"kind": "parsed", "resume_id": p["resume_id"], "data": p} for p in parsed if not p["error"]])
+
+    def save_analysis(self, resume_id: str, analysis: dict):
+        self.analyses[resume_id] = analysis
+        self._append([{"kind": "analysis", "resume_id": resume_id, "data": analysis}])
+
+
+def score_corpus(texts: list[str], job_description: str) -> pd.DataFrame:
+    """Score every resume against the JD in one sparse-matrix pass.
+
+    Builds a resumes × vocabulary TF-IDF matrix over the JD's keywords, with
+    IDF fitted on the applicant pool, and combines cosine similarity with
+    weighted keyword and skills coverage.
+    """
+    resume_terms = [extract_terms(t) for t in texts]
+    jd_terms = extract_terms(job_description)
+    idf = idf_weights(resume_terms + [jd_terms])
+    keywords = select_keywords(jd_terms, idf)
+    vocab = {term: i for i, term in enumerate(keywords)}
+    jd_skills = [t for t in keywords if t in extract_skills(jd_terms)]
+
+    rows, cols, vals = [], [], []
+    for r, terms in enumerate(resume_terms):
+        for term, tf in terms.items():
+            col = vocab.get(term)
+            if col is not None:
+                rows.append(r)
+                cols.append(col)
+                vals.append(1 + np.log(tf))
+    shape = (len(texts), len(vocab))
+    tf_matrix = sparse.csr_matrix((vals, (rows, cols)), shape=shape, dtype=np.float64)
+
+    idf_vec = np.array([idf.get(t, 1.0) for t in keywords])
+    weights = np.array([keywords[t] for t in keywords])
+    tfidf = tf_matrix.multiply(idf_vec).tocsr()
+    jd_vec = np.array([(1 + np.log(jd_terms[t])) * idf.get(t, 1.0) for t in keywords])
+
+    row_norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+    jd_norm = np.linalg.norm(jd_vec) or 1.0
+    cosine = np.divide(tfidf @ jd_vec, row_norms * jd_norm, out=np.zeros(len(texts)), where=row_norms > 0)
+
+    present = (tf_matrix > 0).astype(np.float64)
+    keyword_cov = (present @ weights) / (weights.sum() or 1.0)
+    if jd_skills:
+        skill_cols = [vocab[s] for s in jd_skills]
+        skills_cov = np.asarray(present[:, skill_cols].sum(axis=1)).ravel() / len(skill_cols)
+    else:
+        skills_cov = keyword_cov
+
+    w_cos, w_kw, w_sk = LOCAL_WEIGHTS
+    local = 100 * (w_cos * cosine + w_kw * keyword_cov + w_sk * skills_cov)
+    frame = pd.DataFrame({
+        "local_score": local.round(1),
+        "similarity": (100 * cosine).round(1),
+        "keyword_coverage": (100 * keyword_cov).round(1),
+        "skills_coverage": (100 * skills_cov).round(1),
+    })
+    frame.attrs["idf"] = idf
+    return frame
+
+
+def rank_resumes(
+    files: list[tuple[str, bytes]],
+    job_description: str,
+    api_key: str,
+    top_k: int = 25,
+    llm_workers: int = LLM_WORKERS,
+    on_result=None,
+) -> pd.DataFrame:
+    """Parse, score, and rank a batch of resumes; run full analysis on the top ``top_k``.
+
+    Full analyses are checkpointed per resume, so an interrupted run resumes
+    where it stopped. ``on_result(done, total)`` is called as each analysis
+    completes.
+    """
+    checkpoint = Checkpoint(job_description)
+    ids = [_digest(data) for _, data in files]
+    todo = [f for f, rid in zip(files, ids) if rid not in checkpoint.parsed]
+    if todo:
+        checkpoint.save_parsed(parse_resumes(todo))
+    parsed = [dict(checkpoint.parsed[rid], file=name) for (name, _), rid in zip(files, ids)]
+
+    scores = score_corpus([p["text"] for p in parsed], job_description)
+    table = pd.concat([pd.DataFrame(parsed).drop(columns="text"), scores], axis=1)
+    table = table.sort_values(["local_score", "file"], ascending=[False, True], ignore_index=True)
+    table.insert(0, "rank", range(1, len(table) + 1))
+
+    texts = {p["resume_id"]: p["text"] for p in parsed}
+    shortlist = [rid for rid in table["resume_id"].head(top_k) if texts[rid]]
+    pending = [rid for rid in shortlist if rid not in checkpoint.analyses]
+
+    if pending:
+        idf = scores.attrs["idf"]
+        with ThreadPoolExecutor(max_workers=llm_workers) as pool:
+            futures = {pool.submit(analyze_resume, texts[rid], job_description, api_key, idf): rid for rid in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                rid = futures[future]
+                try:
+                    checkpoint.save_analysis(rid, future.result())
+                except Exception as e:
+                    checkpoint.analyses[rid] = {"error": str(e)}
+                if on_result:
+                    on_result(done, len(pending))
+
+    analyses = [checkpoint.analyses.get(rid, {}) for rid in table["resume_id"]]
+    table["overall_score"] = [a.get("overall_score") for a in analyses]
+    table["summary"] = [a.get("summary", a.get("error", "")) for a in analyses]
+    table["missing_skills"] = [", ".join(a.get("missing_skills", [])) for a in analyses]
+    return table
@@ -3,6 +3,8 @@
 import json
 import anthropic
 
+from engines.record_batches import MAX_WORKERS, Record, fan_out, merge_lists, related_records, split_records
+
 CLAIMS_PROMPT = """\
 You are an expert insurance claims adjudicator and medical billing specialist. \
 Review the submitted claims for completeness, accuracy, medical necessity, and \
@@ -92,10 +94,8 @@ REVIEW GUIDELINES:
 """
 
 
-def review_claims(config: dict, api_key: str) -> dict:
-    """Review insurance claims and generate adjudication recommendations."""
+def _call_claude(prompt: str, api_key: str) -> dict:
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = CLAIMS_PROMPT.format(**config)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
@@ -107,3 +107,55 @@ def review_claims(config: dict, api_key: str) -> dict:
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
     return json.loads(text)
+
+
+def merge_reviews(parts: list[dict], records: list[Record]) -> dict:
+    """Combine per-claim results; decision counts and totals are recomputed locally."""
+    reviews, errors, savings = [], [], 0.0
+    for record, part in zip(records, parts):
+        if "error" in part:
+            errors.append({"record": record.label, "error": part["error"]})
+        reviews += part.get("claim_reviews", [])
+        savings += float((part.get("batch_summary") or {}).get("savings_identified") or 0)
+    decisions = [c.get("recommendation", "") for c in reviews]
+    return {
+        "batch_summary": {
+            "total_claims": len(reviews),
+            "total_billed": sum(float(c.get("total_billed") or 0) for c in reviews),
+            "auto_approve": sum(d == "Approve" for d in decisions),
+            "needs_review": sum(d != "Approve" and "Deny" not in d for d in decisions),
+            "likely_deny": sum("Deny" in d for d in decisions),
+            "estimated_payout": sum(float(c.get("recommended_payout") or 0) for c in reviews),
+            "savings_identified": savings,
+        },
+        "claim_reviews": reviews,
+        "trend_analysis": merge_lists(parts, "trend_analysis"),
+        "record_errors": errors,
+    }
+
+
+def review_claims(config: dict, api_key: str, max_workers: int = MAX_WORKERS, on_result=None) -> dict:
+    """Review insurance claims and generate adjudication recommendations.
+
+    Batches with several ``=== CLAIM ===`` sections are reviewed one claim
+    per call (at most ``max_workers`` in flight), each with a listing of
+    other claims for the same claimant or provider, and merged locally;
+    ``on_result(done, total, part)`` fires with each claim's own result
+    (``part["record"]`` is its header) as it completes.
+    """
+    preamble, records = split_records(config["claims"])
+    if len(records) < 2:
+        return _call_claude(CLAIMS_PROMPT.format(**config), api_key)
+
+    related = related_records(records, ["Claimant", "Provider"],
+                              ["Claimant", "Provider", "Service Date", "Diagnosis", "Billed Amount"])
+
+    def review(record: Record) -> dict:
+        claims = "\n\n".join(p for p in (preamble, record.text, related[record.label]) if p)
+        return _call_claude(CLAIMS_PROMPT.format(**dict(config, claims=claims)), api_key)
+
+    def report(done, total, i, part):
+        if on_result:
+            on_result(done, total, dict(part, record=records[i].label))
+
+    return merge_reviews(fan_out(records, review, max_workers, report), records)
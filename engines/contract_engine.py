@@ -3,6 +3,8 @@
 import json
 import anthropic
 
+from engines.text_normalizer import normalize_text_report
+
 CONTRACT_PROMPT = """\
 You are an expert government contracting advisor helping small and medium businesses \
 navigate federal procurement. Analyse the solicitation and company profile to provide \
@@ -97,6 +99,8 @@ PARAMETERS:
 def analyze_contract(config: dict, api_key: str) -> dict:
     """Analyse government contract opportunity and generate proposal guidance."""
     client = anthropic.Anthropic(api_key=api_key)
+    normalized, normalization = normalize_text_report(config["solicitation"], "Solicitation")
+    config = dict(config, solicitation=normalized)
     prompt = CONTRACT_PROMPT.format(**config)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
@@ -108,4 +112,6 @@ def analyze_contract(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+    result["normalization"] = normalization
+    return result
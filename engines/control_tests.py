@@ -0,0 +1,393 @@
+"""Deterministic expense control tests over activity / GL records, run before the LLM audit."""
+
+import math
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+COLUMN_ALIASES = {
+    "date": "date", "posting date": "date", "transaction date": "date", "submitted": "date",
+    "type": "type", "entry type": "type", "activity": "type",
+    "person": "person", "employee": "person", "requester": "person", "submitted by": "person",
+    "cardholder": "person", "user": "person",
+    "amount": "amount", "total": "amount", "debit": "amount",
+    "category": "category", "account": "category", "gl account": "category", "expense type": "category",
+    "vendor": "vendor", "payee": "vendor", "merchant": "vendor", "supplier": "vendor",
+    "approver": "approver", "approved by": "approver",
+    "approver title": "approver_title", "approver role": "approver_title",
+    "po": "po_ref", "po number": "po_ref", "purchase order": "po_ref",
+    "incurred date": "incurred_date", "expense date": "incurred_date",
+    "notes": "notes", "memo": "notes", "description": "notes", "approval": "notes",
+}
+REQUIRED_COLUMNS = ["date", "person", "amount"]
+
+# Activity types that carry money; everything else in the log is left for the model.
+EXPENSE_TYPES = {"EXPENSE", "PURCHASE", "PAYMENT", "REIMBURSEMENT", "INVOICE", "JOURNAL", "GL", "CARD"}
+
+APPROVER_HIERARCHY = ["Team Lead", "Manager", "Director", "VP", "CFO", "CEO"]
+DEFAULT_APPROVAL_LIMITS = {
+    "Team Lead": 5_000, "Manager": 10_000, "Director": 25_000, "VP": 100_000, "CFO": math.inf, "CEO": math.inf,
+}
+TITLE_ALIASES = {
+    "team lead": "Team Lead", "team leader": "Team Lead", "supervisor": "Team Lead",
+    "manager": "Manager", "director": "Director",
+    "vp": "VP", "svp": "VP", "vice president": "VP",
+    "cfo": "CFO", "chief financial officer": "CFO",
+    "ceo": "CEO", "chief executive officer": "CEO",
+}
+TITLE_RE = (
+    r"\b(chief financial officer|chief executive officer|vice president|team leader|team lead|"
+    r"supervisor|manager|director|svp|vp|cfo|ceo)s?\b"
+)
+AMOUNT_RE = r"\$\s?([\d,]+(?:\.\d+)?)"
+APPROVED_BY_RE = r"approved by:?\s*([^|]+)"
+PO_RE = r"\b(?:PO|P\.O\.|purchase order)\s*(?:#|no\.?|number)?\s*:?\s*([A-Z0-9][\w-]*\d[\w-]*)"
+LATE_DAYS_RE = r"(\d+)\s+days?\s+late"
+INCURRED_RE = r"\bfor\s+([A-Za-z]{3})[a-z]*\.?\s+(\d{1,2})\b"
+PERSONAL_RE = r"\b(?:personal|family|spouse|gift cards?)\b"
+REIMBURSEMENT_RE = r"reimburs"
+
+CONTROL_LABELS = {
+    "missing_approval": "Missing Approval",
+    "approval_authority": "Approver Lacks Authority",
+    "self_approval": "Self-Approval",
+    "split_purchase": "Split Purchase",
+    "missing_po": "Missing Purchase Order",
+    "duplicate_payment": "Duplicate Payment",
+    "late_submission": "Late Submission",
+    "personal_charge": "Personal Charge",
+}
+CONTROL_SEVERITY = {
+    "missing_approval": "High",
+    "approval_authority": "High",
+    "self_approval": "Critical",
+    "split_purchase": "High",
+    "missing_po": "Medium",
+    "duplicate_payment": "High",
+    "late_submission": "Low",
+    "personal_charge": "Medium",
+}
+SEVERITY_ORDER = ["Low", "Medium", "High", "Critical"]
+
+# Exception rows listed in the prompt; the rest are counted and returned from local checks only.
+MAX_PROMPT_ROWS = 40
+MAX_OTHER_LINES = 200
+
+
+@dataclass
+class ControlPolicy:
+    """Thresholds for the control tests; anything not stated in the policy text keeps these defaults."""
+    approval_limits: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_APPROVAL_LIMITS))
+    approval_required_above: float = 500.0
+    po_required_above: float = 10_000.0
+    late_submission_days: int = 30
+    split_window_days: int = 7
+    split_margin_pct: float = 20.0
+
+    def thresholds(self) -> np.ndarray:
+        """Every amount a requester might try to stay under, ascending."""
+        limits = [v for v in self.approval_limits.values() if math.isfinite(v)]
+        return np.array(sorted({*limits, self.approval_required_above, self.po_required_above}), dtype=float)
+
+    def describe(self) -> str:
+        limits = ", ".join(
+            f"{t} {'unlimited' if not math.isfinite(v) else f'<= ${v:,.0f}'}" for t, v in self.approval_limits.items()
+        )
+        return (
+            f"Approval required above ${self.approval_required_above:,.0f}; approver limits: {limits}; "
+            f"PO required above ${self.po_required_above:,.0f}; reimbursements due within "
+            f"{self.late_submission_days} days; split purchases = 2+ charges within {self.split_window_days} days, "
+            f"each within {self.split_margin_pct:g}% under a limit, totalling more than it"
+        )
+
+
+def _money(value: str) -> float:
+    return float(value.replace(",", ""))
+
+
+def _title(value: str) -> str:
+    return TITLE_ALIASES[value.lower()]
+
+
+def policy_from_text(text: str) -> ControlPolicy:
+    """Compile approval limits, PO, reimbursement, and split rules stated in policy text."""
+    policy = ControlPolicy()
+    limits = policy.approval_limits
+    for m in re.finditer(
+        TITLE_RE + r"\s+(?:may|can|are authorized to|is authorized to)\s+approve\s+(?:\w+\s+){0,3}?"
+        r"(?:up to|below|under|not exceeding)\s+" + AMOUNT_RE, text, re.I,
+    ):
+        limits[_title(m.group(1))] = _money(m.group(2))
+    for m in re.finditer(
+        r"(?:over|above|exceeding|greater than|more than|in excess of)\s+" + AMOUNT_RE +
+        r"[^.\n]{0,60}?requires?\s+(?:\w+\s+){0,3}?" + TITLE_RE, text, re.I,
+    ):
+        amount, required = _money(m.group(1)), _title(m.group(2))
+        for title in APPROVER_HIERARCHY[:APPROVER_HIERARCHY.index(required)]:
+            limits[title] = min(limits[title], amount)
+
+    if m := re.search(r"(?:under|below|less than)\s+" + AMOUNT_RE + r"[^.\n]{0,40}?(?:do not|does not|no)\s+(?:require|need)?\s*approval", text, re.I):
+        policy.approval_required_above = _money(m.group(1))
+    elif m := re.search(r"approval (?:is )?required (?:for|on) (?:\w+\s+){0,3}?(?:over|above|exceeding)\s+" + AMOUNT_RE, text, re.I):
+        policy.approval_required_above = _money(m.group(1))
+    if m := re.search(r"(?:over|above|exceeding|greater than|more than|in excess of)\s+" + AMOUNT_RE + r"[^.\n]{0,60}?purchase order", text, re.I):
+        policy.po_required_above = _money(m.group(1))
+    elif m := re.search(r"purchase orders?[^.\n]{0,40}?(?:over|above|exceeding)\s+" + AMOUNT_RE, text, re.I):
+        policy.po_required_above = _money(m.group(1))
+    if m := re.search(r"(?:expense|reimburse)[^.\n]{0,80}?within (\d+) (?:calendar |business )?days", text, re.I):
+        policy.late_submission_days = int(m.group(1))
+    if m := re.search(r"split[^.\n]{0,60}?within (\d+) days", text, re.I):
+        policy.split_window_days = int(m.group(1))
+    return policy
+
+
+def _per_unique(values: pd.Series, fn, fill="") -> pd.Series:
+    """Apply a string transform to each distinct value once and broadcast it back.
+
+    GL columns (people, vendors, accounts, approval remarks) repeat heavily, so
+    this keeps the regex work proportional to distinct values, not rows.
+    Missing values get ``fill``.
+    """
+    codes, uniques = pd.factorize(values)
+    mapped = fn(pd.Series(uniques, dtype=str))
+    if isinstance(mapped, pd.DataFrame):
+        blank = pd.DataFrame([[fill] * mapped.shape[1]], columns=mapped.columns)
+        return pd.concat([mapped, blank], ignore_index=True).iloc[codes].set_axis(values.index)
+    mapped = pd.concat([mapped, pd.Series([fill])], ignore_index=True)
+    return pd.Series(mapped.to_numpy()[codes], index=values.index)
+
+
+def _clean(values: pd.Series) -> pd.Series:
+    return values.str.strip().replace({"nan": "", "None": ""})
+
+
+def _key(values: pd.Series) -> pd.Series:
+    return values.str.lower().str.split().str.join(" ")
+
+
+def _text(df: pd.DataFrame, col: str) -> pd.Series:
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    return _per_unique(df[col], _clean)
+
+
+def _note_fields(notes: pd.Series) -> pd.DataFrame:
+    """Approver, PO reference, lateness, and incurred month/day stated in free-text remarks."""
+    incurred = notes.str.extract(INCURRED_RE)
+    return pd.DataFrame({
+        "approver": notes.str.extract(APPROVED_BY_RE, flags=re.I, expand=False).fillna("").str.strip(),
+        "po_ref": notes.str.extract(PO_RE, flags=re.I, expand=False).fillna(""),
+        "late_days": pd.to_numeric(notes.str.extract(LATE_DAYS_RE, flags=re.I, expand=False), errors="coerce"),
+        "month": incurred[0].str.title(),
+        "day": incurred[1],
+    })
+
+
+def _incurred_dates(month: pd.Series, day: pd.Series, dates: pd.Series) -> pd.Series:
+    """Dates like "for Aug 15" in the remarks, in the year before the submission date if needed."""
+    has = month.notna() & dates.notna()
+    incurred = pd.Series(pd.NaT, index=dates.index, dtype="datetime64[ns]")
+    if has.any():
+        parsed = pd.to_datetime(
+            month[has] + " " + day[has] + " " + dates[has].dt.year.astype(str), format="%b %d %Y", errors="coerce",
+        )
+        incurred[has] = parsed.where(~(parsed > dates[has]), parsed - pd.DateOffset(years=1))
+    return incurred
+
+
+def normalize_activity(df: pd.DataFrame) -> pd.DataFrame:
+    """Map columns onto the canonical schema and derive approver, PO, and timing fields."""
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()]
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Activity data is missing columns: {', '.join(missing)}")
+
+    out = pd.DataFrame(index=df.index)
+    out["ref"] = df["ref"] if "ref" in df.columns else pd.RangeIndex(2, len(df) + 2)
+    out["date"] = pd.to_datetime(df["date"], errors="coerce")
+    out["type"] = _per_unique(_text(df, "type"), lambda u: u.str.upper().replace("", "EXPENSE"), fill="EXPENSE")
+    out["person"] = _text(df, "person")
+    amount = df["amount"]
+    if not pd.api.types.is_numeric_dtype(amount):
+        amount = pd.to_numeric(_per_unique(amount, lambda u: u.str.replace(r"[$,\s()]", "", regex=True)), errors="coerce")
+    out["amount"] = amount.astype(float).abs()
+    out["category"] = _text(df, "category")
+    out["vendor"] = _text(df, "vendor")
+    notes = _text(df, "notes")
+    out["notes"] = notes
+
+    noted = _per_unique(notes, _note_fields)
+    approver = _text(df, "approver")
+    approver = approver.where(approver != "", noted["approver"])
+    out["approved"] = approver != ""
+    cleaned = _per_unique(approver, lambda u: (
+        u.str.replace(r"\((?:not|no|pending)\b[^)]*\)", " ", regex=True, case=False).str.replace(r"[()]", " ", regex=True)
+    ))
+    title = _text(df, "approver_title")
+    title = title.where(title != "", _per_unique(cleaned, lambda u: u.str.extract(TITLE_RE, flags=re.I, expand=False).fillna("")))
+    out["approver_title"] = _per_unique(title, lambda u: u.str.lower().map(TITLE_ALIASES).fillna(u))
+    out["approver_name"] = _per_unique(cleaned, lambda u: (
+        u.str.replace(TITLE_RE, " ", regex=True, flags=re.I).str.replace(r"\s+", " ", regex=True).str.strip(" ,-:")
+    ))
+
+    po_ref = _text(df, "po_ref")
+    out["po_ref"] = po_ref.where(po_ref != "", noted["po_ref"])
+    out["late_days"] = pd.to_numeric(noted["late_days"], errors="coerce")
+    if "incurred_date" in df.columns:
+        incurred = pd.to_datetime(df["incurred_date"], errors="coerce")
+    else:
+        incurred = _incurred_dates(noted["month"], noted["day"], out["date"])
+    out["submission_lag_days"] = (out["date"] - incurred).dt.days
+    return out.dropna(subset=["date", "amount"]).reset_index(drop=True)
+
+
+def parse_activity_log(text: str) -> tuple[pd.DataFrame, list[str]]:
+    """Split a ``date | type | person | amount | category | approval`` log into money records and other lines.
+
+    Only rows whose type is in ``EXPENSE_TYPES`` become records (see
+    examples/sample_activity_log.txt); access, HR, and security events are
+    returned untouched for the model.
+    """
+    lines = pd.Series(text.splitlines(), dtype=str)
+    lines = lines[lines.str.strip() != ""]
+    dated = lines.str.match(r"\s*\d{4}-\d{2}-\d{2}\s*\|")
+    parts = lines[dated].str.strip().str.split(r"\s*\|\s*", n=5, expand=True, regex=True).reindex(columns=range(6)).fillna("")
+    is_expense = parts[1].str.upper().isin(EXPENSE_TYPES) & parts[3].str.contains(r"\$\s?\d", regex=True)
+
+    rows = parts[is_expense]
+    # "$8,500 | Software License | Approved by: ..." vs "Reimbursement for Aug 15 expense ($780) | Submitted 76 days late"
+    itemized = rows[3].str.startswith("$")
+    category = _per_unique(rows[4], lambda u: u.str.replace(r"^vendor:\s*", "", regex=True, case=False))
+    category[~itemized] = rows.loc[~itemized, 3].str.replace(r"\s*\(?\$[\d,.]+\)?", "", regex=True)
+    records = pd.DataFrame({
+        "ref": rows.index + 1,
+        "date": rows[0],
+        "type": rows[1],
+        "person": rows[2],
+        "amount": rows[3].str.extract(AMOUNT_RE, expand=False).str.replace(",", ""),
+        "category": category,
+        "vendor": _per_unique(rows[4], lambda u: u.str.extract(r"(?i)^vendor:\s*(.+)", expand=False).fillna("")),
+        "notes": rows[5].where(itemized, (rows[3] + " | " + rows[4] + " | " + rows[5]).str.strip(" |")),
+    })
+    other = lines[~lines.index.isin(rows.index)]
+    other = other[~other.str.fullmatch(r"\s*[=\-]{3,}\s*")].tolist()
+    if records.empty:
+        return records, other
+    return normalize_activity(records), other
+
+
+def _split_purchases(records: pd.DataFrame, policy: ControlPolicy, person: np.ndarray, payee: np.ndarray) -> pd.Series:
+    """Charges just under a limit by one person to one payee, chained within the window, summing above it."""
+    thresholds = policy.thresholds()
+    amount = records["amount"].to_numpy()
+    idx = np.searchsorted(thresholds, amount, side="right")
+    limit = np.where(idx < len(thresholds), thresholds[np.minimum(idx, len(thresholds) - 1)], np.nan)
+    near = amount >= limit * (1 - policy.split_margin_pct / 100)
+    flagged = pd.Series(False, index=records.index)
+    if near.sum() < 2:
+        return flagged
+
+    cand = pd.DataFrame({
+        "person": person, "payee": payee, "limit": limit, "date": records["date"], "amount": amount,
+    })[near].sort_values(["person", "payee", "limit", "date"])
+    same_key = (cand[["person", "payee", "limit"]] == cand[["person", "payee", "limit"]].shift()).all(axis=1)
+    gap = (cand["date"] - cand["date"].shift()).dt.days
+    chain = (~(same_key & (gap <= policy.split_window_days))).cumsum()
+    grouped = cand.groupby(chain)["amount"]
+    hit = (grouped.transform("size") >= 2) & (grouped.transform("sum") > cand["limit"])
+    flagged[hit[hit].index] = True
+    return flagged
+
+
+def run_controls(records: pd.DataFrame, policy: ControlPolicy | None = None) -> pd.DataFrame:
+    """Evaluate every control over all records at once; returns one boolean column per control."""
+    policy = policy or ControlPolicy()
+    amount = records["amount"]
+    approved = records["approved"]
+
+    def mentions(pattern):
+        return (_per_unique(records["category"], lambda u: u.str.contains(pattern, case=False), fill=False)
+                | _per_unique(records["notes"], lambda u: u.str.contains(pattern, case=False), fill=False)).astype(bool)
+
+    reimbursement = (records["type"] == "REIMBURSEMENT") | mentions(REIMBURSEMENT_RE)
+    approver_limit = records["approver_title"].map(policy.approval_limits)
+    same_person = _per_unique(records["approver_name"], _key) == _per_unique(records["person"], _key)
+    person = pd.factorize(_per_unique(records["person"], _key))[0]
+    payee = pd.factorize(_per_unique(records["vendor"].where(records["vendor"] != "", records["category"]), _key))[0]
+    late = (records["submission_lag_days"] > policy.late_submission_days) | (records["late_days"] > 0)
+    keys = pd.DataFrame({"person": person, "payee": payee, "amount": amount, "date": records["date"]})
+
+    return pd.DataFrame({
+        "missing_approval": (amount > policy.approval_required_above) & ~approved,
+        "approval_authority": approved & (amount > approver_limit),
+        "self_approval": approved & (records["approver_name"] != "") & same_person,
+        "split_purchase": _split_purchases(records, policy, person, payee),
+        "missing_po": (amount > policy.po_required_above) & (records["po_ref"] == "") & ~reimbursement,
+        "duplicate_payment": keys.duplicated(keep="first"),
+        "late_submission": late,
+        "personal_charge": mentions(PERSONAL_RE),
+    }).fillna(False).astype(bool)
+
+
+def summarize_controls(records: pd.DataFrame, flags: pd.DataFrame) -> dict:
+    """Aggregate control hits into the numbers the page displays."""
+    flagged = flags.any(axis=1)
+    return {
+        "records_tested": len(records),
+        "total_amount": round(float(records["amount"].sum()), 2),
+        "exceptions": int(flagged.sum()),
+        "exception_amount": round(float(records.loc[flagged, "amount"].sum()), 2),
+        "control_hits": {control: int(flags[control].sum()) for control in flags.columns},
+    }
+
+
+def control_exceptions(records: pd.DataFrame, flags: pd.DataFrame) -> pd.DataFrame:
+    """Exception rows, most severe and largest first, with the controls each one failed."""
+    flagged = flags.any(axis=1)
+    names = list(flags.columns)
+    hits = [[names[j] for j in row.nonzero()[0]] for row in flags[flagged].to_numpy()]
+    rank = [max(SEVERITY_ORDER.index(CONTROL_SEVERITY[c]) for c in controls) for controls in hits]
+    rows = records[flagged].assign(
+        controls=hits,
+        severity=[SEVERITY_ORDER[r] for r in rank],
+        _rank=rank,
+    )
+    return rows.sort_values(["_rank", "amount"], ascending=False, kind="stable").drop(columns="_rank")
+
+
+def exceptions_for_prompt(records: pd.DataFrame, flags: pd.DataFrame, policy: ControlPolicy,
+                          max_rows: int = MAX_PROMPT_ROWS) -> str:
+    """Render the policy applied, control hit counts, per-person totals, and exception rows as prompt text."""
+    summary = summarize_controls(records, flags)
+    flagged = flags.any(axis=1)
+    by_person = (
+        records.assign(exceptions=flagged, at_risk=records["amount"].where(flagged, 0))
+        .groupby("person").agg(spend=("amount", "sum"), exceptions=("exceptions", "sum"), at_risk=("at_risk", "sum"))
+        .query("exceptions > 0").sort_values("at_risk", ascending=False).head(15)
+    )
+    lines = [
+        "PRECOMPUTED CONTROL TESTS (authoritative counts over all money records):",
+        f"- Policy applied: {policy.describe()}",
+        f"- Records tested: {summary['records_tested']:,} | Amount: ${summary['total_amount']:,.2f} | "
+        f"Exceptions: {summary['exceptions']:,} (${summary['exception_amount']:,.2f})",
+        "- Control hits: " + ", ".join(f"{CONTROL_LABELS[k]}={v:,}" for k, v in summary["control_hits"].items()),
+        "",
+        "BY PERSON (spend | exceptions | amount at risk):",
+    ]
+    lines += [f"- {p}: ${r.spend:,.2f} | {int(r.exceptions)} | ${r.at_risk:,.2f}" for p, r in by_person.iterrows()]
+
+    rows = control_exceptions(records, flags)
+    lines += ["", f"EXCEPTIONS ({len(rows):,}; top {min(len(rows), max_rows)} shown):",
+              "LINE | DATE | PERSON | AMOUNT | PAYEE / CATEGORY | APPROVER | CONTROLS FAILED | NOTES"]
+    for r in rows.head(max_rows).itertuples(index=False):
+        approver = f"{r.approver_title} {r.approver_name}".strip() or "none"
+        controls = ", ".join(CONTROL_LABELS[c] for c in r.controls)
+        lines.append(f"{r.ref} | {r.date:%Y-%m-%d} | {r.person} | ${r.amount:,.2f} | {r.vendor or r.category} | "
+                     f"{approver} | {controls} | {r.notes[:120]}")
+    if len(rows) > max_rows:
+        lines.append(f"... {len(rows) - max_rows:,} more exceptions omitted")
+    return "\n".join(lines)
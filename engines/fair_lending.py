@@ -0,0 +1,298 @@
+"""Fair-lending disparity analytics over underwriting decision histories."""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+APPROVED_DECISIONS = {"approve", "auto-approve", "conditional approve"}
+DENIED_DECISIONS = {"deny", "auto-decline", "decline"}
+PROTECTED_HINTS = ("race", "ethnic", "sex", "gender", "age_group", "age_band", "marital", "national_origin",
+                   "religion", "disability", "proxy")
+CONTROL_COLUMNS = ["credit_score", "dti_pct", "ltv_pct", "annual_income", "requested_amount"]
+# Coarsening for matched-pair cells: fixed widths for ratio-like controls, quintiles for dollar amounts.
+MATCH_BIN_WIDTHS = {"credit_score": 20, "dti_pct": 5, "ltv_pct": 10}
+MATCH_QUANTILES = 5
+AIR_THRESHOLD = 0.8
+ALPHA = 0.05
+MIN_GROUP_SIZE = 30
+MAX_EXAMPLE_PAIRS = 25
+REGRESSION_CHUNK_ROWS = 500_000
+CACHE_SIZE = 16
+
+_cache: OrderedDict = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def approval_outcome(decisions: pd.Series) -> np.ndarray:
+    """1.0 for approvals, 0.0 for denials, NaN for undecided (referred / pending) files."""
+    codes, uniques = pd.factorize(decisions)
+    text = pd.Index(uniques.astype(str)).str.strip().str.lower()
+    outcome = np.where(text.isin(APPROVED_DECISIONS), 1.0, np.where(text.isin(DENIED_DECISIONS), 0.0, np.nan))
+    return np.append(outcome, np.nan)[codes]  # code -1 (missing) picks the trailing NaN
+
+
+def detect_group_columns(columns) -> list[str]:
+    """Column names that look like protected-class attributes or proxies (monitoring only, never decision inputs)."""
+    return [c for c in columns
+            if any(hint in re.sub(r"[\s-]+", "_", str(c).lower()) for hint in PROTECTED_HINTS)]
+
+
+def batch_decisions(screened: pd.DataFrame) -> pd.Series:
+    """Effective decision per batch row: the AI decision where one exists, else the rule pre-decision."""
+    decision = screened["pre_decision"]
+    if "ai_decision" in screened.columns:
+        decision = screened["ai_decision"].where(screened["ai_decision"].notna(), decision)
+    return decision
+
+
+def decision_snapshot(df: pd.DataFrame, columns: list[str]) -> str:
+    """Content fingerprint of the columns an analysis reads; identical decision sets share cached results."""
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return hashlib.sha1(hashed.tobytes() + ",".join(columns).encode()).hexdigest()
+
+
+def _two_proportion_p(x1, n1, x2, n2) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled = (x1 + x2) / (n1 + n2)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n1 + 1 / n2))
+        z = (x1 / n1 - x2 / n2) / se
+    return np.where(se > 0, 2 * stats.norm.sf(np.abs(z)), 1.0)
+
+
+def _reference_group(rates: pd.DataFrame, reference) -> str:
+    if reference is not None and reference in rates.index:
+        return reference
+    eligible = rates[rates["decided"] >= MIN_GROUP_SIZE]
+    return (eligible if len(eligible) else rates)["approval_rate"].idxmax()
+
+
+def approval_disparities(df: pd.DataFrame, group_col: str, reference=None) -> pd.DataFrame:
+    """Approval rate, adverse impact ratio and significance per group against the reference group.
+
+    The reference defaults to the highest-approval group with at least
+    ``MIN_GROUP_SIZE`` decided files. AIR below ``AIR_THRESHOLD`` is the
+    four-fifths-rule flag; the p-value is a two-proportion z-test. Returns an
+    empty frame when no file in ``group_col`` has been decided.
+    """
+    decided = df[df["approved"].notna() & df[group_col].notna()]
+    if decided.empty:
+        return pd.DataFrame()
+    grouped = decided.groupby(group_col, observed=True)["approved"]
+    rates = pd.DataFrame({"decided": grouped.size(), "approved": grouped.sum()})
+    rates["approval_rate"] = rates["approved"] / rates["decided"]
+    ref = _reference_group(rates, reference)
+    ref_row = rates.loc[ref]
+    rates["adverse_impact_ratio"] = rates["approval_rate"] / ref_row["approval_rate"] if ref_row["approval_rate"] else np.nan
+    rates["difference_pp"] = (rates["approval_rate"] - ref_row["approval_rate"]) * 100
+    rates["p_value"] = _two_proportion_p(rates["approved"].to_numpy(float), rates["decided"].to_numpy(float),
+                                         ref_row["approved"], ref_row["decided"])
+    rates["reference"] = rates.index == ref
+    rates["flag"] = np.where(rates["reference"], "reference",
+                             np.where((rates["adverse_impact_ratio"] < AIR_THRESHOLD) & (rates["p_value"] < ALPHA),
+                                      "adverse impact",
+                                      np.where(rates["adverse_impact_ratio"] < AIR_THRESHOLD, "below 4/5 (not significant)",
+                                               "ok")))
+    rates.index = rates.index.astype(str)
+    rates.index.name = group_col
+    return rates.reset_index().sort_values("approval_rate", ascending=False, ignore_index=True)
+
+
+def _match_cells(df: pd.DataFrame, controls: list[str]) -> np.ndarray:
+    """Integer cell id per row from coarsened controls; missing values get their own bin (0)."""
+    cell = np.zeros(len(df), dtype=np.int64)
+    for col in controls:
+        values = df[col].to_numpy(float)
+        missing = ~np.isfinite(values)
+        if missing.all():
+            continue
+        if col in MATCH_BIN_WIDTHS:
+            bins = np.floor(values / MATCH_BIN_WIDTHS[col])
+            bins = np.where(missing, 0, bins - np.nanmin(bins[~missing]) + 1)
+        else:
+            edges = np.quantile(values[~missing], np.linspace(0, 1, MATCH_QUANTILES + 1)[1:-1])
+            bins = np.where(missing, 0, np.searchsorted(edges, values, side="right") + 1)
+        bins = bins.astype(np.int64)
+        cell = cell * (bins.max() + 1) + bins
+    return cell
+
+
+def matched_pairs(df: pd.DataFrame, group_col: str, reference: str, controls: list[str],
+                  id_col: str = "app_id") -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Compare similarly situated applicants: approval gaps within coarsened credit-profile cells.
+
+    Returns (per-group summary, example pairs). A group's matched disparity
+    is the difference between its approval rate and the reference group's
+    approval rate in the same cell, averaged with weights equal to the
+    group's count per cell. Example pairs show a denied group applicant next
+    to an approved reference applicant from one cell, taken from the cells
+    with the largest gaps.
+    """
+    decided = df[df["approved"].notna() & df[group_col].notna()]
+    groups = decided[group_col].astype("category")
+    names = groups.cat.categories.astype(str)
+    keys = pd.DataFrame({"_cell": _match_cells(decided, controls), "_group": groups.cat.codes.to_numpy(),
+                         "approved": decided["approved"].to_numpy()})
+    cells = keys.groupby(["_cell", "_group"])["approved"].agg(["mean", "size"]).unstack("_group")
+    cells = cells.rename(columns=dict(enumerate(names)), level=1)
+    if reference not in cells["mean"].columns:
+        return pd.DataFrame(), pd.DataFrame()
+    ref_rate = cells["mean"][reference]
+
+    rows, gaps = [], []
+    for group in cells["mean"].columns.drop(reference):
+        both = ref_rate.notna() & cells["mean"][group].notna()
+        weights = cells["size"][group][both]
+        gap = cells["mean"][group][both] - ref_rate[both]
+        total = cells["size"][group].sum()
+        rows.append({
+            group_col: group, "reference": reference, "matched_cells": int(both.sum()),
+            "matched_applicants": int(weights.sum()), "match_rate_pct": round(weights.sum() / total * 100, 1) if total else 0.0,
+            "matched_difference_pp": round(float(np.average(gap, weights=weights)) * 100, 2) if weights.sum() else np.nan,
+        })
+        gaps.append(pd.DataFrame({"_cell": gap.index, "_group": group, "gap": gap.to_numpy(), "n": weights.to_numpy()}))
+    summary = pd.DataFrame(rows)
+
+    gaps = pd.concat(gaps, ignore_index=True) if gaps else pd.DataFrame(columns=["_cell", "_group", "gap", "n"])
+    # Rank cells by applicants affected (gap x group count) so one-applicant cells don't crowd out real patterns.
+    worst = gaps[gaps["gap"] < 0].assign(_impact=lambda g: g["gap"] * g["n"])
+    worst = worst.sort_values("_impact").head(MAX_EXAMPLE_PAIRS).drop(columns="_impact")
+    show = [c for c in [id_col] + controls if c in decided.columns]
+    in_worst = keys["_cell"].isin(worst["_cell"]).to_numpy()
+    candidates = decided[in_worst].assign(_cell=keys["_cell"].to_numpy()[in_worst],
+                                          _group=names[keys["_group"].to_numpy()[in_worst]])
+    denied = (candidates[candidates["approved"] == 0].drop_duplicates(["_cell", "_group"])
+              .set_index(["_cell", "_group"])[show])
+    approved = (candidates[(candidates["approved"] == 1) & (candidates["_group"] == reference)]
+                .drop_duplicates("_cell").set_index("_cell")[show])
+    examples = worst.join(denied, on=["_cell", "_group"]).join(approved, on="_cell", rsuffix="_reference")
+    examples = examples.dropna(subset=[show[0], f"{show[0]}_reference"])
+    examples["gap_pp"] = (examples.pop("gap") * 100).round(1)
+    examples = examples.drop(columns=["_cell", "n"]).rename(columns={"_group": group_col})
+    return summary, examples.reset_index(drop=True)
+
+
+def _design_chunk(codes: np.ndarray, values: np.ndarray, group_codes: np.ndarray,
+                  means: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    dummies = codes[:, None] == group_codes[None, :]
+    missing = np.isnan(values)
+    values = (np.where(missing, means, values) - means) / scales
+    has_missing = missing.any(axis=0)
+    return np.column_stack([np.ones(len(codes)), dummies, values, missing[:, has_missing]]).astype(float)
+
+
+def adjusted_disparities(df: pd.DataFrame, group_col: str, reference: str, controls: list[str]) -> pd.DataFrame:
+    """Regression-adjusted approval gaps: linear probability model with HC1 robust standard errors.
+
+    ``approved ~ group dummies + standardized controls (+ missing-value
+    indicators)``. The group coefficient is the approval-rate gap to the
+    reference group at the same credit profile, in percentage points. X'X and
+    the robust "meat" are accumulated in chunks of ``REGRESSION_CHUNK_ROWS``,
+    so memory stays flat on millions of decisions.
+    """
+    decided = df[df["approved"].notna() & df[group_col].notna()]
+    category = decided[group_col].astype("category")
+    names = list(category.cat.categories.astype(str))
+    codes = category.cat.codes.to_numpy()
+    groups = sorted(g for g in names if g != reference)
+    group_codes = np.array([names.index(g) for g in groups], dtype=codes.dtype)
+    controls = [c for c in controls if c in decided.columns and decided[c].notna().any()]
+    values = decided[controls].to_numpy(float)
+    y = decided["approved"].to_numpy(float)
+    means = np.nanmean(values, axis=0) if controls else np.empty(0)
+    scales = np.nanstd(values, axis=0) if controls else np.empty(0)
+    scales = np.where(scales > 0, scales, 1.0)
+
+    chunks = [slice(start, start + REGRESSION_CHUNK_ROWS) for start in range(0, len(decided), REGRESSION_CHUNK_ROWS)]
+    if not chunks:
+        return pd.DataFrame()
+    xtx, xty = 0, 0
+    for rows in chunks:
+        x = _design_chunk(codes[rows], values[rows], group_codes, means, scales)
+        xtx = xtx + x.T @ x
+        xty = xty + x.T @ y[rows]
+    xtx_inv = np.linalg.pinv(xtx)
+    beta = xtx_inv @ xty
+    meat = 0
+    for rows in chunks:
+        x = _design_chunk(codes[rows], values[rows], group_codes, means, scales)
+        scores = x * (y[rows] - x @ beta)[:, None]
+        meat = meat + scores.T @ scores
+    n, k = len(decided), len(beta)
+    cov = xtx_inv @ meat @ xtx_inv * (n / max(n - k, 1))
+    se = np.sqrt(np.clip(np.diag(cov), 0, None))
+
+    coef, err = beta[1:1 + len(groups)], se[1:1 + len(groups)]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = np.where(err > 0, 2 * stats.norm.sf(np.abs(coef / err)), 1.0)
+    z = stats.norm.ppf(1 - ALPHA / 2)
+    return pd.DataFrame({
+        group_col: groups, "reference": reference,
+        "adjusted_difference_pp": (coef * 100).round(2),
+        "ci_low_pp": ((coef - z * err) * 100).round(2), "ci_high_pp": ((coef + z * err) * 100).round(2),
+        "p_value": p, "significant": (p < ALPHA) & (coef < 0),
+    })
+
+
+def analyze_fair_lending(df: pd.DataFrame, group_cols: list[str] | None = None, decision_col: str = "decision",
+                         controls: list[str] | None = None, reference: dict | None = None,
+                         snapshot: str | None = None) -> dict:
+    """Raw, matched-pair and regression-adjusted disparities for every protected-class column.
+
+    Results are cached per decision-set snapshot: pass ``snapshot`` when the
+    caller already has a cheap version id (the review queue does); otherwise
+    the analyzed columns are fingerprinted. Returns ``{group_col: {...}}``
+    plus ``"decided"``/``"undecided"`` counts.
+    """
+    group_cols = group_cols if group_cols is not None else detect_group_columns(df.columns)
+    controls = [c for c in (controls or CONTROL_COLUMNS) if c in df.columns]
+    reference = reference or {}
+    columns = [decision_col] + group_cols + controls
+    snapshot = snapshot or decision_snapshot(df, columns)
+    key = (snapshot, tuple(columns), tuple(sorted((k, str(v)) for k, v in reference.items())))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    data = df[[c for c in ["app_id"] + columns if c in df.columns]].copy()
+    data["approved"] = approval_outcome(data[decision_col])
+    result = {"decided": int(data["approved"].notna().sum()), "undecided": int(data["approved"].isna().sum()),
+              "controls": controls, "groups": {}}
+    for col in group_cols:
+        category = data[col].astype("category")
+        data[col] = category.cat.rename_categories(category.cat.categories.astype(str))
+        rates = approval_disparities(data, col, reference.get(col))
+        if rates.empty:
+            continue
+        ref = rates.loc[rates["reference"], col].iloc[0]
+        pairs, examples = matched_pairs(data, col, ref, controls)
+        result["groups"][col] = {
+            "reference": ref, "rates": rates, "matched": pairs, "examples": examples,
+            "adjusted": adjusted_disparities(data, col, ref, controls),
+        }
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
+
+
+def disparity_findings(result: dict) -> list[str]:
+    """Plain-language flags for groups with adverse impact or significant adjusted gaps."""
+    findings = []
+    for col, analysis in result["groups"].items():
+        rates, adjusted = analysis["rates"], analysis["adjusted"]
+        for row in rates[rates["flag"] == "adverse impact"].to_dict(orient="records"):
+            findings.append(f"{col} = {row[col]}: AIR {row['adverse_impact_ratio']:.2f} vs "
+                            f"{analysis['reference']} ({row['difference_pp']:+.1f} pp, p={row['p_value']:.3g})")
+        if adjusted.empty:
+            continue
+        for row in adjusted[adjusted["significant"]].to_dict(orient="records"):
+            findings.append(f"{col} = {row[col]}: {row['adjusted_difference_pp']:+.1f} pp after controls "
+                            f"(95% CI {row['ci_low_pp']:+.1f} to {row['ci_high_pp']:+.1f})")
+    return findings
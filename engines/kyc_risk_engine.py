@@ -1,8 +1,12 @@
 """AI Risk Shield engine - KYC/AML risk classification."""
 
 import json
+
 import anthropic
 
+from engines.record_batches import MAX_WORKERS, Record, fan_out, merge_lists, related_records, split_records
+from engines.sanctions_index import WatchlistIndex, hits_for_prompt, screening_summary, subjects_from_text
+
 RISK_PROMPT = """\
 You are an expert financial crime compliance analyst specializing in KYC (Know Your \
 Customer), AML (Anti-Money Laundering), and sanctions screening. Analyze the customer \
@@ -101,10 +105,11 @@ SCREENING PARAMETERS:
 """
 
 
-def assess_risk(config: dict, api_key: str) -> dict:
-    """Assess customer risk profiles for KYC/AML compliance."""
+RISK_LEVELS = {"Low": "low_risk", "Medium": "medium_risk", "High": "high_risk", "Very High": "high_risk"}
+
+
+def _call_claude(prompt: str, api_key: str) -> dict:
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = RISK_PROMPT.format(**config)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
@@ -116,3 +121,76 @@ def assess_risk(config: dict, api_key: str) -> dict:
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
     return json.loads(text)
+
+
+def merge_assessments(parts: list[dict], records: list[Record]) -> dict:
+    """Combine per-customer results; the batch summary is recounted locally."""
+    assessments, errors = [], []
+    for record, part in zip(records, parts):
+        if "error" in part:
+            errors.append({"record": record.label, "error": part["error"]})
+        assessments += part.get("customer_assessments", [])
+    summary = {"total_customers": len(assessments), "high_risk": 0, "medium_risk": 0, "low_risk": 0, "blocked": 0}
+    for a in assessments:
+        level = a.get("risk_classification", "")
+        key = "blocked" if "Block" in level or "Reject" in level else RISK_LEVELS.get(level)
+        if key:
+            summary[key] += 1
+    flagged = sorted(assessments, key=lambda a: a.get("risk_score", 0), reverse=True)
+    flagged = [a.get("customer_id", "") for a in flagged if a.get("risk_score", 0) >= 60][:5]
+    summary["key_findings"] = (
+        f"{len(assessments)} customers reviewed individually: {summary['high_risk']} high risk, "
+        f"{summary['blocked']} blocked" + (f"; highest risk: {', '.join(flagged)}" if flagged else "")
+        + (f"; {len(errors)} profiles failed and need re-running" if errors else "") + "."
+    )
+    return {
+        "batch_summary": summary,
+        "customer_assessments": assessments,
+        "regulatory_considerations": merge_lists(parts, "regulatory_considerations"),
+        "record_errors": errors,
+    }
+
+
+def assess_risk(config: dict, api_key: str, watchlist: WatchlistIndex | None = None,
+                subjects: list[dict] | None = None, max_workers: int = MAX_WORKERS,
+                on_result=None) -> dict:
+    """Assess customer risk profiles for KYC/AML compliance.
+
+    With a ``watchlist`` index, subjects (parsed from the profiles unless
+    given) are screened locally and the model only adjudicates the candidate hits.
+
+    Batches with several ``=== CUSTOMER ===`` profiles are reviewed one
+    profile per call (at most ``max_workers`` in flight) and merged locally;
+    ``on_result(done, total, part)`` fires with each profile's own result
+    (``part["record"]`` is its header) as it completes.
+    """
+    screening = hits = None
+    if watchlist is not None:
+        subjects = subjects if subjects is not None else subjects_from_text(config["customers"])
+        hits = watchlist.screen(subjects)
+        screening = screening_summary(watchlist, subjects, hits)
+
+    preamble, records = split_records(config["customers"])
+    if len(records) < 2:
+        if watchlist is not None:
+            config = dict(config, customers=f"{config['customers']}\n\n{hits_for_prompt(watchlist, subjects, hits)}")
+        result = _call_claude(RISK_PROMPT.format(**config), api_key)
+    else:
+        related = related_records(records, ["Address", "Source of Funds"], ["Name", "Address", "Source of Funds"])
+
+        def review(record: Record) -> dict:
+            customers = "\n\n".join(p for p in (preamble, record.text, related[record.label]) if p)
+            if watchlist is not None:
+                own = [s for s in subjects if s["subject_id"] == record.label.title()]
+                customers += f"\n\n{hits_for_prompt(watchlist, own, hits[hits['subject_id'] == record.label.title()])}"
+            return _call_claude(RISK_PROMPT.format(**dict(config, customers=customers)), api_key)
+
+        def report(done, total, i, part):
+            if on_result:
+                on_result(done, total, dict(part, record=records[i].label))
+
+        result = merge_assessments(fan_out(records, review, max_workers, report), records)
+
+    if screening is not None:
+        result["watchlist_screening"] = screening
+    return result
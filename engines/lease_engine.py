@@ -2,6 +2,17 @@
 
 import json
 import anthropic
+import pandas as pd
+
+from engines.lease_schedule import (
+    LeasePortfolio,
+    build_portfolio,
+    normalize_lease_terms,
+    portfolio_totals,
+    schedule_for_prompt,
+    terms_from_abstractions,
+    terms_to_records,
+)
 
 LEASE_PROMPT = """\
 You are an expert lease analyst specialising in commercial and real estate lease \
@@ -13,7 +24,6 @@ Return a JSON object:
 {{
   "portfolio_summary": {{
     "total_leases": <number>,
-    "total_annual_obligation": "$X",
     "upcoming_expirations": <count within 12 months>,
     "key_finding": "One-line portfolio insight"
   }},
@@ -40,19 +50,25 @@ Return a JSON object:
         {{"date": "Date", "event": "What happens", "action_needed": "What to do"}}
       ],
       "risks": ["identified risks"],
-      "compliance_notes": "IFRS 16 / ASC 842 implications"
+      "compliance_notes": "IFRS 16 / ASC 842 implications",
+      "schedule_terms": {{
+        "commencement": "YYYY-MM-DD",
+        "term_months": <number>,
+        "payment": <number, contractual payment per period at commencement>,
+        "frequency": "monthly | quarterly | semi-annual | annual",
+        "timing": "advance | arrears",
+        "escalation_pct": <fixed % increase per step, 0 if none or index-linked>,
+        "escalation_interval_months": <months between increases, usually 12>,
+        "free_rent_months": <number>,
+        "incentives": <lease incentives received, e.g. TI allowance paid to lessee>,
+        "initial_direct_costs": <number>,
+        "prepaid": <payments made before commencement>,
+        "end_of_term_payment": <purchase option price or residual value guarantee if reasonably certain, else 0>,
+        "discount_rate": <lease-specific rate in % if stated, else null>
+      }}
     }}
   ],
 
-  "financial_analysis": {{
-    "total_commitment": "$X",
-    "annual_breakdown": [
-      {{"year": "YYYY", "obligation": "$X"}}
-    ],
-    "lease_liability_estimate": "$X (present value)",
-    "right_of_use_asset": "$X"
-  }},
-
   "compliance_checklist": [
     {{"requirement": "What needs to be done", "standard": "IFRS 16 / ASC 842 / Local",
       "status": "Compliant | Gap | Review Needed", "action": "Remediation step"}}
@@ -69,7 +85,9 @@ Return a JSON object:
 }}
 
 Be precise with dates, amounts, and obligations. Flag any missing or ambiguous terms \
-that need clarification.
+that need clarification. Do NOT compute lease liabilities, ROU assets, or obligation \
+totals: they are calculated deterministically from each lease's schedule_terms, so \
+abstract those terms exactly as written (use null for anything not stated).
 
 IMPORTANT: Return ONLY the JSON object.
 
@@ -86,10 +104,43 @@ ANALYSIS PARAMETERS:
 """
 
 
-def analyze_leases(config: dict, api_key: str) -> dict:
-    """Analyse lease documents and extract key data."""
+COMMENTARY_PROMPT = """\
+You are an expert lease accountant reviewing a lease portfolio under {standard}. \
+The lease schedules below were computed deterministically from abstracted lease \
+terms; treat every figure as authoritative and do not recalculate it. Comment on \
+what the figures mean for {company}.
+
+Return a JSON object:
+
+{{
+  "portfolio_summary": {{
+    "key_finding": "One-line portfolio insight"
+  }},
+  "compliance_checklist": [
+    {{"requirement": "What needs to be done", "standard": "IFRS 16 / ASC 842 / Local",
+      "status": "Compliant | Gap | Review Needed", "action": "Remediation step"}}
+  ],
+  "critical_dates_calendar": [
+    {{"date": "Date", "lease_id": "Reference", "event": "Description", "priority": "High | Medium | Low"}}
+  ],
+  "recommendations": [
+    {{"recommendation": "What to do", "impact": "Financial or operational impact",
+      "priority": "High | Medium | Low"}}
+  ]
+}}
+
+IMPORTANT: Return ONLY the JSON object.
+
+---
+
+{schedule}
+
+ANALYSIS FOCUS: {focus}
+"""
+
+
+def _call_claude(prompt: str, api_key: str) -> dict:
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = LEASE_PROMPT.format(**config)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
@@ -101,3 +152,72 @@ def analyze_leases(config: dict, api_key: str) -> dict:
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
     return json.loads(text)
+
+
+def _schedule_results(terms: pd.DataFrame, as_of, standard: str) -> tuple[LeasePortfolio, pd.DataFrame, dict]:
+    """Schedule the terms; with ``standard="Both"`` the main schedule follows ASC 842 and
+    IFRS 16 headline totals (every lease on the finance model) are added alongside."""
+    portfolio = build_portfolio(terms, as_of)
+    issues = terms.loc[terms["issue"] != "", ["lease_id", "description", "issue"]]
+    totals = portfolio_totals(portfolio)
+    annual = portfolio.annual()
+    schedule = {
+        "standard": "ASC 842" if standard == "Both" else standard,
+        "ifrs16_totals": (portfolio_totals(build_portfolio(terms.assign(finance_model=True, classification="Finance"),
+                                                           as_of))
+                          if standard == "Both" else None),
+        "totals": totals,
+        "leases": portfolio.summary().astype({"commencement": str, "expiration": str}).to_dict(orient="records"),
+        "maturity": portfolio.maturity().to_dict(orient="records"),
+        "annual": annual.to_dict(orient="records"),
+        "issues": issues.to_dict(orient="records"),
+        "terms": terms_to_records(portfolio.terms),
+    }
+    return portfolio, issues, schedule
+
+
+def _apply_schedule(result: dict, schedule: dict):
+    """Overwrite portfolio figures with the computed ones.
+
+    When no lease could be scheduled the model's figures are kept and marked
+    as estimates, rather than replaced with zeros.
+    """
+    result["lease_schedule"] = schedule
+    totals = schedule["totals"]
+    if not totals["leases_scheduled"]:
+        result.setdefault("financial_analysis", {})["source"] = "model estimate"
+        return
+    result.setdefault("portfolio_summary", {}).update(
+        total_leases=totals["leases_scheduled"] + len(schedule["issues"]),
+        total_annual_obligation=f"${totals['next_12m_payments']:,.0f}",
+        upcoming_expirations=totals["expiring_12_months"],
+    )
+    result["financial_analysis"] = {
+        "total_commitment": f"${totals['remaining_commitment']:,.0f}",
+        "annual_breakdown": [{"year": str(a["year"]), "obligation": f"${a['payments']:,.0f}"} for a in schedule["annual"]],
+        "lease_liability_estimate": f"${totals['lease_liability']:,.0f}",
+        "right_of_use_asset": f"${totals['rou_asset']:,.0f}",
+        "source": f"computed ({schedule['standard']})",
+    }
+
+
+def analyze_leases(config: dict, api_key: str, terms_table: pd.DataFrame | None = None, as_of=None) -> dict:
+    """Analyse lease documents and extract key data.
+
+    Liabilities, ROU assets, and maturities are always computed locally
+    (``engines.lease_schedule``). Free-text leases are abstracted by the
+    model, including their schedule terms; an uploaded ``terms_table`` is
+    scheduled directly and the model only comments on the computed figures.
+    """
+    if terms_table is not None:
+        terms = normalize_lease_terms(terms_table, config["discount_rate"], config["standard"])
+        portfolio, issues, schedule = _schedule_results(terms, as_of, config["standard"])
+        prompt = COMMENTARY_PROMPT.format(schedule=schedule_for_prompt(portfolio, issues), **config)
+        result = _call_claude(prompt, api_key)
+        result["lease_abstractions"] = []
+    else:
+        result = _call_claude(LEASE_PROMPT.format(**config), api_key)
+        terms = terms_from_abstractions(result.get("lease_abstractions", []), config["discount_rate"], config["standard"])
+        _, _, schedule = _schedule_results(terms, as_of, config["standard"])
+    _apply_schedule(result, schedule)
+    return result
@@ -0,0 +1,356 @@
+"""Deterministic IFRS 16 / ASC 842 lease liability and ROU asset schedules, vectorized per portfolio."""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+COLUMN_ALIASES = {
+    "lease_id": "lease_id", "lease id": "lease_id", "lease": "lease_id", "id": "lease_id", "contract": "lease_id",
+    "description": "description", "asset": "description", "property": "description", "property_address": "description",
+    "commencement": "commencement", "commencement_date": "commencement", "commencement date": "commencement",
+    "start": "commencement", "start_date": "commencement", "start date": "commencement",
+    "term": "term_months", "term_months": "term_months", "term months": "term_months", "months": "term_months",
+    "payment": "payment", "payment_amount": "payment", "payment amount": "payment", "base_rent": "payment",
+    "base rent": "payment", "monthly_payment": "payment", "monthly payment": "payment", "rent": "payment",
+    "frequency": "frequency", "payment_frequency": "frequency", "payment frequency": "frequency",
+    "timing": "timing", "payment_timing": "timing", "payment timing": "timing",
+    "escalation": "escalation_pct", "escalation_pct": "escalation_pct", "escalation %": "escalation_pct",
+    "escalation_rate": "escalation_pct", "escalation_interval_months": "escalation_interval_months",
+    "escalation_interval": "escalation_interval_months", "free_rent_months": "free_rent_months",
+    "free rent months": "free_rent_months", "incentives": "incentives", "lease_incentives": "incentives",
+    "ti_allowance": "incentives", "initial_direct_costs": "initial_direct_costs", "idc": "initial_direct_costs",
+    "prepaid": "prepaid", "prepaid_rent": "prepaid", "end_of_term_payment": "end_of_term_payment",
+    "purchase_option_price": "end_of_term_payment", "residual_value_guarantee": "end_of_term_payment",
+    "discount_rate": "discount_rate", "discount rate": "discount_rate", "ibr": "discount_rate", "rate": "discount_rate",
+    "classification": "classification", "lease_type": "lease_type", "type": "lease_type",
+}
+REQUIRED_COLUMNS = ["commencement", "term_months", "payment"]
+FREQUENCY_MONTHS = {"monthly": 1, "month": 1, "quarterly": 3, "quarter": 3, "semi-annual": 6, "semiannual": 6,
+                    "semi-annually": 6, "half-yearly": 6, "annual": 12, "annually": 12, "yearly": 12, "year": 12}
+DEFAULT_ESCALATION_INTERVAL = 12
+SHORT_TERM_MONTHS = 12
+MATURITY_BUCKETS = ["Year 1", "Year 2", "Year 3", "Year 4", "Year 5", "After 5 years"]
+MAX_TERM_MONTHS = 1200
+
+
+def _number(series: pd.Series, default: float = 0.0) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(default)
+    text = series.astype(object).where(series.notna(), "").astype(str)
+    return pd.to_numeric(text.str.replace(r"[$,%\s]", "", regex=True), errors="coerce").fillna(default)
+
+
+def _rate(series: pd.Series) -> pd.Series:
+    """Percent columns may hold 5 or 0.05; a column whose values are all <= 0.5 is read as fractions."""
+    values = _number(series)
+    return values if values.abs().max() <= 0.5 else values / 100
+
+
+def _frequency(series: pd.Series) -> pd.Series:
+    text = series.astype(object).where(series.notna(), "").astype(str).str.strip().str.lower()
+    months = pd.to_numeric(text, errors="coerce")
+    return months.fillna(text.map(FREQUENCY_MONTHS)).fillna(1).clip(1, 12).astype(int)
+
+
+def normalize_lease_terms(df: pd.DataFrame, default_rate: float, standard: str = "IFRS 16") -> pd.DataFrame:
+    """Map an abstracted-terms table (or LLM ``schedule_terms``) onto the columns the schedule needs.
+
+    ``default_rate`` (percent) applies to leases without their own discount
+    rate. Rows that cannot be scheduled keep ``issue`` text instead of being
+    dropped, so gaps are visible.
+    """
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Lease terms need {', '.join(missing)} column(s).")
+
+    def col(name, default=""):
+        return df[name] if name in df.columns else pd.Series(default, index=df.index)
+
+    terms = pd.DataFrame({
+        "lease_id": col("lease_id").astype(object).where(col("lease_id").notna(), "").astype(str),
+        "description": col("description").astype(object).where(col("description").notna(), "").astype(str),
+        "commencement": pd.to_datetime(col("commencement"), errors="coerce", format="mixed"),
+        "term_months": _number(col("term_months")).round().astype(int),
+        "payment": _number(col("payment")),
+        "frequency_months": _frequency(col("frequency", "monthly")),
+        "in_arrears": col("timing", "advance").astype(str).str.lower().str.contains("arrear"),
+        "escalation_pct": _rate(col("escalation_pct", 0)),
+        "escalation_interval_months": _number(col("escalation_interval_months", DEFAULT_ESCALATION_INTERVAL),
+                                              DEFAULT_ESCALATION_INTERVAL).clip(lower=1).astype(int),
+        "free_rent_months": _number(col("free_rent_months", 0)).clip(lower=0).astype(int),
+        "incentives": _number(col("incentives", 0)),
+        "initial_direct_costs": _number(col("initial_direct_costs", 0)),
+        "prepaid": _number(col("prepaid", 0)),
+        "end_of_term_payment": _number(col("end_of_term_payment", 0)),
+        "discount_rate": _rate(col("discount_rate", np.nan)) if "discount_rate" in df.columns else np.nan,
+    })
+    terms["discount_rate"] = terms["discount_rate"].where(terms["discount_rate"] > 0, default_rate / 100)
+    empty_ids = terms["lease_id"].str.strip() == ""
+    terms.loc[empty_ids, "lease_id"] = [f"Lease {i + 1}" for i in terms.index[empty_ids]]
+
+    classification = col("classification").astype(object).where(col("classification").notna(), "").astype(str)
+    if standard.upper().startswith("IFRS"):
+        # IFRS 16 has a single lessee model: every lease is accounted for like a finance lease.
+        terms["finance_model"] = True
+    else:
+        terms["finance_model"] = classification.str.contains("finance", case=False)
+    terms["classification"] = np.where(terms["finance_model"], "Finance", "Operating")
+
+    issue = pd.Series("", index=terms.index)
+    issue = issue.mask(terms["commencement"].isna(), "missing commencement date")
+    issue = issue.mask((terms["term_months"] <= 0) | (terms["term_months"] > MAX_TERM_MONTHS), "missing or implausible term")
+    issue = issue.mask(terms["payment"] <= 0, "missing payment amount")
+    terms["issue"] = issue
+    return terms
+
+
+def terms_from_abstractions(abstractions: list[dict], default_rate: float, standard: str) -> pd.DataFrame:
+    """Schedule terms from the model's lease abstractions (each carries a ``schedule_terms`` object)."""
+    rows = []
+    for a in abstractions:
+        row = dict(a.get("schedule_terms") or {})
+        row.setdefault("lease_id", a.get("lease_id", ""))
+        row.setdefault("description", a.get("property_address", ""))
+        row.setdefault("classification", a.get("classification", ""))
+        rows.append(row)
+    frame = pd.DataFrame(rows).reindex(columns=list(dict.fromkeys(
+        ["lease_id", "description", "classification", *REQUIRED_COLUMNS, *(r for row in rows for r in row)])))
+    return normalize_lease_terms(frame, default_rate, standard)
+
+
+def terms_to_records(terms: pd.DataFrame) -> list[dict]:
+    """JSON-safe normalized terms, so a result can be re-scheduled with ``portfolio_from_records``."""
+    return terms.assign(commencement=terms["commencement"].dt.strftime("%Y-%m-%d")).to_dict(orient="records")
+
+
+def portfolio_from_records(records: list[dict], as_of=None) -> "LeasePortfolio":
+    """Rebuild the monthly schedules from ``terms_to_records`` output (e.g. for a schedule download)."""
+    terms = pd.DataFrame(records)
+    return build_portfolio(terms.assign(commencement=pd.to_datetime(terms["commencement"])), as_of)
+
+
+def _expiration(commencement: pd.Series, term_months: pd.Series) -> pd.DatetimeIndex:
+    """Day before the same day-of-month ``term_months`` later, clipped to month end."""
+    start = commencement.to_numpy().astype("datetime64[D]")
+    month = start.astype("datetime64[M]")
+    target = month + term_months.to_numpy()
+    days_in_month = ((target + 1).astype("datetime64[D]") - target.astype("datetime64[D]")).astype(int)
+    day = np.minimum((start - month.astype("datetime64[D]")).astype(int), days_in_month - 1)
+    return pd.DatetimeIndex(target.astype("datetime64[D]") + day - 1)
+
+
+def _months_between(start: pd.Series, end: pd.Timestamp) -> np.ndarray:
+    return ((end.year - start.dt.year) * 12 + (end.month - start.dt.month)).to_numpy()
+
+
+@dataclass
+class LeasePortfolio:
+    """Monthly schedules for every schedulable lease, as lease x month arrays.
+
+    Column ``m`` of each array is month ``m`` after commencement; months past
+    a lease's term are zero. Balances are closing balances for the month.
+    """
+    terms: pd.DataFrame
+    as_of: pd.Timestamp
+    payments: np.ndarray
+    interest: np.ndarray
+    liability: np.ndarray
+    rou_amortization: np.ndarray
+    rou: np.ndarray
+    lease_cost: np.ndarray
+    opening_liability: np.ndarray
+    opening_rou: np.ndarray
+    elapsed: np.ndarray
+
+    def summary(self) -> pd.DataFrame:
+        """One row per lease: initial measurement and carrying amounts at the reporting date."""
+        t, n = self.terms, len(self.terms)
+        rows = np.arange(n)
+        e = self.elapsed
+        commenced = e >= 0
+        ended = e >= t["term_months"].to_numpy()
+        idx = np.clip(e - 1, 0, None)
+        liability_now = np.where(e <= 0, self.opening_liability, self.liability[rows, np.minimum(idx, self.liability.shape[1] - 1)])
+        rou_now = np.where(e <= 0, self.opening_rou, self.rou[rows, np.minimum(idx, self.rou.shape[1] - 1)])
+        idx_12 = np.clip(e + 11, 0, self.liability.shape[1] - 1)
+        liability_12 = np.where(e + 12 >= t["term_months"].to_numpy(), 0.0, self.liability[rows, idx_12])
+        liability_now = np.where(commenced & ~ended, liability_now, 0.0)
+        rou_now = np.where(commenced & ~ended, rou_now, 0.0)
+        current = np.where(commenced & ~ended, liability_now - liability_12, 0.0)
+        end = _expiration(t["commencement"], t["term_months"])
+        return pd.DataFrame({
+            "lease_id": t["lease_id"], "description": t["description"], "classification": t["classification"],
+            "commencement": t["commencement"].dt.date, "expiration": end.date, "term_months": t["term_months"],
+            "discount_rate_pct": (t["discount_rate"] * 100).round(3),
+            "status": np.where(~commenced, "Not commenced", np.where(ended, "Expired", "Active")),
+            "short_term": t["term_months"] <= SHORT_TERM_MONTHS,
+            "total_payments": self.payments.sum(axis=1).round(2),
+            "initial_liability": self.opening_liability.round(2), "initial_rou_asset": self.opening_rou.round(2),
+            "total_interest": self.interest.sum(axis=1).round(2),
+            "liability": liability_now.round(2), "current_liability": current.round(2),
+            "non_current_liability": (liability_now - current).round(2), "rou_asset": rou_now.round(2),
+            "remaining_months": np.clip(t["term_months"].to_numpy() - np.clip(e, 0, None), 0, None),
+        })
+
+    def maturity(self) -> pd.DataFrame:
+        """Undiscounted remaining payments by year after the reporting date, reconciled to the liability."""
+        m = np.arange(self.payments.shape[1])
+        year = (m[None, :] - self.elapsed[:, None]) // 12
+        remaining = np.where(year >= 0, self.payments, 0.0)
+        totals = [remaining[year == b].sum() for b in range(5)] + [remaining[year >= 5].sum()]
+        liability = self.summary()["liability"].sum()
+        frame = pd.DataFrame({"bucket": MATURITY_BUCKETS, "undiscounted_payments": np.round(totals, 2)})
+        total = float(np.sum(totals))
+        # Payments of leases not yet commenced are commitments, not part of the recognized liability.
+        not_commenced = float(remaining[self.elapsed < 0].sum())
+        extra = pd.DataFrame({
+            "bucket": ["Total undiscounted", "Less: not yet commenced", "Less: imputed interest", "Lease liability"],
+            "undiscounted_payments": np.round([total, -not_commenced, -(total - not_commenced - liability), liability], 2),
+        })
+        return pd.concat([frame, extra], ignore_index=True)
+
+    def annual(self) -> pd.DataFrame:
+        """Contractual payments, interest, and lease cost per calendar year across the portfolio."""
+        start = self.terms["commencement"].dt.year.to_numpy() * 12 + self.terms["commencement"].dt.month.to_numpy() - 1
+        year = (start[:, None] + np.arange(self.payments.shape[1])[None, :]) // 12
+        active = np.arange(self.payments.shape[1])[None, :] < self.terms["term_months"].to_numpy()[:, None]
+        years = np.unique(year[active])
+        frame = pd.DataFrame({"year": years})
+        for name, values in (("payments", self.payments), ("interest", self.interest), ("lease_cost", self.lease_cost)):
+            sums = pd.Series(values[active]).groupby(year[active]).sum()
+            frame[name] = sums.reindex(years).to_numpy().round(2)
+        return frame
+
+    def schedule_frame(self, lease_ids: list[str] | None = None) -> pd.DataFrame:
+        """Long-format monthly schedule (one row per lease-month) for display or download."""
+        keep = np.ones(len(self.terms), bool) if lease_ids is None else self.terms["lease_id"].isin(lease_ids).to_numpy()
+        term = self.terms["term_months"].to_numpy()[keep]
+        rows, months = np.nonzero(np.arange(self.payments.shape[1])[None, :] < term[:, None])
+        comm = self.terms["commencement"].to_numpy()[keep]
+        period = pd.PeriodIndex(pd.DatetimeIndex(comm[rows]), freq="M") + months
+        pick = lambda a: a[keep][rows, months].round(2)
+        opening = np.where(months == 0, self.opening_liability[keep][rows], self.liability[keep][rows, np.maximum(months - 1, 0)])
+        return pd.DataFrame({
+            "lease_id": self.terms["lease_id"].to_numpy()[keep][rows], "month": months + 1, "period": period.astype(str),
+            "opening_liability": opening.round(2), "payment": pick(self.payments), "interest": pick(self.interest),
+            "closing_liability": pick(self.liability), "rou_amortization": pick(self.rou_amortization),
+            "rou_asset": pick(self.rou), "lease_cost": pick(self.lease_cost),
+        })
+
+
+def build_portfolio(terms: pd.DataFrame, as_of=None) -> LeasePortfolio:
+    """Compute liability, ROU asset, interest and cost schedules for every lease without an ``issue``.
+
+    Rates are annual, applied monthly (rate / 12). Payments due in advance
+    reduce the balance before the month's interest accrues; payments in
+    arrears after. Escalations compound every ``escalation_interval_months``
+    (index-linked rent is held at its commencement level, as both standards
+    require). Finance-model leases amortize the ROU asset straight-line;
+    ASC 842 operating leases recognize a straight-line single lease cost and
+    the ROU asset absorbs the difference from interest.
+    """
+    terms = terms[terms["issue"] == ""].reset_index(drop=True)
+    as_of = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp.today().normalize()
+    n = len(terms)
+    term = terms["term_months"].to_numpy()
+    width = int(term.max()) if n else 1
+    m = np.arange(width)[None, :]
+    term_c = term[:, None]
+    freq = terms["frequency_months"].to_numpy()[:, None]
+    arrears = terms["in_arrears"].to_numpy()[:, None]
+    active = m < term_c
+
+    due = np.where(arrears, ((m + 1) % freq == 0) | (m == term_c - 1), m % freq == 0) & active
+    steps = m // terms["escalation_interval_months"].to_numpy()[:, None]
+    amount = terms["payment"].to_numpy()[:, None] * (1 + terms["escalation_pct"].to_numpy()[:, None]) ** steps
+    free = m < terms["free_rent_months"].to_numpy()[:, None]
+    payments = np.where(due & ~free, amount, 0.0)
+    payments += np.where(m == term_c - 1, terms["end_of_term_payment"].to_numpy()[:, None], 0.0)
+
+    r = terms["discount_rate"].to_numpy() / 12
+    v = 1 / (1 + r[:, None])
+    exponent = np.where(arrears, m + 1, m)
+    opening_liability = (payments * v ** exponent).sum(axis=1)
+
+    pay_start = np.where(arrears, 0.0, payments)
+    pay_end = np.where(arrears, payments, 0.0)
+    interest = np.zeros_like(payments)
+    liability = np.zeros_like(payments)
+    balance = opening_liability.copy()
+    for t in range(width):
+        balance = balance - pay_start[:, t]
+        interest[:, t] = np.where(active[:, t], balance * r, 0.0)
+        balance = balance + interest[:, t] - pay_end[:, t]
+        liability[:, t] = np.where(active[:, t], balance, 0.0)
+    liability[np.abs(liability) < 0.005] = 0.0
+
+    opening_rou = opening_liability + terms["prepaid"].to_numpy() + terms["initial_direct_costs"].to_numpy() - terms["incentives"].to_numpy()
+    finance = terms["finance_model"].to_numpy()[:, None]
+    straight_line = np.where(active, opening_rou[:, None] / term_c, 0.0)
+    single_cost = (payments.sum(axis=1) + terms["prepaid"].to_numpy() + terms["initial_direct_costs"].to_numpy()
+                   - terms["incentives"].to_numpy()) / term
+    operating_amort = np.where(active, single_cost[:, None] - interest, 0.0)
+    rou_amortization = np.where(finance, straight_line, operating_amort)
+    rou = np.where(active, opening_rou[:, None] - np.cumsum(rou_amortization, axis=1), 0.0)
+    rou[np.abs(rou) < 0.005] = 0.0
+    lease_cost = np.where(finance, interest + straight_line, np.where(active, single_cost[:, None], 0.0))
+
+    elapsed = _months_between(terms["commencement"], as_of) if n else np.zeros(0, int)
+    return LeasePortfolio(terms, as_of, payments, interest, liability, rou_amortization, rou, lease_cost,
+                          opening_liability, opening_rou, elapsed)
+
+
+def portfolio_totals(portfolio: LeasePortfolio, horizon_months: int = 12) -> dict:
+    """Headline figures for the portfolio at the reporting date."""
+    summary = portfolio.summary()
+    m = np.arange(portfolio.payments.shape[1])[None, :]
+    e = portfolio.elapsed[:, None]
+    next_year = portfolio.payments[(m >= e) & (m < e + horizon_months)].sum()
+    maturity = portfolio.maturity()
+    active = summary["status"] == "Active"
+    expiring = active & (summary["remaining_months"] <= horizon_months)
+    return {
+        "as_of": portfolio.as_of.date().isoformat(),
+        "leases_scheduled": int(len(summary)),
+        "active_leases": int(active.sum()),
+        "not_commenced": int((summary["status"] == "Not commenced").sum()),
+        "short_term_leases": int((summary["short_term"] & active).sum()),
+        "expiring_12_months": int(expiring.sum()),
+        "lease_liability": round(float(summary["liability"].sum()), 2),
+        "current_liability": round(float(summary["current_liability"].sum()), 2),
+        "non_current_liability": round(float(summary["non_current_liability"].sum()), 2),
+        "rou_asset": round(float(summary["rou_asset"].sum()), 2),
+        "next_12m_payments": round(float(next_year), 2),
+        "remaining_commitment": float(maturity.loc[maturity["bucket"] == "Total undiscounted", "undiscounted_payments"].iloc[0]),
+        "initial_liability": round(float(summary["initial_liability"].sum()), 2),
+        "initial_rou_asset": round(float(summary["initial_rou_asset"].sum()), 2),
+    }
+
+
+def schedule_for_prompt(portfolio: LeasePortfolio, issues: pd.DataFrame, top_n: int = 25) -> str:
+    """Computed figures the model comments on: totals, maturity, largest leases, expiries, and gaps."""
+    totals = portfolio_totals(portfolio)
+    summary = portfolio.summary()
+    lines = ["COMPUTED LEASE ACCOUNTING (deterministic; treat these figures as authoritative):"]
+    lines += [f"- {k.replace('_', ' ')}: {v:,}" if isinstance(v, (int, float)) else f"- {k.replace('_', ' ')}: {v}"
+              for k, v in totals.items()]
+    lines += ["", "MATURITY ANALYSIS (undiscounted):"]
+    lines += [f"- {r.bucket}: {r.undiscounted_payments:,.0f}" for r in portfolio.maturity().itertuples()]
+    cols = ["lease_id", "description", "classification", "commencement", "expiration", "discount_rate_pct",
+            "status", "liability", "rou_asset", "remaining_months"]
+    top = summary.sort_values("liability", ascending=False).head(top_n)
+    lines += ["", f"LARGEST LEASES BY LIABILITY (top {len(top)} of {len(summary):,}):", " | ".join(cols)]
+    lines += [" | ".join(str(v) for v in row) for row in top[cols].itertuples(index=False)]
+    expiring = summary[(summary["status"] == "Active") & (summary["remaining_months"] <= 12)].sort_values("expiration")
+    if len(expiring):
+        lines += ["", f"EXPIRING WITHIN 12 MONTHS ({len(expiring):,}):"]
+        lines += [f"- {r.lease_id} ({r.description}) expires {r.expiration}" for r in expiring.head(top_n).itertuples()]
+    if len(issues):
+        lines += ["", f"LEASES THAT COULD NOT BE SCHEDULED ({len(issues):,}):"]
+        lines += [f"- {r.lease_id}: {r.issue}" for r in issues.head(top_n).itertuples()]
+    return "\n".join(lines)
+
@@ -0,0 +1,241 @@
+"""Monthly-resolution cash flows with exact payback, IRR and MIRR, vectorized across scenarios."""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from engines.roi_engine import ProjectInputs, ScenarioResult
+
+# IRR search bracket, as annual rates: -99% to +100,000%.
+IRR_BRACKET = (-0.99, 1000.0)
+IRR_ITERATIONS = 80
+IRR_TOLERANCE = 1e-10
+# Rows whose cash flows change sign more than once are scanned at this many rates to count their IRRs.
+IRR_SCAN_POINTS = 256
+
+
+@dataclass
+class MonthlyScenarioResult(ScenarioResult):
+    """ScenarioResult computed month by month, plus exact payback and return metrics.
+
+    Yearly fields equal ``calculate_scenario``'s. ``npv`` discounts each
+    month at the monthly equivalent of the discount rate, and
+    ``payback_month`` is ``ceil(payback_months)``.
+    """
+    monthly_cash_flow: list[float] | None = None  # index 0 = initial investment at t=0, then months 1..N
+    cumulative_cash_flow: list[float] | None = None
+    payback_months: float | None = None  # interpolated within the month
+    irr_pct: float | None = None  # annualized; the lowest one when irr_count > 1
+    irr_count: int | None = None  # IRRs found inside IRR_BRACKET
+    mirr_pct: float | None = None  # annualized
+
+
+def _field(inputs: ProjectInputs, values: dict, name: str, n: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(values.get(name, getattr(inputs, name)), dtype=float), (n,))
+
+
+def monthly_cash_flows(inputs: ProjectInputs, values: dict[str, np.ndarray] | None = None,
+                       revenue_multiplier=1.0, cost_multiplier=1.0) -> dict[str, np.ndarray]:
+    """Cash flows per scenario (rows) and month (columns 0..12*years).
+
+    Month 0 holds the initial investment. Month m earns revenue from
+    ``revenue_start_month`` on, with growth stepping at each project year as in
+    ``calculate_scenario``, and carries 1/12 of that year's operating cost, so
+    yearly sums reproduce the annual model. ``values`` maps ProjectInputs
+    fields to per-scenario arrays; multipliers may be arrays too.
+    """
+    values = values or {}
+    n = max([len(np.atleast_1d(v)) for v in values.values()]
+            + [np.size(revenue_multiplier), np.size(cost_multiplier)])
+    rev_mult = np.broadcast_to(np.asarray(revenue_multiplier, dtype=float), (n,))
+    cost_mult = np.broadcast_to(np.asarray(cost_multiplier, dtype=float), (n,))[:, None]
+
+    qualifying = np.floor(_field(inputs, values, "total_addressable_market", n)
+                          * _field(inputs, values, "qualifying_ratio_pct", n) / 100)
+    customers = np.maximum(1, np.floor(qualifying * _field(inputs, values, "hit_rate_pct", n) / 100 * rev_mult))
+    monthly_base = (customers * _field(inputs, values, "avg_annual_license", n) / 12)[:, None]
+    start = np.round(_field(inputs, values, "revenue_start_month", n))[:, None]
+    growth = _field(inputs, values, "annual_revenue_growth_pct", n)[:, None] / 100
+    cost_growth = _field(inputs, values, "annual_cost_growth_pct", n)[:, None] / 100
+
+    month = np.arange(1, inputs.projection_years * 12 + 1)[None, :]
+    year = np.ceil(month / 12)
+    growth_years = np.maximum(year - np.ceil(start / 12), 0)
+    revenue = np.where(month >= start, monthly_base * (1 + growth) ** growth_years, 0.0)
+    operating = (_field(inputs, values, "annual_operating_cost", n)[:, None] / 12
+                 * (1 + cost_growth) ** (year - 1) * cost_mult)
+    initial = _field(inputs, values, "initial_investment", n)[:, None] * cost_mult
+
+    cash = np.concatenate([-initial, revenue - operating], axis=1)
+    return {"customers": customers, "revenue": revenue, "operating_cost": operating,
+            "initial_investment": initial[:, 0], "cash_flow": cash}
+
+
+def exact_payback(cash: np.ndarray) -> np.ndarray:
+    """Months until cumulative cash first reaches zero, interpolated within the month; NaN if never."""
+    cumulative = np.cumsum(cash, axis=1)
+    paid = cumulative >= 0
+    has = paid.any(axis=1) & (cumulative[:, 0] < 0)
+    first = paid.argmax(axis=1)
+    rows = np.arange(len(cash))
+    before = cumulative[rows, np.maximum(first - 1, 0)]
+    flow = cash[rows, first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(flow > 0, -before / flow, 1.0)
+    payback = (first - 1) + np.clip(fraction, 0, 1)
+    payback = np.where(cumulative[:, 0] >= 0, 0.0, payback)
+    return np.where(has | (cumulative[:, 0] >= 0), payback, np.nan)
+
+
+def _npv_at(cash: np.ndarray, log_growth: np.ndarray) -> np.ndarray:
+    """NPV of each row at a per-row monthly rate given as ln(1 + rate), via Horner's rule."""
+    discount = np.exp(-log_growth)
+    total = np.zeros(len(cash))
+    for column in cash.T[::-1]:
+        total = total * discount + column
+    return total
+
+
+def _sign_changes(cash: np.ndarray) -> np.ndarray:
+    """Sign changes per row of the cash flows, skipping zero months (Descartes' bound on the IRR count)."""
+    signs = np.sign(cash)
+    last_nonzero = np.maximum.accumulate(np.where(signs != 0, np.arange(cash.shape[1]), 0), axis=1)
+    signs = np.take_along_axis(signs, last_nonzero, axis=1)
+    return (signs[:, 1:] * signs[:, :-1] < 0).sum(axis=1)
+
+
+def irr_with_count(cash: np.ndarray, bracket: tuple[float, float] = IRR_BRACKET) -> tuple[np.ndarray, np.ndarray]:
+    """Annualized IRR per row and the number of IRRs found inside ``bracket``.
+
+    Cash flows that change sign at most once have at most one IRR, found by
+    bisection over the whole bracket. Rows with more sign changes are
+    scanned at ``IRR_SCAN_POINTS`` rates first: the count is the number of
+    NPV sign flips seen, and the IRR returned is the lowest one. Rows with no
+    flip (including an even number of roots closer together than the scan
+    spacing) return NaN with a count of 0.
+    """
+    cash = np.atleast_2d(cash)
+    lo = np.full(len(cash), np.log1p(bracket[0]) / 12)
+    hi = np.full(len(cash), np.log1p(bracket[1]) / 12)
+    count = (np.sign(_npv_at(cash, lo)) * np.sign(_npv_at(cash, hi)) < 0).astype(int)
+    multi = _sign_changes(cash) > 1
+    if multi.any():
+        rates = np.linspace(lo[0], hi[0], IRR_SCAN_POINTS)
+        sub = cash[multi]
+        npvs = np.stack([_npv_at(sub, np.full(len(sub), rate)) for rate in rates], axis=1)
+        flips = np.sign(npvs[:, 1:]) * np.sign(npvs[:, :-1]) < 0
+        first = flips.argmax(axis=1)
+        count[multi] = flips.sum(axis=1)
+        lo[multi], hi[multi] = rates[first], rates[first + 1]
+    valid = count > 0
+    f_lo = _npv_at(cash, lo)
+    for _ in range(IRR_ITERATIONS):
+        mid = (lo + hi) / 2
+        f_mid = _npv_at(cash, mid)
+        same = np.sign(f_mid) == np.sign(f_lo)
+        lo, f_lo = np.where(same, mid, lo), np.where(same, f_mid, f_lo)
+        hi = np.where(same, hi, mid)
+        if np.all(hi - lo < IRR_TOLERANCE):
+            break
+    return np.where(valid, np.expm1((lo + hi) / 2 * 12), np.nan), count
+
+
+def irr(cash: np.ndarray, bracket: tuple[float, float] = IRR_BRACKET) -> np.ndarray:
+    """Annualized IRR per row by bracketed bisection on ln(1 + monthly rate).
+
+    All rows advance together, each iteration being one Horner pass over the
+    months, so thousands of scenarios solve in a few milliseconds. Rows with
+    no IRR return NaN; rows with several return the lowest (see
+    ``irr_with_count`` to find those rows).
+    """
+    return irr_with_count(cash, bracket)[0]
+
+
+def mirr(cash: np.ndarray, finance_rate_pct: float, reinvest_rate_pct: float) -> np.ndarray:
+    """Annualized MIRR per row: outflows discounted at the finance rate, inflows compounded at the reinvestment rate."""
+    cash = np.atleast_2d(cash)
+    months = cash.shape[1] - 1
+    t = np.arange(months + 1)
+    finance = (1 + finance_rate_pct / 100) ** (-t / 12)
+    reinvest = (1 + reinvest_rate_pct / 100) ** ((months - t) / 12)
+    pv_out = -(np.minimum(cash, 0) * finance).sum(axis=1)
+    fv_in = (np.maximum(cash, 0) * reinvest).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        monthly = (fv_in / pv_out) ** (1 / months) - 1
+    return np.where((pv_out > 0) & (fv_in > 0) & (months > 0), (1 + monthly) ** 12 - 1, np.nan)
+
+
+def evaluate_monthly(inputs: ProjectInputs, values: dict[str, np.ndarray] | None = None,
+                     revenue_multiplier=1.0, cost_multiplier=1.0,
+                     reinvest_rate_pct: float | None = None) -> dict[str, np.ndarray]:
+    """NPV, IRR, MIRR, exact payback and totals for every scenario row in one pass.
+
+    MIRR finances and reinvests at the discount rate unless
+    ``reinvest_rate_pct`` is given.
+    """
+    flows = monthly_cash_flows(inputs, values, revenue_multiplier, cost_multiplier)
+    cash = flows["cash_flow"]
+    t = np.arange(cash.shape[1])
+    discount = (1 + inputs.discount_rate_pct / 100) ** (-t / 12)
+    total_revenue = flows["revenue"].sum(axis=1)
+    total_costs = flows["operating_cost"].sum(axis=1) + flows["initial_investment"]
+    total_profit = total_revenue - total_costs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(total_costs > 0, total_profit / total_costs * 100, 0.0)
+    reinvest = inputs.discount_rate_pct if reinvest_rate_pct is None else reinvest_rate_pct
+    irr_rate, irr_count = irr_with_count(cash)
+    return {
+        **flows,
+        "npv": cash @ discount,
+        "irr_pct": irr_rate * 100,
+        "irr_count": irr_count,
+        "mirr_pct": mirr(cash, inputs.discount_rate_pct, reinvest) * 100,
+        "payback_months": exact_payback(cash),
+        "total_revenue": total_revenue, "total_costs": total_costs, "total_profit": total_profit, "roi_pct": roi,
+    }
+
+
+def _optional(value: float, digits: int) -> float | None:
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def calculate_monthly_scenario(inputs: ProjectInputs, revenue_multiplier: float = 1.0, cost_multiplier: float = 1.0,
+                               label: str = "Base", reinvest_rate_pct: float | None = None) -> MonthlyScenarioResult:
+    """Monthly counterpart of ``calculate_scenario`` with the same multipliers and yearly fields."""
+    r = evaluate_monthly(inputs, None, revenue_multiplier, cost_multiplier, reinvest_rate_pct)
+    cash = r["cash_flow"][0]
+    yearly_revenue = r["revenue"][0].reshape(-1, 12).sum(axis=1)
+    yearly_costs = r["operating_cost"][0].reshape(-1, 12).sum(axis=1)
+    yearly_costs[0] += r["initial_investment"][0]
+    yearly_profit = yearly_revenue - yearly_costs
+    payback = r["payback_months"][0]
+    return MonthlyScenarioResult(
+        label=label,
+        yearly_revenue=yearly_revenue.round(2).tolist(),
+        yearly_costs=yearly_costs.round(2).tolist(),
+        yearly_profit=yearly_profit.round(2).tolist(),
+        cumulative_profit=np.cumsum(yearly_profit).round(2).tolist(),
+        total_revenue=round(float(r["total_revenue"][0]), 2),
+        total_costs=round(float(r["total_costs"][0]), 2),
+        total_profit=round(float(r["total_profit"][0]), 2),
+        roi_pct=round(float(r["roi_pct"][0]), 1),
+        npv=round(float(r["npv"][0]), 2),
+        payback_month=None if np.isnan(payback) else int(np.ceil(payback)),
+        customer_count=int(r["customers"][0]),
+        monthly_cash_flow=cash.round(2).tolist(),
+        cumulative_cash_flow=np.cumsum(cash).round(2).tolist(),
+        payback_months=_optional(payback, 2),
+        irr_pct=_optional(r["irr_pct"][0], 2),
+        irr_count=int(r["irr_count"][0]),
+        mirr_pct=_optional(r["mirr_pct"][0], 2),
+    )
+
+
+def run_all_monthly_scenarios(inputs: ProjectInputs,
+                              reinvest_rate_pct: float | None = None) -> dict[str, MonthlyScenarioResult]:
+    """Monthly versions of the optimistic, most likely, and pessimistic scenarios."""
+    return {
+        "optimistic": calculate_monthly_scenario(inputs, 1.3, 0.9, "Optimistic", reinvest_rate_pct),
+        "most_likely": calculate_monthly_scenario(inputs, 1.0, 1.0, "Most Likely", reinvest_rate_pct),
+        "pessimistic": calculate_monthly_scenario(inputs, 0.7, 1.15, "Pessimistic", reinvest_rate_pct),
+    }
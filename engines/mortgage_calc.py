@@ -0,0 +1,319 @@
+"""Local mortgage math: vectorized affordability grids, amortization, extra payments, and refinance break-even."""
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Rate adjustments (percentage points) by credit tier and loan term, relative to the 30-year market rate.
+CREDIT_RATE_ADJUSTMENT = {"800+": -0.25, "740-799": 0.0, "670-739": 0.375, "580-669": 1.0, "Below 580": 2.0}
+TERM_RATE_SPREAD = {10: -0.75, 15: -0.625, 20: -0.25, 30: 0.0}
+TERMS = (10, 15, 20, 30)
+DOWN_PCTS = (3.5, 5.0, 10.0, 15.0, 20.0, 25.0)
+RATE_STEPS = np.arange(-1.0, 1.01, 0.25)
+PRICE_POINTS = 9
+
+DEFAULT_MARKET_RATE = 6.75
+PROPERTY_TAX_RATE = 1.0      # % of price per year
+INSURANCE_RATE = 0.35        # % of price per year
+PMI_RATE = 0.5               # % of loan per year while down payment < 20%
+CLOSING_COST_PCT = 3.0       # % of price
+FRONT_END_DTI = 28.0         # comfortable: housing / gross income
+BACK_END_DTI = 36.0          # comfortable: housing + debts / gross income
+MAX_BACK_END_DTI = 43.0      # qualifying ceiling
+EMERGENCY_FUND_MONTHS = 6
+
+AMOUNT_RE = r"\$?\s*(\d[\d,]*(?:\.\d+)?)\s*([kKmM])?\b"
+
+
+def parse_amount(text) -> float:
+    """Sum the dollar amounts in free text, ignoring parenthesized breakdowns ("$850 (car $400, ...)")."""
+    if isinstance(text, (int, float)):
+        return float(text)
+    total = 0.0
+    for number, suffix in re.findall(AMOUNT_RE, re.sub(r"\([^)]*\)", "", str(text))):
+        total += float(number.replace(",", "")) * {"k": 1e3, "m": 1e6}.get(suffix.lower(), 1)
+    return total
+
+
+def parse_price_range(text) -> tuple[float, float]:
+    amounts = [parse_amount(f"{n}{s}") for n, s in re.findall(AMOUNT_RE, str(text))]
+    amounts = [a for a in amounts if a >= 10_000]
+    if not amounts:
+        return 0.0, 0.0
+    return min(amounts), max(amounts)
+
+
+def credit_adjustment(credit_score: str) -> float:
+    for tier, adjustment in CREDIT_RATE_ADJUSTMENT.items():
+        if str(credit_score).startswith(tier):
+            return adjustment
+    return 0.0
+
+
+@dataclass
+class MortgageInputs:
+    annual_income: float
+    monthly_debts: float
+    savings: float
+    market_rate: float = DEFAULT_MARKET_RATE
+    credit_adjustment: float = 0.0
+    price_low: float = 0.0
+    price_high: float = 0.0
+    tax_rate: float = PROPERTY_TAX_RATE
+    insurance_rate: float = INSURANCE_RATE
+    hoa_monthly: float = 0.0
+    closing_cost_pct: float = CLOSING_COST_PCT
+
+    @property
+    def monthly_income(self) -> float:
+        return self.annual_income / 12
+
+    def rate_for(self, term_years, step=0.0):
+        spread = np.vectorize(lambda t: TERM_RATE_SPREAD.get(int(t), 0.0))(term_years)
+        return self.market_rate + self.credit_adjustment + spread + step
+
+
+def inputs_from_config(config: dict, market_rate: float = DEFAULT_MARKET_RATE, **overrides) -> MortgageInputs:
+    """Parse the page's free-text profile fields into numbers."""
+    low, high = parse_price_range(config.get("price_range", ""))
+    return MortgageInputs(
+        annual_income=parse_amount(config.get("income", 0)),
+        monthly_debts=parse_amount(config.get("monthly_debts", 0)),
+        savings=parse_amount(config.get("savings", 0)),
+        market_rate=market_rate,
+        credit_adjustment=credit_adjustment(config.get("credit_score", "")),
+        price_low=low, price_high=high, **overrides,
+    )
+
+
+def monthly_payment(principal, annual_rate_pct, years):
+    """Level principal-and-interest payment; broadcasts over array arguments."""
+    principal, r, n = np.broadcast_arrays(np.asarray(principal, float), np.asarray(annual_rate_pct, float) / 1200,
+                                          np.asarray(years, float) * 12)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        level = principal * r / (1 - (1 + r) ** -n)
+    return np.where(r > 0, level, principal / n)
+
+
+def _price_points(inputs: MortgageInputs, count: int = PRICE_POINTS) -> np.ndarray:
+    low, high = inputs.price_low, inputs.price_high
+    if not low:
+        low = high = max(inputs.annual_income * 3.5, 100_000)
+    return np.linspace(low * 0.7, high * 1.3, count).round(-3)
+
+
+def affordability_grid(inputs: MortgageInputs, rate_steps=RATE_STEPS, terms=TERMS, down_pcts=DOWN_PCTS,
+                       prices=None) -> pd.DataFrame:
+    """Every rate x term x down-payment x price scenario in one broadcast pass; one row per scenario."""
+    prices = _price_points(inputs) if prices is None else np.asarray(prices, float)
+    step = np.asarray(rate_steps, float)[:, None, None, None]
+    term = np.asarray(terms, float)[None, :, None, None]
+    down = np.asarray(down_pcts, float)[None, None, :, None]
+    price = prices[None, None, None, :]
+
+    rate = inputs.rate_for(term, step)
+    loan = price * (1 - down / 100)
+    pi = monthly_payment(loan, rate, term)
+    tax = price * inputs.tax_rate / 1200
+    insurance = price * inputs.insurance_rate / 1200
+    pmi = np.where(down < 20, loan * PMI_RATE / 1200, 0.0)
+    housing = pi + tax + insurance + pmi + inputs.hoa_monthly
+    income = max(inputs.monthly_income, 1.0)
+    front = housing / income * 100
+    back = (housing + inputs.monthly_debts) / income * 100
+    cash = price * (down + inputs.closing_cost_pct) / 100
+    total_interest = pi * term * 12 - loan
+
+    shape = np.broadcast_shapes(rate.shape, down.shape, price.shape)
+    flat = lambda a: np.broadcast_to(a, shape).ravel()
+    frame = pd.DataFrame({
+        "rate_pct": flat(rate).round(3), "term_years": flat(term).astype(int), "down_pct": flat(down),
+        "price": flat(price), "loan": flat(loan).round(2), "principal_interest": flat(pi).round(2),
+        "tax": flat(tax).round(2), "insurance": flat(insurance).round(2), "pmi": flat(pmi).round(2),
+        "housing_payment": flat(housing).round(2), "front_dti_pct": flat(front).round(1),
+        "back_dti_pct": flat(back).round(1), "total_interest": flat(total_interest).round(2),
+        "cash_to_close": flat(cash).round(2),
+    })
+    funded = frame["cash_to_close"] <= inputs.savings
+    frame["qualifies"] = funded & (frame["back_dti_pct"] <= MAX_BACK_END_DTI)
+    frame["comfortable"] = funded & (frame["front_dti_pct"] <= FRONT_END_DTI) & (frame["back_dti_pct"] <= BACK_END_DTI)
+    return frame
+
+
+def max_price_grid(inputs: MortgageInputs, rate_steps=RATE_STEPS, terms=TERMS, down_pcts=DOWN_PCTS) -> pd.DataFrame:
+    """Highest price per rate x term x down payment, solved in closed form.
+
+    Monthly cost is linear in price, so the DTI ceiling gives the price
+    directly; the cash ceiling is savings / (down % + closing %).
+    """
+    step = np.asarray(rate_steps, float)[:, None, None]
+    term = np.asarray(terms, float)[None, :, None]
+    down = np.asarray(down_pcts, float)[None, None, :]
+    rate = inputs.rate_for(term, step)
+    loan_share = 1 - down / 100
+    per_dollar = (monthly_payment(loan_share, rate, term) + (inputs.tax_rate + inputs.insurance_rate) / 1200
+                  + np.where(down < 20, loan_share * PMI_RATE / 1200, 0.0))
+    income = inputs.monthly_income
+    cash_limit = inputs.savings / ((down + inputs.closing_cost_pct) / 100)
+
+    def dti_limit(front_pct, back_pct):
+        budget = np.minimum(front_pct / 100 * income, back_pct / 100 * income - inputs.monthly_debts) - inputs.hoa_monthly
+        return np.clip(budget, 0, None) / per_dollar
+
+    max_dti = dti_limit(MAX_BACK_END_DTI, MAX_BACK_END_DTI)
+    comfortable_dti = dti_limit(FRONT_END_DTI, BACK_END_DTI)
+    shape = np.broadcast_shapes(rate.shape, down.shape)
+    flat = lambda a: np.broadcast_to(a, shape).ravel()
+    return pd.DataFrame({
+        "rate_pct": flat(rate).round(3), "term_years": flat(term).astype(int), "down_pct": flat(down),
+        "max_price": flat(np.minimum(max_dti, cash_limit)).round(-2),
+        "comfortable_price": flat(np.minimum(comfortable_dti, cash_limit)).round(-2),
+        "limited_by": flat(np.where(cash_limit < comfortable_dti, "cash to close", "DTI")),
+    })
+
+
+def amortization_schedule(principal: float, annual_rate_pct: float, years: float, extra_monthly: float = 0.0) -> pd.DataFrame:
+    """Month-by-month schedule with an optional constant extra principal payment (closed form, no loop)."""
+    r = annual_rate_pct / 1200
+    n = int(round(years * 12))
+    scheduled = float(monthly_payment(principal, annual_rate_pct, years))
+    pay = scheduled + extra_monthly
+    k = np.arange(1, n + 1)
+    growth = (1 + r) ** k if r > 0 else np.ones(n)
+    balance = principal * growth - pay * ((growth - 1) / r if r > 0 else k)
+    paid_off = np.flatnonzero(balance <= 0.005)
+    months = int(paid_off[0]) + 1 if len(paid_off) else n
+    balance = np.clip(balance[:months], 0, None)
+    opening = np.concatenate([[principal], balance[:-1]])
+    interest = opening * r
+    payment = np.minimum(np.full(months, pay), opening + interest)
+    principal_paid = payment - interest
+    return pd.DataFrame({
+        "month": k[:months], "year": (k[:months] - 1) // 12 + 1, "opening_balance": opening.round(2),
+        "payment": payment.round(2), "interest": interest.round(2), "principal": principal_paid.round(2),
+        "extra": np.clip(payment - scheduled, 0, extra_monthly).round(2),
+        "closing_balance": (opening - principal_paid).clip(0).round(2),
+    })
+
+
+def _payoff(principal, annual_rate_pct, payment):
+    """Months to payoff and total interest for level payments; vectorized, exact final partial payment."""
+    r = np.asarray(annual_rate_pct, float) / 1200
+    payment = np.asarray(payment, float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = np.ceil(-np.log1p(-r * principal / payment) / np.log1p(r) - 1e-9)
+    g = (1 + r) ** (months - 1)
+    last = (principal * g - payment * (g - 1) / r) * (1 + r)
+    return months, payment * (months - 1) + last - principal
+
+
+def extra_payment_table(principal: float, annual_rate_pct: float, years: float, extras=None) -> pd.DataFrame:
+    """Payoff time and interest saved for a range of extra monthly payments."""
+    extras = np.asarray([0, 100, 200, 300, 500, 750, 1000] if extras is None else extras, float)
+    scheduled = float(monthly_payment(principal, annual_rate_pct, years))
+    months, interest = _payoff(principal, annual_rate_pct, scheduled + extras)
+    base_months, base_interest = _payoff(principal, annual_rate_pct, scheduled)
+    return pd.DataFrame({
+        "extra_monthly": extras, "payment": (scheduled + extras).round(2), "payoff_months": months.astype(int),
+        "months_saved": (base_months - months).astype(int), "total_interest": interest.round(2),
+        "interest_saved": (base_interest - interest).round(2),
+    })
+
+
+def extra_for_payoff(principal: float, annual_rate_pct: float, years: float, target_years: float) -> float:
+    """Extra monthly payment that retires the loan in ``target_years``."""
+    return float(monthly_payment(principal, annual_rate_pct, target_years) - monthly_payment(principal, annual_rate_pct, years))
+
+
+def refinance_breakeven(balance: float, current_rate: float, remaining_months: int, new_rates,
+                        new_term_years: float = 30, closing_costs: float = 0.0) -> pd.DataFrame:
+    """Refinance economics per candidate rate.
+
+    ``simple_breakeven_months`` is costs / payment savings;
+    ``interest_breakeven_months`` is when cumulative interest saved covers
+    the costs, which also holds when the new payment is higher (shorter term).
+    """
+    new_rates = np.asarray(new_rates, float)
+    horizon = max(int(remaining_months), int(new_term_years * 12))
+    k = np.arange(1, horizon + 1)[None, :]
+
+    def interest_path(rate, months):
+        r = np.atleast_1d(rate)[:, None] / 1200
+        pay = monthly_payment(balance, np.atleast_1d(rate), months / 12)[:, None]
+        g = (1 + r) ** (k - 1)
+        opening = balance * g - pay * np.where(r > 0, (g - 1) / np.where(r > 0, r, 1), k - 1)
+        return np.where(k <= months, np.clip(opening, 0, None) * r, 0.0), pay[:, 0]
+
+    old_interest, old_payment = interest_path(current_rate, remaining_months)
+    new_interest, new_payment = interest_path(new_rates, new_term_years * 12)
+    saved = np.cumsum(old_interest - new_interest, axis=1)
+    covered = saved >= closing_costs
+    interest_breakeven = np.where(covered.any(axis=1), covered.argmax(axis=1) + 1, -1)
+    monthly_savings = old_payment[0] - new_payment
+    with np.errstate(divide="ignore"):
+        simple = np.where(monthly_savings > 0, np.ceil(closing_costs / monthly_savings), -1)
+    return pd.DataFrame({
+        "new_rate_pct": new_rates, "new_payment": new_payment.round(2), "current_payment": round(float(old_payment[0]), 2),
+        "monthly_savings": monthly_savings.round(2), "simple_breakeven_months": simple.astype(int),
+        "interest_breakeven_months": interest_breakeven.astype(int),
+        "lifetime_interest_change": (new_interest.sum(axis=1) + closing_costs - old_interest.sum()).round(2),
+    })
+
+
+def affordability_snapshot(inputs: MortgageInputs) -> dict:
+    """Headline figures for the buyer: prices, DTI, and the payment breakdown at the comfortable price.
+
+    Uses the 30-year term at today's rate and the down payment that
+    maximizes the comfortable price given savings.
+    """
+    grid = max_price_grid(inputs, rate_steps=[0.0], terms=[30])
+    best = grid.loc[grid["comfortable_price"].idxmax()]
+    price, down_pct, rate = float(best["comfortable_price"]), float(best["down_pct"]), float(best["rate_pct"])
+    row = affordability_grid(inputs, rate_steps=[0.0], terms=[30], down_pcts=[down_pct], prices=[price]).iloc[0]
+    income = max(inputs.monthly_income, 1.0)
+    return {
+        "rate_pct": rate, "term_years": 30, "down_pct": down_pct,
+        "max_home_price": float(grid["max_price"].max()),
+        "comfortable_home_price": price,
+        "monthly_budget_for_housing": round(float(row["housing_payment"]), 2),
+        "dti_ratio_current": round(inputs.monthly_debts / income * 100, 1),
+        "dti_ratio_projected": float(row["back_dti_pct"]),
+        "limited_by": best["limited_by"],
+        "breakdown": {
+            "home_price": price, "down_payment": round(price * down_pct / 100, 2), "loan_amount": float(row["loan"]),
+            "monthly_principal_interest": float(row["principal_interest"]), "property_tax_monthly": float(row["tax"]),
+            "homeowners_insurance_monthly": float(row["insurance"]), "pmi_monthly": float(row["pmi"]),
+            "hoa_estimate_monthly": inputs.hoa_monthly, "total_monthly_payment": float(row["housing_payment"]),
+            "closing_costs_estimate": round(price * inputs.closing_cost_pct / 100, 2),
+            "cash_needed_at_closing": float(row["cash_to_close"]),
+            "emergency_fund_recommendation": round(EMERGENCY_FUND_MONTHS * (float(row["housing_payment"]) + inputs.monthly_debts), -2),
+            "total_interest": float(row["total_interest"]),
+        },
+    }
+
+
+def snapshot_for_prompt(inputs: MortgageInputs, snapshot: dict, grid: pd.DataFrame) -> str:
+    """Computed figures the model explains instead of estimating."""
+    b = snapshot["breakdown"]
+    lines = [
+        "COMPUTED AFFORDABILITY (deterministic; treat as authoritative, do not recalculate):",
+        f"- Parsed income ${inputs.annual_income:,.0f}/yr, debts ${inputs.monthly_debts:,.0f}/mo, savings ${inputs.savings:,.0f}",
+        f"- Rate used: {snapshot['rate_pct']:.3f}% (30-yr, market {inputs.market_rate:.2f}% + credit adjustment {inputs.credit_adjustment:+.3f})",
+        f"- Comfortable price ${snapshot['comfortable_home_price']:,.0f} ({FRONT_END_DTI:.0f}/{BACK_END_DTI:.0f} DTI, "
+        f"{snapshot['down_pct']:g}% down, limited by {snapshot['limited_by']}); max price ${snapshot['max_home_price']:,.0f} "
+        f"({MAX_BACK_END_DTI:.0f}% back-end DTI)",
+        f"- Payment at comfortable price: P&I ${b['monthly_principal_interest']:,.0f}, tax ${b['property_tax_monthly']:,.0f}, "
+        f"insurance ${b['homeowners_insurance_monthly']:,.0f}, PMI ${b['pmi_monthly']:,.0f}, total ${b['total_monthly_payment']:,.0f}",
+        f"- DTI current {snapshot['dti_ratio_current']:.1f}%, projected {snapshot['dti_ratio_projected']:.1f}%; "
+        f"cash to close ${b['cash_needed_at_closing']:,.0f}",
+        "", "PAYMENTS AT TODAY'S RATES BY TERM AND DOWN PAYMENT (price | term | down | rate | total monthly | back DTI | qualifies):",
+    ]
+    today = grid[np.isclose(grid["rate_pct"], inputs.rate_for(grid["term_years"].to_numpy()))]
+    target = (inputs.price_low + inputs.price_high) / 2 or snapshot["comfortable_home_price"]
+    near = today[np.isclose(today["price"], today["price"].iloc[(today["price"] - target).abs().argmin()])]
+    for r in near.itertuples():
+        lines.append(f"- ${r.price:,.0f} | {r.term_years}yr | {r.down_pct:g}% | {r.rate_pct:.3f}% | "
+                     f"${r.housing_payment:,.0f} | {r.back_dti_pct:.1f}% | {'yes' if r.qualifies else 'no'}")
+    return "\n".join(lines)
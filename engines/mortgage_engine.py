@@ -1,8 +1,22 @@
 """AI Mortgage Consultant engine - loan matching and affordability analysis."""
 
 import json
+import re
+
 import anthropic
 
+from engines.mortgage_calc import (
+    DEFAULT_MARKET_RATE,
+    MortgageInputs,
+    affordability_grid,
+    affordability_snapshot,
+    inputs_from_config,
+    max_price_grid,
+    monthly_payment,
+    parse_amount,
+    snapshot_for_prompt,
+)
+
 MORTGAGE_PROMPT = """\
 You are an expert mortgage consultant and real estate financial advisor. Analyze \
 the buyer's financial profile and provide personalized mortgage product recommendations, \
@@ -11,7 +25,9 @@ affordability analysis, and a home buying action plan.
 DISCLAIMER: This is for educational purposes only. Not financial advice.
 Consult a licensed mortgage lender for official pre-approval.
 
-Return a JSON object:
+Start with a short advisory narrative for the buyer (150-250 words, markdown, no \
+headings) explaining what the computed figures below mean for them. Then output a line \
+containing only {separator} followed by a JSON object:
 
 {{
   "disclaimer": "For educational purposes only. Consult a licensed mortgage professional.",
@@ -19,11 +35,6 @@ Return a JSON object:
   "financial_assessment": {{
     "readiness_score": <0-100>,
     "readiness_level": "Not Ready | Getting Close | Ready | Strong Candidate",
-    "monthly_budget_for_housing": <number>,
-    "max_home_price": <number>,
-    "comfortable_home_price": <number>,
-    "dti_ratio_current": <number as percentage>,
-    "dti_ratio_projected": <number as percentage>,
     "strengths": ["financial strength 1"],
     "concerns": ["financial concern 1"],
     "improvements_needed": ["improvement 1"]
@@ -35,11 +46,11 @@ Return a JSON object:
       "recommended": true|false,
       "fit_score": <1-10>,
       "estimated_rate": "X.XX%",
-      "estimated_monthly_payment": <number>,
+      "term_years": <number>,
+      "down_payment_pct": <minimum down payment %>,
       "down_payment_required": "Minimum % and $ amount",
       "pmi_required": true|false,
-      "pmi_monthly": <number or 0>,
-      "total_monthly_cost": <number>,
+      "pmi_annual_pct": <annual PMI / MIP rate as % of the loan, or 0>,
       "pros": ["advantage 1"],
       "cons": ["disadvantage 1"],
       "best_for": "When this loan type is ideal",
@@ -47,21 +58,6 @@ Return a JSON object:
     }}
   ],
 
-  "affordability_breakdown": {{
-    "home_price": <comfortable price>,
-    "down_payment": <amount>,
-    "loan_amount": <amount>,
-    "monthly_principal_interest": <number>,
-    "property_tax_monthly": <number>,
-    "homeowners_insurance_monthly": <number>,
-    "pmi_monthly": <number>,
-    "hoa_estimate_monthly": <number>,
-    "total_monthly_payment": <number>,
-    "closing_costs_estimate": <number>,
-    "cash_needed_at_closing": <number>,
-    "emergency_fund_recommendation": <number>
-  }},
-
   "market_insights": {{
     "market_condition": "Buyer's Market | Balanced | Seller's Market",
     "rate_environment": "Description of current rate trends",
@@ -88,9 +84,12 @@ Return a JSON object:
   }}
 }}
 
-Be realistic with rates and calculations. Provide actionable, specific advice.
+Payments, prices, DTI ratios, and the affordability breakdown are computed locally \
+from the figures below; do not recalculate them. Give each loan product's rate, term, \
+minimum down payment, and PMI rate, and the payments will be computed from those. \
+Provide actionable, specific advice.
 
-IMPORTANT: Return ONLY the JSON object.
+IMPORTANT: After the {separator} line, return ONLY the JSON object.
 
 ---
 
@@ -106,21 +105,82 @@ BUYER PROFILE:
 - Timeline: {timeline}
 - Employment: {employment}
 - Additional Context: {context}
+
+{computed}
 """
 
 
-def analyze_mortgage(config: dict, api_key: str) -> dict:
-    """Analyze financial profile and recommend mortgage products."""
+NARRATIVE_SEPARATOR = "===JSON==="
+
+
+def local_analysis(config: dict, market_rate: float = DEFAULT_MARKET_RATE, **overrides) -> dict:
+    """Instant local figures: parsed inputs, headline affordability, and the scenario grids."""
+    inputs = inputs_from_config(config, market_rate, **overrides)
+    snapshot = affordability_snapshot(inputs)
+    grid = affordability_grid(inputs)
+    return {"inputs": inputs, "snapshot": snapshot, "grid": grid, "max_prices": max_price_grid(inputs)}
+
+
+def _price_products(loans: list[dict], inputs: MortgageInputs, price: float):
+    """Replace model payment estimates with computed ones at the comfortable price."""
+    for loan in loans:
+        rate = parse_amount(re.sub(r"%.*", "", str(loan.get("estimated_rate", "")))) or inputs.rate_for(30)
+        term = loan.get("term_years") or (15 if "15" in str(loan.get("loan_type", "")) else 30)
+        down = float(loan.get("down_payment_pct") or 0)
+        amount = price * (1 - down / 100)
+        pi = float(monthly_payment(amount, float(rate), float(term)))
+        pmi = amount * float(loan.get("pmi_annual_pct") or 0) / 1200 if loan.get("pmi_required") else 0.0
+        carrying = price * (inputs.tax_rate + inputs.insurance_rate) / 1200 + inputs.hoa_monthly
+        loan.update(
+            estimated_monthly_payment=round(pi, 2), pmi_monthly=round(pmi, 2),
+            total_monthly_cost=round(pi + pmi + carrying, 2),
+            back_end_dti=round((pi + pmi + carrying + inputs.monthly_debts) / max(inputs.monthly_income, 1) * 100, 1),
+        )
+
+
+def analyze_mortgage(config: dict, api_key: str, local: dict | None = None, on_narrative=None) -> dict:
+    """Analyze financial profile and recommend mortgage products.
+
+    The money math comes from ``local`` (see ``local_analysis``); the model
+    writes the narrative, product fit, and plan. With ``on_narrative`` the
+    response is streamed and the callback receives the narrative so far as
+    it arrives.
+    """
+    local = local or local_analysis(config)
+    inputs, snapshot = local["inputs"], local["snapshot"]
+    computed = snapshot_for_prompt(inputs, snapshot, local["grid"])
+    prompt = MORTGAGE_PROMPT.format(separator=NARRATIVE_SEPARATOR, computed=computed, **config)
+
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = MORTGAGE_PROMPT.format(**config)
-    message = client.messages.create(
-        model="claude-sonnet-4-5-20250929",
-        max_tokens=4096,
-        messages=[{"role": "user", "content": prompt}],
-    )
-    text = message.content[0].text.strip()
+    request = dict(model="claude-sonnet-4-5-20250929", max_tokens=4096,
+                   messages=[{"role": "user", "content": prompt}])
+    if on_narrative is None:
+        text = client.messages.create(**request).content[0].text
+    else:
+        text = ""
+        with client.messages.stream(**request) as stream:
+            for chunk in stream.text_stream:
+                text += chunk
+                if NARRATIVE_SEPARATOR not in text:
+                    # The separator sits on its own line; hold back a partially received one.
+                    on_narrative(text.split("\n===")[0])
+    if NARRATIVE_SEPARATOR in text:
+        narrative, _, text = text.rpartition(NARRATIVE_SEPARATOR)
+    else:
+        narrative, text = text[:text.find("{")], text[text.find("{"):]
+    text = text.strip()
     if text.startswith("```"):
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+    if on_narrative is not None:
+        on_narrative(narrative.strip())
+
+    result["narrative"] = narrative.strip()
+    result.setdefault("financial_assessment", {}).update(
+        {k: snapshot[k] for k in ("monthly_budget_for_housing", "max_home_price", "comfortable_home_price",
+                                  "dti_ratio_current", "dti_ratio_projected")})
+    result["affordability_breakdown"] = snapshot["breakdown"]
+    _price_products(result.get("loan_recommendations", []), inputs, snapshot["comfortable_home_price"])
+    return result
@@ -1,24 +1,32 @@
 """Document parsing utilities."""
 
-import io
+from typing import BinaryIO
+
 import pdfplumber
 from docx import Document
 
+from engines.upload_store import as_stream, read_bytes
+
 
-def extract_text(file_name: str, file_bytes: bytes) -> str:
+def extract_pages(file_name: str, source: bytes | BinaryIO) -> list[str]:
+    """Extract text per page (form feeds split plain text; DOCX is one page)."""
     name_lower = file_name.lower()
     if name_lower.endswith(".pdf"):
         parts = []
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        with pdfplumber.open(as_stream(source)) as pdf:
             for page in pdf.pages:
                 t = page.extract_text()
                 if t:
                     parts.append(t)
-        return "\n".join(parts)
+        return parts
     elif name_lower.endswith(".docx"):
-        doc = Document(io.BytesIO(file_bytes))
-        return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+        doc = Document(as_stream(source))
+        return ["\n".join(p.text for p in doc.paragraphs if p.text.strip())]
     elif name_lower.endswith(".txt"):
-        return file_bytes.decode("utf-8", errors="replace")
+        return read_bytes(source).decode("utf-8", errors="replace").split("\f")
     else:
         raise ValueError(f"Unsupported file type: {file_name}")
+
+
+def extract_text(file_name: str, source: bytes | BinaryIO) -> str:
+    return "\n".join(extract_pages(file_name, source))
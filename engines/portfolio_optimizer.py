@@ -0,0 +1,255 @@
+"""Portfolio mode for the ROI calculator: evaluate many initiatives at once and pick the best fundable set."""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from engines.roi_engine import ProjectInputs, simulate_paths
+
+COLUMN_ALIASES = {
+    "project": "project", "project_name": "project", "product_name": "project", "name": "project",
+    "initiative": "project", "product": "project",
+    "initial_investment": "initial_investment", "investment": "initial_investment", "capex": "initial_investment",
+    "capital": "initial_investment",
+    "annual_operating_cost": "annual_operating_cost", "operating_cost": "annual_operating_cost",
+    "opex": "annual_operating_cost",
+    "annual_cost_growth_pct": "annual_cost_growth_pct", "cost_growth_pct": "annual_cost_growth_pct",
+    "total_addressable_market": "total_addressable_market", "tam": "total_addressable_market",
+    "qualifying_ratio_pct": "qualifying_ratio_pct", "qualifying_pct": "qualifying_ratio_pct",
+    "hit_rate_pct": "hit_rate_pct", "hit_rate": "hit_rate_pct", "conversion_pct": "hit_rate_pct",
+    "avg_annual_license": "avg_annual_license", "annual_license": "avg_annual_license", "acv": "avg_annual_license",
+    "revenue_start_month": "revenue_start_month", "start_month": "revenue_start_month",
+    "annual_revenue_growth_pct": "annual_revenue_growth_pct", "revenue_growth_pct": "annual_revenue_growth_pct",
+    "projection_years": "projection_years", "years": "projection_years",
+    "discount_rate_pct": "discount_rate_pct", "discount_rate": "discount_rate_pct",
+    "headcount": "headcount", "fte": "headcount", "ftes": "headcount", "staff": "headcount",
+    "mandatory": "mandatory", "must_fund": "mandatory", "required": "mandatory",
+}
+REQUIRED_COLUMNS = ["initial_investment", "annual_operating_cost", "total_addressable_market", "hit_rate_pct",
+                    "avg_annual_license"]
+NUMERIC_DEFAULTS = {
+    "annual_cost_growth_pct": 0.0, "qualifying_ratio_pct": 100.0, "revenue_start_month": 1,
+    "annual_revenue_growth_pct": 0.0, "projection_years": 3, "discount_rate_pct": 10.0, "headcount": 0.0,
+}
+TRUE_VALUES = {"true", "yes", "y", "1", "x"}
+# ProjectInputs numeric fields that simulate_paths reads per project; years and discount rate are per group.
+PATH_FIELDS = ["initial_investment", "annual_operating_cost", "annual_cost_growth_pct", "total_addressable_market",
+               "qualifying_ratio_pct", "hit_rate_pct", "avg_annual_license", "revenue_start_month",
+               "annual_revenue_growth_pct"]
+SOLVER_TIME_LIMIT = 5.0  # seconds for a single selection
+FRONTIER_TIME_LIMIT = 0.5  # seconds per frontier point; the heuristic covers any point that times out
+FRONTIER_POINTS = 25
+
+
+@dataclass
+class PortfolioSelection:
+    """Projects chosen under the budgets, and how they were chosen."""
+    selected: np.ndarray  # bool per project row
+    npv: float
+    capital: float
+    headcount: float
+    method: str  # "exact" (MILP), "heuristic" (greedy) or "incumbent" (caller's selection kept)
+    optimal: bool
+    upper_bound: float  # LP-relaxation NPV bound; equals npv when optimal
+
+    @property
+    def gap_pct(self) -> float:
+        return 0.0 if self.upper_bound <= 0 else max(0.0, (self.upper_bound - self.npv) / self.upper_bound * 100)
+
+
+def portfolio_template() -> pd.DataFrame:
+    """Example upload with every recognised column."""
+    return pd.DataFrame([
+        {"project": "Software Zed — ERCOT", "initial_investment": 500_000, "annual_operating_cost": 200_000,
+         "annual_cost_growth_pct": 5, "total_addressable_market": 1100, "qualifying_ratio_pct": 22.7,
+         "hit_rate_pct": 10, "avg_annual_license": 165_000, "revenue_start_month": 13,
+         "annual_revenue_growth_pct": 10, "projection_years": 3, "discount_rate_pct": 10, "headcount": 4,
+         "mandatory": False},
+        {"project": "Software Zed — PJM", "initial_investment": 750_000, "annual_operating_cost": 250_000,
+         "annual_cost_growth_pct": 5, "total_addressable_market": 1800, "qualifying_ratio_pct": 18,
+         "hit_rate_pct": 8, "avg_annual_license": 150_000, "revenue_start_month": 18,
+         "annual_revenue_growth_pct": 12, "projection_years": 5, "discount_rate_pct": 10, "headcount": 6,
+         "mandatory": False},
+    ])
+
+
+def normalize_projects(df: pd.DataFrame, defaults: dict | None = None) -> pd.DataFrame:
+    """Map a project list onto ProjectInputs fields with numeric types; ``defaults`` override NUMERIC_DEFAULTS."""
+    defaults = {**NUMERIC_DEFAULTS, **(defaults or {})}
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower().replace(" ", "_")) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Project file needs {', '.join(missing)} column(s).")
+
+    projects = pd.DataFrame(index=df.index)
+    projects["project"] = (df["project"].astype(str) if "project" in df.columns
+                           else pd.Series([f"Project {i + 1}" for i in df.index], index=df.index))
+    for col in REQUIRED_COLUMNS + list(NUMERIC_DEFAULTS):
+        values = df[col] if col in df.columns else pd.Series(defaults.get(col, np.nan), index=df.index)
+        if not pd.api.types.is_numeric_dtype(values):
+            values = pd.to_numeric(values.astype(str).str.replace(r"[$,%\s]", "", regex=True), errors="coerce")
+        projects[col] = values.astype(float).fillna(defaults.get(col, np.nan))
+    bad = projects[REQUIRED_COLUMNS].isna().any(axis=1)
+    if bad.any():
+        rows = ", ".join(str(i + 2) for i in np.flatnonzero(bad)[:10])
+        raise ValueError(f"Missing or non-numeric required values in row(s) {rows}.")
+    projects["projection_years"] = projects["projection_years"].round().clip(1, 5).astype(int)
+    projects["revenue_start_month"] = projects["revenue_start_month"].round().clip(1, 60)
+    projects["mandatory"] = (df["mandatory"].astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+                             if "mandatory" in df.columns else False)
+    return projects
+
+
+def evaluate_projects(projects: pd.DataFrame) -> pd.DataFrame:
+    """Most-likely NPV, ROI, profit and payback for every project, identical to ``calculate_scenario``.
+
+    Projects are evaluated in one ``simulate_paths`` call per distinct
+    (projection years, discount rate) pair, each row being one "path".
+    """
+    out = projects.copy()
+    for col in ["customers", "total_revenue", "total_costs", "total_profit", "roi_pct", "npv", "payback_month"]:
+        out[col] = np.nan
+    for (years, rate), group in projects.groupby(["projection_years", "discount_rate_pct"], sort=False):
+        inputs = ProjectInputs("", "", "", 0, 0, 0, 0, 0, 0, 0, 1, 0, int(years), float(rate))
+        r = simulate_paths(inputs, {f: group[f].to_numpy(float) for f in PATH_FIELDS})
+        idx = group.index
+        out.loc[idx, "customers"] = r["customers"]
+        out.loc[idx, "total_revenue"] = r["total_revenue"].round(2)
+        out.loc[idx, "total_costs"] = r["total_costs"].round(2)
+        out.loc[idx, "total_profit"] = r["total_profit"].round(2)
+        out.loc[idx, "roi_pct"] = r["roi_pct"].round(1)
+        out.loc[idx, "npv"] = r["npv"].round(2)
+        out.loc[idx, "payback_month"] = r["payback_month"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out["npv_per_dollar"] = np.where(out["initial_investment"] > 0,
+                                         out["npv"] / out["initial_investment"], np.nan).round(3)
+    return out
+
+
+def _resources(evaluated: pd.DataFrame, capital_budget: float,
+               headcount_budget: float | None) -> tuple[np.ndarray, np.ndarray]:
+    """Constraint matrix (one row per budget) and the budget vector."""
+    rows, limits = [evaluated["initial_investment"].to_numpy(float)], [capital_budget]
+    if headcount_budget is not None:
+        rows.append(evaluated["headcount"].to_numpy(float))
+        limits.append(headcount_budget)
+    return np.vstack(rows), np.asarray(limits, dtype=float)
+
+
+def _lp_bound(npv: np.ndarray, usage: np.ndarray, limits: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> float:
+    res = milp(-npv, constraints=LinearConstraint(usage, -np.inf, limits), bounds=Bounds(lower, upper))
+    return float(-res.fun) if res.success else float(npv[lower > 0].sum())
+
+
+def _greedy(npv: np.ndarray, usage: np.ndarray, limits: np.ndarray, lower: np.ndarray,
+            upper: np.ndarray) -> np.ndarray:
+    """Mandatory projects first, then by NPV per unit of budget share used, skipping any that no longer fit.
+
+    Also tries the single most valuable project on its own (the classic fix
+    that stops one large project losing to many small ones) and keeps the better.
+    """
+    chosen = lower > 0
+    remaining = limits - usage[:, chosen].sum(axis=1)
+    share = (usage / np.where(limits > 0, limits, np.inf)[:, None]).sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        density = np.where(share > 0, npv / share, np.inf)
+    order = [i for i in np.argsort(-density, kind="stable") if upper[i] > 0 and not chosen[i] and npv[i] > 0]
+    for i in order:
+        if np.all(usage[:, i] <= remaining + 1e-9):
+            chosen[i] = True
+            remaining -= usage[:, i]
+
+    base = lower > 0
+    base_left = limits - usage[:, base].sum(axis=1)
+    fits = [i for i in order if np.all(usage[:, i] <= base_left + 1e-9)]
+    if fits:
+        best = max(fits, key=lambda i: npv[i])
+        if npv[base].sum() + npv[best] > npv[chosen].sum():
+            chosen = base.copy()
+            chosen[best] = True
+    return chosen
+
+
+def select_portfolio(evaluated: pd.DataFrame, capital_budget: float, headcount_budget: float | None = None,
+                     method: str = "auto", time_limit: float = SOLVER_TIME_LIMIT,
+                     incumbent: np.ndarray | None = None) -> PortfolioSelection:
+    """NPV-maximizing set of projects within the capital (and optional headcount) budget.
+
+    ``method`` is ``"exact"`` (0/1 knapsack as a MILP), ``"heuristic"``
+    (greedy) or ``"auto"``: exact, falling back to the better of the solver's
+    incumbent and the greedy pick if the time limit is hit. Mandatory projects
+    are always funded and negative-NPV projects never are. A feasible
+    ``incumbent`` selection is kept whenever the search does not beat it.
+    """
+    npv = evaluated["npv"].to_numpy(float)
+    usage, limits = _resources(evaluated, capital_budget, headcount_budget)
+    lower = evaluated["mandatory"].to_numpy(bool).astype(float)
+    upper = np.maximum(lower, (npv > 0).astype(float))
+    if np.any(usage[:, lower > 0].sum(axis=1) > limits + 1e-9):
+        raise ValueError("Mandatory projects alone exceed the budget.")
+    bound = _lp_bound(npv, usage, limits, lower, upper)
+
+    chosen, solved, optimal = None, "heuristic", False
+    if method in ("auto", "exact"):
+        res = milp(-npv, constraints=LinearConstraint(usage, -np.inf, limits), integrality=np.ones(len(npv)),
+                   bounds=Bounds(lower, upper), options={"time_limit": time_limit})
+        if res.x is not None:
+            chosen, solved, optimal = res.x > 0.5, "exact", res.status == 0
+    if chosen is None or not optimal:
+        greedy = _greedy(npv, usage, limits, lower, upper)
+        if chosen is None or npv[greedy].sum() > npv[chosen].sum():
+            chosen, solved = greedy, "heuristic"
+        if (incumbent is not None and np.all(usage[:, incumbent].sum(axis=1) <= limits + 1e-9)
+                and npv[incumbent].sum() > npv[chosen].sum()):
+            chosen, solved = incumbent.copy(), "incumbent"
+    total = float(npv[chosen].sum())
+    return PortfolioSelection(
+        selected=chosen, npv=round(total, 2), capital=float(usage[0, chosen].sum()),
+        headcount=float(evaluated["headcount"].to_numpy(float)[chosen].sum()), method=solved, optimal=optimal,
+        upper_bound=round(total if optimal else max(bound, total), 2),
+    )
+
+
+def efficient_frontier(evaluated: pd.DataFrame, headcount_budget: float | None = None,
+                       points: int = FRONTIER_POINTS, max_capital: float | None = None,
+                       method: str = "auto", time_limit: float = FRONTIER_TIME_LIMIT) -> pd.DataFrame:
+    """Best achievable NPV at evenly spaced capital budgets, from the mandatory spend to funding everything.
+
+    Each point starts from the previous point's portfolio, which still fits
+    the larger budget, so NPV never falls as the budget grows even when a
+    point times out. ``optimal`` marks the points the solver proved optimal.
+    """
+    capital = evaluated["initial_investment"].to_numpy(float)
+    mandatory = evaluated["mandatory"].to_numpy(bool)
+    floor = float(capital[mandatory].sum())
+    ceiling = max_capital if max_capital is not None else float(capital[mandatory | (evaluated["npv"] > 0)].sum())
+    rows, previous, incumbent = [], None, None
+    for budget in np.unique(np.linspace(floor, max(floor, ceiling), points)):
+        sel = select_portfolio(evaluated, float(budget), headcount_budget, method, time_limit, incumbent)
+        incumbent = sel.selected
+        rows.append({"capital_budget": round(float(budget), 2), "npv": sel.npv, "capital_used": sel.capital,
+                     "headcount_used": sel.headcount, "projects": int(sel.selected.sum()), "method": sel.method,
+                     "optimal": sel.optimal,
+                     "marginal_npv_per_dollar": (None if previous is None or budget == previous[0]
+                                                 else round((sel.npv - previous[1]) / (budget - previous[0]), 3))})
+        previous = (float(budget), sel.npv)
+    return pd.DataFrame(rows)
+
+
+def portfolio_summary(evaluated: pd.DataFrame, selection: PortfolioSelection) -> dict:
+    chosen = evaluated[selection.selected]
+    return {
+        "candidates": int(len(evaluated)),
+        "positive_npv": int((evaluated["npv"] > 0).sum()),
+        "selected": int(selection.selected.sum()),
+        "npv": selection.npv,
+        "capital": selection.capital,
+        "headcount": selection.headcount,
+        "total_profit": float(chosen["total_profit"].sum()),
+        "portfolio_roi_pct": (round(float(chosen["total_profit"].sum() / chosen["total_costs"].sum() * 100), 1)
+                              if len(chosen) and chosen["total_costs"].sum() > 0 else 0.0),
+    }
@@ -0,0 +1,356 @@
+"""Local price optimizer: per-SKU elasticities and constrained margin/revenue-optimal prices, vectorized."""
+
+import re
+from dataclasses import asdict, dataclass
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+COLUMN_ALIASES = {
+    "product": "product", "product_name": "product", "name": "product", "item": "product", "sku": "product",
+    "price": "price", "current_price": "price", "list_price": "price", "retail_price": "price",
+    "cost": "cost", "unit_cost": "cost", "cogs": "cost",
+    "units": "units", "monthly_units": "units", "inventory": "units", "volume": "units", "quantity": "units",
+    "qty": "units", "units_sold": "units",
+    "category": "category", "department": "category",
+    "elasticity": "elasticity", "price_elasticity": "elasticity",
+    "competitor_price": "competitor_price", "competitor_prices": "competitor_price",
+    "competitor_min": "competitor_min", "competitor_low": "competitor_min",
+    "competitor_max": "competitor_max", "competitor_high": "competitor_max",
+    "ladder_rank": "ladder_rank", "tier": "ladder_rank", "size": "ladder_rank",
+    "ladder_group": "ladder_group", "line": "ladder_group", "brand": "ladder_group",
+}
+REQUIRED_COLUMNS = ["product", "price", "cost"]
+DEFAULT_ELASTICITY = -1.8
+ELASTICITY_BOUNDS = (-6.0, -0.2)
+# Pseudo-observations of log-price variance backing the prior when shrinking fitted elasticities.
+PRIOR_STRENGTH = 0.05
+MIN_HISTORY_POINTS = 3
+MONEY = re.compile(r"\$\s?(\d[\d,]*(?:\.\d+)?)")
+
+
+@dataclass
+class PricingConstraints:
+    """Bounds the optimizer must respect; percentages are of the relevant price."""
+    min_margin_pct: float = 35.0  # per-SKU gross margin floor
+    max_change_pct: float = 15.0  # largest move from the current price, either way
+    below_competitor_pct: float = 10.0  # lowest allowed price vs the cheapest competitor
+    above_competitor_pct: float = 5.0  # highest allowed price vs the dearest competitor
+    ladder_gap_pct: float = 0.0  # >0 keeps prices in ladder order within each group, this far apart
+    revenue_weight: float = 0.0  # 0 = maximize gross profit, 1 = maximize revenue
+
+    def describe(self) -> str:
+        return "; ".join(f"{k.replace('_', ' ')}: {v}" for k, v in asdict(self).items())
+
+
+def parse_margin_target(text: str, default: float = 35.0) -> float:
+    """First percentage in a free-text margin target ("35% minimum, 40% target" -> 35)."""
+    match = re.search(r"(\d+(?:\.\d+)?)\s*%?", text or "")
+    return float(match.group(1)) if match else default
+
+
+def _numeric(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return pd.to_numeric(values.astype(str).str.replace(r"[^\d.\-]", "", regex=True), errors="coerce")
+
+
+def parse_catalog_text(text: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """Pipe-, tab- or comma-separated catalog text; the first line is a header unless it holds a number."""
+    lines = [l for l in (text or "").strip().splitlines() if l.strip()]
+    if not lines:
+        return pd.DataFrame()
+    sep = "|" if "|" in lines[0] else "\t" if "\t" in lines[0] else ","
+    rows = [[cell.strip() for cell in l.split(sep)] for l in lines]
+    has_header = not any(re.search(r"\d", cell) for cell in rows[0][1:])
+    header = rows[0] if has_header else (columns or [f"col_{i}" for i in range(len(rows[0]))])
+    body = rows[1:] if has_header else rows
+    width = len(header)
+    return pd.DataFrame([(r + [""] * width)[:width] for r in body], columns=header)
+
+
+def normalize_catalog(df: pd.DataFrame) -> pd.DataFrame:
+    """Map a catalog onto optimizer fields; competitor prices may be one column of "$x, $y" text."""
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower().replace(" ", "_")) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()].reset_index(drop=True)
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Catalog needs {', '.join(missing)} column(s).")
+
+    cat = pd.DataFrame({"product": df["product"].astype(str).str.strip()}, index=df.index)
+    for col in ["price", "cost"]:
+        cat[col] = _numeric(df[col])
+    cat["units"] = _numeric(df["units"]).fillna(1.0) if "units" in df.columns else 1.0
+    cat["category"] = df["category"].astype(str) if "category" in df.columns else "All"
+    cat["elasticity"] = -_numeric(df["elasticity"]).abs() if "elasticity" in df.columns else np.nan
+
+    cat["competitor_min"] = _numeric(df["competitor_min"]) if "competitor_min" in df.columns else np.nan
+    cat["competitor_max"] = _numeric(df["competitor_max"]) if "competitor_max" in df.columns else np.nan
+    if "competitor_price" in df.columns:
+        raw = df["competitor_price"]
+        if pd.api.types.is_numeric_dtype(raw):
+            quoted = pd.DataFrame({"min": raw.astype(float), "max": raw.astype(float)})
+        else:
+            amounts = raw.astype(str).str.extractall(MONEY)[0].str.replace(",", "").astype(float)
+            quoted = amounts.groupby(level=0).agg(["min", "max"]).reindex(df.index)
+        cat["competitor_min"] = cat["competitor_min"].fillna(quoted["min"])
+        cat["competitor_max"] = cat["competitor_max"].fillna(quoted["max"])
+
+    # Ladders apply only where the catalog defines them: a ladder_group (ranked by current price) and/or a
+    # ladder_rank (grouped by category). Rows with neither are priced on their own.
+    has_group, has_rank = "ladder_group" in df.columns, "ladder_rank" in df.columns
+    if has_group or has_rank:
+        group = df["ladder_group"].astype(object) if has_group else cat["category"]
+        cat["ladder_group"] = group.where(group.notna() & (group.astype(str).str.strip() != ""), None)
+        cat["ladder_rank"] = _numeric(df["ladder_rank"]) if has_rank else cat["price"]
+    else:
+        cat["ladder_group"], cat["ladder_rank"] = None, np.nan
+    bad = cat[["price", "cost"]].isna().any(axis=1) | (cat["price"] <= 0)
+    if bad.any():
+        rows = ", ".join(str(i + 2) for i in np.flatnonzero(bad)[:10])
+        raise ValueError(f"Missing or non-positive price/cost in row(s) {rows}.")
+    return cat
+
+
+def apply_competitor_matrix(catalog: pd.DataFrame, text: str) -> pd.DataFrame:
+    """Fold a competitor × product price grid into competitor_min/max.
+
+    Grid columns name products loosely ("Cold Brew"); a column applies to every
+    catalog product whose name contains all of its words.
+    """
+    grid = parse_catalog_text(text)
+    if grid.empty or len(grid.columns) < 2:
+        return catalog
+    catalog = catalog.copy()
+    names = catalog["product"].str.lower()
+    for col in grid.columns[1:]:
+        prices = _numeric(grid[col]).dropna()
+        words = [w for w in re.split(r"\W+", str(col).lower()) if w]
+        if prices.empty or not words:
+            continue
+        match = np.logical_and.reduce([names.str.contains(w, regex=False).to_numpy() for w in words])
+        catalog.loc[match, "competitor_min"] = np.fmin(catalog.loc[match, "competitor_min"], prices.min())
+        catalog.loc[match, "competitor_max"] = np.fmax(catalog.loc[match, "competitor_max"], prices.max())
+    return catalog
+
+
+def fit_elasticities(history: pd.DataFrame, prior: float = DEFAULT_ELASTICITY,
+                     strength: float = PRIOR_STRENGTH) -> pd.DataFrame:
+    """Per-product log-log demand slope from price/units history, shrunk toward ``prior``.
+
+    ``history`` has product, price and units columns, one row per observation
+    (e.g. week). All products are fitted at once from grouped sums; the
+    prior's weight falls as a product's own log-price variation grows, so
+    products that never changed price stay at the prior.
+    """
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower().replace(" ", "_")) for c in history.columns}
+    h = history.rename(columns={c: n for c, n in renamed.items() if n})
+    missing = [c for c in ["product", "price", "units"] if c not in h.columns]
+    if missing:
+        raise ValueError(f"Price history needs {', '.join(missing)} column(s).")
+    price, units = _numeric(h["price"]), _numeric(h["units"])
+    ok = (price > 0) & (units > 0)
+    frame = pd.DataFrame({"product": h.loc[ok, "product"].astype(str).str.strip(),
+                          "x": np.log(price[ok]), "y": np.log(units[ok])})
+    frame["xx"], frame["xy"] = frame["x"] ** 2, frame["x"] * frame["y"]
+    sums = frame.groupby("product", sort=False).agg(n=("x", "size"), x=("x", "sum"), y=("y", "sum"),
+                                                     xx=("xx", "sum"), xy=("xy", "sum"))
+    sxx = (sums["xx"] - sums["x"] ** 2 / sums["n"]).clip(lower=0)
+    sxy = sums["xy"] - sums["x"] * sums["y"] / sums["n"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where((sums["n"] >= MIN_HISTORY_POINTS) & (sxx > 1e-12), sxy / sxx, prior)
+    weight = np.where(sums["n"] >= MIN_HISTORY_POINTS, sxx / (sxx + strength), 0.0)
+    fitted = np.clip(weight * slope + (1 - weight) * prior, *ELASTICITY_BOUNDS)
+    return pd.DataFrame({"product": sums.index, "elasticity": fitted.round(3),
+                         "observations": sums["n"].to_numpy(), "fit_weight": weight.round(3)})
+
+
+def _pav(values: np.ndarray, weights: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Weighted non-decreasing fit within each run beginning at ``starts`` (pool-adjacent-violators)."""
+    out = np.empty_like(values)
+    bounds = list(starts) + [len(values)]
+    for a, b in zip(bounds[:-1], bounds[1:]):
+        level, weight, size = [], [], []
+        for v, w in zip(values[a:b], weights[a:b]):
+            level.append(v), weight.append(w), size.append(1)
+            while len(level) > 1 and level[-2] > level[-1]:
+                w2, w1 = weight.pop(), weight.pop()
+                v2, v1 = level.pop(), level.pop()
+                n2, n1 = size.pop(), size.pop()
+                level.append((v1 * w1 + v2 * w2) / (w1 + w2)), weight.append(w1 + w2), size.append(n1 + n2)
+        out[a:b] = np.repeat(level, size)
+    return out
+
+
+def _binding(price, target, lower, upper, floors, caps) -> np.ndarray:
+    """Label the constraint each optimized price sits on."""
+    labels = np.full(len(price), "optimal", dtype=object)
+    at_low = np.isclose(price, lower) & (target < lower - 1e-9)
+    at_high = np.isclose(price, upper) & (target > upper + 1e-9)
+    for mask, names in ((at_low, floors), (at_high, caps)):
+        for name, bound in names:
+            labels[mask & np.isclose(price, bound) & (labels == "optimal")] = name
+    moved = ~np.isclose(price, np.clip(target, lower, upper))
+    labels[moved & (labels == "optimal")] = "price ladder"
+    return labels
+
+
+def optimize_prices(catalog: pd.DataFrame, constraints: PricingConstraints | None = None,
+                    elasticities: pd.DataFrame | None = None) -> pd.DataFrame:
+    """Profit/revenue-optimal price per SKU under constant-elasticity demand and the given bounds.
+
+    Demand is ``units * (p / price) ** elasticity``. Maximizing
+    ``(1 - w) * profit + w * revenue`` equals maximizing profit against an
+    effective cost ``(1 - w) * cost``, whose optimum is
+    ``(1 - w) * cost * e / (1 + e)`` (no interior optimum when e >= -1, so
+    the price goes to its ceiling). That target is clipped to the intersection
+    of the margin floor, competitor band and max-change limits; rows whose
+    margin floor lies above a cap cannot satisfy both, so they keep their
+    current price and are flagged "constraint conflict". With a ladder
+    gap, prices of rows with an explicit ladder group or rank are then made
+    non-decreasing in ladder rank, with the gap, by an isotonic fit in log
+    price weighted by current revenue, clipped to running bounds; groups the
+    ladder cannot fit within their bounds are flagged and keep their own
+    clipped optima.
+    """
+    c = constraints or PricingConstraints()
+    cat = catalog.copy()
+    source = np.where(cat["elasticity"].notna(), "catalog", "default")
+    if elasticities is not None and len(elasticities):
+        fitted = cat["product"].map(elasticities.set_index("product")["elasticity"])
+        source = np.where(cat["elasticity"].isna() & fitted.notna(), "fitted", source)
+        cat["elasticity"] = cat["elasticity"].fillna(fitted)
+        prior = float(fitted.median()) if fitted.notna().any() else DEFAULT_ELASTICITY
+    else:
+        prior = DEFAULT_ELASTICITY
+    cat["elasticity"] = np.clip(cat["elasticity"].fillna(prior).to_numpy(float), *ELASTICITY_BOUNDS)
+    cat["elasticity_source"] = source
+
+    price, cost = cat["price"].to_numpy(float), cat["cost"].to_numpy(float)
+    units, e = cat["units"].to_numpy(float), cat["elasticity"].to_numpy(float)
+    margin_floor = cost / max(1e-9, 1 - c.min_margin_pct / 100)
+    change_low, change_high = price * (1 - c.max_change_pct / 100), price * (1 + c.max_change_pct / 100)
+    comp_low = np.nan_to_num(cat["competitor_min"].to_numpy(float) * (1 - c.below_competitor_pct / 100), nan=0.0)
+    comp_high = np.nan_to_num(cat["competitor_max"].to_numpy(float) * (1 + c.above_competitor_pct / 100),
+                              nan=np.inf)
+    caps = [("max change", change_high), ("competitor ceiling", comp_high)]
+    floors = [("margin floor", margin_floor), ("max change", change_low), ("competitor floor", comp_low)]
+    lower = np.maximum.reduce([f for _, f in floors])
+    upper = np.minimum.reduce([u for _, u in caps])
+    # No price satisfies both a floor and a cap below it; hold those rows at today's price rather than break a cap.
+    conflict = lower > upper + 1e-9
+    floor_out, ceiling_out = lower, upper
+    lower, upper = np.where(conflict, price, lower), np.where(conflict, price, upper)
+
+    effective_cost = (1 - c.revenue_weight) * cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        target = np.where(e < -1, effective_cost * e / (1 + e), np.inf)
+    target = np.where((effective_cost <= 0) & (e < -1), 0.0, target)
+    optimal = np.clip(target, lower, upper)
+
+    laddered_rows = np.flatnonzero(cat["ladder_group"].notna().to_numpy() & cat["ladder_rank"].notna().to_numpy())
+    ladder_conflict = np.zeros(len(cat), dtype=bool)
+    if c.ladder_gap_pct > 0 and len(laddered_rows):
+        ranks, names = cat["ladder_rank"].to_numpy(float), cat["ladder_group"].astype(str).to_numpy()
+        # Equal ranks share a rung; within a rung, rows go in order of their own optimum (no constraint between them).
+        order = laddered_rows[np.lexsort((optimal[laddered_rows], ranks[laddered_rows], names[laddered_rows]))]
+        groups, sorted_ranks = names[order], ranks[order]
+        new_group = np.r_[True, groups[1:] != groups[:-1]]
+        starts = np.flatnonzero(new_group)
+        group_id = np.cumsum(new_group) - 1
+        new_rung = new_group | np.r_[True, sorted_ranks[1:] != sorted_ranks[:-1]]
+        rung = np.cumsum(new_rung) - 1
+        step = rung - rung[starts][group_id]
+        shift = step * np.log1p(c.ladder_gap_pct / 100)
+        y = np.log(optimal[order]) - shift
+        lo, hi = np.log(lower[order]) - shift, np.log(upper[order]) - shift
+        run_lo = pd.Series(lo).groupby(group_id).cummax().to_numpy()
+        run_hi = pd.Series(hi[::-1]).groupby(group_id[::-1]).cummin().to_numpy()[::-1]
+        # A group whose bounds leave no room for the ladder is flagged as a whole and priced without it.
+        infeasible = pd.Series(run_lo > run_hi + 1e-9).groupby(group_id).transform("any").to_numpy()
+        fitted = np.clip(_pav(y, (price * units)[order] + 1e-9, starts), run_lo, run_hi)
+        laddered = optimal.copy()
+        laddered[order] = np.where(infeasible, optimal[order], np.exp(fitted + shift))
+        ladder_conflict[order] = infeasible
+        optimal = laddered
+
+    new_price = np.round(optimal, 2)
+    new_price = np.where(np.isfinite(new_price) & (new_price > 0), new_price, price)
+    new_units = units * (new_price / price) ** e
+    cat["recommended_price"] = new_price
+    cat["price_change_pct"] = ((new_price / price - 1) * 100).round(1)
+    cat["price_floor"] = floor_out.round(2)
+    cat["price_ceiling"] = np.where(np.isinf(ceiling_out), np.nan, ceiling_out).round(2)
+    cat["binding_constraint"] = np.where(conflict, "constraint conflict",
+                                         np.where(ladder_conflict, "ladder conflict",
+                                                  _binding(optimal, target, lower, upper, floors, caps)))
+    cat["expected_units"] = new_units.round(1)
+    cat["current_revenue"], cat["expected_revenue"] = (price * units).round(2), (new_price * new_units).round(2)
+    cat["current_profit"] = ((price - cost) * units).round(2)
+    cat["expected_profit"] = ((new_price - cost) * new_units).round(2)
+    cat["current_margin_pct"] = ((1 - cost / price) * 100).round(1)
+    cat["expected_margin_pct"] = ((1 - cost / new_price) * 100).round(1)
+    return cat
+
+
+def optimization_summary(priced: pd.DataFrame) -> dict:
+    rev0, rev1 = priced["current_revenue"].sum(), priced["expected_revenue"].sum()
+    prof0, prof1 = priced["current_profit"].sum(), priced["expected_profit"].sum()
+    return {
+        "skus": int(len(priced)),
+        "price_increases": int((priced["price_change_pct"] > 0).sum()),
+        "price_decreases": int((priced["price_change_pct"] < 0).sum()),
+        "current_revenue": round(float(rev0), 2), "expected_revenue": round(float(rev1), 2),
+        "revenue_change_pct": round(float((rev1 / rev0 - 1) * 100), 1) if rev0 else 0.0,
+        "current_profit": round(float(prof0), 2), "expected_profit": round(float(prof1), 2),
+        "profit_change_pct": round(float((prof1 - prof0) / abs(prof0) * 100), 1) if prof0 else 0.0,
+        "current_margin_pct": round(float(prof0 / rev0 * 100), 1) if rev0 else 0.0,
+        "expected_margin_pct": round(float(prof1 / rev1 * 100), 1) if rev1 else 0.0,
+        "binding": priced["binding_constraint"].value_counts().to_dict(),
+        "conflicts": priced.loc[priced["binding_constraint"] == "constraint conflict", "product"].tolist(),
+    }
+
+
+def computed_prices_text(priced: pd.DataFrame, constraints: PricingConstraints, limit: int = 40) -> str:
+    """Optimizer output for a prompt: totals, constraint counts and the largest profit movers."""
+    s = optimization_summary(priced)
+    lines = [
+        f"{s['skus']:,} SKUs optimized ({constraints.describe()}).",
+        f"Revenue ${s['current_revenue']:,.0f} -> ${s['expected_revenue']:,.0f} ({s['revenue_change_pct']:+.1f}%); "
+        f"gross profit ${s['current_profit']:,.0f} -> ${s['expected_profit']:,.0f} ({s['profit_change_pct']:+.1f}%); "
+        f"margin {s['current_margin_pct']}% -> {s['expected_margin_pct']}%.",
+        "Binding constraints: " + ", ".join(f"{k} {v:,}" for k, v in s["binding"].items()),
+    ]
+    if s["conflicts"]:
+        shown = ", ".join(s["conflicts"][:limit]) + (" ..." if len(s["conflicts"]) > limit else "")
+        lines.append(f"{len(s['conflicts']):,} SKUs held at their current price because the margin floor is above "
+                     f"the max-change or competitor cap (resolve the constraints before repricing): {shown}")
+    lines.append("")
+    movers = priced.assign(_delta=(priced["expected_profit"] - priced["current_profit"]).abs())
+    movers = movers.nlargest(limit, "_delta")
+    if len(priced) > limit:
+        lines.append(f"Top {limit} SKUs by profit impact:")
+    cols = ["product", "price", "cost", "recommended_price", "price_change_pct", "elasticity", "elasticity_source",
+            "competitor_min", "competitor_max", "binding_constraint", "expected_margin_pct"]
+    buffer = StringIO()
+    movers[cols].to_csv(buffer, index=False, float_format="%.2f")
+    return "\n".join(lines) + buffer.getvalue()
+
+
+def apply_computed_prices(items: list[dict], priced: pd.DataFrame, fields: dict[str, str]) -> list[dict]:
+    """Overwrite numeric fields in LLM product items with optimizer values, matched by product name.
+
+    ``fields`` maps item keys to ``priced`` columns. Items the optimizer did
+    not price are left untouched.
+    """
+    lookup = priced.assign(_key=priced["product"].str.lower()).drop_duplicates("_key").set_index("_key")
+    for item in items:
+        key = str(item.get("product", "")).strip().lower()
+        if key in lookup.index:
+            row = lookup.loc[key]
+            for field, column in fields.items():
+                value = row[column]
+                item[field] = None if pd.isna(value) else float(value)
+    return items
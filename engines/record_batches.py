@@ -0,0 +1,114 @@
+"""Split multi-record text batches and process the records concurrently."""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+RECORD_HEADER_RE = r"^\s*===\s*(.+?)\s*===\s*$"
+FIELD_RE = r"^\s*-?\s*([A-Za-z][A-Za-z /-]*?)\s*:\s*(.+?)\s*$"
+MAX_WORKERS = 8
+MAX_RELATED = 10
+
+RELATED_NOTE = """\
+OTHER RECORDS IN THIS BATCH sharing a {fields} value with the record above \
+(context for duplicate / linked-party checks only; assess only the record above):"""
+
+
+@dataclass
+class Record:
+    """One ``=== LABEL ===`` section of a batch: its header, full text, and ``Field: value`` lines."""
+    label: str
+    text: str
+    fields: dict[str, str] = field(default_factory=dict)
+
+    def get(self, name: str, default: str = "") -> str:
+        return self.fields.get(name.lower(), default)
+
+
+def split_records(text: str) -> tuple[str, list[Record]]:
+    """Split batch text on ``=== ... ===`` headers; returns (preamble, records).
+
+    Text without headers yields no records, so callers fall back to a
+    single call over the whole input.
+    """
+    parts = re.split(RECORD_HEADER_RE, text, flags=re.M)
+    records = []
+    for label, body in zip(parts[1::2], parts[2::2]):
+        fields = {}
+        for m in re.finditer(FIELD_RE, body, flags=re.M):
+            fields.setdefault(m.group(1).strip().lower(), m.group(2))
+        records.append(Record(label, f"=== {label} ===\n{body.strip()}", fields))
+    return parts[0].strip(), records
+
+
+def _link_key(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip()
+
+
+def related_records(records: list[Record], link_fields: list[str], show_fields: list[str],
+                    max_related: int = MAX_RELATED) -> dict[str, str]:
+    """Per record label, a compact listing of other records sharing a ``link_fields`` value.
+
+    Keeps cross-record checks (duplicate bills, shared addresses) possible
+    when each record is reviewed in its own call; records with no links map
+    to an empty string.
+    """
+    by_value: dict[tuple[str, str], list[int]] = {}
+    for i, record in enumerate(records):
+        for name in link_fields:
+            key = _link_key(record.get(name))
+            if key:
+                by_value.setdefault((name, key), []).append(i)
+    note = RELATED_NOTE.format(fields=" / ".join(link_fields))
+    out = {}
+    for i, record in enumerate(records):
+        linked = []
+        for name in link_fields:
+            for j in by_value.get((name, _link_key(record.get(name))), []):
+                if j != i and j not in linked:
+                    linked.append(j)
+        lines = []
+        for j in linked[:max_related]:
+            other = records[j]
+            values = " | ".join(f"{name}: {other.get(name)}" for name in show_fields if other.get(name))
+            lines.append(f"- {other.label} | {values}")
+        if len(linked) > max_related:
+            lines.append(f"- ... {len(linked) - max_related:,} more linked records")
+        out[record.label] = f"{note}\n" + "\n".join(lines) if lines else ""
+    return out
+
+
+def fan_out(items: list, fn, max_workers: int = MAX_WORKERS, on_result=None) -> list[dict]:
+    """Run ``fn(item)`` for every item with at most ``max_workers`` calls in flight.
+
+    Results come back in input order; a failed item yields ``{"error": ...}``
+    instead of failing the batch. ``on_result(done, total, index, result)``
+    is called from the calling thread as each item completes, so pages can
+    render results as they arrive.
+    """
+    results: list[dict] = [{} for _ in items]
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fn, item): i for i, item in enumerate(items)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                results[i] = {"error": str(e)}
+            if on_result:
+                on_result(done, len(items), i, results[i])
+    return results
+
+
+def merge_lists(parts: list[dict], section: str) -> dict[str, list]:
+    """Union the list fields of one nested section across per-record results, first-seen order."""
+    merged: dict[str, list] = {}
+    for part in parts:
+        for key, values in (part.get(section) or {}).items():
+            if not isinstance(values, list):
+                continue
+            bucket = merged.setdefault(key, [])
+            for value in values:
+                if value not in bucket:
+                    bucket.append(value)
+    return merged
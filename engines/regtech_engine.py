@@ -3,6 +3,8 @@
 import json
 import anthropic
 
+from engines.text_normalizer import normalize_text_report
+
 REGTECH_PROMPT = """\
 You are an expert regulatory compliance analyst and RegTech advisor. Analyze the given \
 regulation against the organization's profile and current compliance posture, then generate \
@@ -141,6 +143,8 @@ ANALYSIS PARAMETERS:
 def analyze_regulation(config: dict, api_key: str) -> dict:
     """Analyze a regulation against an organization's compliance posture."""
     client = anthropic.Anthropic(api_key=api_key)
+    normalized, normalization = normalize_text_report(config["regulation_text"], "Regulation")
+    config = dict(config, regulation_text=normalized)
     prompt = REGTECH_PROMPT.format(**config)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
@@ -152,4 +156,6 @@ def analyze_regulation(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+    result["normalization"] = normalization
+    return result
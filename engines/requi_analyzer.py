@@ -1,8 +1,15 @@
 """LLM-powered requirement extraction, classification, and analysis."""
 
 import json
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import anthropic
 
+from engines.requi_index import RequirementsIndex, build_requirements_index, chunk_document, tokenize
+from engines.requi_lsh import candidate_clusters
+
 EXTRACTION_PROMPT = """\
 You are an expert requirements engineer and document analyst.
 
@@ -43,6 +50,21 @@ DOCUMENT(S):
 {document_text}
 """
 
+SINGLE_CALL_MAX_CHARS = 80_000
+MAP_CHUNK_CHARS = 20_000
+MAP_MAX_WORKERS = 16
+MAP_MAX_TOKENS = 16_000  # a dense 20k-character section can list 100+ requirements
+MAP_MIN_SPLIT_CHARS = 2_000  # truncated sections shorter than this are reported rather than split again
+DUPLICATE_JACCARD = 0.85
+DUPLICATE_BLOCKING_TOKENS = 3
+SINGLE_CALL_MAX_REQUIREMENTS = 60
+CONFLICT_MAX_WORKERS = 8
+
+SECTION_HEADING_RE = re.compile(
+    r"^(=== .+ ===|(section|chapter|article|part|appendix)\s+[\w.]+.*|\d+(\.\d+)*\.?\s+[A-Z].{0,80})$",
+    re.IGNORECASE,
+)
+
 CONTRADICTION_PROMPT = """\
 You are an expert requirements analyst specializing in conflict detection.
 
@@ -78,20 +100,20 @@ REQUIREMENTS:
 """
 
 CHAT_PROMPT = """\
-You are a helpful requirements analyst assistant. You have access to the following
-requirement document(s) and extracted requirements.
+You are a helpful requirements analyst assistant. You have access to the excerpts of the
+requirement document(s) and the extracted requirements most relevant to the question.
 
 Answer the user's question based on this context. Be specific, cite requirement IDs
-when relevant, and provide actionable answers. If the answer isn't in the documents, say so.
+when relevant, and provide actionable answers. If the answer isn't in the excerpts, say so.
 
 ---
 
-DOCUMENT TEXT:
+RELEVANT DOCUMENT EXCERPTS:
 {document_text}
 
 ---
 
-EXTRACTED REQUIREMENTS:
+RELEVANT REQUIREMENTS:
 {requirements_json}
 
 ---
@@ -100,13 +122,20 @@ USER QUESTION: {question}
 """
 
 
-def _call_claude(prompt: str, api_key: str, max_tokens: int = 4096) -> str:
+class TruncatedResponseError(ValueError):
+    """Raised when the model stops at ``max_tokens`` before finishing its JSON."""
+
+
+def _call_claude(prompt: str, api_key: str, max_tokens: int = 4096, complete: bool = False) -> str:
+    """Return the model's reply; with ``complete`` a reply cut off at ``max_tokens`` raises instead."""
     client = anthropic.Anthropic(api_key=api_key)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=max_tokens,
         messages=[{"role": "user", "content": prompt}],
     )
+    if complete and message.stop_reason == "max_tokens":
+        raise TruncatedResponseError(f"response exceeded {max_tokens:,} output tokens")
     return message.content[0].text.strip()
 
 
@@ -118,24 +147,234 @@ def _parse_json(text: str) -> dict:
     return json.loads(text)
 
 
-def extract_requirements(document_text: str, api_key: str) -> dict:
-    """Extract and classify requirements from document text."""
-    # Truncate very large documents to fit context
-    max_chars = 80_000
-    if len(document_text) > max_chars:
-        document_text = document_text[:max_chars] + "\n\n[... document truncated ...]"
-
-    prompt = EXTRACTION_PROMPT.format(document_text=document_text)
-    response = _call_claude(prompt, api_key)
-    return _parse_json(response)
-
-
-def detect_contradictions(requirements: list[dict], api_key: str) -> dict:
-    """Analyze requirements for contradictions and conflicts."""
-    reqs_json = json.dumps(requirements, indent=2)
-    prompt = CONTRADICTION_PROMPT.format(requirements_json=reqs_json)
-    response = _call_claude(prompt, api_key)
-    return _parse_json(response)
+def split_sections(document_text: str, max_chars: int = MAP_CHUNK_CHARS) -> list[str]:
+    """Split a document into chunks that start on section headings where possible.
+
+    Consecutive sections are packed up to ``max_chars``; a single section
+    longer than that is split on paragraph boundaries.
+    """
+    sections = []
+    current = []
+    for line in document_text.splitlines():
+        if current and SECTION_HEADING_RE.match(line.strip()):
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current))
+
+    chunks = []
+    buf = ""
+    for section in sections:
+        pieces = chunk_document(section, max_chars) if len(section) > max_chars else [section]
+        for piece in pieces:
+            if buf and len(buf) + len(piece) + 1 > max_chars:
+                chunks.append(buf)
+                buf = ""
+            buf = f"{buf}\n{piece}" if buf else piece
+    if buf.strip():
+        chunks.append(buf)
+    return chunks
+
+
+def _extract_chunk(chunk: str, part: int, total: int, api_key: str) -> list[dict]:
+    """Extract one chunk; if the reply is cut off, split the chunk in half and extract each half."""
+    text = f"[Part {part} of {total} of a larger document]\n\n{chunk}"
+    prompt = EXTRACTION_PROMPT.format(document_text=text)
+    try:
+        return [_parse_json(_call_claude(prompt, api_key, max_tokens=MAP_MAX_TOKENS, complete=True))]
+    except TruncatedResponseError:
+        halves = split_sections(chunk, max_chars=len(chunk) // 2 + 1)
+        if len(chunk) < MAP_MIN_SPLIT_CHARS or len(halves) < 2:
+            raise
+        return [p for half in halves for p in _extract_chunk(half, part, total, api_key)]
+
+
+def _requirement_key(req: dict) -> frozenset[str]:
+    return frozenset(tokenize(f"{req.get('title', '')} {req.get('description', '')}"))
+
+
+def _collapse_duplicates(reqs: list[dict]) -> tuple[list[dict], dict[int, int]]:
+    """Drop near-duplicate requirements (token Jaccard >= ``DUPLICATE_JACCARD``).
+
+    Candidates are blocked on each requirement's rarest tokens so only
+    requirements sharing one of them are compared. The earliest occurrence is
+    kept. Returns the kept requirements and a map from every input position
+    to the position of the kept requirement that absorbed it.
+    """
+    keys = [_requirement_key(r) for r in reqs]
+    df = Counter(t for k in keys for t in k)
+    blocks: dict[str, list[int]] = defaultdict(list)
+    absorbed_by = {}
+    kept = []
+    for i, key in enumerate(keys):
+        rare = sorted(key, key=lambda t: (df[t], t))[:DUPLICATE_BLOCKING_TOKENS]
+        match = None
+        for j in sorted({j for t in rare for j in blocks[t]}):
+            other = keys[j]
+            union = len(key | other)
+            if union and len(key & other) / union >= DUPLICATE_JACCARD:
+                match = j
+                break
+        if match is not None:
+            absorbed_by[i] = absorbed_by[match]
+            target = kept[absorbed_by[match]]
+            target["related_to"] = list(dict.fromkeys(target.get("related_to", []) + reqs[i].get("related_to", [])))
+            continue
+        absorbed_by[i] = len(kept)
+        kept.append(reqs[i])
+        for t in rare:
+            blocks[t].append(i)
+    return kept, absorbed_by
+
+
+def merge_extractions(parts: list[dict]) -> dict:
+    """Reduce per-chunk extractions into one result with stable REQ-### numbering.
+
+    Requirements keep document order (chunk order, then in-chunk order) and
+    ``related_to`` references are rewritten from chunk-local to global IDs.
+    """
+    reqs = []
+    for part in parts:
+        part_reqs = [dict(r) for r in part.get("requirements", [])]
+        position = {str(r.get("id", "")): len(reqs) + i for i, r in enumerate(part_reqs)}
+        for req in part_reqs:
+            # Chunk-local IDs -> positions in the flat list, so they survive the dedupe merge.
+            req["related_to"] = [position[str(r)] for r in req.get("related_to", []) if str(r) in position]
+        reqs.extend(part_reqs)
+
+    kept, absorbed_by = _collapse_duplicates(reqs)
+    for pos, req in enumerate(kept):
+        req["id"] = f"REQ-{pos + 1:03d}"
+        related = [f"REQ-{absorbed_by[j] + 1:03d}" for j in req["related_to"]]
+        req["related_to"] = [r for r in dict.fromkeys(related) if r != req["id"]]
+
+    summaries = [p.get("document_summary", "") for p in parts if p.get("document_summary")]
+    return {
+        "requirements": kept,
+        "document_summary": " ".join(summaries[:3]) + (
+            f" (Merged from {len(parts)} sections; {len(reqs) - len(kept)} duplicate requirements collapsed.)"
+        ),
+        "total_requirements_found": len(kept),
+        "type_breakdown": dict(Counter(r.get("type", "Unspecified") for r in kept)),
+    }
+
+
+def extract_requirements(document_text: str, api_key: str, max_workers: int = MAP_MAX_WORKERS) -> dict:
+    """Extract and classify requirements from document text.
+
+    Documents up to ``SINGLE_CALL_MAX_CHARS`` use one call. Larger documents
+    are split into section-aligned chunks, extracted concurrently (at most
+    ``max_workers`` calls in flight), and merged locally, so the whole
+    document is covered. A chunk that fails does not discard the others: it
+    is listed under ``failed_sections`` and the rest are merged.
+    """
+    if len(document_text) <= SINGLE_CALL_MAX_CHARS:
+        prompt = EXTRACTION_PROMPT.format(document_text=document_text)
+        response = _call_claude(prompt, api_key)
+        return _parse_json(response)
+
+    chunks = split_sections(document_text)
+    results, failures = {}, []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_extract_chunk, chunk, i + 1, len(chunks), api_key): i for i, chunk in enumerate(chunks)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                failures.append({"section": i + 1, "chars": len(chunks[i]), "preview": chunks[i][:80].strip(),
+                                 "error": str(e)})
+    if not results:
+        raise ValueError(f"All {len(chunks)} sections failed; first error: {failures[0]['error']}")
+    merged = merge_extractions([p for i in sorted(results) for p in results[i]])
+    merged["failed_sections"] = sorted(failures, key=lambda f: f["section"])
+    if failures:
+        merged["document_summary"] += f" {len(failures)} of {len(chunks)} sections could not be extracted."
+    return merged
+
+
+def _check_cluster(cluster: list[dict], api_key: str) -> dict:
+    fields = ("id", "title", "description", "type", "category", "priority")
+    compact = [{k: r.get(k, "") for k in fields} for r in cluster]
+    prompt = CONTRADICTION_PROMPT.format(requirements_json=json.dumps(compact, separators=(",", ":")))
+    return _parse_json(_call_claude(prompt, api_key))
+
+
+def group_by_category(contradictions: list[dict], requirements: list[dict]) -> dict[str, list[dict]]:
+    """Tag each issue with the category of the requirements it cites and group the issues by it.
+
+    Issues citing requirements from several categories go under "Cross-category";
+    ones citing no known requirement go under "Uncategorized".
+    """
+    category_of = {r.get("id"): r.get("category") or "Uncategorized" for r in requirements}
+    grouped = defaultdict(list)
+    for c in contradictions:
+        cats = {category_of[i] for i in c.get("requirement_ids", []) if i in category_of}
+        c["category"] = cats.pop() if len(cats) == 1 else "Cross-category" if cats else "Uncategorized"
+        grouped[c["category"]].append(c)
+    return dict(sorted(grouped.items(), key=lambda kv: (-len(kv[1]), kv[0])))
+
+
+def detect_contradictions(requirements: list[dict], api_key: str, max_workers: int = CONFLICT_MAX_WORKERS) -> dict:
+    """Analyze requirements for contradictions and conflicts.
+
+    Small sets go to Claude in one call. Larger sets are pruned locally with
+    MinHash/LSH: only clusters of requirements that share subject matter are
+    sent, concurrently, and the per-cluster results are merged. Clusters whose
+    call fails are listed under ``failed_clusters`` and left out of the score.
+    Either way the issues are also returned grouped under ``by_category``.
+    """
+    if len(requirements) <= SINGLE_CALL_MAX_REQUIREMENTS:
+        reqs_json = json.dumps(requirements, indent=2)
+        prompt = CONTRADICTION_PROMPT.format(requirements_json=reqs_json)
+        response = _parse_json(_call_claude(prompt, api_key))
+        response["by_category"] = group_by_category(response.get("contradictions", []), requirements)
+        return response
+
+    all_clusters = [[requirements[i] for i in c] for c in candidate_clusters(requirements)]
+    done, failures = {}, []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_check_cluster, c, api_key): i for i, c in enumerate(all_clusters)}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                done[i] = future.result()
+            except Exception as e:
+                failures.append({"cluster": i + 1, "requirement_ids": [r.get("id", "") for r in all_clusters[i]],
+                                 "error": str(e)})
+    if all_clusters and not done:
+        raise ValueError(f"All {len(all_clusters)} cluster checks failed; first error: {failures[0]['error']}")
+    results = [done[i] for i in sorted(done)]
+    clusters = [all_clusters[i] for i in sorted(done)]
+
+    contradictions = []
+    seen = set()
+    for result in results:
+        for c in result.get("contradictions", []):
+            key = (c.get("type"), frozenset(c.get("requirement_ids", [])))
+            if key not in seen:
+                seen.add(key)
+                contradictions.append(c)
+
+    # Requirements outside every cluster share no subject matter with others and count as consistent.
+    # Large components are split into overlapping batches, so a requirement may be scored more than once.
+    clustered = len({id(r) for c in all_clusters for r in c})
+    unclustered = len(requirements) - clustered
+    weighted = sum(r.get("overall_consistency_score", 100) * len(c) for r, c in zip(results, clusters))
+    score = round((weighted + 100 * unclustered) / max(sum(len(c) for c in clusters) + unclustered, 1))
+    failed_note = f" {len(failures)} clusters could not be checked." if failures else ""
+    return {
+        "contradictions": contradictions,
+        "by_category": group_by_category(contradictions, requirements),
+        "overall_consistency_score": score,
+        "summary": (
+            f"Screened {len(requirements)} requirements locally into {len(all_clusters)} clusters of related "
+            f"requirements ({clustered} requirements); {len(contradictions)} issues found across clusters."
+            + failed_note
+        ),
+        "failed_clusters": sorted(failures, key=lambda f: f["cluster"]),
+    }
 
 
 def chat_about_requirements(
@@ -143,16 +382,22 @@ def chat_about_requirements(
     document_text: str,
     requirements: list[dict],
     api_key: str,
+    index: RequirementsIndex | None = None,
+    top_chunks: int = 6,
+    top_requirements: int = 12,
 ) -> str:
-    """Answer questions about the documents and requirements."""
-    max_chars = 60_000
-    if len(document_text) > max_chars:
-        document_text = document_text[:max_chars] + "\n\n[... truncated ...]"
+    """Answer questions about the documents and requirements.
+
+    Only the BM25 top-k chunks and requirements are sent. Pass the ``index``
+    built at analysis time to avoid re-chunking the document per question.
+    """
+    if index is None:
+        index = build_requirements_index(document_text, requirements)
+    chunks, reqs = index.retrieve(question, top_chunks, top_requirements)
 
-    reqs_json = json.dumps(requirements, indent=2)
     prompt = CHAT_PROMPT.format(
-        document_text=document_text,
-        requirements_json=reqs_json,
+        document_text="\n\n...\n\n".join(chunks) or "(no matching excerpts)",
+        requirements_json=json.dumps(reqs, separators=(",", ":")),
         question=question,
     )
     return _call_claude(prompt, api_key, max_tokens=2048)
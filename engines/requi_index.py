@@ -0,0 +1,136 @@
+"""Local BM25 retrieval over requirement documents for the REQUI Track chat."""
+
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+REQ_ID_RE = re.compile(r"\bREQ-\d+\b", re.IGNORECASE)
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+
+CHUNK_CHARS = 1200
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its of on or shall "
+    "should that the their there these this to was we what when where which who why will with "
+    "must may any all not".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def chunk_document(text: str, max_chars: int = CHUNK_CHARS) -> list[str]:
+    """Split text into paragraph-aligned chunks of roughly ``max_chars``.
+
+    Short paragraphs are merged with their neighbours; paragraphs longer than
+    ``max_chars`` are split on line boundaries.
+    """
+    chunks = []
+    current = ""
+    for para in PARAGRAPH_SPLIT_RE.split(text):
+        para = para.strip()
+        if not para:
+            continue
+        pieces = [para]
+        if len(para) > max_chars:
+            pieces, buf = [], ""
+            for line in para.splitlines():
+                if buf and len(buf) + len(line) + 1 > max_chars:
+                    pieces.append(buf)
+                    buf = ""
+                buf = f"{buf}\n{line}" if buf else line
+            if buf:
+                pieces.append(buf)
+        for piece in pieces:
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of texts, backed by an inverted index."""
+
+    def __init__(self, texts: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((doc_id, tf))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+
+    def _idf(self, term: str) -> float:
+        df = len(self.postings.get(term, ()))
+        n = len(self.doc_lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+        """Return ``(doc_id, score)`` for the best ``top_k`` matches, best first."""
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+
+
+def _requirement_text(req: dict) -> str:
+    return " ".join(str(req.get(k, "")) for k in ("id", "title", "description", "category", "type", "source_ref"))
+
+
+@dataclass
+class RequirementsIndex:
+    """Chunks and requirements indexed once at analysis time, queried per chat question."""
+    chunks: list[str]
+    requirements: list[dict]
+    chunk_index: BM25Index = field(repr=False)
+    requirement_index: BM25Index = field(repr=False)
+    requirements_by_id: dict[str, dict] = field(repr=False)
+
+    def retrieve(self, question: str, top_chunks: int = 6, top_requirements: int = 12) -> tuple[list[str], list[dict]]:
+        """Return the most relevant document chunks and requirements for a question.
+
+        Requirement IDs named in the question (e.g. "REQ-014") are always
+        included, ahead of the BM25 matches.
+        """
+        chunks = [self.chunks[i] for i, _ in self.chunk_index.search(question, top_chunks)]
+
+        picked = []
+        seen = set()
+        for req_id in REQ_ID_RE.findall(question):
+            req = self.requirements_by_id.get(req_id.upper())
+            if req is not None and req_id.upper() not in seen:
+                picked.append(req)
+                seen.add(req_id.upper())
+        for i, _ in self.requirement_index.search(question, top_requirements):
+            req = self.requirements[i]
+            key = str(req.get("id", i)).upper()
+            if key not in seen and len(picked) < top_requirements:
+                picked.append(req)
+                seen.add(key)
+        return chunks, picked
+
+
+def build_requirements_index(document_text: str, requirements: list[dict]) -> RequirementsIndex:
+    """Chunk the document and build BM25 indexes over chunks and requirements."""
+    chunks = chunk_document(document_text)
+    return RequirementsIndex(
+        chunks=chunks,
+        requirements=requirements,
+        chunk_index=BM25Index(chunks),
+        requirement_index=BM25Index([_requirement_text(r) for r in requirements]),
+        requirements_by_id={str(r.get("id", "")).upper(): r for r in requirements},
+    )
@@ -0,0 +1,144 @@
+"""MinHash/LSH candidate generation for requirement conflict detection."""
+
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+from engines.requi_index import tokenize
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs with Jaccard ~0.3+ are likely to collide
+MIN_JACCARD = 0.2
+MAX_CLUSTER_SIZE = 40
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def _shingles(req: dict) -> set[str]:
+    """Unigrams plus word bigrams of the requirement's subject matter."""
+    toks = tokenize(f"{req.get('title', '')} {req.get('description', '')}")
+    return set(toks) | {f"{a} {b}" for a, b in zip(toks, toks[1:])}
+
+
+def minhash_signatures(shingle_sets: list[set[str]]) -> np.ndarray:
+    """Return an ``(n, NUM_PERM)`` MinHash signature matrix.
+
+    Shingles are hashed with CRC32 so signatures are stable across processes.
+    """
+    sigs = np.full((len(shingle_sets), NUM_PERM), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, shingles in enumerate(shingle_sets):
+        if not shingles:
+            continue
+        h = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+        hashed = (np.outer(h, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+        sigs[i] = hashed.min(axis=0)
+    return sigs
+
+
+def candidate_pairs(requirements: list[dict], bands: int = BANDS, min_jaccard: float = MIN_JACCARD) -> dict[tuple[int, int], float]:
+    """Find requirement pairs likely to share subject matter.
+
+    Pairs colliding in any LSH band are kept if their estimated Jaccard
+    similarity is at least ``min_jaccard``. Returns ``{(i, j): similarity}``
+    with ``i < j``.
+    """
+    sigs = minhash_signatures([_shingles(r) for r in requirements])
+    rows = NUM_PERM // bands
+    candidates = set()
+    for band in range(bands):
+        buckets = defaultdict(list)
+        block = sigs[:, band * rows:(band + 1) * rows]
+        for i, key in enumerate(map(bytes, block)):
+            buckets[key].append(i)
+        for members in buckets.values():
+            if 1 < len(members) <= 500:  # huge buckets are boilerplate, not shared subject matter
+                candidates.update((a, b) for k, a in enumerate(members) for b in members[k + 1:])
+
+    pairs = {}
+    for i, j in sorted(candidates):
+        similarity = float(np.mean(sigs[i] == sigs[j]))
+        if similarity >= min_jaccard:
+            pairs[(i, j)] = similarity
+    return pairs
+
+
+def _cover_pairs(pairs: dict[tuple[int, int], float], max_size: int) -> list[list[int]]:
+    """Greedily pack candidate pairs into batches of at most ``max_size`` requirements.
+
+    Each batch is seeded with the most similar uncovered pair and grown with
+    the requirement that covers the most uncovered pairs against the batch so
+    far. Every pair ends up inside at least one batch; a requirement may
+    appear in several.
+    """
+    uncovered = defaultdict(set)
+    for i, j in pairs:
+        uncovered[i].add(j)
+        uncovered[j].add(i)
+    batches = []
+    for i, j in sorted(pairs, key=lambda p: (-pairs[p], p)):
+        if j not in uncovered[i]:
+            continue
+        batch = [i, j]
+        gain = defaultdict(int)
+        for m in batch:
+            for k in uncovered[m]:
+                if k not in batch:
+                    gain[k] += 1
+        while len(batch) < max_size and gain:
+            best = max(gain, key=lambda k: (gain[k], -k))
+            del gain[best]
+            batch.append(best)
+            for k in uncovered[best]:
+                if k not in batch:
+                    gain[k] += 1
+        members = set(batch)
+        for m in batch:
+            uncovered[m] -= members
+        batches.append(sorted(batch))
+    return batches
+
+
+def candidate_clusters(requirements: list[dict], max_size: int = MAX_CLUSTER_SIZE) -> list[list[int]]:
+    """Group requirements connected by candidate pairs into reviewable clusters.
+
+    Connected components are found with union-find. Components larger than
+    ``max_size`` are broken into overlapping batches built from their
+    candidate pairs, so every candidate pair is still reviewed together.
+    Requirements with no candidate partner are omitted.
+    """
+    parent = list(range(len(requirements)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    pairs = candidate_pairs(requirements)
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    components = defaultdict(list)
+    for i in range(len(requirements)):
+        components[find(i)].append(i)
+
+    oversized = defaultdict(dict)
+    clusters = []
+    for root, members in components.items():
+        if 2 <= len(members) <= max_size:
+            clusters.append(members)
+        elif len(members) > max_size:
+            oversized[root] = {}
+    for (i, j), similarity in pairs.items():
+        root = find(i)
+        if root in oversized:
+            oversized[root][(i, j)] = similarity
+    for component_pairs in oversized.values():
+        clusters += _cover_pairs(component_pairs, max_size)
+    return sorted(clusters, key=lambda c: c[0])
@@ -3,40 +3,45 @@
 import json
 import anthropic
 
+from engines.resume_scorer import score_resume
+
 
 ANALYSIS_PROMPT = """\
 You are an expert ATS (Applicant Tracking System) analyzer and career coach.
 
-Analyze the following resume against the provided job description. Return your analysis as a JSON object with exactly these fields:
+Keyword and skills alignment have already been computed deterministically and are given
+below as facts; do not re-score them. Assess the remaining dimensions of the resume against
+the job description. Return your analysis as a JSON object with exactly these fields:
 
 {{
-  "overall_score": <integer 0-100>,
-  "keyword_match_score": <integer 0-100>,
-  "skills_alignment_score": <integer 0-100>,
   "experience_relevance_score": <integer 0-100>,
   "education_match_score": <integer 0-100>,
-  "matched_keywords": ["list", "of", "matched", "keywords"],
-  "missing_keywords": ["list", "of", "important", "missing", "keywords"],
-  "matched_skills": ["list", "of", "matched", "skills"],
-  "missing_skills": ["list", "of", "missing", "skills"],
   "strengths": ["strength 1", "strength 2", "..."],
   "improvement_suggestions": ["suggestion 1", "suggestion 2", "..."],
   "summary": "A 2-3 sentence overall assessment of the candidate's fit for this role."
 }}
 
 Scoring guidelines:
-- overall_score: Weighted average reflecting how well the resume matches the job (keyword 30%, skills 30%, experience 25%, education 15%)
-- keyword_match_score: How many key terms from the job description appear in the resume
-- skills_alignment_score: How well the candidate's skills match the required/preferred skills
 - experience_relevance_score: How relevant the candidate's experience is to the role
 - education_match_score: How well education/certifications align with requirements
 
-Be specific and actionable in your improvement suggestions. Focus on what would make the biggest impact.
+Be specific and actionable in your improvement suggestions. Use the missing keywords and
+skills below where they matter. Focus on what would make the biggest impact.
 
 IMPORTANT: Return ONLY the JSON object, no other text.
 
 ---
 
+PRECOMPUTED ALIGNMENT:
+- Keyword match score: {keyword_match_score}/100
+- Skills alignment score: {skills_alignment_score}/100
+- Matched skills: {matched_skills}
+- Missing skills: {missing_skills}
+- Matched keywords: {matched_keywords}
+- Missing keywords: {missing_keywords}
+
+---
+
 JOB DESCRIPTION:
 {job_description}
 
@@ -46,19 +51,37 @@ RESUME:
 {resume_text}
 """
 
+OVERALL_WEIGHTS = {
+    "keyword_match_score": 0.30,
+    "skills_alignment_score": 0.30,
+    "experience_relevance_score": 0.25,
+    "education_match_score": 0.15,
+}
+
+
+def analyze_resume(resume_text: str, job_description: str, api_key: str, idf: dict[str, float] | None = None) -> dict:
+    """Analyze a resume against a job description.
 
-def analyze_resume(resume_text: str, job_description: str, api_key: str) -> dict:
-    """Analyze a resume against a job description using Claude."""
+    Keyword and skills scores come from the local scorer and are reproducible;
+    Claude supplies only the experience/education scores and narrative fields.
+    """
     client = anthropic.Anthropic(api_key=api_key)
+    alignment = score_resume(resume_text, job_description, idf)
 
     prompt = ANALYSIS_PROMPT.format(
         resume_text=resume_text,
         job_description=job_description,
+        keyword_match_score=alignment["keyword_match_score"],
+        skills_alignment_score=alignment["skills_alignment_score"],
+        matched_skills=", ".join(alignment["matched_skills"]) or "none",
+        missing_skills=", ".join(alignment["missing_skills"]) or "none",
+        matched_keywords=", ".join(alignment["matched_keywords"]) or "none",
+        missing_keywords=", ".join(alignment["missing_keywords"]) or "none",
     )
 
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
-        max_tokens=2048,
+        max_tokens=1024,
         messages=[{"role": "user", "content": prompt}],
     )
 
@@ -71,4 +94,6 @@ def analyze_resume(resume_text: str, job_description: str, api_key: str) -> dict
         lines = [l for l in lines if not l.strip().startswith("```")]
         response_text = "\n".join(lines)
 
-    return json.loads(response_text)
+    result = {**json.loads(response_text), **alignment}
+    result["overall_score"] = round(sum(result.get(k, 0) * w for k, w in OVERALL_WEIGHTS.items()))
+    return result
@@ -1,14 +1,17 @@
 """Resume and job description file parsing utilities."""
 
-import io
+from typing import BinaryIO
+
 import pdfplumber
 from docx import Document
 
+from engines.upload_store import as_stream, read_bytes
+
 
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+def extract_text_from_pdf(source: bytes | BinaryIO) -> str:
     """Extract text content from a PDF file."""
     text_parts = []
-    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+    with pdfplumber.open(as_stream(source)) as pdf:
         for page in pdf.pages:
             page_text = page.extract_text()
             if page_text:
@@ -16,25 +19,25 @@ def extract_text_from_pdf(file_bytes: bytes) -> str:
     return "\n".join(text_parts)
 
 
-def extract_text_from_docx(file_bytes: bytes) -> str:
+def extract_text_from_docx(source: bytes | BinaryIO) -> str:
     """Extract text content from a DOCX file."""
-    doc = Document(io.BytesIO(file_bytes))
+    doc = Document(as_stream(source))
     return "\n".join(para.text for para in doc.paragraphs if para.text.strip())
 
 
-def extract_text_from_txt(file_bytes: bytes) -> str:
+def extract_text_from_txt(source: bytes | BinaryIO) -> str:
     """Extract text content from a plain text file."""
-    return file_bytes.decode("utf-8", errors="replace")
+    return read_bytes(source).decode("utf-8", errors="replace")
 
 
-def extract_text(file_name: str, file_bytes: bytes) -> str:
+def extract_text(file_name: str, source: bytes | BinaryIO) -> str:
     """Extract text from an uploaded file based on its extension."""
     name_lower = file_name.lower()
     if name_lower.endswith(".pdf"):
-        return extract_text_from_pdf(file_bytes)
+        return extract_text_from_pdf(source)
     elif name_lower.endswith(".docx"):
-        return extract_text_from_docx(file_bytes)
+        return extract_text_from_docx(source)
     elif name_lower.endswith(".txt"):
-        return extract_text_from_txt(file_bytes)
+        return extract_text_from_txt(source)
     else:
         raise ValueError(f"Unsupported file type: {file_name}. Use PDF, DOCX, or TXT.")
@@ -0,0 +1,228 @@
+"""Deterministic keyword and skills scoring of a resume against a job description."""
+
+import math
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]|\.net")
+LINE_SPLIT_RE = re.compile(r"[\n;•]+")
+
+MAX_NGRAM = 3
+MAX_KEYWORDS = 40
+
+STOPWORDS = frozenset("""
+a about above across after all also an and any are as at be been being both but by can could do
+does during each either etc for from has have having he her his how i if in including into is it
+its may more most must no not of on or other our out over own per plus preferred required
+responsibilities responsible role she should so such than that the their them then there these
+they this those through to under up us using via was we well were what when where which while who
+will with within work working would year years you your ability able strong excellent good
+experience experienced knowledge skills skill understanding familiarity proficiency proficient
+team teams candidate candidates job position company looking join help new best build building
+maintain ensure benefits salary compensation location remote hybrid office range plus bonus equity
+""".split())
+
+# Canonical skill -> aliases. Aliases are matched as whole n-grams after
+# tokenization and rewritten to the canonical name before scoring.
+SKILL_SYNONYMS = {
+    "python": ["python3"],
+    "java": [],
+    "javascript": ["js", "ecmascript", "es6"],
+    "typescript": [],
+    "c++": ["cpp"],
+    "c#": ["csharp"],
+    "golang": ["go lang"],
+    "rust": [],
+    "ruby": [],
+    "scala": [],
+    "kotlin": [],
+    "swift": [],
+    "sql": ["t-sql", "pl/sql", "plsql"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "elasticsearch": ["elastic search", "opensearch"],
+    "snowflake": [],
+    "spark": ["apache spark", "pyspark"],
+    "hadoop": [],
+    "kafka": ["apache kafka"],
+    "airflow": ["apache airflow"],
+    "dbt": [],
+    "pandas": [],
+    "numpy": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": [],
+    "pytorch": ["torch"],
+    "machine learning": ["ml"],
+    "deep learning": [],
+    "natural language processing": ["nlp"],
+    "computer vision": [],
+    "large language models": ["llm", "llms", "large language model"],
+    "generative ai": ["genai", "gen ai"],
+    "data science": [],
+    "data engineering": [],
+    "data analysis": ["data analytics"],
+    "statistics": ["statistical analysis"],
+    "aws": ["amazon web services"],
+    "azure": ["microsoft azure"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "docker": ["dockerfile"],
+    "kubernetes": ["k8s", "eks", "gke", "aks"],
+    "terraform": [],
+    "ansible": [],
+    "ci/cd": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "jenkins": [],
+    "github actions": [],
+    "git": ["github", "gitlab"],
+    "linux": ["unix"],
+    "react": ["reactjs", "react.js"],
+    "angular": ["angularjs"],
+    "vue": ["vuejs", "vue.js"],
+    "node.js": ["nodejs"],
+    "django": [],
+    "flask": [],
+    "fastapi": [],
+    "spring boot": ["spring framework", "spring mvc"],
+    ".net": ["dotnet", "asp.net"],
+    "rest api": ["restful", "rest apis", "restful apis"],
+    "graphql": [],
+    "microservices": ["microservice", "micro services"],
+    "html": ["html5"],
+    "css": ["css3"],
+    "tableau": [],
+    "power bi": ["powerbi"],
+    "microsoft excel": ["ms excel"],
+    "salesforce": [],
+    "sap": [],
+    "jira": [],
+    "agile": ["scrum", "kanban"],
+    "project management": ["pmp"],
+    "product management": [],
+    "stakeholder management": [],
+    "leadership": ["people management", "team leadership"],
+    "communication": ["communication skills"],
+    "security": ["cybersecurity", "information security", "infosec"],
+    "devops": [],
+    "sre": ["site reliability engineering"],
+    "etl": ["elt"],
+    "a/b testing": ["ab testing", "experimentation"],
+}
+
+
+def _tokens(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+_ALIAS_TO_SKILL = {}
+for _skill, _aliases in SKILL_SYNONYMS.items():
+    _ALIAS_TO_SKILL[_skill] = _skill
+    for _alias in _aliases:
+        _ALIAS_TO_SKILL[_alias] = _skill
+# Keys are tokenized like the text they are matched against ("a/b testing" -> a, b, testing).
+_ALIAS_TO_SKILL = {tuple(_tokens(k)): v for k, v in _ALIAS_TO_SKILL.items()}
+_MAX_ALIAS_LEN = max(len(k) for k in _ALIAS_TO_SKILL)
+
+
+def canonical_terms(text: str) -> list[str]:
+    """Tokenize and rewrite skill aliases (longest match first) to canonical names.
+
+    Skills become single terms (e.g. "amazon web services" -> "aws"); other
+    tokens pass through unchanged.
+    """
+    toks = _tokens(text)
+    out = []
+    i = 0
+    while i < len(toks):
+        for n in range(min(_MAX_ALIAS_LEN, len(toks) - i), 0, -1):
+            skill = _ALIAS_TO_SKILL.get(tuple(toks[i:i + n]))
+            if skill is not None:
+                out.append(skill)
+                i += n
+                break
+        else:
+            out.append(toks[i])
+            i += 1
+    return out
+
+
+def extract_terms(text: str) -> Counter:
+    """Count skills, content unigrams, and stopword-free 2-/3-grams in a text."""
+    counts = Counter()
+    for line in LINE_SPLIT_RE.split(text):
+        terms = canonical_terms(line)
+        for n in range(1, MAX_NGRAM + 1):
+            for i in range(len(terms) - n + 1):
+                gram = terms[i:i + n]
+                if any(t not in SKILL_SYNONYMS and (t in STOPWORDS or len(t) < 2 or any(c.isdigit() for c in t))
+                       for t in gram):
+                    continue
+                counts[" ".join(gram)] += 1
+    return counts
+
+
+def extract_skills(terms: Counter) -> set[str]:
+    return {t for t in terms if t in SKILL_SYNONYMS}
+
+
+def idf_weights(documents: list[Counter]) -> dict[str, float]:
+    """Smoothed IDF over a corpus of term counters."""
+    df = Counter()
+    for doc in documents:
+        df.update(doc.keys())
+    n = len(documents)
+    return {term: math.log((1 + n) / (1 + d)) + 1 for term, d in df.items()}
+
+
+def select_keywords(jd_terms: Counter, idf: dict[str, float], limit: int = MAX_KEYWORDS) -> dict[str, float]:
+    """Pick the job description's most important terms, weighted by TF-IDF.
+
+    Skills are always kept; multi-word phrases must recur to count as keywords.
+    """
+    weights = {}
+    for term, tf in jd_terms.items():
+        if term not in SKILL_SYNONYMS and " " in term and tf < 2:
+            continue
+        weights[term] = (1 + math.log(tf)) * idf.get(term, 1.0)
+    ranked = sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))
+    skills = {t: w for t, w in ranked if t in SKILL_SYNONYMS}
+    others = [(t, w) for t, w in ranked if t not in SKILL_SYNONYMS]
+    for term, weight in others[:max(0, limit - len(skills))]:
+        skills[term] = weight
+    return skills
+
+
+def score_resume(resume_text: str, job_description: str, idf: dict[str, float] | None = None) -> dict:
+    """Compute keyword and skills alignment deterministically.
+
+    ``idf`` may come from a larger corpus (e.g. all applicants for a
+    requisition); by default it is fitted on the lines of the job description
+    and resume so boilerplate terms shared by every line are down-weighted.
+    """
+    jd_terms = extract_terms(job_description)
+    resume_terms = extract_terms(resume_text)
+    if idf is None:
+        lines = [l for l in LINE_SPLIT_RE.split(f"{job_description}\n{resume_text}") if l.strip()]
+        idf = idf_weights([extract_terms(l) for l in lines])
+
+    keywords = select_keywords(jd_terms, idf)
+    matched_kw = [t for t in keywords if t in resume_terms]
+    missing_kw = [t for t in keywords if t not in resume_terms]
+    total_weight = sum(keywords.values())
+    keyword_score = round(100 * sum(keywords[t] for t in matched_kw) / total_weight) if total_weight else 0
+
+    jd_skills = extract_skills(jd_terms)
+    resume_skills = extract_skills(resume_terms)
+    matched_skills = sorted(jd_skills & resume_skills, key=lambda s: (-keywords.get(s, 0), s))
+    missing_skills = sorted(jd_skills - resume_skills, key=lambda s: (-keywords.get(s, 0), s))
+    skills_score = round(100 * len(matched_skills) / len(jd_skills)) if jd_skills else keyword_score
+
+    return {
+        "keyword_match_score": keyword_score,
+        "skills_alignment_score": skills_score,
+        "matched_keywords": matched_kw,
+        "missing_keywords": missing_kw,
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills,
+        "additional_resume_skills": sorted(resume_skills - jd_skills),
+    }
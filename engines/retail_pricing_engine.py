@@ -2,6 +2,10 @@
 
 import json
 import anthropic
+import pandas as pd
+
+from engines.price_optimizer import (PricingConstraints, apply_computed_prices, computed_prices_text,
+                                     optimization_summary)
 
 PRICING_PROMPT = """\
 You are an expert retail pricing strategist and revenue optimization consultant.
@@ -87,6 +91,10 @@ Return a JSON object:
 
 Be data-driven, specific, and realistic with projections.
 
+When COMPUTED PRICES are given below, they come from a constrained price-elasticity optimizer: use \
+exactly those recommended prices, changes and elasticities for the products listed, and explain them \
+rather than proposing different prices.
+
 IMPORTANT: Return ONLY the JSON object.
 
 ---
@@ -104,6 +112,9 @@ PRODUCT CATALOG:
 COMPETITOR DATA:
 {competitor_data}
 
+COMPUTED PRICES:
+{computed_prices}
+
 MARKET CONDITIONS:
 {market_conditions}
 
@@ -112,10 +123,25 @@ ADDITIONAL CONTEXT: {context}
 """
 
 
-def analyze_pricing(config: dict, api_key: str) -> dict:
-    """Analyze pricing and generate recommendations."""
+# Result fields that always come from the optimizer, per list of product items: item key -> priced column.
+PRICE_FIELDS = {
+    "product_analysis": {"current_price": "price", "recommended_price": "recommended_price",
+                         "price_change_pct": "price_change_pct"},
+}
+
+
+def analyze_pricing(config: dict, api_key: str, priced: pd.DataFrame | None = None,
+                    constraints: PricingConstraints | None = None) -> dict:
+    """Analyze pricing and generate recommendations.
+
+    ``priced`` is ``price_optimizer.optimize_prices`` output; when given, the
+    model explains those prices and the numeric price fields in the result
+    are overwritten with the optimizer's values.
+    """
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = PRICING_PROMPT.format(**config)
+    computed = (computed_prices_text(priced, constraints or PricingConstraints()) if priced is not None
+                else "Not computed; recommend prices from the catalog.")
+    prompt = PRICING_PROMPT.format(**config, computed_prices=computed)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
@@ -126,4 +152,12 @@ def analyze_pricing(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+    if priced is not None:
+        for key, columns in PRICE_FIELDS.items():
+            apply_computed_prices(result.get(key, []), priced, columns)
+        summary = optimization_summary(priced)
+        result.setdefault("revenue_simulation", {}).update(
+            current_monthly_revenue=summary["current_revenue"], projected_monthly_revenue=summary["expected_revenue"],
+            revenue_change_pct=summary["revenue_change_pct"])
+    return result
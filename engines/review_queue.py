@@ -0,0 +1,311 @@
+"""Durable, shared human review queue for underwriting decisions (SQLite)."""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+QUEUE_DB = os.getenv("REVIEW_QUEUE_DB", ".data/review_queue.sqlite3")
+PAGE_SIZE = 25
+STATUSES = ["Pending", "Reviewed"]
+RISK_BANDS = ["Low", "Medium", "High", "Unknown"]
+BUSY_TIMEOUT_S = 10
+APP_ID_OFFSET = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_id TEXT NOT NULL,
+    applicant_name TEXT,
+    loan_purpose TEXT,
+    requested_amount REAL,
+    credit_score INTEGER,
+    preliminary_decision TEXT,
+    risk_band TEXT NOT NULL,
+    confidence INTEGER,
+    status TEXT NOT NULL DEFAULT 'Pending',
+    assignee TEXT,
+    final_decision TEXT,
+    reviewer_notes TEXT NOT NULL DEFAULT '',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1,
+    result_json TEXT NOT NULL,
+    app_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_status_age ON reviews (status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reviews_assignee ON reviews (assignee, status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reviews_risk ON reviews (risk_band, status, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_reviews_updated ON reviews (updated_at);
+
+-- Application ids are handed out by INSERT so concurrent sessions never share one. Seeded past the
+-- existing items so ids issued before this table existed (count-based) are not repeated.
+CREATE TABLE IF NOT EXISTS app_ids (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    issued_at REAL NOT NULL
+);
+INSERT INTO app_ids (id, issued_at)
+SELECT MAX(id), 0 FROM reviews HAVING MAX(id) IS NOT NULL AND NOT EXISTS (SELECT 1 FROM app_ids);
+
+CREATE TABLE IF NOT EXISTS queue_counts (
+    status TEXT NOT NULL,
+    risk_band TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (status, risk_band)
+);
+CREATE TRIGGER IF NOT EXISTS reviews_count_insert AFTER INSERT ON reviews BEGIN
+    INSERT INTO queue_counts (status, risk_band, n) VALUES (NEW.status, NEW.risk_band, 1)
+    ON CONFLICT (status, risk_band) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_count_update AFTER UPDATE OF status, risk_band ON reviews
+WHEN OLD.status IS NOT NEW.status OR OLD.risk_band IS NOT NEW.risk_band BEGIN
+    UPDATE queue_counts SET n = n - 1 WHERE status = OLD.status AND risk_band = OLD.risk_band;
+    INSERT INTO queue_counts (status, risk_band, n) VALUES (NEW.status, NEW.risk_band, 1)
+    ON CONFLICT (status, risk_band) DO UPDATE SET n = n + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS reviews_count_delete AFTER DELETE ON reviews BEGIN
+    UPDATE queue_counts SET n = n - 1 WHERE status = OLD.status AND risk_band = OLD.risk_band;
+END;
+"""
+
+_ITEM_COLUMNS = ("id, app_id, status, assignee, final_decision, reviewer_notes, created_at, updated_at, "
+                 "version, risk_band, result_json, app_json")
+
+
+class ReviewConflictError(ValueError):
+    """Raised when a review item changed since the reviewer loaded it."""
+
+
+def risk_band(risk_classification: str | None) -> str:
+    """Map the model's ``risk_classification`` ("Low Risk", ...) onto a queue band."""
+    text = (risk_classification or "").lower()
+    for band in RISK_BANDS[:3]:
+        if band.lower() in text:
+            return band
+    return "Unknown"
+
+
+class ReviewQueue:
+    """Underwriting review items in one SQLite file, shared by every session.
+
+    Each call opens a short-lived connection (WAL mode, so readers never block
+    the writer). Status and risk-band counts are kept in ``queue_counts`` by
+    triggers, so ``count()`` never scans the queue; listings use keyset
+    pagination over the ``(status, created_at, id)`` indexes, and the
+    dashboard aggregates are reused until ``snapshot()`` changes. Every update
+    bumps ``version`` and only applies if the caller's version still
+    matches, so two reviewers cannot silently overwrite each other.
+    """
+
+    _initialized: set[str] = set()
+    _init_lock = threading.Lock()
+
+    def __init__(self, path: str = QUEUE_DB):
+        self.path = path
+        with self._init_lock:
+            if path not in self._initialized:
+                if os.path.dirname(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                with closing(self._open()) as conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(SCHEMA)
+                self._initialized.add(path)
+        self._dashboard_cache: tuple[str, dict] | None = None
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        with closing(self._open()) as conn, conn:
+            yield conn
+
+    # ── Writes ──
+
+    def next_app_id(self) -> str:
+        """A new application id ("APP-1001", ...), unique across sessions and never reused."""
+        with self._transaction() as conn:
+            cur = conn.execute("INSERT INTO app_ids (issued_at) VALUES (?)", (time.time(),))
+        return f"APP-{cur.lastrowid + APP_ID_OFFSET:04d}"
+
+    def enqueue(self, result: dict, app_data: dict) -> int:
+        """Add one analyzed application as a Pending item; returns its queue id."""
+        return self.enqueue_many([(result, app_data)])[0]
+
+    def enqueue_many(self, items: list[tuple[dict, dict]]) -> list[int]:
+        """Add many (result, app_data) pairs in one transaction; returns their queue ids."""
+        now = time.time()
+        rows = []
+        for result, app_data in items:
+            result = {k: v for k, v in result.items() if k != "app_data"}
+            rows.append((str(app_data.get("app_id", "")), app_data.get("applicant_name", ""),
+                         app_data.get("loan_purpose", ""), app_data.get("requested_amount"),
+                         app_data.get("credit_score"), result.get("preliminary_decision", "Unknown"),
+                         risk_band(result.get("risk_classification")), result.get("confidence"),
+                         now, now, json.dumps(result, default=str), json.dumps(app_data, default=str)))
+        ids = []
+        with self._transaction() as conn:
+            # AUTOINCREMENT never reuses ids of deleted rows, so read each id back rather than derive it from MAX(id).
+            for row in rows:
+                cur = conn.execute(
+                    "INSERT INTO reviews (app_id, applicant_name, loan_purpose, requested_amount, credit_score, "
+                    "preliminary_decision, risk_band, confidence, created_at, updated_at, result_json, app_json) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                ids.append(cur.lastrowid)
+        return ids
+
+    def _update(self, item_id: int, version: int, assignments: str, params: tuple):
+        with self._transaction() as conn:
+            cur = conn.execute(
+                f"UPDATE reviews SET {assignments}, version = version + 1, updated_at = ? "
+                "WHERE id = ? AND version = ?",
+                (*params, time.time(), item_id, version),
+            )
+            if cur.rowcount == 0:
+                row = conn.execute("SELECT status, assignee FROM reviews WHERE id = ?", (item_id,)).fetchone()
+                if row is None:
+                    raise ReviewConflictError(f"Review item {item_id} no longer exists.")
+                holder = f" (assigned to {row['assignee']})" if row["assignee"] else ""
+                raise ReviewConflictError(
+                    f"Review item {item_id} was changed by another reviewer{holder}; now {row['status']}. "
+                    "Reload the queue and try again.")
+
+    def claim(self, item_id: int, version: int, reviewer: str):
+        """Assign an item to ``reviewer`` if nobody changed it since ``version`` was read."""
+        self._update(item_id, version, "assignee = ?", (reviewer or None,))
+
+    def submit_review(self, item_id: int, version: int, final_decision: str, notes: str, reviewer: str = ""):
+        """Record the human decision; raises ``ReviewConflictError`` on a stale ``version``."""
+        self._update(item_id, version, "status = 'Reviewed', final_decision = ?, reviewer_notes = ?, "
+                     "assignee = COALESCE(?, assignee)", (final_decision, notes, reviewer or None))
+
+    # ── Reads ──
+
+    def count(self, status: str | None = None, band: str | None = None) -> int:
+        """Items by status and/or risk band, read from the trigger-maintained counters."""
+        sql, params = "SELECT COALESCE(SUM(n), 0) FROM queue_counts WHERE 1 = 1", []
+        if status:
+            sql, params = sql + " AND status = ?", params + [status]
+        if band:
+            sql, params = sql + " AND risk_band = ?", params + [band]
+        with closing(self._open()) as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def counts(self) -> dict[str, dict[str, int]]:
+        """``{status: {risk_band: n}}`` for every non-empty bucket."""
+        with closing(self._open()) as conn:
+            rows = conn.execute("SELECT status, risk_band, n FROM queue_counts WHERE n > 0").fetchall()
+        out: dict[str, dict[str, int]] = {}
+        for row in rows:
+            out.setdefault(row["status"], {})[row["risk_band"]] = row["n"]
+        return out
+
+    def page(self, status: str = "Pending", band: str | None = None, assignee: str | None = None,
+             unassigned: bool = False, newest_first: bool = False, after: tuple | None = None,
+             limit: int = PAGE_SIZE) -> tuple[list[dict], tuple | None]:
+        """One page of items, oldest first by default; returns (items, cursor for the next page).
+
+        ``after`` is the cursor returned by the previous call. Pages are
+        seeks on an index rather than OFFSET scans, so page 4,000 is as fast
+        as page 1.
+        """
+        where, params = ["status = ?"], [status]
+        if band:
+            where.append("risk_band = ?")
+            params.append(band)
+        if unassigned:
+            where.append("assignee IS NULL")
+        elif assignee:
+            where.append("assignee = ?")
+            params.append(assignee)
+        if after:
+            where.append(f"(created_at, id) {'<' if newest_first else '>'} (?, ?)")
+            params.extend(after)
+        order = "DESC" if newest_first else "ASC"
+        sql = (f"SELECT {_ITEM_COLUMNS} FROM reviews WHERE {' AND '.join(where)} "
+               f"ORDER BY created_at {order}, id {order} LIMIT ?")
+        with closing(self._open()) as conn:
+            rows = conn.execute(sql, (*params, limit + 1)).fetchall()
+        items = [_item(row) for row in rows[:limit]]
+        cursor = (rows[limit - 1]["created_at"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        return items, cursor
+
+    def get(self, item_id: int) -> dict | None:
+        with closing(self._open()) as conn:
+            row = conn.execute(f"SELECT {_ITEM_COLUMNS} FROM reviews WHERE id = ?", (item_id,)).fetchone()
+        return _item(row) if row else None
+
+    def dashboard(self) -> dict:
+        """Decision mix, average confidence, and credit-score histogram, aggregated in SQL.
+
+        The full-table aggregates only rerun when ``snapshot()`` has changed.
+        """
+        snapshot = self.snapshot()
+        cached = self._dashboard_cache
+        if cached and cached[0] == snapshot:
+            return cached[1]
+        with closing(self._open()) as conn:
+            decisions = dict(conn.execute(
+                "SELECT preliminary_decision, COUNT(*) FROM reviews GROUP BY preliminary_decision").fetchall())
+            avg_confidence = conn.execute("SELECT AVG(confidence) FROM reviews").fetchone()[0]
+            scores = conn.execute(
+                "SELECT (credit_score / 25) * 25 AS bucket, COUNT(*) FROM reviews "
+                "WHERE credit_score IS NOT NULL GROUP BY bucket ORDER BY bucket").fetchall()
+        stats = {
+            "decisions": decisions,
+            "avg_confidence": round(avg_confidence or 0, 1),
+            "credit_score_buckets": {row[0]: row[1] for row in scores},
+        }
+        self._dashboard_cache = (snapshot, stats)
+        return stats
+
+    def snapshot(self) -> str:
+        """Version id of the whole queue; changes whenever an item is added or updated.
+
+        Each part is an index lookup: the count comes from ``queue_counts`` and
+        the maxima from ``idx_reviews_updated`` and the rowid.
+        """
+        with closing(self._open()) as conn:
+            count, last_update, last_id = conn.execute(
+                "SELECT (SELECT COALESCE(SUM(n), 0) FROM queue_counts), (SELECT MAX(updated_at) FROM reviews), "
+                "(SELECT MAX(id) FROM reviews)").fetchone()
+        return f"{os.path.abspath(self.path)}:{count}:{last_update}:{last_id}"
+
+    def decision_frame(self) -> pd.DataFrame:
+        """One row per item: the effective decision (the human decision once reviewed) plus application fields.
+
+        Fair-lending ``monitoring`` fields stored with batch applications are
+        flattened into their own columns.
+        """
+        with closing(self._open()) as conn:
+            rows = conn.execute("SELECT id, status, preliminary_decision, final_decision, app_json "
+                                "FROM reviews ORDER BY id").fetchall()
+        apps = []
+        for row in rows:
+            app = json.loads(row["app_json"])
+            app.update(app.pop("monitoring", None) or {})
+            apps.append(app)
+        frame = pd.DataFrame(apps)
+        frame["queue_id"] = [row["id"] for row in rows]
+        frame["status"] = [row["status"] for row in rows]
+        frame["decision"] = [row["final_decision"] if row["status"] == "Reviewed" else row["preliminary_decision"]
+                             for row in rows]
+        return frame
+
+
+def _item(row: sqlite3.Row) -> dict:
+    """Queue row in the shape the pages render: the model result plus app_data and review fields."""
+    return {
+        **json.loads(row["result_json"]),
+        "app_data": json.loads(row["app_json"]),
+        "id": row["id"], "status": row["status"], "assignee": row["assignee"],
+        "final_decision": row["final_decision"], "reviewer_notes": row["reviewer_notes"],
+        "risk_band": row["risk_band"], "created_at": row["created_at"],
+        "updated_at": row["updated_at"], "version": row["version"],
+    }
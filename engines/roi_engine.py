@@ -3,6 +3,8 @@
 import math
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class ProjectInputs:
@@ -145,3 +147,321 @@ def run_all_scenarios(inputs: ProjectInputs) -> dict[str, ScenarioResult]:
         "most_likely": calculate_scenario(inputs, revenue_multiplier=1.0, cost_multiplier=1.0, label="Most Likely"),
         "pessimistic": calculate_scenario(inputs, revenue_multiplier=0.7, cost_multiplier=1.15, label="Pessimistic"),
     }
+
+
+# ── Monte Carlo mode ──
+
+SIMULATED_FIELDS = (
+    "initial_investment", "annual_operating_cost", "annual_cost_growth_pct", "total_addressable_market",
+    "qualifying_ratio_pct", "hit_rate_pct", "avg_annual_license", "revenue_start_month", "annual_revenue_growth_pct",
+)
+FIELD_BOUNDS = {
+    "qualifying_ratio_pct": (0.0, 100.0), "hit_rate_pct": (0.0, 100.0), "revenue_start_month": (1, 60),
+    "annual_cost_growth_pct": (-100.0, None), "annual_revenue_growth_pct": (-100.0, None),
+}
+# (downside, upside) around each input: % of the value, or points / months for ABSOLUTE_SPREAD_UNITS fields.
+DEFAULT_SPREADS = {
+    "hit_rate_pct": (-40, 30), "qualifying_ratio_pct": (-20, 10), "avg_annual_license": (-15, 10),
+    "annual_operating_cost": (-10, 25), "initial_investment": (-5, 30), "annual_revenue_growth_pct": (-5, 5),
+    "annual_cost_growth_pct": (-2, 3), "revenue_start_month": (-2, 6),
+}
+ABSOLUTE_SPREAD_UNITS = {"annual_revenue_growth_pct": "pts", "annual_cost_growth_pct": "pts",
+                         "revenue_start_month": "months"}
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+DEFAULT_PATHS = 100_000
+HISTOGRAM_BINS = 60
+
+
+@dataclass
+class Distribution:
+    """Uncertainty for one ProjectInputs field, in that field's units.
+
+    ``triangular``/``pert`` use (low, mode, high), ``uniform`` uses
+    (low, high), ``normal`` uses (mode as mean, std). ``mode`` defaults to the
+    field's value in ProjectInputs.
+    """
+    kind: str = "triangular"
+    low: float | None = None
+    high: float | None = None
+    mode: float | None = None
+    std: float = 0.0
+
+    def sample(self, center: float, n: int, rng: np.random.Generator) -> np.ndarray:
+        mode = center if self.mode is None else self.mode
+        low = mode if self.low is None else min(self.low, mode)
+        high = mode if self.high is None else max(self.high, mode)
+        if self.kind == "normal":
+            return rng.normal(mode, self.std, n) if self.std > 0 else np.full(n, float(mode))
+        if high <= low:
+            return np.full(n, float(mode))
+        if self.kind == "uniform":
+            return rng.uniform(low, high, n)
+        if self.kind == "pert":
+            alpha = 1 + 4 * (mode - low) / (high - low)
+            beta = 1 + 4 * (high - mode) / (high - low)
+            return low + rng.beta(alpha, beta, n) * (high - low)
+        return rng.triangular(low, mode, high, n)
+
+
+def distributions_from_spreads(inputs: ProjectInputs, spreads: dict[str, tuple[float, float]],
+                               kind: str = "triangular") -> dict[str, Distribution]:
+    """Build distributions from (downside, upside) spreads around the ProjectInputs values.
+
+    Spreads are percent of the value, except the fields in
+    ``ABSOLUTE_SPREAD_UNITS`` (growth rates in points, start month in months).
+    """
+    out = {}
+    for name, (down, up) in spreads.items():
+        center = getattr(inputs, name)
+        if name in ABSOLUTE_SPREAD_UNITS:
+            low, high = center + down, center + up
+        else:
+            low, high = center * (1 + down / 100), center * (1 + up / 100)
+        out[name] = Distribution(kind=kind, low=low, high=high)
+    return out
+
+
+def default_distributions(inputs: ProjectInputs) -> dict[str, Distribution]:
+    """Triangular ranges spanning roughly the fixed optimistic / pessimistic multipliers."""
+    return distributions_from_spreads(inputs, DEFAULT_SPREADS)
+
+
+@dataclass
+class MonteCarloResult:
+    """Distribution of outcomes across simulated paths."""
+    n_paths: int
+    npv: dict[int, float]  # percentile -> value
+    roi_pct: dict[int, float]
+    total_profit: dict[int, float]
+    payback_month: dict[int, float]  # over paths that pay back
+    mean_npv: float
+    probability_of_loss: float  # P(NPV < 0)
+    probability_negative_profit: float  # P(undiscounted total profit < 0)
+    probability_no_payback: float
+    cumulative_profit_fan: dict[int, list[float]]  # percentile -> per-year cumulative profit
+    npv_histogram: tuple[list[float], list[int]]  # (bin edges, counts)
+    samples: dict[str, np.ndarray]
+
+
+def simulate_paths(inputs: ProjectInputs, values: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """``calculate_scenario`` over arrays: each ProjectInputs field in ``values`` is one value per path.
+
+    Fields missing from ``values`` stay at their ProjectInputs value. With
+    every path at the point values this reproduces the Most Likely scenario.
+    """
+    n = max((len(v) for v in values.values()), default=1)
+
+    def field(name):
+        return np.broadcast_to(np.asarray(values.get(name, getattr(inputs, name)), dtype=float), (n,))
+
+    years = inputs.projection_years
+    qualifying = np.floor(field("total_addressable_market") * field("qualifying_ratio_pct") / 100)
+    customers = np.maximum(1, np.floor(qualifying * field("hit_rate_pct") / 100))
+    base_revenue = customers * field("avg_annual_license")
+    rev_start = field("revenue_start_month")[:, None]
+    growth = field("annual_revenue_growth_pct")[:, None] / 100
+
+    year = np.arange(1, years + 1)[None, :]
+    ramping = (year == 1) | ((year - 1) * 12 < rev_start)
+    active_months = np.clip(year * 12 - rev_start + 1, 0, 12)
+    growth_years = year - np.ceil(rev_start / 12)
+    revenue = base_revenue[:, None] * np.where(ramping, active_months / 12, (1 + growth) ** growth_years)
+    revenue = np.where((year == 1) & (rev_start > 12), 0.0, revenue)
+
+    operating = field("annual_operating_cost")[:, None]
+    costs = np.where(year == 1, field("initial_investment")[:, None] + operating,
+                     operating * (1 + field("annual_cost_growth_pct")[:, None] / 100) ** (year - 1))
+    profit = revenue - costs
+    cumulative = np.cumsum(profit, axis=1)
+
+    # Payback month: same interpolation as calculate_scenario, at the first year cumulative profit >= 0.
+    paid = cumulative >= 0
+    has_payback = paid.any(axis=1)
+    first = paid.argmax(axis=1)
+    rows = np.arange(n)
+    prev_cum = np.where(first > 0, cumulative[rows, np.maximum(first - 1, 0)], 0.0)
+    first_profit = profit[rows, first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        months = np.where(prev_cum < 0, np.floor(12 * -prev_cum / first_profit), 0)
+    payback = np.where(first == 0, 12,
+                       np.where(first_profit > 0, first * 12 + np.maximum(1, months), (first + 1) * 12))
+    payback = np.where(has_payback, payback, np.nan)
+
+    total_revenue, total_costs = revenue.sum(axis=1), costs.sum(axis=1)
+    total_profit = total_revenue - total_costs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(total_costs > 0, total_profit / total_costs * 100, 0.0)
+    discount = (1 + inputs.discount_rate_pct / 100) ** -year
+    return {
+        "customers": customers, "revenue": revenue, "costs": costs, "profit": profit, "cumulative": cumulative,
+        "total_revenue": total_revenue, "total_costs": total_costs, "total_profit": total_profit,
+        "roi_pct": roi, "npv": (profit * discount).sum(axis=1), "payback_month": payback,
+    }
+
+
+def sample_inputs(inputs: ProjectInputs, distributions: dict[str, Distribution], n_paths: int,
+                  seed: int | None = None) -> dict[str, np.ndarray]:
+    """Draw ``n_paths`` values for every field with a distribution, clipped to the field's valid range."""
+    rng = np.random.default_rng(seed)
+    values = {}
+    for name, dist in distributions.items():
+        if name not in SIMULATED_FIELDS:
+            raise ValueError(f"{name} is not a simulated ProjectInputs field.")
+        draw = dist.sample(getattr(inputs, name), n_paths, rng)
+        low, high = FIELD_BOUNDS.get(name, (0.0, None))
+        draw = np.clip(draw, low, high)
+        if name == "revenue_start_month":
+            draw = np.round(draw)
+        values[name] = draw
+    return values
+
+
+def _percentiles(values: np.ndarray) -> dict[int, float]:
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return {p: float("nan") for p in PERCENTILES}
+    return dict(zip(PERCENTILES, np.percentile(finite, PERCENTILES).round(2).tolist()))
+
+
+def run_monte_carlo(inputs: ProjectInputs, distributions: dict[str, Distribution] | None = None,
+                    n_paths: int = DEFAULT_PATHS, seed: int | None = None) -> MonteCarloResult:
+    """Simulate ``n_paths`` projections in one vectorized pass and summarize the outcome distribution."""
+    distributions = default_distributions(inputs) if distributions is None else distributions
+    paths = simulate_paths(inputs, sample_inputs(inputs, distributions, n_paths, seed))
+    npv, payback = paths["npv"], paths["payback_month"]
+    fan = np.percentile(paths["cumulative"], PERCENTILES, axis=0).round(2)
+    counts, edges = np.histogram(npv, bins=HISTOGRAM_BINS)
+    return MonteCarloResult(
+        n_paths=n_paths,
+        npv=_percentiles(npv),
+        roi_pct=_percentiles(paths["roi_pct"]),
+        total_profit=_percentiles(paths["total_profit"]),
+        payback_month=_percentiles(payback),
+        mean_npv=round(float(npv.mean()), 2),
+        probability_of_loss=round(float((npv < 0).mean()), 4),
+        probability_negative_profit=round(float((paths["total_profit"] < 0).mean()), 4),
+        probability_no_payback=round(float(np.isnan(payback).mean()), 4),
+        cumulative_profit_fan={p: row.tolist() for p, row in zip(PERCENTILES, fan)},
+        npv_histogram=(edges.round(2).tolist(), counts.tolist()),
+        samples={"npv": npv, "roi_pct": paths["roi_pct"], "payback_month": payback,
+                 "customers": paths["customers"]},
+    )
+
+
+# ── Sensitivity analysis ──
+
+SENSITIVITY_STEPS = 11
+GRID_STEPS = 25
+SPREAD_LABELS = {
+    "hit_rate_pct": "Hit Rate", "qualifying_ratio_pct": "Qualifying Ratio", "avg_annual_license": "Avg Annual License",
+    "annual_operating_cost": "Annual Operating Cost", "initial_investment": "Initial Investment",
+    "annual_revenue_growth_pct": "Revenue Growth", "annual_cost_growth_pct": "Cost Growth",
+    "revenue_start_month": "Revenue Start Month", "total_addressable_market": "Total Addressable Market",
+}
+
+
+@dataclass
+class DriverSensitivity:
+    """One-at-a-time sweep of a single driver, all other inputs at their base values."""
+    field: str
+    label: str
+    values: list[float]
+    npv: list[float]
+    roi_pct: list[float]
+    npv_low: float  # NPV at the downside end of the range
+    npv_high: float  # NPV at the upside end
+    swing: float  # |npv_high - npv_low|
+    breakeven_value: float | None  # driver value where NPV crosses zero inside the range
+
+
+@dataclass
+class SensitivityGrid:
+    """Two-way grid: metric[i][j] is the outcome at y_values[i], x_values[j]."""
+    x_field: str
+    y_field: str
+    x_values: list[float]
+    y_values: list[float]
+    npv: list[list[float]]
+    roi_pct: list[list[float]]
+
+
+def _range_values(inputs: ProjectInputs, field: str, spread: tuple[float, float], steps: int) -> np.ndarray:
+    dist = distributions_from_spreads(inputs, {field: spread})[field]
+    low, high = FIELD_BOUNDS.get(field, (0.0, None))
+    values = np.clip(np.linspace(dist.low, dist.high, steps), low, high)
+    return np.round(values) if field == "revenue_start_month" else values
+
+
+def _breakeven(values: np.ndarray, npv: np.ndarray) -> float | None:
+    crossings = np.nonzero(np.diff(np.sign(npv)) != 0)[0]
+    if not len(crossings):
+        return None
+    i = crossings[0]
+    if npv[i + 1] == npv[i]:
+        return float(values[i])
+    return float(values[i] - npv[i] * (values[i + 1] - values[i]) / (npv[i + 1] - npv[i]))
+
+
+def driver_sensitivities(inputs: ProjectInputs, spreads: dict[str, tuple[float, float]] | None = None,
+                         steps: int = SENSITIVITY_STEPS) -> list[DriverSensitivity]:
+    """Sweep every driver across its spread in one ``simulate_paths`` call; sorted by NPV swing (tornado order)."""
+    spreads = spreads or DEFAULT_SPREADS
+    fields = list(spreads)
+    sweeps = {f: _range_values(inputs, f, spreads[f], steps) for f in fields}
+    n = steps * len(fields)
+    values = {f: np.full(n, float(getattr(inputs, f))) for f in fields}
+    for k, f in enumerate(fields):
+        values[f][k * steps:(k + 1) * steps] = sweeps[f]
+    paths = simulate_paths(inputs, values)
+    npv = paths["npv"].reshape(len(fields), steps)
+    roi = paths["roi_pct"].reshape(len(fields), steps)
+
+    out = [
+        DriverSensitivity(
+            field=f, label=SPREAD_LABELS.get(f, f), values=sweeps[f].round(4).tolist(),
+            npv=npv[k].round(2).tolist(), roi_pct=roi[k].round(1).tolist(),
+            npv_low=round(float(npv[k, 0]), 2), npv_high=round(float(npv[k, -1]), 2),
+            swing=round(float(abs(npv[k, -1] - npv[k, 0])), 2),
+            breakeven_value=_breakeven(sweeps[f], npv[k]),
+        )
+        for k, f in enumerate(fields)
+    ]
+    return sorted(out, key=lambda d: d.swing, reverse=True)
+
+
+def sensitivity_grid(inputs: ProjectInputs, x_field: str = "hit_rate_pct", y_field: str = "avg_annual_license",
+                     spreads: dict[str, tuple[float, float]] | None = None, steps: int = GRID_STEPS) -> SensitivityGrid:
+    """Evaluate every (x, y) combination of two drivers in one vectorized pass."""
+    spreads = spreads or DEFAULT_SPREADS
+    x = _range_values(inputs, x_field, spreads.get(x_field, DEFAULT_SPREADS.get(x_field, (-25, 25))), steps)
+    y = _range_values(inputs, y_field, spreads.get(y_field, DEFAULT_SPREADS.get(y_field, (-25, 25))), steps)
+    yy, xx = np.meshgrid(y, x, indexing="ij")
+    paths = simulate_paths(inputs, {x_field: xx.ravel(), y_field: yy.ravel()})
+    return SensitivityGrid(
+        x_field=x_field, y_field=y_field, x_values=x.round(4).tolist(), y_values=y.round(4).tolist(),
+        npv=paths["npv"].reshape(len(y), len(x)).round(2).tolist(),
+        roi_pct=paths["roi_pct"].reshape(len(y), len(x)).round(1).tolist(),
+    )
+
+
+def sensitivity_summary(inputs: ProjectInputs, drivers: list[DriverSensitivity], grid: SensitivityGrid | None = None,
+                        monte_carlo: "MonteCarloResult | None" = None) -> str:
+    """Computed sensitivity facts as prompt text, so the advisor reports them instead of guessing."""
+    base_npv = simulate_paths(inputs, {})["npv"][0]
+    lines = [f"Base NPV: ${base_npv:,.0f}. Drivers ranked by NPV swing across their tested range:"]
+    for d in drivers:
+        unit = ABSOLUTE_SPREAD_UNITS.get(d.field, "")
+        breakeven = (f"; NPV breaks even at {d.breakeven_value:,.2f}{' ' + unit if unit else ''}"
+                     if d.breakeven_value is not None else "; NPV does not cross zero in this range")
+        lines.append(f"- {d.label} {d.values[0]:,.2f} to {d.values[-1]:,.2f} (base {getattr(inputs, d.field):,.2f}): "
+                     f"NPV ${d.npv_low:,.0f} to ${d.npv_high:,.0f} (swing ${d.swing:,.0f}){breakeven}")
+    if grid is not None:
+        npv = np.array(grid.npv)
+        lines.append(f"Two-way grid {SPREAD_LABELS.get(grid.x_field, grid.x_field)} x "
+                     f"{SPREAD_LABELS.get(grid.y_field, grid.y_field)}: NPV ranges ${npv.min():,.0f} to "
+                     f"${npv.max():,.0f}; {(npv < 0).mean():.0%} of combinations have negative NPV.")
+    if monte_carlo is not None:
+        lines.append(f"Monte Carlo ({monte_carlo.n_paths:,} paths): NPV P5 ${monte_carlo.npv[5]:,.0f}, "
+                     f"P50 ${monte_carlo.npv[50]:,.0f}, P95 ${monte_carlo.npv[95]:,.0f}; "
+                     f"probability of loss {monte_carlo.probability_of_loss:.1%}.")
+    return "\n".join(lines)
@@ -0,0 +1,568 @@
+"""Local sanctions / PEP watchlist index with fuzzy name matching for KYC screening."""
+
+import io
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+from collections.abc import MutableMapping
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from engines.upload_store import as_stream
+
+SESSION_WATCHLIST_KEY = "_watchlist_index"
+
+COLUMN_ALIASES = {
+    "name": "name", "full name": "name", "sdn_name": "name", "sdn name": "name", "entity name": "name",
+    "primary name": "name", "whole name": "name", "wholename": "name",
+    "aliases": "aliases", "alias": "aliases", "aka": "aliases", "alternate names": "aliases", "other names": "aliases",
+    "id": "entry_id", "uid": "entry_id", "ent_num": "entry_id", "entity id": "entry_id", "reference": "entry_id",
+    "list": "list_name", "list name": "list_name", "source": "list_name", "dataset": "list_name",
+    "program": "programs", "programs": "programs", "sanctions program": "programs", "regime": "programs",
+    "position": "programs",
+    "type": "entity_type", "entity type": "entity_type", "sdn_type": "entity_type", "sdn type": "entity_type",
+    "dob": "dob", "date of birth": "dob", "birth date": "dob",
+    "country": "country", "nationality": "country", "citizenship": "country",
+    "remarks": "remarks", "notes": "remarks",
+}
+SDN_COLUMNS = ["entry_id", "name", "entity_type", "programs", "title", "call_sign", "vessel_type",
+               "tonnage", "grt", "vessel_flag", "vessel_owner", "remarks"]
+ALT_COLUMNS = ["entry_id", "alt_id", "alt_type", "variant", "alt_remarks"]
+WATCHLIST_COLUMNS = ["entry_id", "name", "variant", "list_name", "entity_type", "programs", "dob", "country", "remarks"]
+
+# Transliteration for characters NFKD does not decompose to ASCII.
+TRANSLITERATION = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "e", "ж": "zh", "з": "z", "и": "i",
+    "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t",
+    "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "shch", "ъ": "", "ы": "y", "ь": "",
+    "э": "e", "ю": "yu", "я": "ya", "і": "i", "ї": "yi", "є": "ye", "ґ": "g",
+    "ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "ı": "i",
+    "'": "", "’": "", "`": "", "‘": "",
+})
+HONORIFICS = {"mr", "mrs", "ms", "miss", "dr", "prof", "sir", "dame", "hon", "gen", "col", "capt"}
+LEGAL_SUFFIXES = {
+    "ltd", "llc", "inc", "co", "corp", "corporation", "company", "limited", "plc", "sa", "ag", "gmbh",
+    "jsc", "ojsc", "pjsc", "cjsc", "ooo", "zao", "oao", "bv", "nv", "srl", "spa", "fze", "fzco", "lp", "llp",
+}
+# Joined to the following token so "Al-Rashid", "Al Rashid" and "Alrashid" normalize alike.
+PARTICLES = {"al", "el", "bin", "ibn", "abu", "van", "von", "de", "del", "der", "da", "di", "du", "le", "la", "dos", "das"}
+
+PHONETIC_REWRITES = [
+    ("dzh", "j"), ("shch", "s"), ("sch", "s"), ("tch", "c"), ("ph", "f"), ("kh", "h"), ("gh", "g"),
+    ("th", "t"), ("sh", "s"), ("ch", "c"), ("zh", "j"), ("ts", "s"), ("ck", "k"), ("dj", "j"),
+    ("w", "v"), ("q", "k"), ("x", "ks"),
+]
+PHONETIC_CLASSES = str.maketrans({
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6", **dict.fromkeys("aeiouyhw", ""),
+})
+
+NGRAM = 3
+BLOCK_MIN_SIMILARITY = 0.30  # n-gram/phonetic cosine needed to become a candidate
+KEYED_MIN_TOKEN_SIMILARITY = 0.86  # key-block hits this close at token level are judged mainly on tokens
+MAX_CANDIDATES = 12          # per screened name, before rescoring
+QUERY_CHUNK = 2048
+BLOCK_MAX_DF = 0.005         # features in more than this share of names (min 100) are skipped when blocking
+SCORE_WEIGHTS = {"token": 0.45, "ngram": 0.35, "phonetic": 0.20}
+LIKELY_MATCH = 0.88
+POSSIBLE_MATCH = 0.76
+MAX_PROMPT_HITS = 40
+
+SCREENING_NOTE = """\
+The subjects below were screened locally against the watchlists named; no other \
+lists were available. Adjudicate only the candidate hits listed (Likely match, \
+Possible match, or False positive) using the match evidence and the profile details. \
+Do not report sanctions or PEP list matches from memory; for subjects with no \
+candidate hits, report the lists as checked with no match."""
+
+
+@lru_cache(maxsize=200_000)
+def normalize_name(name: str) -> tuple[str, ...]:
+    """Transliterate, strip accents and punctuation, drop titles and legal suffixes; returns tokens."""
+    text = unicodedata.normalize("NFKD", str(name).lower().translate(TRANSLITERATION))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    raw = [t for t in re.split(r"[^a-z0-9]+", text) if t and t not in HONORIFICS and t not in LEGAL_SUFFIXES]
+    tokens, i = [], 0
+    while i < len(raw):
+        if raw[i] in PARTICLES and i + 1 < len(raw):
+            tokens.append(raw[i] + raw[i + 1])
+            i += 2
+        else:
+            tokens.append(raw[i])
+            i += 1
+    return tuple(tokens)
+
+
+@lru_cache(maxsize=200_000)
+def phonetic_key(token: str) -> str:
+    """Full-length Soundex-style key tolerant of common transliteration variants.
+
+    Digraphs are folded first (kh/h, ph/f, w/v, q/k, ...), letters map to
+    consonant classes, vowels drop, and repeats collapse; the first letter is
+    kept only as "vowel" or its class, so Qadhafi/Gaddafi and Volkov/Wolkow agree.
+    """
+    for src, dst in PHONETIC_REWRITES:
+        token = token.replace(src, dst)
+    if not token:
+        return ""
+    head = "a" if token[0] in "aeiouy" else ""
+    coded = token.translate(PHONETIC_CLASSES)
+    collapsed = "".join(c for i, c in enumerate(coded) if i == 0 or c != coded[i - 1])
+    return head + collapsed
+
+
+def _features(tokens: tuple[str, ...]) -> list[str]:
+    grams = []
+    for token in tokens:
+        padded = f" {token} "
+        grams += [padded[i:i + NGRAM] for i in range(len(padded) - NGRAM + 1)]
+        grams.append("#" + phonetic_key(token))
+    return grams
+
+
+def _phonetic_signature(tokens: tuple[str, ...]) -> tuple[str, ...]:
+    return tuple(sorted(phonetic_key(t) for t in tokens))
+
+
+@lru_cache(maxsize=500_000)
+def jaro_winkler(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    la, lb = len(a), len(b)
+    if not la or not lb:
+        return 0.0
+    window = max(max(la, lb) // 2 - 1, 0)
+    matched_b = [False] * lb
+    matches_a = []
+    for i, ch in enumerate(a):
+        for j in range(max(0, i - window), min(lb, i + window + 1)):
+            if not matched_b[j] and b[j] == ch:
+                matched_b[j] = True
+                matches_a.append(ch)
+                break
+    m = len(matches_a)
+    if not m:
+        return 0.0
+    matches_b = [b[j] for j in range(lb) if matched_b[j]]
+    transpositions = sum(x != y for x, y in zip(matches_a, matches_b)) / 2
+    jaro = (m / la + m / lb + (m - transpositions) / m) / 3
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+def token_similarity(query: tuple[str, ...], listed: tuple[str, ...]) -> float:
+    """Best-alignment Jaro-Winkler over the shorter name's tokens, lightly penalizing unmatched tokens."""
+    if not query or not listed:
+        return 0.0
+    short, long_ = (query, listed) if len(query) <= len(listed) else (listed, query)
+    best = [max(jaro_winkler(s, t) for t in long_) for s in short]
+    weights = [len(s) for s in short]
+    aligned = sum(b * w for b, w in zip(best, weights)) / sum(weights)
+    return 0.85 * aligned + 0.15 * len(short) / len(long_)
+
+
+def _years(value) -> set[int]:
+    return {int(y) for y in re.findall(r"\b(1[89]\d\d|20\d\d)\b", str(value or ""))}
+
+
+def _country_tokens(value) -> set[str]:
+    words = re.findall(r"[a-z]+", str(value or "").lower())
+    return {w[:4] for w in words if w not in {"the", "of", "and", "federation", "republic", "national", "state", "states"}}
+
+
+def _clean(series: pd.Series) -> pd.Series:
+    return series.fillna("").astype(str).str.strip().replace({"-0-": "", "nan": ""})
+
+
+def _entity_type(value: str) -> str:
+    value = str(value or "").strip().lower()
+    if not value:
+        return ""
+    return "Individual" if value.startswith(("indiv", "person", "natural")) else "Entity"
+
+
+def _display_name(name: str, entity_type: str) -> str:
+    """OFAC lists individuals as "LAST, First Middle"; show them as "First Middle LAST"."""
+    if entity_type == "Individual" and name.count(",") == 1:
+        last, first = (p.strip() for p in name.split(","))
+        return f"{first} {last}".strip()
+    return name
+
+
+def _read_csv_watchlist(data: bytes, list_name: str) -> pd.DataFrame:
+    probe = pd.read_csv(io.BytesIO(data), header=None, dtype=str, nrows=5, keep_default_na=False)
+    first = probe.iloc[:, 0].str.strip()
+    if first.str.fullmatch(r"\d+").all() and probe.shape[1] == len(SDN_COLUMNS):
+        df = pd.read_csv(io.BytesIO(data), header=None, names=SDN_COLUMNS, dtype=str, keep_default_na=False)
+        df = df[df["entry_id"].str.strip().str.fullmatch(r"\d+")]
+        remarks = _clean(df["remarks"])
+        rows = pd.DataFrame({
+            "entry_id": df["entry_id"].str.strip(),
+            "name": _clean(df["name"]),
+            "list_name": list_name,
+            "entity_type": _clean(df["entity_type"]).map(lambda t: "Entity" if t.lower() in ("", "entity") else t.title()),
+            "programs": _clean(df["programs"]),
+            "dob": remarks.str.extract(r"DOB ([^;]+)", expand=False).fillna(""),
+            "country": remarks.str.extract(r"[Nn]ationality ([^;.]+)", expand=False).fillna(""),
+            "remarks": remarks,
+        })
+        akas = remarks.str.extractall(r"a\.k\.a\. '([^']+)'")[0]
+        aka_rows = rows.loc[akas.index.get_level_values(0)].assign(variant=akas.to_numpy())
+        return pd.concat([rows.assign(variant=rows["name"]), aka_rows], ignore_index=True)
+    if first.str.fullmatch(r"\d+").all() and probe.shape[1] == len(ALT_COLUMNS):
+        df = pd.read_csv(io.BytesIO(data), header=None, names=ALT_COLUMNS, dtype=str, keep_default_na=False)
+        return pd.DataFrame({"entry_id": df["entry_id"].str.strip(), "variant": _clean(df["variant"]), "list_name": list_name})
+
+    df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False)
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()]
+    if "name" not in df.columns:
+        raise ValueError("Watchlist CSV needs a name column (or OFAC sdn.csv / alt.csv layout).")
+    rows = pd.DataFrame({"name": _clean(df["name"])})
+    rows["entry_id"] = _clean(df["entry_id"]) if "entry_id" in df.columns else [f"{list_name}-{i}" for i in range(1, len(df) + 1)]
+    for col in ("entity_type", "programs", "dob", "country", "remarks"):
+        rows[col] = _clean(df[col]) if col in df.columns else ""
+    rows["entity_type"] = rows["entity_type"].map(_entity_type)
+    rows["list_name"] = _clean(df["list_name"]).replace("", list_name) if "list_name" in df.columns else list_name
+    out = [rows.assign(variant=rows["name"])]
+    if "aliases" in df.columns:
+        aliases = _clean(df["aliases"]).str.split(r"\s*[;|]\s*").explode()
+        aliases = aliases[aliases != ""]
+        out.append(rows.loc[aliases.index].assign(variant=aliases.to_numpy()))
+    return pd.concat(out, ignore_index=True)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text_of(elem, *path) -> str:
+    for child in elem:
+        if _local(child.tag) == path[0]:
+            return (child.text or "").strip() if len(path) == 1 else _text_of(child, *path[1:])
+    return ""
+
+
+def _all_text(elem, tag: str) -> list[str]:
+    return [(e.text or "").strip() for e in elem.iter() if _local(e.tag) == tag and (e.text or "").strip()]
+
+
+def _read_xml_watchlist(data: bytes, list_name: str) -> pd.DataFrame:
+    """OFAC SDN XML (``sdnEntry``) or UN consolidated list XML (``INDIVIDUAL`` / ``ENTITY``)."""
+    records = []
+    for _, elem in ET.iterparse(io.BytesIO(data), events=("end",)):
+        tag = _local(elem.tag)
+        if tag == "sdnEntry":
+            entity_type = _entity_type(_text_of(elem, "sdnType"))
+            name = " ".join(filter(None, [_text_of(elem, "firstName"), _text_of(elem, "lastName")]))
+            akas = [" ".join(filter(None, [_text_of(a, "firstName"), _text_of(a, "lastName")]))
+                    for a in elem.iter() if _local(a.tag) == "aka"]
+            base = dict(entry_id=_text_of(elem, "uid"), name=name, list_name=list_name, entity_type=entity_type,
+                        programs="; ".join(_all_text(elem, "program")), dob="; ".join(_all_text(elem, "dateOfBirth")),
+                        country="; ".join(_all_text(elem, "country")), remarks=_text_of(elem, "remarks"))
+        elif tag in ("INDIVIDUAL", "ENTITY"):
+            name = " ".join(filter(None, (_text_of(elem, f) for f in ("FIRST_NAME", "SECOND_NAME", "THIRD_NAME", "FOURTH_NAME"))))
+            akas = _all_text(elem, "ALIAS_NAME")
+            dob = [e.text.strip() for e in elem.iter() if _local(e.tag) in ("DATE", "YEAR") and (e.text or "").strip()]
+            base = dict(entry_id=_text_of(elem, "REFERENCE_NUMBER") or _text_of(elem, "DATAID"), name=name,
+                        list_name=list_name, entity_type="Individual" if tag == "INDIVIDUAL" else "Entity",
+                        programs=_text_of(elem, "UN_LIST_TYPE"), dob="; ".join(dob),
+                        country="; ".join(_all_text(elem, "VALUE")), remarks=_text_of(elem, "COMMENTS1"))
+        else:
+            continue
+        records.append(dict(base, variant=name))
+        records += [dict(base, variant=a) for a in akas if a]
+        elem.clear()
+    if not records:
+        raise ValueError("No sdnEntry, INDIVIDUAL or ENTITY records found in watchlist XML.")
+    return pd.DataFrame(records)
+
+
+def load_watchlist(file_name: str, source, list_name: str | None = None) -> pd.DataFrame:
+    """Read one watchlist file into one row per name variant (primary names and aliases)."""
+    stream = as_stream(source)
+    data = stream.read()
+    list_name = list_name or re.sub(r"[_\-]+", " ", file_name.rsplit(".", 1)[0]).strip().upper()
+    name_lower = file_name.lower()
+    if name_lower.endswith(".csv"):
+        return _read_csv_watchlist(data, list_name)
+    elif name_lower.endswith(".xml"):
+        return _read_xml_watchlist(data, list_name)
+    else:
+        raise ValueError(f"Unsupported watchlist type: {file_name}. Use CSV or XML.")
+
+
+class WatchlistIndex:
+    """Character n-gram + phonetic TF-IDF index over watchlist name variants.
+
+    Blocking is one sparse matrix product per batch of screened names;
+    candidates above ``BLOCK_MIN_SIMILARITY``, plus every exact- or
+    phonetic-key match, are rescored with token-level Jaro-Winkler and
+    phonetic agreement, then adjusted by DOB/nationality evidence.
+    """
+
+    def __init__(self, entries: pd.DataFrame):
+        entries = entries.reindex(columns=WATCHLIST_COLUMNS).fillna("")
+        # alt.csv rows carry only an id and a variant; inherit the rest from the primary record.
+        primary = entries[entries["name"] != ""].drop_duplicates("entry_id").set_index("entry_id")
+        for col in ("name", "entity_type", "programs", "dob", "country", "remarks"):
+            fill = entries["entry_id"].map(primary[col]).fillna("")
+            entries[col] = entries[col].where(entries[col] != "", fill)
+        entries["tokens"] = entries["variant"].map(normalize_name)
+        entries = entries[entries["tokens"].str.len() > 0].drop_duplicates(["entry_id", "tokens"])
+        entries["name"] = [_display_name(n, t) for n, t in zip(entries["name"], entries["entity_type"])]
+        self.entries = entries.reset_index(drop=True)
+        self.lists = self.entries.groupby("list_name")["entry_id"].nunique().to_dict()
+
+        self.vocab: dict[str, int] = {}
+        rows, cols = [], []
+        for i, tokens in enumerate(self.entries["tokens"]):
+            for feature in _features(tokens):
+                rows.append(i)
+                cols.append(self.vocab.setdefault(feature, len(self.vocab)))
+        counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(self.entries), len(self.vocab)))
+        df = np.bincount(counts.indices, minlength=len(self.vocab))
+        self.idf = np.log((1 + len(self.entries)) / (1 + df)) + 1
+        self.matrix = self._weigh(counts)
+        # Very common n-grams ("ov ", " al") only add noise to blocking; exact cosine is computed per candidate.
+        common = df > max(100, BLOCK_MAX_DF * len(self.entries))
+        self.blocking_t = (self.matrix @ sparse.diags((~common).astype(float))).T.tocsr()
+        self.blocking_t.eliminate_zeros()
+        self._records = self.entries.drop(columns="tokens").to_dict(orient="records")
+        self._tokens = self.entries["tokens"].tolist()
+        self._phonetic = [frozenset(map(phonetic_key, t)) for t in self._tokens]
+        # Exact and phonetic-signature blocks guarantee recall for reordered or transliterated names.
+        self._by_key: dict[tuple, list[int]] = {}
+        self._by_phonetic: dict[tuple, list[int]] = {}
+        for i, tokens in enumerate(self._tokens):
+            self._by_key.setdefault(tuple(sorted(tokens)), []).append(i)
+            self._by_phonetic.setdefault(_phonetic_signature(tokens), []).append(i)
+        self._years = [_years(d) for d in self.entries["dob"]]
+        self._countries = [_country_tokens(c) for c in self.entries["country"]]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _weigh(self, counts: sparse.csr_matrix) -> sparse.csr_matrix:
+        weighted = counts.multiply(self.idf).tocsr()
+        norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1))).ravel()
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ weighted
+
+    def _vectorize(self, token_lists: list[tuple[str, ...]]) -> sparse.csr_matrix:
+        rows, cols = [], []
+        for i, tokens in enumerate(token_lists):
+            for feature in _features(tokens):
+                j = self.vocab.get(feature)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        counts = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(token_lists), len(self.vocab)))
+        return self._weigh(counts)
+
+    def screen(self, subjects: list[dict], min_score: float = POSSIBLE_MATCH, top_k: int = 3) -> pd.DataFrame:
+        """Screen subjects (``name`` plus optional ``dob``, ``country``, ``entity_type``); one row per candidate hit."""
+        hits = []
+        for start in range(0, len(subjects), QUERY_CHUNK):
+            batch = subjects[start:start + QUERY_CHUNK]
+            tokens = [normalize_name(s.get("name", "")) for s in batch]
+            queries = self._vectorize(tokens)
+            blocked = (queries @ self.blocking_t).tocsr()
+            pair_k, pair_j, pair_keyed = [], [], []
+            for k in range(len(batch)):
+                lo, hi = blocked.indptr[k], blocked.indptr[k + 1]
+                idx, vals = blocked.indices[lo:hi], blocked.data[lo:hi]
+                idx, vals = idx[vals >= BLOCK_MIN_SIMILARITY * 0.5], vals[vals >= BLOCK_MIN_SIMILARITY * 0.5]
+                if len(idx) > 4 * MAX_CANDIDATES:
+                    idx = idx[np.argpartition(-vals, 4 * MAX_CANDIDATES)[:4 * MAX_CANDIDATES]]
+                keyed = self._by_key.get(tuple(sorted(tokens[k])), []) + self._by_phonetic.get(_phonetic_signature(tokens[k]), [])
+                idx = np.union1d(idx, keyed).astype(int)
+                pair_k.append(np.full(len(idx), k))
+                pair_j.append(idx)
+                pair_keyed.append(np.isin(idx, keyed))
+            if not pair_k:
+                continue
+            pair_k, pair_j = np.concatenate(pair_k).astype(int), np.concatenate(pair_j).astype(int)
+            pair_keyed = np.concatenate(pair_keyed)
+            # Exact n-gram/phonetic cosine for every candidate pair in one sparse pass.
+            cosines = np.asarray(queries[pair_k].multiply(self.matrix[pair_j]).sum(axis=1)).ravel()
+            # Key-block hits skip the cosine cut: spelling drift is exactly what the phonetic key absorbs.
+            keep = (cosines >= BLOCK_MIN_SIMILARITY) | pair_keyed
+            candidates = pd.DataFrame({"k": pair_k[keep], "j": pair_j[keep], "cosine": cosines[keep],
+                                       "keyed": pair_keyed[keep]})
+            candidates = (candidates.sort_values(["k", "keyed", "cosine"], ascending=[True, False, False])
+                          .groupby("k").head(MAX_CANDIDATES))
+            for k, group in candidates.groupby("k", sort=False):
+                subject, best = batch[k], {}
+                for j, cosine, is_keyed in zip(group["j"].tolist(), group["cosine"].tolist(), group["keyed"].tolist()):
+                    hit = self._score(subject, tokens[k], j, cosine, is_keyed)
+                    if hit["score"] >= min_score and hit["score"] > best.get(hit["entry_id"], {}).get("score", -1):
+                        best[hit["entry_id"]] = hit
+                hits += sorted(best.values(), key=lambda h: h["score"], reverse=True)[:top_k]
+        columns = ["subject_id", "role", "query_name", "entry_id", "listed_name", "matched_variant", "list_name",
+                   "entity_type", "programs", "listed_dob", "listed_country", "score", "assessment",
+                   "ngram_similarity", "token_similarity", "phonetic_overlap", "dob_check", "country_check"]
+        return pd.DataFrame(hits, columns=columns)
+
+    def _score(self, subject: dict, query: tuple[str, ...], j: int, cosine: float, keyed: bool = False) -> dict:
+        """Weighted token/n-gram/phonetic score plus DOB, country and entity-type evidence.
+
+        For exact- or phonetic-key hits with token similarity of at least
+        ``KEYED_MIN_TOKEN_SIMILARITY`` the n-gram term uses the mean of the
+        cosine and the token similarity, so a transliteration that shares few
+        trigrams (Gaddafi/Qadhafi) is judged mostly at token level.
+        """
+        row = self._records[j]
+        listed = self._tokens[j]
+        q_phon = frozenset(map(phonetic_key, query))
+        phonetic = len(q_phon & self._phonetic[j]) / max(min(len(q_phon), len(self._phonetic[j])), 1)
+        tokens = token_similarity(query, listed)
+        ngram = (cosine + tokens) / 2 if keyed and tokens >= KEYED_MIN_TOKEN_SIMILARITY else cosine
+        score = (SCORE_WEIGHTS["token"] * tokens + SCORE_WEIGHTS["ngram"] * ngram
+                 + SCORE_WEIGHTS["phonetic"] * phonetic)
+
+        dob_check = country_check = "n/a"
+        years, subject_years = self._years[j], _years(subject.get("dob"))
+        if years and subject_years:
+            if years & subject_years:
+                dob_check, score = "match", score + 0.05
+            elif min(abs(a - b) for a in years for b in subject_years) > 1:
+                dob_check, score = "mismatch", score - 0.15
+        countries, subject_countries = self._countries[j], _country_tokens(subject.get("country"))
+        if countries and subject_countries:
+            country_check = "match" if countries & subject_countries else "different"
+            if country_check == "match":
+                score += 0.03
+        listed_type, subject_type = row["entity_type"], subject.get("entity_type", "")
+        if listed_type and subject_type and listed_type != subject_type and "Entity" in (listed_type, subject_type):
+            score -= 0.10
+
+        score = round(min(max(score, 0.0), 1.0), 3)
+        return {
+            "subject_id": subject.get("subject_id", ""), "role": subject.get("role", ""),
+            "query_name": subject.get("name", ""), "entry_id": row["entry_id"], "listed_name": row["name"],
+            "matched_variant": row["variant"], "list_name": row["list_name"], "entity_type": listed_type,
+            "programs": row["programs"], "listed_dob": row["dob"], "listed_country": row["country"],
+            "score": score, "assessment": "Likely match" if score >= LIKELY_MATCH else "Possible match",
+            "ngram_similarity": round(cosine, 3), "token_similarity": round(tokens, 3),
+            "phonetic_overlap": round(phonetic, 3), "dob_check": dob_check, "country_check": country_check,
+        }
+
+
+def build_watchlist_index(frames: list[pd.DataFrame]) -> WatchlistIndex:
+    return WatchlistIndex(pd.concat(frames, ignore_index=True))
+
+
+def load_session_watchlist(store: MutableMapping, files: list[tuple[str, object, int | None]]) -> WatchlistIndex:
+    """Return the index for a set of uploaded watchlists, building it once per session.
+
+    ``files`` is a list of ``(file_name, source, size)``; the cached index is
+    rebuilt only when the set of names and sizes changes.
+    """
+    key = tuple((name, size) for name, _, size in files)
+    cached = store.get(SESSION_WATCHLIST_KEY)
+    if cached is None or cached[0] != key:
+        index = build_watchlist_index([load_watchlist(name, source) for name, source, _ in files])
+        store[SESSION_WATCHLIST_KEY] = cached = (key, index)
+    return cached[1]
+
+
+SUBJECT_FIELDS = {
+    "name": "Customer", "beneficial owner": "Beneficial Owner", "ubo": "Beneficial Owner",
+    "director": "Director", "directors": "Director", "shareholder": "Shareholder", "shareholders": "Shareholder",
+}
+ENTITY_NAME_RE = r"\b(?:ltd|llc|inc|corp|group|holdings?|bank|trust|fund|company|limited|plc|gmbh|foundation)\b"
+
+
+def subjects_from_text(text: str) -> list[dict]:
+    """Names to screen from profile text: ``Name:`` plus beneficial owner / director / shareholder lines.
+
+    Profiles separated by ``=== CUSTOMER #n ===`` headers get their own
+    subject ids; DOB and nationality lines apply to the profile's own name.
+    """
+    subjects = []
+    blocks = re.split(r"^\s*===\s*(.+?)\s*===\s*$", text, flags=re.M)
+    pairs = [("Profile", blocks[0])] + list(zip(blocks[1::2], blocks[2::2]))
+    for label, body in pairs:
+        fields = {}
+        for m in re.finditer(r"^\s*-?\s*([A-Za-z /]+?)\s*:\s*(.+?)\s*$", body, flags=re.M):
+            fields.setdefault(m.group(1).strip().lower(), m.group(2))
+        dob = fields.get("dob") or fields.get("date of birth", "")
+        country = fields.get("nationality") or fields.get("citizenship", "")
+        is_entity = "entity type" in fields or bool(re.search(ENTITY_NAME_RE, fields.get("name", ""), flags=re.I))
+        for field, role in SUBJECT_FIELDS.items():
+            if field not in fields:
+                continue
+            for name in re.split(r"\s*(?:;|,| and )\s*", re.sub(r"\([^)]*\)", "", fields[field])):
+                if not name.strip():
+                    continue
+                own = role == "Customer"
+                subjects.append({
+                    "subject_id": label.title(), "role": role, "name": name.strip(),
+                    "dob": dob if own else "", "country": country if own else "",
+                    "entity_type": ("Entity" if is_entity else "Individual") if own else "Individual",
+                })
+    return subjects
+
+
+def subjects_from_table(df: pd.DataFrame) -> list[dict]:
+    """Names to screen from a customer export (name column plus optional DOB / nationality / type)."""
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    renamed.update({c: "name" for c in df.columns if str(c).strip().lower() in ("customer", "customer name", "client name")})
+    df = df.rename(columns={c: n for c, n in renamed.items() if n})
+    df = df.loc[:, ~df.columns.duplicated()]
+    if "name" not in df.columns:
+        raise ValueError("Customer table needs a name column to screen.")
+    frame = pd.DataFrame({
+        "subject_id": _clean(df["entry_id"]) if "entry_id" in df.columns else [f"Row {i}" for i in range(2, len(df) + 2)],
+        "role": "Customer",
+        "name": _clean(df["name"]),
+        "dob": _clean(df["dob"]) if "dob" in df.columns else "",
+        "country": _clean(df["country"]) if "country" in df.columns else "",
+        "entity_type": _clean(df["entity_type"]).map(_entity_type) if "entity_type" in df.columns else "",
+    })
+    return frame[frame["name"] != ""].to_dict(orient="records")
+
+
+def hits_for_prompt(index: WatchlistIndex, subjects: list[dict], hits: pd.DataFrame, max_rows: int = MAX_PROMPT_HITS) -> str:
+    """Render the lists checked, candidate hits with evidence, and clear subjects as prompt text."""
+    lists = ", ".join(f"{name} ({count:,} entries)" for name, count in index.lists.items())
+    lines = [SCREENING_NOTE, "", "LOCAL WATCHLIST SCREENING:", f"- Lists: {lists}",
+             f"- Subjects screened: {len(subjects):,} | Candidate hits: {len(hits):,} "
+             f"(Likely >= {LIKELY_MATCH:.2f}, Possible >= {POSSIBLE_MATCH:.2f})", ""]
+    if len(hits):
+        lines += [f"CANDIDATE HITS (top {min(len(hits), max_rows)} by score):",
+                  "SUBJECT | ROLE | SCREENED NAME | LIST | ENTRY | LISTED NAME | MATCHED VARIANT | PROGRAMS | "
+                  "SCORE | N-GRAM | TOKENS | PHONETIC | DOB | COUNTRY"]
+        for h in hits.sort_values("score", ascending=False).head(max_rows).itertuples(index=False):
+            lines.append(f"{h.subject_id} | {h.role} | {h.query_name} | {h.list_name} | {h.entry_id} | {h.listed_name} | "
+                         f"{h.matched_variant} | {h.programs or 'n/a'} | {h.score:.2f} | {h.ngram_similarity:.2f} | "
+                         f"{h.token_similarity:.2f} | {h.phonetic_overlap:.2f} | {h.dob_check} ({h.listed_dob or 'n/a'}) | "
+                         f"{h.country_check} ({h.listed_country or 'n/a'})")
+        if len(hits) > max_rows:
+            lines.append(f"... {len(hits) - max_rows:,} lower-scoring hits omitted")
+    hit_names = set(zip(hits["subject_id"], hits["query_name"])) if len(hits) else set()
+    clear = [f"{s['subject_id']}: {s['name']}" for s in subjects if (s["subject_id"], s["name"]) not in hit_names]
+    if clear:
+        shown = "; ".join(clear[:50]) + (f"; ... {len(clear) - 50:,} more" if len(clear) > 50 else "")
+        lines += ["", f"NO CANDIDATE HITS: {shown}"]
+    return "\n".join(lines)
+
+
+def screening_summary(index: WatchlistIndex, subjects: list[dict], hits: pd.DataFrame) -> dict:
+    """Counts and hit records attached to engine results for display and audit trail."""
+    return {
+        "lists": index.lists,
+        "subjects_screened": len(subjects),
+        "likely_matches": int((hits["assessment"] == "Likely match").sum()),
+        "possible_matches": int((hits["assessment"] == "Possible match").sum()),
+        "hits": hits.to_dict(orient="records"),
+    }
@@ -1,8 +1,11 @@
 """Smart AI Risk Shield engine - KYC/AML sanctions and PEP screening."""
 
 import json
+
 import anthropic
 
+from engines.sanctions_index import WatchlistIndex, hits_for_prompt, screening_summary, subjects_from_text
+
 RISK_PROMPT = """\
 You are an expert KYC/AML compliance analyst specialising in sanctions screening, \
 Politically Exposed Persons (PEP) identification, and adverse media analysis. \
@@ -122,8 +125,20 @@ SCREENING CONTEXT:
 """
 
 
-def screen_customer(config: dict, api_key: str) -> dict:
-    """Screen a customer for KYC/AML compliance risks."""
+def screen_customer(config: dict, api_key: str, watchlist: WatchlistIndex | None = None,
+                    subjects: list[dict] | None = None) -> dict:
+    """Screen a customer for KYC/AML compliance risks.
+
+    With a ``watchlist`` index, subjects (parsed from the profile unless
+    given) are screened locally and the model only adjudicates the candidate hits.
+    """
+    screening = None
+    if watchlist is not None:
+        subjects = subjects if subjects is not None else subjects_from_text(config["customer_profile"])
+        hits = watchlist.screen(subjects)
+        screening = screening_summary(watchlist, subjects, hits)
+        config = dict(config, customer_profile=f"{config['customer_profile']}\n\n{hits_for_prompt(watchlist, subjects, hits)}")
+
     client = anthropic.Anthropic(api_key=api_key)
     prompt = RISK_PROMPT.format(**config)
     message = client.messages.create(
@@ -136,4 +151,7 @@ def screen_customer(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+    if screening is not None:
+        result["watchlist_screening"] = screening
+    return result
@@ -0,0 +1,312 @@
+"""Local statistical anomaly detection over spend line items."""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+COLUMN_ALIASES = {
+    "date": "date", "invoice date": "date", "invoice_date": "date", "posting date": "date",
+    "posting_date": "date", "payment date": "date", "payment_date": "date", "month": "date", "period": "date",
+    "vendor": "vendor", "supplier": "vendor", "payee": "vendor", "merchant": "vendor",
+    "category": "category", "spend category": "category", "gl category": "category", "service": "category",
+    "amount": "amount", "total": "amount", "spend": "amount", "cost": "amount", "amount_usd": "amount",
+    "po": "po_number", "po number": "po_number", "po_number": "po_number", "purchase order": "po_number",
+    "invoice": "invoice_number", "invoice number": "invoice_number", "invoice_number": "invoice_number",
+    "invoice id": "invoice_number", "invoice_id": "invoice_number",
+    "notes": "notes", "memo": "notes", "description": "notes",
+    "contract": "contract_monthly", "contract cap": "contract_monthly", "contract_monthly": "contract_monthly",
+}
+
+BASELINE_MONTHS = 6
+MIN_HISTORY_MONTHS = 3
+ROBUST_Z_THRESHOLD = 3.5
+DUPLICATE_WINDOW_DAYS = 20  # below a monthly billing cycle, so recurring subscriptions are not duplicates
+PO_REQUIRED_ABOVE = 10_000.0
+SEVERITY_BANDS = [(25_000, "Critical"), (10_000, "High"), (1_000, "Medium"), (0, "Low")]
+
+VENDOR_SUFFIX_RE = r"\b(?:inc|llc|ltd|corp|corporation|co|company|gmbh|plc|limited)\b"
+MISSING_PO_NOTE_RE = r"\bno (?:po|purchase order)\b"
+PO_POLICY_RE = re.compile(r"po for\s*>\s*\$?([\d,.]+)\s*([km])?", re.IGNORECASE)
+
+MONTH_LINE_RE = re.compile(r"^-\s*([A-Z][a-z]{2,8}\s+\d{4}):\s*\$([\d,]+(?:\.\d+)?)")
+FIELD_LINE_RE = re.compile(r"^-\s*(Contract|Notes):\s*(.*)$")
+VENDOR_LINE_RE = re.compile(r"^([^-=\s][^(\[]*?)\s*(?:\(([^)]*)\))?\s*(?:\[[^\]]*\]\s*)*$")
+CONTRACT_CAP_RE = re.compile(r"\$([\d,]+(?:\.\d+)?)\s*/\s*month")
+
+FINDING_COLUMNS = [
+    "anomaly_type", "vendor", "category", "period", "amount", "expected_amount",
+    "variance_pct", "robust_z", "impact", "severity", "detail",
+]
+
+
+def _to_number(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.astype(str).str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+
+
+def po_threshold_from_context(context: str, default: float = PO_REQUIRED_ABOVE) -> float:
+    """Read a "PO for >$10K"-style policy out of free-text context."""
+    m = PO_POLICY_RE.search(context or "")
+    if not m:
+        return default
+    value = float(m.group(1).replace(",", ""))
+    return value * {"k": 1_000, "m": 1_000_000}.get((m.group(2) or "").lower(), 1)
+
+
+def normalize_items(df: pd.DataFrame) -> pd.DataFrame:
+    """Map column names onto the canonical line-item schema and coerce types."""
+    renamed = {c: COLUMN_ALIASES.get(str(c).strip().lower()) for c in df.columns}
+    df = df.rename(columns={c: n for c, n in renamed.items() if n}).copy()
+    missing = [c for c in ("date", "vendor", "amount") if c not in df.columns]
+    if missing:
+        raise ValueError(f"Spend data is missing columns: {', '.join(missing)}")
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"].astype(str), errors="coerce", format="mixed")
+    df["vendor"] = df["vendor"].astype(str).str.strip()
+    df["category"] = df["category"].astype(str).str.strip() if "category" in df.columns else "Uncategorized"
+    df["amount"] = _to_number(df["amount"])
+    for col in ("po_number", "invoice_number", "notes"):
+        if col in df.columns:
+            df[col] = df[col].astype("string").str.strip().replace({"": pd.NA, "nan": pd.NA, "None": pd.NA})
+    if "contract_monthly" in df.columns:
+        df["contract_monthly"] = _to_number(df["contract_monthly"])
+    df = df.dropna(subset=["date", "amount"])
+    df["period"] = df["date"].dt.to_period("M")
+    df["vendor_key"] = (
+        df["vendor"].str.lower()
+        .str.replace(VENDOR_SUFFIX_RE, "", regex=True)
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+    return df.reset_index(drop=True)
+
+
+def parse_spend_report(text: str) -> pd.DataFrame:
+    """Parse a vendor spend log (see examples/sample_spend_data.txt) into monthly line items.
+
+    Each "- Mon YYYY: $X" line under a vendor heading becomes one row; the
+    vendor's Contract and Notes lines are carried onto its rows.
+    """
+    rows, vendor, category, fields = [], None, "", {}
+    vendor_rows: list[dict] = []
+
+    def flush():
+        for row in vendor_rows:
+            row["notes"] = fields.get("Notes")
+            cap = CONTRACT_CAP_RE.search(fields.get("Contract", ""))
+            row["contract_monthly"] = cap.group(1) if cap else None
+        rows.extend(vendor_rows)
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if m := MONTH_LINE_RE.match(line):
+            if vendor:
+                vendor_rows.append({"date": m.group(1), "vendor": vendor, "category": category, "amount": m.group(2)})
+        elif m := FIELD_LINE_RE.match(line):
+            fields[m.group(1)] = m.group(2)
+        elif m := VENDOR_LINE_RE.match(line):
+            flush()
+            vendor, category, fields, vendor_rows = m.group(1).strip(), (m.group(2) or "Uncategorized").strip(), {}, []
+        else:
+            flush()
+            vendor, fields, vendor_rows = None, {}, []
+    flush()
+    if not rows:
+        raise ValueError("No vendor spend lines found")
+    return normalize_items(pd.DataFrame(rows))
+
+
+def _baseline(monthly: pd.DataFrame, key: str, window: int) -> pd.DataFrame:
+    """Rolling median of each group's prior months, with robust z-scores of the deviations.
+
+    The scale is the MAD of the group's deviations from its own rolling
+    baseline across all months, which stays stable even with short windows.
+    """
+    monthly = monthly.sort_values([key, "period"]).reset_index(drop=True)
+    prior = monthly.groupby(key)["amount"].shift()
+    monthly["expected_amount"] = prior.groupby(monthly[key]).rolling(window, min_periods=1).median().reset_index(level=0, drop=True)
+    deviation = monthly["amount"] - monthly["expected_amount"]
+    monthly["history"] = deviation.notna().groupby(monthly[key]).transform("sum")
+    sigma = 1.4826 * deviation.abs().groupby(monthly[key]).transform("median")
+    monthly["robust_z"] = (deviation / sigma.where(sigma > 0)).where(monthly["history"] >= MIN_HISTORY_MONTHS)
+    expected = monthly["expected_amount"].where(monthly["expected_amount"] > 0)
+    monthly["variance_pct"] = 100 * deviation / expected
+    return monthly
+
+
+def _spikes(monthly: pd.DataFrame, threshold_pct: float, z_threshold: float) -> pd.Series:
+    """Above the variance threshold, and unusual for the group unless its history is flat.
+
+    Groups with fewer than ``MIN_HISTORY_MONTHS`` baseline comparisons have
+    no usable spread, so the variance must clear twice the threshold instead.
+    """
+    short = monthly["history"] < MIN_HISTORY_MONTHS
+    unusual = monthly["robust_z"].isna() | (monthly["robust_z"] >= z_threshold)
+    return (monthly["variance_pct"] >= threshold_pct) & (
+        (short & (monthly["variance_pct"] >= 2 * threshold_pct)) | (~short & unusual)
+    )
+
+
+def _duplicate_payments(items: pd.DataFrame, window_days: int) -> pd.DataFrame:
+    """Exact duplicates (same invoice, or same vendor/amount/date) and near-duplicates.
+
+    Near-duplicates are found by sorting on normalized vendor name and amount
+    and comparing neighbours, so "Datadog Inc" and "DATADOG" paying $8,700
+    ten days apart still pair up.
+    """
+    exact = items.duplicated(subset=["vendor_key", "amount", "date"], keep="first")
+    if "invoice_number" in items.columns:
+        invoice_key = items["invoice_number"].str.upper().str.replace(r"[^A-Z0-9]", "", regex=True)
+        has_invoice = invoice_key.notna() & (invoice_key != "")
+        exact |= has_invoice & items.assign(_inv=invoice_key).duplicated(subset=["vendor_key", "_inv"], keep="first")
+
+    ordered = items.sort_values(["vendor_key", "amount", "date"])
+    prev = ordered.shift()
+    near = (
+        (ordered["vendor_key"] == prev["vendor_key"])
+        & ((ordered["amount"] - prev["amount"]).abs() < 0.005)
+        & ((ordered["date"] - prev["date"]).abs() <= pd.Timedelta(days=window_days))
+        & (ordered["amount"] > 0)
+    )
+    near = near.reindex(items.index) & ~exact
+    matched_date = prev["date"].reindex(items.index)
+
+    dups = items[exact | near].assign(
+        anomaly_type="Duplicate",
+        expected_amount=0.0,
+        impact=lambda d: d["amount"],
+        detail=np.where(exact[exact | near], "Exact duplicate payment",
+                        "Near-duplicate of payment on " + matched_date[exact | near].dt.strftime("%Y-%m-%d").fillna("")),
+    )
+    return dups
+
+
+def _severity(impact: pd.Series) -> pd.Series:
+    bands = [impact >= floor for floor, _ in SEVERITY_BANDS]
+    return pd.Series(np.select(bands, [label for _, label in SEVERITY_BANDS], "Low"), index=impact.index)
+
+
+def detect_anomalies(
+    items: pd.DataFrame,
+    threshold_pct: float = 20.0,
+    po_threshold: float = PO_REQUIRED_ABOVE,
+    z_threshold: float = ROBUST_Z_THRESHOLD,
+    baseline_months: int = BASELINE_MONTHS,
+) -> pd.DataFrame:
+    """Rank spend anomalies by financial impact.
+
+    Covers vendor spikes and category variance against rolling baselines,
+    new vendors, contract-cap breaches, duplicate payments, and line items
+    above ``po_threshold`` without a PO.
+    """
+    frames = []
+    latest = items["period"].max()
+
+    vendor_monthly = items.groupby(["vendor_key", "period"], as_index=False).agg(
+        vendor=("vendor", "first"), category=("category", "first"), amount=("amount", "sum")
+    )
+    vendor_monthly = _baseline(vendor_monthly, "vendor_key", baseline_months)
+    spikes = vendor_monthly[_spikes(vendor_monthly, threshold_pct, z_threshold)]
+    frames.append(spikes.assign(
+        anomaly_type="Spike",
+        impact=spikes["amount"] - spikes["expected_amount"],
+        detail="Above rolling baseline of prior months",
+    ))
+
+    new = vendor_monthly[
+        (vendor_monthly["period"] == latest) & (vendor_monthly["amount"] > 0)
+        & ((vendor_monthly["history"] == 0) | (vendor_monthly["expected_amount"] == 0))
+        & (vendor_monthly["period"] > items["period"].min())
+    ]
+    frames.append(new.assign(anomaly_type="New Vendor", impact=new["amount"], detail="No prior spend with this vendor"))
+
+    # Category variance is reported only where vendor-level findings do not already explain it.
+    category_monthly = items.groupby(["category", "period"], as_index=False)["amount"].sum()
+    category_monthly = _baseline(category_monthly, "category", baseline_months)
+    explained = pd.concat([spikes.assign(excess=spikes["amount"] - spikes["expected_amount"]),
+                           new.assign(excess=new["amount"])]).groupby(["category", "period"])["excess"].sum()
+    category_monthly = category_monthly.join(explained, on=["category", "period"])
+    residual = category_monthly["amount"] - category_monthly["excess"].fillna(0)
+    category_monthly["variance_pct"] = 100 * (residual - category_monthly["expected_amount"]) / category_monthly["expected_amount"]
+    cat_spikes = category_monthly[_spikes(category_monthly, threshold_pct, z_threshold)]
+    frames.append(cat_spikes.assign(
+        anomaly_type="Unusual Pattern", vendor="(category total)",
+        impact=cat_spikes["amount"] - cat_spikes["expected_amount"],
+        detail="Category spend above its rolling baseline beyond vendor-level findings",
+    ))
+
+    if "contract_monthly" in items.columns:
+        caps = items.groupby(["vendor_key", "period"])["contract_monthly"].max()
+        capped = vendor_monthly.join(caps, on=["vendor_key", "period"])
+        breach = capped[capped["contract_monthly"].notna() & (capped["amount"] > capped["contract_monthly"])]
+        frames.append(breach.assign(
+            anomaly_type="Contract Breach",
+            expected_amount=breach["contract_monthly"],
+            variance_pct=100 * (breach["amount"] - breach["contract_monthly"]) / breach["contract_monthly"],
+            impact=breach["amount"] - breach["contract_monthly"],
+            detail="Monthly spend above contract cap",
+        ))
+
+    frames.append(_duplicate_payments(items, DUPLICATE_WINDOW_DAYS))
+
+    if "po_number" in items.columns:
+        no_po = items["po_number"].isna()
+    elif "notes" in items.columns:
+        no_po = items["notes"].str.contains(MISSING_PO_NOTE_RE, case=False, regex=True).fillna(False).astype(bool)
+    else:
+        no_po = pd.Series(False, index=items.index)
+    missing_po = items[no_po & (items["amount"] > po_threshold)]
+    frames.append(missing_po.assign(
+        anomaly_type="Missing PO", expected_amount=np.nan, impact=missing_po["amount"],
+        detail=f"No PO on a payment above ${po_threshold:,.0f}",
+    ))
+
+    findings = pd.concat([f.reindex(columns=FINDING_COLUMNS) for f in frames if len(f)], ignore_index=True)
+    if findings.empty:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    findings["period"] = findings["period"].astype(str)
+    findings["severity"] = _severity(findings["impact"].fillna(0))
+    for col in ("amount", "expected_amount", "impact"):
+        findings[col] = findings[col].astype(float).round(2)
+    for col in ("variance_pct", "robust_z"):
+        findings[col] = findings[col].astype(float).round(1)
+    return findings.sort_values(["impact", "anomaly_type"], ascending=[False, True], ignore_index=True)
+
+
+def spend_totals(items: pd.DataFrame, budget: float) -> dict:
+    """Totals for the latest period, plus the month-by-month trend."""
+    monthly = items.groupby("period")["amount"].sum().sort_index()
+    latest = monthly.index.max()
+    total = float(monthly.iloc[-1])
+    return {
+        "period": latest.strftime("%B %Y"),
+        "total_spend": round(total, 2),
+        "variance_pct": round(100 * (total - budget) / budget, 1) if budget else 0.0,
+        "monthly_trend": [{"month": p.strftime("%b %Y"), "spend": round(float(v), 2)} for p, v in monthly.items()],
+        "by_category": items[items["period"] == latest].groupby("category")["amount"].sum().round(2).to_dict(),
+    }
+
+
+def findings_for_prompt(findings: pd.DataFrame, totals: dict, max_rows: int = 40) -> str:
+    """Render the ranked findings and totals as prompt text for explanation."""
+    lines = [
+        "PRE-RANKED FINDINGS FROM LOCAL CHECKS (authoritative amounts, ranked by impact):",
+        f"- Latest period: {totals['period']} | Total of parsed line items: ${totals['total_spend']:,.2f} | "
+        f"Variance vs budget: {totals['variance_pct']:+.1f}%",
+        "- Monthly totals: " + ", ".join(f"{m['month']} ${m['spend']:,.0f}" for m in totals["monthly_trend"]),
+        "- Latest period by category: " + ", ".join(f"{c} ${v:,.0f}" for c, v in totals["by_category"].items()),
+        "",
+        f"FINDINGS ({len(findings):,}; top {min(len(findings), max_rows)} shown):",
+        "# | TYPE | VENDOR | CATEGORY | PERIOD | AMOUNT | EXPECTED | VARIANCE % | ROBUST Z | SEVERITY | DETAIL",
+    ]
+    for i, r in enumerate(findings.head(max_rows).itertuples(index=False), 1):
+        expected = "-" if pd.isna(r.expected_amount) else f"${r.expected_amount:,.2f}"
+        variance = "-" if pd.isna(r.variance_pct) else f"{r.variance_pct:+.1f}"
+        z = "-" if pd.isna(r.robust_z) else f"{r.robust_z:.1f}"
+        lines.append(f"{i} | {r.anomaly_type} | {r.vendor} | {r.category} | {r.period} | ${r.amount:,.2f} | "
+                     f"{expected} | {variance} | {z} | {r.severity} | {r.detail}")
+    if len(findings) > max_rows:
+        lines.append(f"... {len(findings) - max_rows:,} lower-impact findings omitted")
+    return "\n".join(lines)
@@ -1,7 +1,18 @@
 """AI Spend Monitor engine - FinOps anomaly detection."""
 
 import json
+
 import anthropic
+import pandas as pd
+
+from engines.spend_anomalies import (
+    detect_anomalies,
+    findings_for_prompt,
+    normalize_items,
+    parse_spend_report,
+    po_threshold_from_context,
+    spend_totals,
+)
 
 SPEND_PROMPT = """\
 You are an expert FinOps analyst specialising in cloud and SaaS spend monitoring, \
@@ -106,9 +117,38 @@ ANALYSIS PARAMETERS:
 - Additional Context: {context}
 """
 
+EXPLAIN_NOTE = """Anomalies below were detected and ranked by local statistical checks (rolling baselines, robust z-scores, duplicate and missing-PO matching). Treat the listed amounts and variances as authoritative: explain each finding in the anomalies array in the same order, with a root-cause hypothesis, action, and priority. Do not invent anomalies that are not listed."""
+
+
+def analyze_spend(config: dict, api_key: str, items: pd.DataFrame | None = None) -> dict:
+    """Analyse spend data and detect anomalies.
+
+    Line items (an uploaded frame, or a vendor spend log parsed from
+    ``spend_data``) are scored locally first and the model only explains the
+    ranked findings. Text that does not parse is sent as-is.
+    """
+    raw_text = items is None
+    if items is None:
+        try:
+            items = parse_spend_report(config["spend_data"])
+        except (ValueError, KeyError):
+            items = None
+    else:
+        items = normalize_items(items)
+
+    findings = totals = None
+    if items is not None and len(items):
+        findings = detect_anomalies(
+            items,
+            threshold_pct=float(config.get("threshold", 20)),
+            po_threshold=po_threshold_from_context(config.get("context", "")),
+        )
+        totals = spend_totals(items, float(config.get("budget") or 0))
+        local = findings_for_prompt(findings, totals)
+        # Parsed text reports keep their narrative notes; uploaded tables send findings only.
+        spend_data = f"{config['spend_data']}\n\n{local}" if raw_text else local
+        config = dict(config, spend_data=f"{EXPLAIN_NOTE}\n\n{spend_data}")
 
-def analyze_spend(config: dict, api_key: str) -> dict:
-    """Analyse spend data and detect anomalies."""
     client = anthropic.Anthropic(api_key=api_key)
     prompt = SPEND_PROMPT.format(**config)
     message = client.messages.create(
@@ -121,4 +161,15 @@ def analyze_spend(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+
+    if findings is not None:
+        result["detected_anomalies"] = findings.astype(object).where(findings.notna(), None).to_dict(orient="records")
+        if not raw_text:
+            # Uploaded line items are complete, so local totals replace the model's.
+            summary = result.setdefault("spend_summary", {})
+            summary["total_spend"] = f"${totals['total_spend']:,.0f}"
+            summary["variance_pct"] = totals["variance_pct"]
+            summary["anomaly_count"] = len(findings)
+            result.setdefault("trend_analysis", {})["monthly_trend"] = totals["monthly_trend"]
+    return result
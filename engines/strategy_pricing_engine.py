@@ -2,6 +2,9 @@
 
 import json
 import anthropic
+import pandas as pd
+
+from engines.price_optimizer import PricingConstraints, apply_computed_prices, computed_prices_text
 
 PRICING_PROMPT = """\
 You are an expert retail pricing strategist and revenue optimization consultant. Analyze the \
@@ -112,6 +115,10 @@ Return a JSON object:
 Be data-driven, practical, and specific with numbers. Consider both short-term revenue impact \
 and long-term competitive positioning.
 
+When COMPUTED PRICES are given below, they come from a constrained price-elasticity optimizer: use \
+exactly those recommended prices, changes and elasticities for the products listed, and explain them \
+rather than proposing different prices.
+
 IMPORTANT: Return ONLY the JSON object.
 
 ---
@@ -124,15 +131,35 @@ BUSINESS GOALS:
 - Revenue Growth Target: {revenue_growth}
 - Inventory Goals: {inventory_goals}
 
+COMPUTED PRICES:
+{computed_prices}
+
 MARKET CONDITIONS:
 {market_conditions}
 """
 
 
-def analyze_pricing(config: dict, api_key: str) -> dict:
-    """Analyze pricing and generate optimization strategy."""
+# Numbers the model must not set: result list -> {item key: optimizer column}.
+PRICE_FIELDS = {
+    "pricing_recommendations": {"current_price": "price", "recommended_price": "recommended_price",
+                                "price_change_pct": "price_change_pct"},
+    "elasticity_analysis": {"elasticity_estimate": "elasticity", "floor_price": "price_floor",
+                            "ceiling_price": "price_ceiling"},
+}
+
+
+def analyze_pricing(config: dict, api_key: str, priced: pd.DataFrame | None = None,
+                    constraints: PricingConstraints | None = None) -> dict:
+    """Analyze pricing and generate optimization strategy.
+
+    ``priced`` is ``price_optimizer.optimize_prices`` output; when given, the
+    model explains those prices and the numeric price fields in the result
+    are overwritten with the optimizer's values.
+    """
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = PRICING_PROMPT.format(**config)
+    computed = (computed_prices_text(priced, constraints or PricingConstraints()) if priced is not None
+                else "Not computed; recommend prices from the catalog.")
+    prompt = PRICING_PROMPT.format(**config, computed_prices=computed)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
@@ -143,4 +170,8 @@ def analyze_pricing(config: dict, api_key: str) -> dict:
         lines = text.split("\n")
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
-    return json.loads(text)
+    result = json.loads(text)
+    if priced is not None:
+        for key, columns in PRICE_FIELDS.items():
+            apply_computed_prices(result.get(key, []), priced, columns)
+    return result
@@ -0,0 +1,196 @@
+"""Tabular ingestion utilities for CSV, XLSX, and Parquet exports."""
+
+from collections.abc import MutableMapping
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+SUPPORTED_TABLE_TYPES = ["csv", "xlsx", "parquet"]
+
+CSV_CHUNK_ROWS = 200_000
+DTYPE_SAMPLE_ROWS = 50_000
+CATEGORY_MAX_RATIO = 0.5
+SESSION_TABLES_KEY = "_tables"
+
+
+def _looks_numeric(probe: pd.Series) -> bool:
+    """Cheap check on a small head sample before parsing a whole column as currency."""
+    if probe.empty:
+        return False
+    parsed = pd.to_numeric(probe.astype(str).str.replace(r"[$,]", "", regex=True), errors="coerce")
+    return bool(parsed.notna().all())
+
+
+def _parse_currency(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.astype(str).str.replace(r"[$,]", "", regex=True), errors="coerce")
+
+
+def _infer_dtypes(sample: pd.DataFrame) -> dict[str, str]:
+    """Choose a compact storage kind per column from a sample of rows.
+
+    Returns ``{column: "integer" | "currency" | "category"}``; columns not
+    listed keep the dtype pandas parsed. Floats stay float64 so currency
+    amounts keep their cents.
+    """
+    plan = {}
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            plan[col] = "integer"
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if _looks_numeric(series.dropna().head(1000)) and _parse_currency(series).notna().sum() == series.notna().sum():
+                plan[col] = "currency"
+            elif len(series) and series.nunique(dropna=True) / len(series) <= CATEGORY_MAX_RATIO:
+                plan[col] = "category"
+    return plan
+
+
+def _apply_dtypes(df: pd.DataFrame, plan: dict[str, str]) -> pd.DataFrame:
+    """Convert columns to the kinds chosen by ``_infer_dtypes``.
+
+    A currency column is left as text in any frame where some value does not
+    parse, so no data is silently turned into NaN.
+    """
+    for col, kind in plan.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if kind == "integer":
+            if pd.api.types.is_integer_dtype(series):
+                df[col] = pd.to_numeric(series, downcast="integer")
+        elif kind == "currency":
+            numeric = _parse_currency(series)
+            if numeric.notna().sum() == series.notna().sum():
+                df[col] = numeric
+        elif kind == "category":
+            df[col] = series.astype("category")
+    return df
+
+
+def _optimize_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast integers, parse currency text, and store low-cardinality text as categoricals."""
+    return _apply_dtypes(df, _infer_dtypes(df.head(DTYPE_SAMPLE_ROWS)))
+
+
+def _concat_chunks(chunks: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks, merging per-chunk categoricals instead of falling back to object."""
+    if len(chunks) == 1:
+        return chunks[0]
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [c[col] for c in chunks]
+        if all(isinstance(p.dtype, pd.CategoricalDtype) for p in parts):
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+        else:
+            parts = [p.astype(object) if isinstance(p.dtype, pd.CategoricalDtype) else p for p in parts]
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns)
+
+
+def read_csv_chunked(source, chunksize: int = CSV_CHUNK_ROWS) -> pd.DataFrame:
+    """Read a CSV in fixed-size chunks, compacting each chunk before the next is parsed.
+
+    Column kinds are inferred once from the first ``DTYPE_SAMPLE_ROWS`` rows
+    and applied to every chunk. Text columns in that sample are read as text
+    in every chunk, so a later chunk of all-digit values cannot come back
+    numeric and break the categorical merge.
+    """
+    start = source.tell() if hasattr(source, "seek") else None
+    sample = pd.read_csv(source, nrows=DTYPE_SAMPLE_ROWS)
+    if start is not None:
+        source.seek(start)
+    plan = _infer_dtypes(sample)
+    text_columns = {col: object for col in sample.columns
+                    if pd.api.types.is_object_dtype(sample[col]) or pd.api.types.is_string_dtype(sample[col])}
+    chunks = [_apply_dtypes(chunk, plan) for chunk in pd.read_csv(source, chunksize=chunksize, dtype=text_columns)]
+    if not chunks:
+        return sample
+    return _concat_chunks(chunks)
+
+
+def read_table(file_name: str, source) -> pd.DataFrame:
+    """Load a tabular upload into a compact columnar DataFrame."""
+    name_lower = file_name.lower()
+    if name_lower.endswith(".csv"):
+        return read_csv_chunked(source)
+    elif name_lower.endswith(".xlsx"):
+        return _optimize_dtypes(pd.read_excel(source, engine="openpyxl"))
+    elif name_lower.endswith(".parquet"):
+        return _optimize_dtypes(pd.read_parquet(source))
+    else:
+        raise ValueError(f"Unsupported file type: {file_name}. Use CSV, XLSX, or Parquet.")
+
+
+def load_session_table(store: MutableMapping, file_name: str, source, size: int | None = None) -> pd.DataFrame:
+    """Return the parsed table for an upload, parsing it once per session.
+
+    ``store`` is any mutable mapping that lives for the user's session
+    (``st.session_state`` in the pages). Tables are keyed by name and size so a
+    re-upload of a different file with the same name is parsed again.
+    """
+    tables = store.setdefault(SESSION_TABLES_KEY, {})
+    key = (file_name, size)
+    if key not in tables:
+        tables[key] = read_table(file_name, source)
+    return tables[key]
+
+
+def load_uploaded_table(ui, upload) -> pd.DataFrame:
+    """Parse an uploaded file once per session, or report why it could not be read and stop the page.
+
+    ``ui`` is the ``streamlit`` module, passed in so this module never imports
+    it: ``ui.session_state`` caches the table and ``ui.error`` / ``ui.stop``
+    handle an unreadable file.
+    """
+    try:
+        return load_session_table(ui.session_state, upload.name, upload, upload.size)
+    except Exception as e:
+        ui.error(f"Could not read {upload.name}: {e}")
+        ui.stop()
+
+
+def _format_number(value) -> str:
+    if pd.isna(value):
+        return "n/a"
+    return f"{value:,.2f}" if isinstance(value, (float, np.floating)) else f"{value:,}"
+
+
+def summarize_table(df: pd.DataFrame, name: str = "table", sample_rows: int = 50, top_values: int = 10) -> str:
+    """Render a compact text projection of a table for use in an LLM prompt.
+
+    Every column is described by its dtype and aggregate statistics computed
+    over the full frame; only ``sample_rows`` rows are emitted verbatim.
+    """
+    lines = [f"TABLE: {name} — {len(df):,} rows × {len(df.columns)} columns", "", "COLUMN PROFILE:"]
+    for col in df.columns:
+        series = df[col]
+        nulls = int(series.isna().sum())
+        null_note = f", {nulls:,} missing" if nulls else ""
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            lines.append(
+                f"- {col} ({series.dtype}{null_note}): min {_format_number(series.min())}, "
+                f"mean {_format_number(float(series.mean()))}, max {_format_number(series.max())}, "
+                f"sum {_format_number(float(series.sum()))}"
+            )
+        else:
+            distinct = series.nunique(dropna=True)
+            if distinct == series.notna().sum():
+                lines.append(f"- {col} ({series.dtype}{null_note}): all {distinct:,} values distinct")
+                continue
+            counts = series.value_counts(dropna=True).head(top_values)
+            top = "; ".join(f"{value} ({count:,})" for value, count in counts.items())
+            lines.append(f"- {col} ({series.dtype}{null_note}): {distinct:,} distinct; top: {top}")
+
+    if len(df) > sample_rows:
+        sample = df.sample(n=sample_rows, random_state=0).sort_index()
+        lines += ["", f"SAMPLE ROWS ({sample_rows} of {len(df):,}, deterministic random sample):"]
+    else:
+        sample = df
+        lines += ["", f"ALL ROWS ({len(df):,}):"]
+    lines.append(" | ".join(str(c) for c in df.columns))
+    for row in sample.itertuples(index=False):
+        lines.append(" | ".join("" if pd.isna(v) else str(v) for v in row))
+    return "\n".join(lines)
@@ -0,0 +1,203 @@
+"""Prompt-side text normalization: header/footer stripping, whitespace collapsing, paragraph and line dedupe."""
+
+import re
+from collections import Counter
+
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?[-–—]?\s*\d+\s*[-–—]?(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+PAGE_LABEL_RE = re.compile(r"^page\s*\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+DIGITS_RE = re.compile(r"\d+")
+SPACES_RE = re.compile(r"[ \t\u00a0]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+
+EDGE_LINES = 3  # lines at the top/bottom of a page that may be header/footer
+EDGE_MIN_RATIO = 0.5  # header/footer must recur on at least this share of pages
+BODY_MIN_RATIO = 0.8  # boilerplate anywhere on the page must recur on this share
+BODY_MIN_TOKENS = 3  # shorter lines (numbers, labels) are never treated as body boilerplate
+MIN_PAGES = 3
+MIN_DEDUPE_PARAGRAPH_CHARS = 40
+MIN_DEDUPE_LINE_CHARS = 40  # PDF text rarely has blank lines, so long lines are deduped on their own too
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for reporting savings."""
+    return (len(text) + 3) // 4
+
+
+def _line_key(line: str) -> str:
+    return SPACES_RE.sub(" ", line.strip().lower())
+
+
+def _edge_key(line: str) -> str:
+    """Header/footer key with digits masked so "Page 3 of 12" and "Page 4 of 12" compare equal."""
+    return DIGITS_RE.sub("#", _line_key(line))
+
+
+def _edge_indices(content: list[int]) -> set[int]:
+    """Indices of the header/footer lines: up to ``EDGE_LINES`` each end, at most a quarter of a short page."""
+    span = min(EDGE_LINES, max(1, len(content) // 4))
+    return set(content[:span] + content[-span:])
+
+
+def find_repeated_lines(pages: list[str]) -> tuple[set[str], set[str]]:
+    """Return (edge_keys, body_keys) for lines that recur across pages.
+
+    Lines at the top/bottom of a page are candidate headers and footers: they
+    are compared with digits masked, need to recur on ``EDGE_MIN_RATIO`` of
+    pages, and must never appear away from the page edges (templated body
+    lines such as "Clause 3: ..." do). Lines anywhere else are compared
+    verbatim, need the stricter ``BODY_MIN_RATIO`` and at least
+    ``BODY_MIN_TOKENS`` words.
+    """
+    if len(pages) < MIN_PAGES:
+        return set(), set()
+    edge_counts = Counter()
+    interior = set()
+    body_counts = Counter()
+    for page in pages:
+        lines = page.splitlines()
+        content = [i for i, l in enumerate(lines) if l.strip()]
+        edge_idx = _edge_indices(content)
+        edge_counts.update({_edge_key(lines[i]) for i in edge_idx})
+        interior.update(_edge_key(lines[i]) for i in content if i not in edge_idx)
+        body_counts.update({_line_key(lines[i]) for i in content})
+    edge_keys = {k for k, n in edge_counts.items()
+                 if n >= max(2, EDGE_MIN_RATIO * len(pages)) and k not in interior}
+    body_keys = {k for k, n in body_counts.items()
+                 if n >= BODY_MIN_RATIO * len(pages) and len(k.split()) >= BODY_MIN_TOKENS}
+    return edge_keys, body_keys
+
+
+def strip_repeated_lines(pages: list[str]) -> tuple[list[str], int]:
+    """Drop page numbers and lines repeated across pages. Returns (pages, lines_removed).
+
+    Page numbers are only recognised in header/footer position. Single-page
+    input is returned unchanged.
+    """
+    if len(pages) < 2:
+        return pages, 0
+    edge_keys, body_keys = find_repeated_lines(pages)
+    cleaned = []
+    removed = 0
+    for page in pages:
+        lines = page.splitlines()
+        edge_idx = _edge_indices([i for i, l in enumerate(lines) if l.strip()])
+        kept = []
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            if stripped and (
+                _line_key(line) in body_keys
+                or (i in edge_idx and (PAGE_NUMBER_RE.match(stripped) or _edge_key(line) in edge_keys))
+            ):
+                removed += 1
+                continue
+            kept.append(line)
+        cleaned.append("\n".join(kept))
+    return cleaned, removed
+
+
+def collapse_whitespace(text: str) -> str:
+    """Collapse runs of spaces/tabs, trailing whitespace, and blank-line runs."""
+    lines = [SPACES_RE.sub(" ", line).strip() for line in text.splitlines()]
+    return BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def split_pages(text: str) -> list[str]:
+    """Split pasted text into pages at form feeds or, failing that, after "Page N (of M)" lines.
+
+    Text with neither (or fewer than ``MIN_PAGES`` page labels) is one page.
+    """
+    if "\f" in text:
+        return text.split("\f")
+    lines = text.splitlines()
+    breaks = [i + 1 for i, line in enumerate(lines) if PAGE_LABEL_RE.match(line.strip())]
+    if len(breaks) < MIN_PAGES:
+        return [text]
+    bounds = [0] + breaks + ([len(lines)] if breaks[-1] < len(lines) else [])
+    return ["\n".join(lines[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a single pasted document (see ``normalize_text_report`` for the savings)."""
+    return normalize_text_report(text)[0]
+
+
+def normalize_text_report(text: str, name: str = "document") -> tuple[str, dict]:
+    """Normalize a single pasted document; returns the text and its savings report row."""
+    [(_, normalized)], report = normalize_documents([(name, split_pages(text))])
+    return normalized, report[0]
+
+
+def dedupe_paragraphs(texts: list[str]) -> tuple[list[str], list[int], list[int]]:
+    """Remove paragraphs, then long lines, already seen earlier in the same or a previous document.
+
+    Paragraphs are blank-line separated blocks; extracted PDF text usually has
+    none, so lines of at least ``MIN_DEDUPE_LINE_CHARS`` are also deduped
+    individually. Short paragraphs and lines (headings, labels) are always
+    kept. Returns the texts and the paragraphs and lines removed from each.
+    """
+    seen = set()
+    seen_lines = set()
+    out = []
+    para_counts = []
+    line_counts = []
+    for text in texts:
+        kept = []
+        removed = 0
+        for para in PARAGRAPH_SPLIT_RE.split(text):
+            key = " ".join(para.split()).lower()
+            if len(key) >= MIN_DEDUPE_PARAGRAPH_CHARS:
+                if key in seen:
+                    removed += 1
+                    continue
+                seen.add(key)
+            kept.append(para)
+        lines = []
+        lines_removed = 0
+        for line in "\n\n".join(kept).split("\n"):
+            key = _line_key(line)
+            if len(key) >= MIN_DEDUPE_LINE_CHARS:
+                if key in seen_lines:
+                    lines_removed += 1
+                    continue
+                seen_lines.add(key)
+            lines.append(line)
+        out.append(BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip())
+        para_counts.append(removed)
+        line_counts.append(lines_removed)
+    return out, para_counts, line_counts
+
+
+def normalize_documents(documents: list[tuple[str, list[str]]]) -> tuple[list[tuple[str, str]], list[dict]]:
+    """Normalize several paged documents before they are concatenated into a prompt.
+
+    ``documents`` is a list of ``(name, pages)``. Returns ``(name, text)``
+    pairs and a per-document report of estimated tokens saved.
+    """
+    names = []
+    raw_tokens = []
+    texts = []
+    line_counts = []
+    for name, pages in documents:
+        cleaned, removed = strip_repeated_lines(pages)
+        names.append(name)
+        raw_tokens.append(estimate_tokens("\n".join(pages)))
+        texts.append(collapse_whitespace("\n\n".join(cleaned)))
+        line_counts.append(removed)
+
+    texts, para_counts, dup_line_counts = dedupe_paragraphs(texts)
+
+    report = []
+    for name, text, before, lines_removed, paras_removed, dup_lines in zip(
+            names, texts, raw_tokens, line_counts, para_counts, dup_line_counts):
+        after = estimate_tokens(text)
+        report.append({
+            "document": name,
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": before - after,
+            "repeated_lines_removed": lines_removed,
+            "duplicate_paragraphs_removed": paras_removed,
+            "duplicate_lines_removed": dup_lines,
+        })
+    return list(zip(names, texts)), report
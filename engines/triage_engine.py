@@ -1,8 +1,11 @@
 """AI Incident Triage engine - correlates alerts and suggests remediation."""
 
 import json
+
 import anthropic
 
+from engines.alert_clusters import WINDOW_MINUTES, AlertCluster, cluster_alerts, clusters_for_prompt, parse_alerts
+
 TRIAGE_PROMPT = """\
 You are a senior Site Reliability Engineer (SRE) and incident commander. Analyze \
 the provided alerts, logs, and error traces to perform incident triage. Correlate \
@@ -98,10 +101,41 @@ ADDITIONAL CONTEXT: {context}
 """
 
 
-def triage_incident(config: dict, api_key: str) -> dict:
-    """Analyze alerts and perform incident triage."""
+DELTA_PROMPT = """\
+You are a senior Site Reliability Engineer (SRE) and incident commander running \
+live triage. You already triaged this incident; new alerts have arrived since. \
+Update your triage in light of what changed.
+
+Return the complete updated JSON object using exactly the same schema as the \
+PREVIOUS TRIAGE below. Keep sections that are still accurate, revise severity, \
+status, hypotheses, and actions where the new evidence warrants it, and add the \
+new developments to the timeline.
+
+IMPORTANT: Return ONLY the JSON object.
+
+---
+
+PREVIOUS TRIAGE:
+{previous}
+
+WHAT CHANGED SINCE THE PREVIOUS TRIAGE:
+{changes}
+
+CURRENT ALERT CLUSTERS:
+{alerts}
+
+SYSTEM CONTEXT:
+- Environment: {environment}
+- Architecture: {architecture}
+- Recent Changes: {recent_changes}
+- On-call Team: {oncall_team}
+
+ADDITIONAL CONTEXT: {context}
+"""
+
+
+def _complete(prompt: str, api_key: str) -> dict:
     client = anthropic.Anthropic(api_key=api_key)
-    prompt = TRIAGE_PROMPT.format(**config)
     message = client.messages.create(
         model="claude-sonnet-4-5-20250929",
         max_tokens=4096,
@@ -113,3 +147,55 @@ def triage_incident(config: dict, api_key: str) -> dict:
         lines = [l for l in lines if not l.strip().startswith("```")]
         text = "\n".join(lines)
     return json.loads(text)
+
+
+def _attach_clusters(result: dict, clusters: list[AlertCluster], total_alerts: int) -> dict:
+    result["alert_stats"] = {"alerts": total_alerts, "clusters": len(clusters)}
+    result["alert_clusters"] = [c.to_dict() for c in clusters]
+    return result
+
+
+def triage_incident(config: dict, api_key: str) -> dict:
+    """Analyze alerts and perform incident triage.
+
+    Alert lines are parsed, templated, and clustered locally first so the
+    prompt carries ranked clusters rather than the raw stream. Text with no
+    parseable alert lines is sent as-is.
+    """
+    alerts, other = parse_alerts(config["alerts"])
+    if not alerts:
+        return _complete(TRIAGE_PROMPT.format(**config), api_key)
+    clusters = cluster_alerts(alerts, float(config.get("window_minutes", WINDOW_MINUTES)))
+    return triage_clusters(config, clusters, len(alerts), other, api_key)
+
+
+def triage_clusters(
+    config: dict, clusters: list[AlertCluster], total_alerts: int, other_lines: list[str], api_key: str
+) -> dict:
+    """Triage from already-correlated clusters (batch or live tail)."""
+    config = dict(config, alerts=clusters_for_prompt(clusters, total_alerts, other_lines))
+    return _attach_clusters(_complete(TRIAGE_PROMPT.format(**config), api_key), clusters, total_alerts)
+
+
+def retriage_incident(
+    config: dict,
+    previous: dict,
+    changes: list[str],
+    clusters: list[AlertCluster],
+    total_alerts: int,
+    other_lines: list[str],
+    api_key: str,
+) -> dict:
+    """Update a previous triage with a delta prompt describing what changed."""
+    prior = {k: v for k, v in previous.items() if k not in ("alert_clusters", "alert_stats")}
+    prompt = DELTA_PROMPT.format(
+        previous=json.dumps(prior, separators=(",", ":")),
+        changes="\n".join(f"- {c}" for c in changes),
+        alerts=clusters_for_prompt(clusters, total_alerts, other_lines),
+        environment=config["environment"],
+        architecture=config["architecture"],
+        recent_changes=config["recent_changes"],
+        oncall_team=config["oncall_team"],
+        context=config["context"],
+    )
+    return _attach_clusters(_complete(prompt, api_key), clusters, total_alerts)
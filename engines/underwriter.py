@@ -3,6 +3,7 @@
 import json
 import anthropic
 
+ESTIMATE_APR_PCT = 7.0
 
 UNDERWRITING_PROMPT = """\
 You are an expert loan underwriter at a regulated financial institution. Analyze the
@@ -112,7 +113,7 @@ def calculate_basic_ratios(application: dict) -> dict:
     property_value = application.get("property_value", 0)
 
     # Estimate monthly payment (simple calculation at ~7% APR)
-    rate = 0.07 / 12
+    rate = ESTIMATE_APR_PCT / 1200
     if rate > 0 and requested_term > 0:
         monthly_payment = requested_amount * (rate * (1 + rate) ** requested_term) / ((1 + rate) ** requested_term - 1)
     else:
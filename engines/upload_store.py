@@ -0,0 +1,142 @@
+"""Bounded, copy-free access to uploaded files for the document parsers."""
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "250")) * 1024 * 1024
+SPOOL_MEMORY_BYTES = int(os.getenv("UPLOAD_SPOOL_MB", "16")) * 1024 * 1024
+MAX_CONCURRENT_PARSES = int(os.getenv("MAX_CONCURRENT_PARSES", "2"))
+COPY_CHUNK_BYTES = 1024 * 1024
+RSS_SAMPLE_SECONDS = 0.05
+
+# Shared by every session in the server process, so N users uploading large
+# PDFs at once parse at most MAX_CONCURRENT_PARSES of them at a time.
+_parse_slots = threading.BoundedSemaphore(MAX_CONCURRENT_PARSES)
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size ceiling."""
+
+
+def _upload_size(file_obj) -> int | None:
+    size = getattr(file_obj, "size", None)
+    if size is not None:
+        return size
+    if hasattr(file_obj, "getbuffer"):
+        return file_obj.getbuffer().nbytes
+    return None
+
+
+def _check_size(size: int, max_bytes: int, name: str):
+    if size > max_bytes:
+        raise UploadTooLargeError(
+            f"{name} is {size / 1024 / 1024:,.1f} MB; the limit is {max_bytes / 1024 / 1024:,.0f} MB."
+        )
+
+
+@contextmanager
+def spooled_upload(file_obj, max_bytes: int = MAX_UPLOAD_BYTES):
+    """Yield a seekable binary stream over an upload without duplicating its bytes.
+
+    In-memory uploads (Streamlit's ``UploadedFile`` is a ``BytesIO``) are
+    rewound and handed over as-is. Anything else is streamed in
+    ``COPY_CHUNK_BYTES`` pieces into a spooled temp file, which moves to disk
+    once it passes ``SPOOL_MEMORY_BYTES``. Parsing is gated by a process-wide
+    semaphore.
+    """
+    name = getattr(file_obj, "name", "upload")
+    size = _upload_size(file_obj)
+    if size is not None:
+        _check_size(size, max_bytes, name)
+
+    with _parse_slots:
+        if hasattr(file_obj, "getbuffer"):
+            file_obj.seek(0)
+            yield file_obj
+            return
+
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES) as spool:
+            copied = 0
+            while chunk := file_obj.read(COPY_CHUNK_BYTES):
+                copied += len(chunk)
+                _check_size(copied, max_bytes, name)
+                spool.write(chunk)
+            spool.seek(0)
+            yield spool
+
+
+def as_stream(data) -> io.IOBase:
+    """Wrap raw bytes for parsers that need a file object; streams pass through.
+
+    ``io.BytesIO(bytes)`` shares the immutable buffer until written to, so no
+    copy is made for ``bytes`` input.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return io.BytesIO(data)
+    data.seek(0)
+    return data
+
+
+def read_bytes(source) -> bytes:
+    """Read the full contents of bytes or a binary stream (for plain-text decoding)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    source.seek(0)
+    return source.read()
+
+
+def _current_rss_bytes() -> int:
+    """Resident set size now; falls back to the lifetime peak where /proc is unavailable, 0 if neither is."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@contextmanager
+def measure_rss(stats: dict):
+    """Record RSS before/after a block and the highest RSS sampled while it ran.
+
+    A daemon thread samples RSS every ``RSS_SAMPLE_SECONDS``, so
+    ``peak_rss_mb`` is this block's own peak rather than the process-lifetime
+    high-water mark, and ``peak_growth_mb`` is how far it rose above the
+    starting RSS. Values are written into ``stats`` when the block exits.
+    """
+    rss_before = _current_rss_bytes()
+    peak = [rss_before]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(RSS_SAMPLE_SECONDS):
+            peak[0] = max(peak[0], _current_rss_bytes())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        done.set()
+        sampler.join()
+        rss_after = _current_rss_bytes()
+        peak_rss = max(peak[0], rss_after)
+        mb = 1024 * 1024
+        stats.update({
+            "rss_before_mb": round(rss_before / mb, 1),
+            "rss_after_mb": round(rss_after / mb, 1),
+            "peak_rss_mb": round(peak_rss / mb, 1),
+            "peak_growth_mb": round(max(0, peak_rss - rss_before) / mb, 1),
+            "seconds": round(time.perf_counter() - start, 2),
+        })
@@ -5,7 +5,9 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from engines.resume_parser import extract_text
+from engines.upload_store import spooled_upload
 from engines.resume_analyzer import analyze_resume
+from engines.bulk_ranker import rank_resumes
 
 load_dotenv()
 
@@ -205,7 +207,8 @@ if st.button("Analyze Match", type="primary", use_container_width=True):
     resume_text = ""
     if resume_file:
         try:
-            resume_text = extract_text(resume_file.name, resume_file.read())
+            with spooled_upload(resume_file) as stream:
+                resume_text = extract_text(resume_file.name, stream)
         except Exception as e:
             st.error(f"Error reading resume: {e}")
             st.stop()
@@ -220,7 +223,8 @@ if st.button("Analyze Match", type="primary", use_container_width=True):
     jd_text = ""
     if jd_file:
         try:
-            jd_text = extract_text(jd_file.name, jd_file.read())
+            with spooled_upload(jd_file) as stream:
+                jd_text = extract_text(jd_file.name, stream)
         except Exception as e:
             st.error(f"Error reading job description: {e}")
             st.stop()
@@ -241,3 +245,57 @@ if st.button("Analyze Match", type="primary", use_container_width=True):
 
     st.divider()
     render_results(results)
+
+
+# --- Bulk Ranking ---
+st.divider()
+st.header("Bulk Ranking")
+st.markdown("Rank a whole applicant pool against the job description above. Every resume is scored locally; "
+            "only the top candidates get the full Claude analysis. Interrupted runs resume from a checkpoint.")
+
+bulk_files = st.file_uploader(
+    "Upload resumes (multiple allowed)",
+    type=["pdf", "docx", "txt"],
+    accept_multiple_files=True,
+    key="bulk_resumes",
+)
+bulk_top_k = st.slider("Full analysis for top", 0, 100, 25, key="bulk_top_k")
+
+if st.button("Rank Resumes", use_container_width=True):
+    if not api_key and bulk_top_k > 0:
+        st.error("Please provide an Anthropic API key in the sidebar or .env file.")
+        st.stop()
+    if not bulk_files:
+        st.error("Please upload at least one resume.")
+        st.stop()
+
+    bulk_jd = jd_text_input.strip()
+    if jd_file:
+        with spooled_upload(jd_file) as stream:
+            bulk_jd = extract_text(jd_file.name, stream)
+    if not bulk_jd:
+        st.error("Please upload a job description file or paste job description text above.")
+        st.stop()
+
+    progress = st.progress(0.0, text="Parsing and scoring resumes...")
+    try:
+        ranked = rank_resumes(
+            [(f.name, f.getvalue()) for f in bulk_files],
+            bulk_jd,
+            api_key,
+            top_k=bulk_top_k,
+            on_result=lambda done, total: progress.progress(done / total, text=f"Analyzed {done}/{total} candidates"),
+        )
+    except Exception as e:
+        st.error(f"Bulk ranking failed: {e}")
+        st.stop()
+    progress.empty()
+
+    failed = ranked["error"].notna().sum()
+    b1, b2, b3 = st.columns(3)
+    b1.metric("Resumes Ranked", len(ranked) - failed)
+    b2.metric("Fully Analyzed", ranked["overall_score"].notna().sum())
+    b3.metric("Unreadable Files", failed)
+
+    st.dataframe(ranked.drop(columns=["resume_id"]), use_container_width=True, hide_index=True)
+    st.download_button("Download Ranking (CSV)", ranked.to_csv(index=False), "resume_ranking.csv", "text/csv")
@@ -1,13 +1,22 @@
 """AI-Powered ROI Calculator - Streamlit Application."""
 
 import os
+import time
+from dataclasses import replace
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import streamlit as st
 from dotenv import load_dotenv
 
-from engines.roi_engine import ProjectInputs, run_all_scenarios
+from engines.roi_engine import (ABSOLUTE_SPREAD_UNITS, DEFAULT_SPREADS, PERCENTILES, SPREAD_LABELS, ProjectInputs,
+                                distributions_from_spreads, driver_sensitivities, run_all_scenarios, run_monte_carlo,
+                                sensitivity_grid, sensitivity_summary)
+from engines.monthly_cashflow import calculate_monthly_scenario, evaluate_monthly, run_all_monthly_scenarios
+from engines.portfolio_optimizer import (FRONTIER_POINTS, efficient_frontier, evaluate_projects, normalize_projects,
+                                         portfolio_summary, portfolio_template, select_portfolio)
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_session_table
 from engines.ai_advisor import get_ai_assessment
 
 load_dotenv()
@@ -92,10 +101,10 @@ def build_scenario_comparison_chart(scenarios: dict) -> go.Figure:
     return fig
 
 
-def render_scenario_table(scenarios: dict, years: int):
-    """Render a financial summary table."""
+def render_scenario_table(scenarios: dict, years: int, monthly: dict | None = None):
+    """Render a financial summary table, with IRR/MIRR/exact payback when monthly results are given."""
     rows = []
-    for sc in scenarios.values():
+    for key, sc in scenarios.items():
         row = {"Scenario": sc.label, "Customers": sc.customer_count}
         for i in range(years):
             row[f"Y{i+1} Revenue"] = f"${sc.yearly_revenue[i]:,.0f}"
@@ -106,10 +115,217 @@ def render_scenario_table(scenarios: dict, years: int):
         row["NPV"] = f"${sc.npv:,.0f}"
         payback = f"{sc.payback_month} mo" if sc.payback_month else "N/A"
         row["Payback"] = payback
+        if monthly is not None:
+            m = monthly[key]
+            row["IRR"] = f"{m.irr_pct:,.1f}%" if m.irr_pct is not None else "N/A"
+            row["MIRR"] = f"{m.mirr_pct:,.1f}%" if m.mirr_pct is not None else "N/A"
+            row["Exact Payback"] = f"{m.payback_months:.1f} mo" if m.payback_months is not None else "N/A"
         rows.append(row)
     return pd.DataFrame(rows)
 
 
+def build_fan_chart(mc, scenarios: dict, years: int) -> go.Figure:
+    """Cumulative profit percentile bands across simulated paths, with the fixed scenarios overlaid."""
+    year_labels = [f"Year {i+1}" for i in range(years)]
+    fan = mc.cumulative_profit_fan
+    fig = go.Figure()
+    for low, high, opacity in [(5, 95, 0.15), (25, 75, 0.3)]:
+        fig.add_trace(go.Scatter(x=year_labels, y=fan[high], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=year_labels, y=fan[low], mode="lines", line=dict(width=0), fill="tonexty",
+                                 fillcolor=f"rgba(102, 126, 234, {opacity})", name=f"P{low}–P{high}"))
+    fig.add_trace(go.Scatter(x=year_labels, y=fan[50], mode="lines+markers", name="Median",
+                             line=dict(color="#667eea", width=3)))
+    colors = {"optimistic": "#28a745", "most_likely": "#17a2b8", "pessimistic": "#dc3545"}
+    for key, sc in scenarios.items():
+        fig.add_trace(go.Scatter(x=year_labels, y=sc.cumulative_profit, mode="lines", name=sc.label,
+                                 line=dict(color=colors[key], width=1.5, dash="dot")))
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
+    fig.update_layout(title="Cumulative Profit — Monte Carlo Fan", height=400, yaxis_tickprefix="$",
+                      legend=dict(orientation="h", y=-0.15))
+    return fig
+
+
+def build_npv_histogram(mc) -> go.Figure:
+    """NPV distribution from pre-binned counts, so the browser never receives the raw paths."""
+    edges, counts = mc.npv_histogram
+    centers = [(a + b) / 2 for a, b in zip(edges[:-1], edges[1:])]
+    fig = go.Figure(go.Bar(x=centers, y=counts, width=edges[1] - edges[0] if len(edges) > 1 else None,
+                           marker_color=["#dc3545" if c < 0 else "#28a745" for c in centers]))
+    for p, dash in [(5, "dot"), (50, "dash"), (95, "dot")]:
+        fig.add_vline(x=mc.npv[p], line_dash=dash, line_color="#333", annotation_text=f"P{p}")
+    fig.update_layout(title="NPV Distribution", height=350, xaxis_tickprefix="$", yaxis_title="Paths",
+                      bargap=0)
+    return fig
+
+
+def build_tornado_chart(drivers: list, base_npv: float) -> go.Figure:
+    """NPV at the downside and upside of each driver's range, widest swing on top."""
+    drivers = drivers[::-1]
+    labels = [d.label for d in drivers]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(y=labels, x=[d.npv_low - base_npv for d in drivers], base=base_npv, orientation="h",
+                         name="Downside", marker_color="#dc3545",
+                         customdata=[d.values[0] for d in drivers],
+                         hovertemplate="%{y} at %{customdata:,.2f}: NPV $%{x:,.0f}<extra></extra>"))
+    fig.add_trace(go.Bar(y=labels, x=[d.npv_high - base_npv for d in drivers], base=base_npv, orientation="h",
+                         name="Upside", marker_color="#28a745",
+                         customdata=[d.values[-1] for d in drivers],
+                         hovertemplate="%{y} at %{customdata:,.2f}: NPV $%{x:,.0f}<extra></extra>"))
+    fig.add_vline(x=base_npv, line_color="#333", annotation_text="Base NPV")
+    fig.update_layout(title="NPV Tornado", barmode="overlay", height=60 + 40 * len(drivers),
+                      xaxis_tickprefix="$", legend=dict(orientation="h", y=-0.15))
+    return fig
+
+
+def build_grid_heatmap(grid) -> go.Figure:
+    """Two-way NPV heatmap, with the NPV = 0 contour as the breakeven frontier."""
+    fig = go.Figure(go.Heatmap(z=grid.npv, x=grid.x_values, y=grid.y_values, colorscale="RdYlGn", zmid=0,
+                               colorbar=dict(title="NPV", tickprefix="$"),
+                               hovertemplate="x=%{x:,.2f}<br>y=%{y:,.2f}<br>NPV $%{z:,.0f}<extra></extra>"))
+    fig.add_trace(go.Contour(z=grid.npv, x=grid.x_values, y=grid.y_values, showscale=False,
+                             contours=dict(start=0, end=0, coloring="none", showlabels=True),
+                             line=dict(color="black", width=2), hoverinfo="skip", name="Breakeven"))
+    fig.update_layout(title=f"NPV: {SPREAD_LABELS[grid.x_field]} × {SPREAD_LABELS[grid.y_field]}", height=450,
+                      xaxis_title=SPREAD_LABELS[grid.x_field], yaxis_title=SPREAD_LABELS[grid.y_field])
+    return fig
+
+
+def build_monthly_cash_chart(result) -> go.Figure:
+    """Monthly net cash flow bars with the cumulative position on a second axis."""
+    months = list(range(len(result.monthly_cash_flow)))
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Bar(x=months, y=result.monthly_cash_flow, name="Net Cash Flow",
+                         marker_color=["#dc3545" if v < 0 else "#28a745" for v in result.monthly_cash_flow]))
+    fig.add_trace(go.Scatter(x=months, y=result.cumulative_cash_flow, mode="lines", name="Cumulative",
+                             line=dict(color="#667eea", width=3)), secondary_y=True)
+    if result.payback_months is not None:
+        fig.add_vline(x=result.payback_months, line_dash="dash", line_color="#333",
+                      annotation_text=f"Payback {result.payback_months:.1f} mo")
+    fig.update_layout(title="Monthly Cash Flow", height=400, xaxis_title="Month",
+                      legend=dict(orientation="h", y=-0.2))
+    fig.update_yaxes(tickprefix="$", secondary_y=False)
+    fig.update_yaxes(tickprefix="$", secondary_y=True, showgrid=False)
+    return fig
+
+
+def build_irr_heatmap(start_months, hit_rates, irr_pct, hurdle_pct: float) -> go.Figure:
+    """IRR across revenue start month × hit rate, with the discount-rate hurdle as a contour."""
+    finite = irr_pct[np.isfinite(irr_pct)]
+    zmax = max(float(np.percentile(finite, 95)), hurdle_pct * 2) if len(finite) else hurdle_pct * 2
+    fig = go.Figure(go.Heatmap(z=irr_pct, x=start_months, y=hit_rates, colorscale="RdYlGn", zmid=hurdle_pct,
+                               zmax=zmax, colorbar=dict(title="IRR", ticksuffix="%"),
+                               hovertemplate="Start month %{x}<br>Hit rate %{y:.2f}%<br>IRR %{z:,.1f}%"
+                                             "<extra></extra>"))
+    fig.add_trace(go.Contour(z=irr_pct, x=start_months, y=hit_rates, showscale=False,
+                             contours=dict(start=hurdle_pct, end=hurdle_pct, coloring="none", showlabels=True),
+                             line=dict(color="black", width=2), hoverinfo="skip", name="Hurdle"))
+    fig.update_layout(title="IRR: Revenue Start Month × Hit Rate", height=450,
+                      xaxis_title="Revenue Start Month", yaxis_title="Hit Rate (%)")
+    return fig
+
+
+def build_frontier_chart(frontier: pd.DataFrame, selection, capital_budget: float) -> go.Figure:
+    """Best achievable NPV by capital budget, with the chosen portfolio marked."""
+    quality = np.where(frontier["optimal"], "proven optimal", "best found (not proven optimal)")
+    fig = go.Figure(go.Scatter(x=frontier["capital_budget"], y=frontier["npv"], mode="lines+markers",
+                               line=dict(color="#667eea", width=3, shape="hv"), name="Efficient Frontier",
+                               marker=dict(symbol=np.where(frontier["optimal"], "circle", "circle-open"), size=8),
+                               customdata=np.column_stack([frontier["projects"], frontier["headcount_used"], quality]),
+                               hovertemplate="Budget $%{x:,.0f}<br>NPV $%{y:,.0f}<br>%{customdata[0]} projects, "
+                                             "%{customdata[1]:,.0f} headcount<br>%{customdata[2]}<extra></extra>"))
+    fig.add_trace(go.Scatter(x=[capital_budget], y=[selection.npv], mode="markers", name="Selected Portfolio",
+                             marker=dict(color="#28a745", size=14, symbol="star")))
+    fig.update_layout(title="Portfolio NPV vs Capital Budget", height=420, xaxis_title="Capital Budget",
+                      yaxis_title="Portfolio NPV", xaxis_tickprefix="$", yaxis_tickprefix="$",
+                      legend=dict(orientation="h", y=-0.2))
+    return fig
+
+
+def render_portfolio_mode():
+    """Evaluate an uploaded list of initiatives and choose the NPV-maximizing set under the budgets."""
+    st.subheader("Portfolio Optimizer")
+    st.caption("Every initiative is evaluated with the Most Likely scenario model, then the NPV-maximizing set "
+               "is chosen under the capital and headcount budgets (exact 0/1 optimization, greedy fallback).")
+    project_file = st.file_uploader("Project list (CSV, XLSX, Parquet)", type=SUPPORTED_TABLE_TYPES,
+                                    key="portfolio_projects",
+                                    help="Needs initial_investment, annual_operating_cost, total_addressable_market, "
+                                         "hit_rate_pct and avg_annual_license; headcount, mandatory and the other "
+                                         "ROI inputs are optional.")
+    st.download_button("Download Template (CSV)", portfolio_template().to_csv(index=False),
+                       "roi_portfolio_template.csv", "text/csv")
+
+    with st.form("portfolio_form"):
+        p1, p2, p3 = st.columns(3)
+        capital_budget = p1.number_input("Capital Budget ($)", min_value=0, value=5_000_000, step=250_000,
+                                         help="Limit on total initial investment")
+        headcount_budget = p2.number_input("Headcount Budget (FTE)", min_value=0.0, value=0.0, step=1.0,
+                                           help="0 = no headcount limit")
+        method = p3.selectbox("Method", ["auto", "exact", "heuristic"],
+                              help="auto: exact optimization, greedy fallback if the solver times out")
+        p4, p5, p6 = st.columns(3)
+        default_years = p4.selectbox("Default Projection (Years)", [1, 2, 3, 4, 5], index=2,
+                                     help="Used where the file has no projection_years")
+        default_rate = p5.slider("Default Discount Rate (%)", 0.0, 25.0, 10.0, step=0.5,
+                                 help="Used where the file has no discount_rate_pct")
+        frontier_points = p6.slider("Frontier Points", 5, 60, FRONTIER_POINTS)
+        portfolio_submitted = st.form_submit_button("Optimize Portfolio", type="primary", use_container_width=True)
+
+    if not portfolio_submitted:
+        return
+    if project_file is None:
+        st.error("Upload a project list.")
+        st.stop()
+    hc_budget = headcount_budget or None
+    try:
+        table = load_session_table(st.session_state, project_file.name, project_file, project_file.size)
+        evaluated = evaluate_projects(normalize_projects(
+            table, {"projection_years": default_years, "discount_rate_pct": default_rate}))
+        started = time.perf_counter()
+        with st.spinner("Optimizing portfolio..."):
+            selection = select_portfolio(evaluated, capital_budget, hc_budget, method)
+            frontier = efficient_frontier(evaluated, hc_budget, frontier_points, method=method)
+        elapsed = time.perf_counter() - started
+    except Exception as e:
+        st.error(f"Could not optimize portfolio: {e}")
+        st.stop()
+
+    summary = portfolio_summary(evaluated, selection)
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("Projects Funded", f"{summary['selected']} / {summary['candidates']}",
+              help=f"{summary['positive_npv']} candidates have positive NPV")
+    k2.metric("Portfolio NPV", format_currency(summary["npv"]))
+    k3.metric("Capital Used", format_currency(summary["capital"]), help=f"Budget {format_currency(capital_budget)}")
+    k4.metric("Headcount Used", f"{summary['headcount']:,.1f}",
+              help=f"Budget {headcount_budget:,.1f} FTE" if hc_budget else "No headcount limit")
+    k5.metric("Portfolio ROI", f"{summary['portfolio_roi_pct']}%")
+    quality = ("proven optimal" if selection.optimal
+               else f"within {selection.gap_pct:.1f}% of the LP upper bound")
+    st.caption(f"Selection by {selection.method} method, {quality}. Selection and {len(frontier)}-point frontier "
+               f"computed in {elapsed:,.2f} s.")
+
+    st.plotly_chart(build_frontier_chart(frontier, selection, capital_budget), use_container_width=True)
+
+    results = evaluated.assign(selected=selection.selected).sort_values(["selected", "npv"], ascending=False)
+    display = pd.DataFrame({
+        "Selected": results["selected"].map({True: "✅", False: ""}),
+        "Project": results["project"],
+        "Mandatory": results["mandatory"].map({True: "Yes", False: ""}),
+        "Investment": results["initial_investment"].map("${:,.0f}".format),
+        "Headcount": results["headcount"],
+        "NPV": results["npv"].map("${:,.0f}".format),
+        "NPV per $": results["npv_per_dollar"],
+        "ROI %": results["roi_pct"],
+        "Payback (mo)": results["payback_month"],
+        "Customers": results["customers"].astype(int),
+    })
+    st.dataframe(display, use_container_width=True, hide_index=True)
+    st.download_button("Download Project Evaluation (CSV)", results.to_csv(index=False),
+                       "roi_portfolio.csv", "text/csv")
+    st.download_button("Download Efficient Frontier (CSV)", frontier.to_csv(index=False),
+                       "roi_frontier.csv", "text/csv")
+
+
 def render_ai_assessment(assessment: dict):
     """Render the AI strategic assessment."""
     # Go / No-Go Verdict
@@ -174,7 +390,13 @@ with st.sidebar:
         api_key = api_key_input
     st.divider()
     st.markdown("**Model:** Claude Sonnet 4.5")
-    st.markdown("**Scenarios:** Optimistic, Most Likely, Pessimistic")
+    st.markdown("**Scenarios:** Optimistic, Most Likely, Pessimistic + Monte Carlo")
+    st.divider()
+    mode = st.radio("Mode", ["Single Project", "Portfolio"], help="Portfolio: compare many initiatives under a budget")
+
+if mode == "Portfolio":
+    render_portfolio_mode()
+    st.stop()
 
 # --- Input Form ---
 with st.form("roi_form"):
@@ -227,10 +449,45 @@ with st.form("roi_form"):
     st.divider()
     discount_rate = st.slider("Discount Rate for NPV (%)", min_value=0.0, max_value=25.0, value=10.0, step=0.5)
 
+    st.divider()
+    st.subheader("Monte Carlo Simulation")
+    mc1, mc2 = st.columns([1, 2])
+    with mc1:
+        run_mc = st.checkbox("Simulate input uncertainty", value=True)
+        n_paths = st.select_slider("Simulated Paths", [10_000, 50_000, 100_000, 250_000, 500_000], value=100_000)
+        distribution_kind = st.selectbox("Distribution", ["triangular", "pert", "uniform"],
+                                         help="Each input ranges from its downside to its upside, "
+                                              "most likely at the value entered above.")
+        mc_seed = st.number_input("Random Seed", min_value=0, value=42, step=1,
+                                  help="Fixed so P10/P50/P90 stay the same across reruns with the same inputs; "
+                                       "change it to draw a different sample.")
+    with mc2:
+        spreads_table = st.data_editor(
+            pd.DataFrame([{"Input": SPREAD_LABELS[k], "Downside": down, "Upside": up,
+                           "Unit": ABSOLUTE_SPREAD_UNITS.get(k, "% of value")}
+                          for k, (down, up) in DEFAULT_SPREADS.items()]),
+            disabled=["Input", "Unit"], hide_index=True, use_container_width=True, key="mc_spreads",
+        )
+
+    st.subheader("Sensitivity Grid")
+    driver_keys = list(DEFAULT_SPREADS)
+    g1, g2 = st.columns(2)
+    with g1:
+        grid_x = st.selectbox("Grid X Driver", driver_keys, index=driver_keys.index("hit_rate_pct"),
+                              format_func=SPREAD_LABELS.get)
+    with g2:
+        grid_y = st.selectbox("Grid Y Driver", driver_keys, index=driver_keys.index("avg_annual_license"),
+                              format_func=SPREAD_LABELS.get)
+
     submitted = st.form_submit_button("Calculate ROI", type="primary", use_container_width=True)
 
 # --- Results ---
+# Results stay on screen after the first submit so the what-if sliders below the form can rerun the page.
 if submitted:
+    st.session_state["roi_calculated"] = True
+    st.session_state.pop("roi_assessment", None)
+
+if st.session_state.get("roi_calculated"):
     inputs = ProjectInputs(
         product_name=product_name,
         target_market=target_market,
@@ -250,6 +507,7 @@ if submitted:
 
     # Calculate scenarios
     scenarios = run_all_scenarios(inputs)
+    monthly = run_all_monthly_scenarios(inputs)
     ml = scenarios["most_likely"]
 
     st.divider()
@@ -269,25 +527,131 @@ if submitted:
 
     # Scenario table
     st.subheader("Scenario Comparison")
-    df = render_scenario_table(scenarios, projection_years)
+    df = render_scenario_table(scenarios, projection_years, monthly)
     st.dataframe(df, use_container_width=True, hide_index=True)
 
+    # Monte Carlo
+    spreads = {key: (float(row["Downside"]), float(row["Upside"]))
+               for key, row in zip(DEFAULT_SPREADS, spreads_table.to_dict(orient="records"))}
+    mc = None
+    if run_mc:
+        st.divider()
+        st.header("Monte Carlo Simulation")
+        started = time.perf_counter()
+        mc = run_monte_carlo(inputs, distributions_from_spreads(inputs, spreads, distribution_kind), n_paths,
+                             seed=int(mc_seed))
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        k1, k2, k3, k4, k5 = st.columns(5)
+        k1.metric("Median NPV", format_currency(mc.npv[50]))
+        k2.metric("NPV P5 – P95", f"{format_currency(mc.npv[5])} – {format_currency(mc.npv[95])}")
+        k3.metric("Probability of Loss", f"{mc.probability_of_loss:.1%}", help="Share of paths with NPV < 0")
+        k4.metric("Median ROI", f"{mc.roi_pct[50]:.1f}%")
+        median_payback = mc.payback_month[50]
+        k5.metric("Median Payback", f"{median_payback:.0f} mo" if median_payback == median_payback else "N/A",
+                  help=f"{mc.probability_no_payback:.1%} of paths do not pay back within the projection")
+        st.caption(f"{mc.n_paths:,} paths simulated in {elapsed_ms:,.0f} ms.")
+
+        st.plotly_chart(build_fan_chart(mc, scenarios, projection_years), use_container_width=True)
+        st.plotly_chart(build_npv_histogram(mc), use_container_width=True)
+
+        mc_df = pd.DataFrame({
+            "Percentile": [f"P{p}" for p in PERCENTILES],
+            "NPV": [f"${mc.npv[p]:,.0f}" for p in PERCENTILES],
+            "Total Profit": [f"${mc.total_profit[p]:,.0f}" for p in PERCENTILES],
+            "ROI %": [f"{mc.roi_pct[p]:.1f}%" for p in PERCENTILES],
+            "Payback (mo)": [f"{mc.payback_month[p]:.0f}" if mc.payback_month[p] == mc.payback_month[p] else "N/A"
+                             for p in PERCENTILES],
+        })
+        st.dataframe(mc_df, use_container_width=True, hide_index=True)
+
+    # Sensitivity
+    st.divider()
+    st.header("Sensitivity Analysis")
+    st.caption("Each driver is swept across its downside–upside range from the uncertainty table, "
+               "all other inputs at their base values.")
+    drivers = driver_sensitivities(inputs, spreads)
+    grid = sensitivity_grid(inputs, grid_x, grid_y, spreads) if grid_x != grid_y else None
+    st.plotly_chart(build_tornado_chart(drivers, ml.npv), use_container_width=True)
+    if grid is not None:
+        st.plotly_chart(build_grid_heatmap(grid), use_container_width=True)
+    else:
+        st.info("Pick two different drivers for the two-way grid.")
+    sens_df = pd.DataFrame([{
+        "Driver": d.label, "Range": f"{d.values[0]:,.2f} – {d.values[-1]:,.2f}",
+        "NPV at Downside": f"${d.npv_low:,.0f}", "NPV at Upside": f"${d.npv_high:,.0f}",
+        "Swing": f"${d.swing:,.0f}",
+        "NPV Breakeven": f"{d.breakeven_value:,.2f}" if d.breakeven_value is not None else "not in range",
+    } for d in drivers])
+    st.dataframe(sens_df, use_container_width=True, hide_index=True)
+    sensitivity = sensitivity_summary(inputs, drivers, grid, mc)
+
+    # Monthly cash flow
+    st.divider()
+    st.header("Monthly Cash Flow & IRR")
+    st.caption("Month-by-month model: revenue begins exactly in its start month, payback is interpolated within "
+               "the month, and NPV discounts each month at the monthly equivalent of the discount rate.")
+    w1, w2, w3 = st.columns(3)
+    what_if_start = w1.slider("What-if Revenue Start Month", 1, 60, int(rev_start))
+    what_if_hit = w2.slider("What-if Hit Rate (%)", 0.1, 100.0, float(hit_rate), step=0.1)
+    reinvest_rate = w3.slider("MIRR Reinvestment Rate (%)", 0.0, 25.0, float(discount_rate), step=0.5)
+    what_if = replace(inputs, revenue_start_month=what_if_start, hit_rate_pct=what_if_hit)
+    cf = calculate_monthly_scenario(what_if, label="What-if", reinvest_rate_pct=reinvest_rate)
+
+    f1, f2, f3, f4 = st.columns(4)
+    f1.metric("IRR", f"{cf.irr_pct:,.1f}%" if cf.irr_pct is not None else "N/A",
+              delta=f"{cf.irr_pct - discount_rate:+,.1f} pts vs hurdle" if cf.irr_pct is not None else None)
+    f2.metric("MIRR", f"{cf.mirr_pct:,.1f}%" if cf.mirr_pct is not None else "N/A")
+    f3.metric("Exact Payback", f"{cf.payback_months:.1f} mo" if cf.payback_months is not None else "N/A")
+    f4.metric("Monthly NPV", format_currency(cf.npv))
+    if cf.irr_count and cf.irr_count > 1:
+        st.warning(f"The cash flows change sign more than once and have {cf.irr_count} IRRs in range; the lowest "
+                   "is shown. Rely on MIRR and NPV for this scenario.")
+    st.plotly_chart(build_monthly_cash_chart(cf), use_container_width=True)
+
+    started = time.perf_counter()
+    start_months = np.arange(1, min(60, projection_years * 12) + 1)
+    hit_rates = np.linspace(max(0.1, hit_rate * 0.25), min(100.0, hit_rate * 2), 100)
+    starts, hits = np.meshgrid(start_months, hit_rates)
+    grid = evaluate_monthly(inputs, {"revenue_start_month": starts.ravel(), "hit_rate_pct": hits.ravel()})
+    irr_grid = grid["irr_pct"].reshape(starts.shape)
+    ambiguous = int((grid["irr_count"] > 1).sum())
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.plotly_chart(build_irr_heatmap(start_months, hit_rates, irr_grid, discount_rate), use_container_width=True)
+    st.caption(f"{irr_grid.size:,} scenario variants solved for IRR in {elapsed_ms:,.0f} ms. "
+               f"Black line: IRR equal to the {discount_rate}% discount rate."
+               + (f" {ambiguous:,} variants have more than one IRR; the lowest is plotted." if ambiguous else ""))
+    cf_df = pd.DataFrame({
+        "Month": range(len(cf.monthly_cash_flow)),
+        "Net Cash Flow": cf.monthly_cash_flow,
+        "Cumulative": cf.cumulative_cash_flow,
+    })
+
     # AI Assessment
     if not api_key:
         st.warning("Add an Anthropic API key in the sidebar to get AI-powered market assessment and recommendations.")
     else:
         st.divider()
         st.header("AI Strategic Assessment")
-        with st.spinner("Claude is analyzing your market and financials..."):
-            try:
-                assessment = get_ai_assessment(inputs, scenarios, api_key)
-                render_ai_assessment(assessment)
-            except Exception as e:
-                st.error(f"AI assessment failed: {e}")
-                st.info("Financial projections above are still valid — they don't require the AI.")
+        try:
+            # Cached per submit so what-if slider reruns don't call the API again.
+            if "roi_assessment" not in st.session_state:
+                with st.spinner("Claude is analyzing your market and financials..."):
+                    st.session_state["roi_assessment"] = get_ai_assessment(inputs, scenarios, api_key, sensitivity)
+            render_ai_assessment(st.session_state["roi_assessment"])
+        except Exception as e:
+            st.error(f"AI assessment failed: {e}")
+            st.info("Financial projections above are still valid — they don't require the AI.")
 
     # Export
     st.divider()
     st.subheader("Export")
     csv = df.to_csv(index=False)
     st.download_button("Download Scenario Table (CSV)", csv, "roi_scenarios.csv", "text/csv")
+    if mc is not None:
+        st.download_button("Download Monte Carlo Percentiles (CSV)", mc_df.to_csv(index=False),
+                           "roi_monte_carlo.csv", "text/csv")
+    st.download_button("Download Sensitivity Table (CSV)", sens_df.to_csv(index=False),
+                       "roi_sensitivity.csv", "text/csv")
+    st.download_button("Download What-if Monthly Cash Flow (CSV)", cf_df.to_csv(index=False),
+                       "roi_monthly_cash_flow.csv", "text/csv")
@@ -9,7 +9,9 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from engines.requi_doc_parser import extract_text
+from engines.upload_store import measure_rss, spooled_upload
 from engines.requi_analyzer import extract_requirements, detect_contradictions, chat_about_requirements
+from engines.requi_index import build_requirements_index
 
 load_dotenv()
 
@@ -133,17 +135,20 @@ def render_contradictions(contradictions_data: dict):
         return
 
     st.subheader(f"Issues Found ({len(conflicts)})")
-    for c in conflicts:
-        sev = c.get("severity", "medium").lower()
-        css = f"conflict-{sev}"
-        req_ids = ", ".join(c.get("requirement_ids", []))
-        st.markdown(f"""
-        <div class="req-card {css}">
-            <strong>[{c.get('severity', 'N/A')}] {c.get('type', 'Issue')}</strong> — {req_ids}<br/>
-            {c.get('description', '')}<br/>
-            <em>Recommendation:</em> {c.get('recommendation', 'N/A')}
-        </div>
-        """, unsafe_allow_html=True)
+    by_category = contradictions_data.get("by_category") or {"All issues": conflicts}
+    for category, issues in by_category.items():
+        with st.expander(f"{category} ({len(issues)})", expanded=len(by_category) == 1):
+            for c in issues:
+                sev = c.get("severity", "medium").lower()
+                css = f"conflict-{sev}"
+                req_ids = ", ".join(c.get("requirement_ids", []))
+                st.markdown(f"""
+                <div class="req-card {css}">
+                    <strong>[{c.get('severity', 'N/A')}] {c.get('type', 'Issue')}</strong> — {req_ids}<br/>
+                    {c.get('description', '')}<br/>
+                    <em>Recommendation:</em> {c.get('recommendation', 'N/A')}
+                </div>
+                """, unsafe_allow_html=True)
 
 
 # ===================== MAIN APP =====================
@@ -186,7 +191,11 @@ if st.button("Analyze Requirements", type="primary", use_container_width=True):
     if uploaded_files:
         for f in uploaded_files:
             try:
-                doc_text = extract_text(f.name, f.read())
+                stats = {}
+                with measure_rss(stats), spooled_upload(f) as stream:
+                    doc_text = extract_text(f.name, stream)
+                st.caption(f"{f.name}: parsed in {stats['seconds']}s, peak RSS {stats['peak_rss_mb']:,.0f} MB "
+                           f"(+{stats['peak_growth_mb']:,.0f} MB)")
                 all_text += f"\n\n=== Document: {f.name} ===\n\n{doc_text}"
             except Exception as e:
                 st.error(f"Error reading {f.name}: {e}")
@@ -212,8 +221,13 @@ if st.button("Analyze Requirements", type="primary", use_container_width=True):
     reqs = extraction.get("requirements", [])
     st.session_state["requirements"] = reqs
     st.session_state["extraction"] = extraction
+    st.session_state["requi_index"] = build_requirements_index(all_text, reqs)
 
     st.header("Extracted Requirements")
+    if extraction.get("failed_sections"):
+        st.warning(f"{len(extraction['failed_sections'])} document sections could not be extracted; "
+                   "requirements from them are missing below.")
+        st.dataframe(pd.DataFrame(extraction["failed_sections"]), use_container_width=True, hide_index=True)
     render_extraction_results(extraction)
 
     # Traceability Table
@@ -247,6 +261,11 @@ if st.button("Analyze Requirements", type="primary", use_container_width=True):
                 contradictions = detect_contradictions(reqs, api_key)
                 st.session_state["contradictions"] = contradictions
                 render_contradictions(contradictions)
+                if contradictions.get("failed_clusters"):
+                    st.warning(f"{len(contradictions['failed_clusters'])} requirement clusters could not be "
+                               "checked; conflicts among them are not reported.")
+                    st.dataframe(pd.DataFrame(contradictions["failed_clusters"]), use_container_width=True,
+                                 hide_index=True)
             except Exception as e:
                 st.error(f"Contradiction analysis failed: {e}")
 
@@ -293,6 +312,7 @@ if st.session_state.get("requirements"):
                             st.session_state.get("doc_text", ""),
                             st.session_state["requirements"],
                             api_key,
+                            index=st.session_state.get("requi_index"),
                         )
                         st.markdown(answer)
                         st.session_state["chat_history"].append({"role": "assistant", "content": answer})
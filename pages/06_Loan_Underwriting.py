@@ -2,16 +2,34 @@
 
 import os
 import json
+import time
 import pandas as pd
+import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
+from engines.batch_underwriting import (AI_WORKERS, DECISIONS, MAX_AI_REVIEWS, DecisionRules, batch_summary,
+                                        review_referrals, screen_applications)
+from engines.fair_lending import (AIR_THRESHOLD, analyze_fair_lending, batch_decisions, detect_group_columns,
+                                   disparity_findings)
+from engines.review_queue import RISK_BANDS, ReviewConflictError, ReviewQueue
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_session_table
 from engines.underwriter import analyze_application, calculate_basic_ratios
 
 load_dotenv()
 
 
+@st.cache_resource
+def get_review_queue() -> ReviewQueue:
+    return ReviewQueue()
+
+
+def _age(created_at: float) -> str:
+    hours = (time.time() - created_at) / 3600
+    return f"{hours:.0f}h" if hours < 48 else f"{hours / 24:.0f}d"
+
+
 st.markdown("""
 <style>
     .hero { background: linear-gradient(135deg, #1e3a5f 0%, #2d6a4f 100%);
@@ -48,17 +66,17 @@ with st.sidebar:
     st.markdown("- Bias-free decisions")
     st.markdown("- Human-in-the-loop review")
     st.divider()
-    # Review queue
-    if "review_queue" not in st.session_state:
-        st.session_state["review_queue"] = []
-    queue_count = len([r for r in st.session_state["review_queue"] if r.get("status") == "Pending"])
-    st.metric("Pending Reviews", queue_count)
+    # Review queue (shared across sessions)
+    review_queue = get_review_queue()
+    reviewer = st.text_input("Reviewer", value=os.getenv("USER", ""), help="Used to claim and sign reviews.")
+    st.metric("Pending Reviews", f"{review_queue.count('Pending'):,}")
 
 st.markdown("""<div class="hero"><h1>Loan Underwriting System</h1>
 <p>AI-powered credit assessment with bias guardrails and human-in-the-loop review</p></div>""",
 unsafe_allow_html=True)
 
-tab_apply, tab_review, tab_dashboard = st.tabs(["New Application", "Human Review Queue", "Dashboard"])
+tab_apply, tab_batch, tab_review, tab_fair, tab_dashboard = st.tabs(
+    ["New Application", "Batch Underwriting", "Human Review Queue", "Fair Lending", "Dashboard"])
 
 # ── Application Tab ──
 with tab_apply:
@@ -119,7 +137,7 @@ with tab_apply:
             st.stop()
 
         app_data = dict(
-            app_id=f"APP-{len(st.session_state.get('review_queue', [])) + 1001:04d}",
+            app_id=review_queue.next_app_id(),
             applicant_name=applicant_name, loan_purpose=loan_purpose,
             requested_amount=requested_amount, requested_term=requested_term,
             property_value=property_value, annual_income=annual_income,
@@ -205,27 +223,171 @@ with tab_apply:
                 st.markdown(f"- {r}")
 
         # Add to review queue
-        review_item = {**result, "app_data": app_data, "status": "Pending", "reviewer_notes": ""}
-        st.session_state["review_queue"].append(review_item)
+        review_queue.enqueue(result, app_data)
         st.success(f"Application {app_data['app_id']} added to human review queue.")
 
         st.download_button("Download Analysis (JSON)", json.dumps(result, indent=2),
                            f"underwriting_{app_data['app_id']}.json", "application/json")
 
+# ── Batch Tab ──
+with tab_batch:
+    st.subheader("Batch Underwriting")
+    st.caption("Ratios and rule-based pre-decisions are computed locally for every row; only referred "
+               "files are sent to AI review, then queued for a human reviewer.")
+    batch_file = st.file_uploader("Application file (CSV, XLSX, Parquet)", type=SUPPORTED_TABLE_TYPES,
+                                  key="batch_apps",
+                                  help="Needs requested_amount, requested_term, annual_income, monthly_debts and "
+                                       "credit_score columns; other application fields are optional.")
+    defaults = DecisionRules()
+    with st.form("batch_rules"):
+        st.markdown("**Auto-approve when all of these hold** (and no collections or bankruptcies)")
+        b1, b2, b3, b4, b5 = st.columns(5)
+        approve_score = b1.number_input("Min Credit Score", 300, 850, defaults.approve_min_credit_score)
+        approve_dti = b2.number_input("Max DTI (%)", 0.0, 100.0, defaults.approve_max_dti_pct, step=1.0)
+        approve_ltv = b3.number_input("Max LTV (%)", 0.0, 150.0, defaults.approve_max_ltv_pct, step=1.0)
+        approve_pti = b4.number_input("Max PTI (%)", 0.0, 100.0, defaults.approve_max_pti_pct, step=1.0)
+        approve_late = b5.number_input("Max Late Payments", 0, 20, defaults.approve_max_late_payments)
+        st.markdown("**Auto-decline when any of these hold**")
+        d1, d2, d3, d4, d5 = st.columns(5)
+        decline_score = d1.number_input("Credit Score Below", 300, 850, defaults.decline_min_credit_score)
+        decline_dti = d2.number_input("DTI Above (%)", 0.0, 200.0, defaults.decline_max_dti_pct, step=1.0)
+        decline_ltv = d3.number_input("LTV Above (%)", 0.0, 200.0, defaults.decline_max_ltv_pct, step=1.0)
+        decline_disposable = d4.number_input("Disposable Income Below ($)", -10_000.0, 10_000.0,
+                                             defaults.decline_min_disposable_income, step=100.0)
+        decline_collections = d5.number_input("Collections Above", 0, 20, defaults.decline_max_collections)
+        st.markdown("**AI review of referred files**")
+        e1, e2, e3 = st.columns(3)
+        run_ai = e1.checkbox("Send referred files to AI review", value=bool(api_key))
+        max_reviews = e2.number_input("Max AI Reviews", 1, 5_000, MAX_AI_REVIEWS,
+                                      help="Highest-DTI referrals are reviewed first; the rest stay referred.")
+        workers = e3.slider("Concurrent Reviews", 1, 16, AI_WORKERS)
+        batch_submitted = st.form_submit_button("Screen Applications", type="primary", use_container_width=True)
+
+    if batch_submitted:
+        if batch_file is None:
+            st.error("Upload an application file.")
+            st.stop()
+        rules = DecisionRules(
+            approve_min_credit_score=approve_score, approve_max_dti_pct=approve_dti,
+            approve_max_ltv_pct=approve_ltv, approve_max_pti_pct=approve_pti,
+            approve_max_late_payments=approve_late, decline_min_credit_score=decline_score,
+            decline_max_dti_pct=decline_dti, decline_max_ltv_pct=decline_ltv,
+            decline_min_disposable_income=decline_disposable, decline_max_collections=decline_collections,
+        )
+        try:
+            table = load_session_table(st.session_state, batch_file.name, batch_file, batch_file.size)
+            screened = screen_applications(table, rules)
+        except Exception as e:
+            st.error(f"Could not screen application file: {e}")
+            st.stop()
+
+        referred_count = int((screened["pre_decision"] == "Refer").sum())
+        if run_ai and referred_count:
+            if not api_key:
+                st.error("API key required for AI review of referred files.")
+                st.stop()
+            total_reviews = min(referred_count, max_reviews)
+            progress = st.progress(0.0, text=f"AI review of {total_reviews:,} referred files...")
+
+            def _on_review(done, total, result):
+                progress.progress(done / total, text=f"Reviewed {done:,} of {total:,} referred files "
+                                                     f"(latest: {result['app_data']['app_id']})")
+
+            screened = review_referrals(screened, api_key, max_reviews, workers, on_result=_on_review)
+            progress.empty()
+            reviewed_ok = [r for r in screened.attrs["ai_results"].values() if "error" not in r]
+            review_queue.enqueue_many([(r, r["app_data"]) for r in reviewed_ok])
+        st.session_state["batch_results"] = {"screened": screened, "rules": rules}
+
+    batch = st.session_state.get("batch_results")
+    if batch:
+        screened = batch["screened"]
+        summary = batch_summary(screened)
+        st.divider()
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Applications", f"{summary['applications']:,}")
+        m2.metric("Auto-Approve", f"{summary['Auto-Approve']:,}")
+        m3.metric("Auto-Decline", f"{summary['Auto-Decline']:,}")
+        m4.metric("Referred", f"{summary['Refer']:,}")
+        m5.metric("Auto-Decided", f"{summary['auto_decided_pct']}%")
+
+        ai_results = screened.attrs.get("ai_results", {})
+        if ai_results:
+            failed = sum("error" in r for r in ai_results.values())
+            st.success(f"{len(ai_results) - failed:,} referred files reviewed by AI and added to the human review queue.")
+            if failed:
+                st.warning(f"{failed:,} AI reviews failed; those files remain referred.")
+
+        colors = {"Auto-Approve": "#28a745", "Refer": "#17a2b8", "Auto-Decline": "#dc3545"}
+        c1, c2 = st.columns(2)
+        with c1:
+            fig = go.Figure(go.Pie(labels=DECISIONS, values=[summary[d] for d in DECISIONS],
+                                   marker=dict(colors=[colors[d] for d in DECISIONS]), hole=0.4))
+            fig.update_layout(title="Pre-Decision Distribution", height=350)
+            st.plotly_chart(fig, use_container_width=True)
+        with c2:
+            sample = screened.sample(min(len(screened), 20_000), random_state=0)
+            fig2 = px.histogram(sample, x=sample["dti_pct"].clip(upper=100), color="pre_decision",
+                                color_discrete_map=colors, nbins=50, category_orders={"pre_decision": DECISIONS})
+            fig2.update_layout(title="DTI by Pre-Decision", height=350, xaxis_title="DTI (%)",
+                               yaxis_title="Applications", legend_title="")
+            st.plotly_chart(fig2, use_container_width=True)
+
+        reasons = (screened.loc[screened["pre_decision"] != "Auto-Approve", "decision_reasons"]
+                   .str.split("; ").explode().value_counts().head(10))
+        if not reasons.empty:
+            fig3 = go.Figure(go.Bar(x=reasons.values[::-1], y=reasons.index[::-1], orientation="h",
+                                    marker_color="#667eea"))
+            fig3.update_layout(title="Most Common Decline / Referral Reasons", height=350,
+                               xaxis_title="Applications")
+            st.plotly_chart(fig3, use_container_width=True)
+
+        view = st.selectbox("Show", ["Referred", "Auto-Decline", "Auto-Approve", "All"], key="batch_view")
+        shown = screened if view == "All" else screened[screened["pre_decision"] == view.replace("Referred", "Refer")]
+        columns = [c for c in ["app_id", "applicant_name", "requested_amount", "credit_score", "monthly_payment_est",
+                               "dti_pct", "ltv_pct", "pti_pct", "disposable_after_payment", "pre_decision",
+                               "decision_reasons", "ai_decision", "ai_risk", "ai_confidence"] if c in shown.columns]
+        st.dataframe(shown[columns].head(1_000), use_container_width=True, hide_index=True)
+        if len(shown) > 1_000:
+            st.caption(f"Showing the first 1,000 of {len(shown):,} rows; download for the full file.")
+        st.download_button("Download Pre-Decisions (CSV)", screened.to_csv(index=False),
+                           "batch_underwriting.csv", "text/csv")
+        st.caption(f"Rules: {batch['rules'].describe()}")
+
 # ── Review Tab ──
 with tab_review:
     st.subheader("Human Review Queue")
-    queue = st.session_state.get("review_queue", [])
-    pending = [r for r in queue if r.get("status") == "Pending"]
+    f1, f2, f3 = st.columns(3)
+    band_filter = f1.selectbox("Risk Band", ["All"] + RISK_BANDS, key="rq_band")
+    assignment = f2.selectbox("Assignment", ["All", "Unassigned", "Mine"], key="rq_assignment")
+    order = f3.selectbox("Order", ["Oldest first", "Newest first"], key="rq_order")
+    filters = dict(band=None if band_filter == "All" else band_filter,
+                   assignee=reviewer if assignment == "Mine" else None,
+                   unassigned=assignment == "Unassigned", newest_first=order == "Newest first")
+
+    # Keyset pagination: remember the cursor of every page visited under the current filters.
+    if st.session_state.get("rq_filters") != filters:
+        st.session_state["rq_filters"] = filters
+        st.session_state["rq_cursors"] = [None]
+    cursors = st.session_state["rq_cursors"]
+    pending, next_cursor = review_queue.page("Pending", after=cursors[-1], **filters)
+
+    by_band = review_queue.counts().get("Pending", {})
+    st.caption(f"{review_queue.count('Pending'):,} pending — "
+               + ", ".join(f"{band}: {by_band.get(band, 0):,}" for band in RISK_BANDS)
+               + f" | page {len(cursors)}")
 
     if not pending:
         st.info("No applications pending review.")
     else:
-        for i, item in enumerate(pending):
+        for item in pending:
             app = item.get("app_data", {})
+            item_id = item["id"]
+            owner = f" | {item['assignee']}" if item.get("assignee") else ""
             with st.expander(f"{app.get('app_id', 'N/A')} — {app.get('applicant_name', '')} | "
                            f"AI Decision: {item.get('preliminary_decision', 'N/A')} | "
-                           f"${app.get('requested_amount', 0):,.0f} {app.get('loan_purpose', '')}"):
+                           f"${app.get('requested_amount', 0):,.0f} {app.get('loan_purpose', '')} | "
+                           f"{_age(item['created_at'])} old{owner}"):
                 st.markdown(f"**Risk:** {item.get('risk_classification', '')} | "
                           f"**Credit Score:** {app.get('credit_score', '')} | "
                           f"**Confidence:** {item.get('confidence', 0)}%")
@@ -235,22 +397,38 @@ with tab_review:
                 with col_a:
                     final_decision = st.selectbox("Final Decision",
                         ["Approve", "Conditional Approve", "Deny"],
-                        key=f"dec_{i}")
+                        key=f"dec_{item_id}")
+                    if item.get("assignee") != reviewer and reviewer and st.button("Claim", key=f"claim_{item_id}"):
+                        try:
+                            review_queue.claim(item_id, item["version"], reviewer)
+                        except ReviewConflictError as e:
+                            st.warning(str(e))
+                        else:
+                            st.rerun()
                 with col_b:
-                    notes = st.text_area("Reviewer Notes", key=f"notes_{i}", height=80)
-
-                if st.button("Submit Review", key=f"submit_{i}"):
-                    idx = queue.index(item)
-                    queue[idx]["status"] = "Reviewed"
-                    queue[idx]["final_decision"] = final_decision
-                    queue[idx]["reviewer_notes"] = notes
-                    st.success(f"Review submitted: {final_decision}")
-                    st.rerun()
-
-    reviewed = [r for r in queue if r.get("status") == "Reviewed"]
+                    notes = st.text_area("Reviewer Notes", key=f"notes_{item_id}", height=80)
+
+                if st.button("Submit Review", key=f"submit_{item_id}"):
+                    try:
+                        review_queue.submit_review(item_id, item["version"], final_decision, notes, reviewer)
+                    except ReviewConflictError as e:
+                        st.warning(str(e))
+                    else:
+                        st.success(f"Review submitted: {final_decision}")
+                        st.rerun()
+
+    p1, p2, p3 = st.columns([1, 1, 4])
+    if len(cursors) > 1 and p1.button("Previous Page", key="rq_prev"):
+        cursors.pop()
+        st.rerun()
+    if next_cursor and p2.button("Next Page", key="rq_next"):
+        cursors.append(next_cursor)
+        st.rerun()
+
+    reviewed, _ = review_queue.page("Reviewed", newest_first=True, limit=200)
     if reviewed:
         st.divider()
-        st.subheader("Reviewed Applications")
+        st.subheader("Recently Reviewed Applications")
         rows = []
         for r in reviewed:
             app = r.get("app_data", {})
@@ -261,37 +439,131 @@ with tab_review:
                 "AI Decision": r.get("preliminary_decision", ""),
                 "Final Decision": r.get("final_decision", ""),
                 "Credit Score": app.get("credit_score", ""),
+                "Reviewer": r.get("assignee") or "",
                 "Reviewer Notes": r.get("reviewer_notes", ""),
             })
         st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
 
+# ── Fair Lending Tab ──
+with tab_fair:
+    st.subheader("Fair Lending Analytics")
+    st.caption("Approval-rate disparities, adverse impact ratios, matched-pair comparisons and regression-adjusted "
+               "gaps by protected-class proxy columns (e.g. race_proxy, sex, age_group) carried in batch files. "
+               "These fields are used for monitoring only and never reach the rules or the model.")
+    sources = ["Latest batch", "Review queue"] if st.session_state.get("batch_results") else ["Review queue"]
+    source = st.radio("Decision history", sources, horizontal=True, key="fl_source")
+    if source == "Latest batch":
+        screened = st.session_state["batch_results"]["screened"]
+        history = screened.assign(decision=batch_decisions(screened))
+        snapshot = None
+    else:
+        # Loading the whole queue is the slow part, so do it on request and reuse it until the queue changes.
+        snapshot = review_queue.snapshot()
+        loaded = st.session_state.get("fl_queue_history")
+        history = loaded["history"] if loaded and loaded["snapshot"] == snapshot else None
+        if history is None and st.button("Load Review Queue Decisions", disabled=not review_queue.count()):
+            queue_frame = review_queue.decision_frame()
+            history = screen_applications(queue_frame).assign(decision=queue_frame["decision"].to_numpy())
+            st.session_state["fl_queue_history"] = {"snapshot": snapshot, "history": history}
+
+    detected = detect_group_columns(history.columns) if history is not None else []
+    if history is None:
+        st.info("Load the review queue's decision history to analyze it.")
+    elif not detected:
+        st.info("No protected-class proxy columns found in this decision history. Include columns such as "
+                "race_proxy, ethnicity, sex or age_group in the batch file to monitor them.")
+    else:
+        with st.form("fair_lending"):
+            group_cols = st.multiselect("Protected-Class Columns", detected, default=detected)
+            fl_submitted = st.form_submit_button("Run Disparity Analysis", type="primary", use_container_width=True)
+        if fl_submitted:
+            with st.spinner(f"Analyzing {len(history):,} decisions..."):
+                st.session_state["fair_lending"] = analyze_fair_lending(history, group_cols, snapshot=snapshot)
+
+    fair = st.session_state.get("fair_lending")
+    if fair and detected:
+        f1, f2, f3 = st.columns(3)
+        f1.metric("Decided Files", f"{fair['decided']:,}")
+        f2.metric("Undecided (Referred / Pending)", f"{fair['undecided']:,}")
+        f3.metric("Controls", ", ".join(fair["controls"]) or "none")
+        findings = disparity_findings(fair)
+        if findings:
+            st.error("**Potential disparities to investigate:**\n" + "\n".join(f"- {f}" for f in findings))
+        elif not fair["groups"]:
+            st.info("No approved or denied files with a recorded group value yet, so there is nothing to compare.")
+        else:
+            st.success("No adverse impact or significant adjusted disparity detected.")
+
+        for col, analysis in fair["groups"].items():
+            st.divider()
+            st.markdown(f"### {col} (reference: {analysis['reference']})")
+            rates = analysis["rates"]
+            a1, a2 = st.columns(2)
+            with a1:
+                fig = go.Figure(go.Bar(
+                    x=rates[col], y=rates["adverse_impact_ratio"],
+                    marker_color=["#dc3545" if v < AIR_THRESHOLD else "#28a745" for v in rates["adverse_impact_ratio"]],
+                    text=[f"{v:.0%}" for v in rates["approval_rate"]], textposition="outside",
+                ))
+                fig.add_hline(y=AIR_THRESHOLD, line_dash="dash", annotation_text="4/5 rule")
+                fig.update_layout(title="Adverse Impact Ratio (bar label: approval rate)", height=350,
+                                  yaxis_title="AIR", yaxis_range=[0, max(1.1, rates["adverse_impact_ratio"].max() * 1.15)])
+                st.plotly_chart(fig, use_container_width=True)
+            with a2:
+                adjusted = analysis["adjusted"]
+                matched = analysis["matched"]
+                if not adjusted.empty:
+                    fig2 = go.Figure()
+                    fig2.add_trace(go.Bar(x=rates.loc[~rates["reference"], col],
+                                          y=rates.loc[~rates["reference"], "difference_pp"],
+                                          name="Raw", marker_color="#adb5bd"))
+                    if not matched.empty:
+                        fig2.add_trace(go.Bar(x=matched[col], y=matched["matched_difference_pp"],
+                                              name="Matched pairs", marker_color="#17a2b8"))
+                    fig2.add_trace(go.Bar(
+                        x=adjusted[col], y=adjusted["adjusted_difference_pp"], name="Regression-adjusted",
+                        marker_color="#667eea",
+                        error_y=dict(type="data", symmetric=False,
+                                     array=adjusted["ci_high_pp"] - adjusted["adjusted_difference_pp"],
+                                     arrayminus=adjusted["adjusted_difference_pp"] - adjusted["ci_low_pp"]),
+                    ))
+                    fig2.update_layout(title="Approval Gap vs Reference (pp)", barmode="group", height=350,
+                                       yaxis_title="Percentage points")
+                    st.plotly_chart(fig2, use_container_width=True)
+            st.dataframe(rates, use_container_width=True, hide_index=True)
+            if not matched.empty:
+                st.dataframe(matched, use_container_width=True, hide_index=True)
+            if not analysis["adjusted"].empty:
+                st.dataframe(analysis["adjusted"], use_container_width=True, hide_index=True)
+            if not analysis["examples"].empty:
+                with st.expander(f"Matched-pair examples ({len(analysis['examples'])}) — denied applicant vs "
+                                 f"approved {analysis['reference']} applicant with a similar credit profile"):
+                    st.dataframe(analysis["examples"], use_container_width=True, hide_index=True)
+            st.download_button(f"Download {col} Disparities (CSV)",
+                               rates.merge(analysis["adjusted"].drop(columns="reference"), on=col, how="left")
+                               .to_csv(index=False), f"fair_lending_{col}.csv", "text/csv", key=f"fl_dl_{col}")
+
 # ── Dashboard Tab ──
 with tab_dashboard:
     st.subheader("Underwriting Dashboard")
-    queue = st.session_state.get("review_queue", [])
+    total = review_queue.count()
 
-    if not queue:
+    if not total:
         st.info("No applications processed yet. Submit an application to see dashboard metrics.")
     else:
         # Summary metrics
-        total = len(queue)
-        reviewed = [r for r in queue if r.get("status") == "Reviewed"]
-        pending_count = total - len(reviewed)
+        reviewed_count = review_queue.count("Reviewed")
+        stats = review_queue.dashboard()
 
         m1, m2, m3, m4 = st.columns(4)
-        m1.metric("Total Applications", total)
-        m2.metric("Reviewed", len(reviewed))
-        m3.metric("Pending", pending_count)
+        m1.metric("Total Applications", f"{total:,}")
+        m2.metric("Reviewed", f"{reviewed_count:,}")
+        m3.metric("Pending", f"{total - reviewed_count:,}")
 
         # AI decision distribution
-        decisions = {}
-        for r in queue:
-            d = r.get("preliminary_decision", "Unknown")
-            decisions[d] = decisions.get(d, 0) + 1
-
+        decisions = stats["decisions"]
         if decisions:
-            avg_confidence = sum(r.get("confidence", 0) for r in queue) / total
-            m4.metric("Avg Confidence", f"{avg_confidence:.0f}%")
+            m4.metric("Avg Confidence", f"{stats['avg_confidence']:.0f}%")
 
             colors = {"Approve": "#28a745", "Conditional Approve": "#ffc107",
                       "Refer to Human": "#17a2b8", "Deny": "#dc3545"}
@@ -304,9 +576,10 @@ with tab_dashboard:
             st.plotly_chart(fig, use_container_width=True)
 
         # Credit score distribution
-        scores = [r.get("app_data", {}).get("credit_score", 0) for r in queue if r.get("app_data")]
-        if scores:
-            fig2 = go.Figure(go.Histogram(x=scores, nbinsx=10, marker_color="#667eea"))
+        buckets = stats["credit_score_buckets"]
+        if buckets:
+            fig2 = go.Figure(go.Bar(x=[b + 12.5 for b in buckets], y=list(buckets.values()),
+                                    width=24, marker_color="#667eea"))
             fig2.update_layout(title="Credit Score Distribution", height=300,
                              xaxis_title="Credit Score", yaxis_title="Count")
             st.plotly_chart(fig2, use_container_width=True)
@@ -7,8 +7,12 @@ import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
-from engines.audit_doc_parser import extract_text
+from engines.audit_doc_parser import extract_pages, extract_text
 from engines.auditor import run_audit
+from engines.control_tests import CONTROL_LABELS
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_uploaded_table
+from engines.upload_store import measure_rss, spooled_upload
+from engines.text_normalizer import normalize_documents
 
 load_dotenv()
 
@@ -78,6 +82,8 @@ with pc2:
                                        accept_multiple_files=True, key="logs")
     activity_text_input = st.text_area("Or paste log data", height=120,
                                         placeholder="Paste activity logs...", key="log_paste")
+    gl_file = st.file_uploader("Or upload a GL / expense export (CSV, XLSX, Parquet)",
+                               type=SUPPORTED_TABLE_TYPES, key="gl_export")
 
 if st.button("Run Compliance Audit", type="primary", use_container_width=True):
     if not api_key:
@@ -85,25 +91,44 @@ if st.button("Run Compliance Audit", type="primary", use_container_width=True):
         st.stop()
 
     # Gather texts
-    policy_text = ""
+    policy_docs = []
     for f in (policy_files or []):
         try:
-            policy_text += f"\n\n=== {f.name} ===\n" + extract_text(f.name, f.read())
+            stats = {}
+            with measure_rss(stats), spooled_upload(f) as stream:
+                policy_docs.append((f.name, extract_pages(f.name, stream)))
+            st.caption(f"{f.name}: parsed in {stats['seconds']}s, peak RSS {stats['peak_rss_mb']:,.0f} MB "
+                       f"(+{stats['peak_growth_mb']:,.0f} MB)")
         except Exception as e:
             st.error(f"Error reading {f.name}: {e}")
     if policy_text_input.strip():
-        policy_text += "\n\n=== Pasted Policy ===\n" + policy_text_input.strip()
+        policy_docs.append(("Pasted Policy", policy_text_input.strip().split("\f")))
+    policy_docs, normalization_report = normalize_documents(policy_docs)
+    policy_text = "".join(f"\n\n=== {name} ===\n{text}" for name, text in policy_docs)
+    saved = sum(r["tokens_saved"] for r in normalization_report)
+    if saved > 0:
+        with st.expander(f"Normalization removed ~{saved:,} tokens of repeated headers, footers, and boilerplate"):
+            st.dataframe(pd.DataFrame(normalization_report), use_container_width=True, hide_index=True)
 
     activity_text = ""
     for f in (activity_files or []):
         try:
-            activity_text += f"\n\n=== {f.name} ===\n" + extract_text(f.name, f.read())
+            stats = {}
+            with measure_rss(stats), spooled_upload(f) as stream:
+                activity_text += f"\n\n=== {f.name} ===\n" + extract_text(f.name, stream)
+            st.caption(f"{f.name}: parsed in {stats['seconds']}s, peak RSS {stats['peak_rss_mb']:,.0f} MB "
+                       f"(+{stats['peak_growth_mb']:,.0f} MB)")
         except Exception as e:
             st.error(f"Error reading {f.name}: {e}")
     if activity_text_input.strip():
         activity_text += "\n\n=== Pasted Logs ===\n" + activity_text_input.strip()
 
-    if not policy_text and not activity_text:
+    gl_table = None
+    if gl_file is not None:
+        gl_table = load_uploaded_table(st, gl_file)
+        st.caption(f"Loaded {len(gl_table):,} GL records from {gl_file.name}.")
+
+    if not policy_text and not activity_text and gl_table is None:
         st.error("Please upload or paste at least one document.")
         st.stop()
 
@@ -117,7 +142,7 @@ if st.button("Run Compliance Audit", type="primary", use_container_width=True):
 
     with st.spinner("Running compliance audit — scanning for violations..."):
         try:
-            result = run_audit(config, api_key)
+            result = run_audit(config, api_key, activity=gl_table)
         except Exception as e:
             st.error(f"Audit failed: {e}")
             st.stop()
@@ -149,6 +174,31 @@ if st.button("Run Compliance Audit", type="primary", use_container_width=True):
     m3.metric("Areas Audited", len(summary.get("areas_audited", [])))
     m4.metric("Frameworks Checked", len(frameworks))
 
+    # Local control tests
+    controls = result.get("control_summary")
+    if controls:
+        st.divider()
+        st.subheader("Control Tests")
+        k1, k2, k3 = st.columns(3)
+        k1.metric("Records Tested", f"{controls['records_tested']:,}")
+        k2.metric("Amount Tested", f"${controls['total_amount']:,.0f}")
+        k3.metric("Exceptions", f"{controls['exceptions']:,}",
+                  delta=f"${controls['exception_amount']:,.0f} affected", delta_color="inverse")
+        hits = {CONTROL_LABELS[k]: v for k, v in controls["control_hits"].items() if v}
+        if hits:
+            fig_ct = go.Figure(go.Bar(x=list(hits.values()), y=list(hits.keys()), orientation="h",
+                                      marker_color="#0f3460"))
+            fig_ct.update_layout(title="Exceptions by Control", height=300)
+            st.plotly_chart(fig_ct, use_container_width=True)
+        exceptions_df = pd.DataFrame(result.get("control_exceptions", []))
+        if not exceptions_df.empty:
+            with st.expander(f"Control exceptions ({len(exceptions_df):,})"):
+                st.dataframe(exceptions_df[["ref", "date", "person", "amount", "vendor", "category",
+                                            "approver_title", "approver_name", "controls", "severity"]],
+                             use_container_width=True, hide_index=True)
+                st.download_button("Download Control Exceptions (CSV)", exceptions_df.to_csv(index=False),
+                                   "control_exceptions.csv", "text/csv")
+
     # Severity distribution
     sev_counts = {}
     cat_counts = {}
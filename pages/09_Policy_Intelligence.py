@@ -7,8 +7,10 @@ import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
-from engines.policy_doc_parser import extract_text
+from engines.policy_doc_parser import extract_pages
 from engines.policy_analyzer import analyze_policies
+from engines.upload_store import measure_rss, spooled_upload
+from engines.text_normalizer import normalize_documents
 
 load_dotenv()
 
@@ -60,14 +62,24 @@ if st.button("Analyze Policies", type="primary", use_container_width=True):
         st.error("API key required.")
         st.stop()
 
-    policy_text = ""
+    policy_docs = []
     for f in (uploaded or []):
         try:
-            policy_text += f"\n\n=== {f.name} ===\n" + extract_text(f.name, f.read())
+            stats = {}
+            with measure_rss(stats), spooled_upload(f) as stream:
+                policy_docs.append((f.name, extract_pages(f.name, stream)))
+            st.caption(f"{f.name}: parsed in {stats['seconds']}s, peak RSS {stats['peak_rss_mb']:,.0f} MB "
+                       f"(+{stats['peak_growth_mb']:,.0f} MB)")
         except Exception as e:
             st.error(f"Error: {e}")
     if paste.strip():
-        policy_text += "\n\n" + paste.strip()
+        policy_docs.append(("Pasted Policy", paste.strip().split("\f")))
+    policy_docs, normalization_report = normalize_documents(policy_docs)
+    policy_text = "".join(f"\n\n=== {name} ===\n{text}" for name, text in policy_docs)
+    saved = sum(r["tokens_saved"] for r in normalization_report)
+    if saved > 0:
+        with st.expander(f"Normalization removed ~{saved:,} tokens of repeated headers, footers, and boilerplate"):
+            st.dataframe(pd.DataFrame(normalization_report), use_container_width=True, hide_index=True)
 
     if not policy_text.strip():
         st.error("Upload or paste policy documents.")
@@ -8,9 +8,12 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from engines.billing_engine import review_billing
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_uploaded_table
 
 load_dotenv()
 
+MAX_FLAG_CARDS = 50
+
 
 st.markdown("""
 <style>
@@ -61,6 +64,8 @@ with st.form("billing_form"):
         st.subheader("Billing Log")
         billing_log = st.text_area("Paste billing entries (date, attorney, hours, description)",
                                     value=sample_log, height=250)
+        billing_file = st.file_uploader("Or upload a billing export (CSV, XLSX, Parquet)",
+                                        type=SUPPORTED_TABLE_TYPES)
 
     context = st.text_input("Review Context",
         value="Monthly pre-bill review for January 2025. Focus on vague descriptions and excessive hours.")
@@ -71,6 +76,11 @@ if submitted:
     if not api_key:
         st.error("API key required.")
         st.stop()
+    billing_table = None
+    if billing_file is not None:
+        billing_table = load_uploaded_table(st, billing_file)
+        st.caption(f"Loaded {len(billing_table):,} billing entries from {billing_file.name}.")
+        billing_log = billing_file.name
     if not guidelines.strip() or not billing_log.strip():
         st.error("Both guidelines and billing log are required.")
         st.stop()
@@ -79,10 +89,11 @@ if submitted:
 
     with st.spinner("Reviewing billing entries for compliance..."):
         try:
-            result = review_billing(config, api_key)
+            result = review_billing(config, api_key, entries=billing_table)
         except Exception as e:
             st.error(f"Review failed: {e}")
             st.stop()
+    local_flagged = result.pop("local_flagged", None)
 
     # Summary metrics
     summary = result.get("summary", {})
@@ -95,6 +106,11 @@ if submitted:
               delta=f"-${summary.get('estimated_write_off', 0):,.0f} at risk",
               delta_color="inverse")
 
+    rule_hits = result.get("rule_hits", {})
+    if rule_hits:
+        st.caption("Rule checks over all entries: " + " · ".join(
+            f"{rule.replace('_', ' ')}: {count:,}" for rule, count in rule_hits.items() if count))
+
     # Violation breakdown chart
     flagged = result.get("flagged_items", [])
     if flagged:
@@ -129,7 +145,9 @@ if submitted:
     if flagged:
         st.divider()
         st.subheader(f"Flagged Entries ({len(flagged)})")
-        for item in flagged:
+        if len(flagged) > MAX_FLAG_CARDS:
+            st.caption(f"Showing the first {MAX_FLAG_CARDS} of {len(flagged)}; all are in the JSON report.")
+        for item in flagged[:MAX_FLAG_CARDS]:
             sev = item.get("severity", "Medium")
             sev_cls = "sev-high" if sev == "High" else "sev-low" if sev == "Low" else "sev-med"
             sev_emoji = "🔴" if sev == "High" else "🟡" if sev == "Medium" else "🟢"
@@ -146,6 +164,14 @@ if submitted:
                 </div>
             </div>""", unsafe_allow_html=True)
 
+    if local_flagged is not None and len(local_flagged):
+        st.divider()
+        st.subheader(f"Other Flagged Entries ({len(local_flagged):,})")
+        st.caption("Flagged by the local rule checks only, largest amounts first; no AI rewrite.")
+        st.dataframe(local_flagged, use_container_width=True, hide_index=True)
+        st.download_button("Download Other Flagged Entries (CSV)", local_flagged.to_csv(index=False),
+                           "billing_flagged_entries.csv", "text/csv")
+
     # Attorney Summary
     attorneys = result.get("attorney_summary", [])
     if attorneys:
@@ -7,7 +7,10 @@ import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
+from engines.price_optimizer import (PricingConstraints, apply_competitor_matrix, fit_elasticities, normalize_catalog,
+                                     optimization_summary, optimize_prices, parse_catalog_text, parse_margin_target)
 from engines.retail_pricing_engine import analyze_pricing
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_session_table, load_uploaded_table, summarize_table
 
 load_dotenv()
 
@@ -83,10 +86,33 @@ with st.form("pricing_form"):
     with c1:
         product_catalog = st.text_area("Product Catalog (name, price, cost, units, category)",
                                         value=SAMPLE_CATALOG, height=200)
+        catalog_file = st.file_uploader("Or upload a catalog export (CSV, XLSX, Parquet)",
+                                        type=SUPPORTED_TABLE_TYPES)
     with c2:
         competitor_data = st.text_area("Competitor Pricing Data",
                                         value=SAMPLE_COMPETITORS, height=200)
 
+    st.divider()
+    st.subheader("Price Optimizer")
+    st.caption("Prices are computed locally from per-product elasticities under these limits; "
+               "the AI explains them rather than inventing its own.")
+    o1, o2, o3 = st.columns(3)
+    with o1:
+        run_optimizer = st.checkbox("Compute optimal prices", value=True)
+        revenue_weight = st.slider("Revenue vs Margin", 0.0, 1.0, 0.0, step=0.1,
+                                   help="0 = maximize gross profit, 1 = maximize revenue")
+    with o2:
+        max_change = st.number_input("Max Price Change (%)", 0.0, 100.0, 15.0, step=1.0)
+        ladder_gap = st.number_input("Price Ladder Gap (%)", 0.0, 50.0, 0.0, step=1.0,
+                                     help="> 0 keeps products with ladder_group / ladder_rank columns (in an "
+                                          "upload) in ladder order, at least this far apart")
+    with o3:
+        below_comp = st.number_input("Max Below Cheapest Competitor (%)", 0.0, 100.0, 10.0, step=1.0)
+        above_comp = st.number_input("Max Above Dearest Competitor (%)", 0.0, 100.0, 5.0, step=1.0)
+    history_file = st.file_uploader("Optional price history for elasticity fitting (product, price, units)",
+                                    type=SUPPORTED_TABLE_TYPES, key="price_history",
+                                    help="Without history, catalog elasticity columns are used, else a default.")
+
     market_conditions = st.text_input("Market Conditions",
         value="Summer season approaching. Inflation at 3.2%. Health-conscious trend growing. "
               "New Whole Foods opening 2 miles away next month.")
@@ -97,8 +123,67 @@ with st.form("pricing_form"):
                                        type="primary", use_container_width=True)
 
 if submitted:
+    product_catalog_table = None
+    if catalog_file is not None:
+        product_catalog_table = load_uploaded_table(st, catalog_file)
+        st.caption(f"Loaded {len(product_catalog_table):,} products from {catalog_file.name}.")
+        product_catalog = summarize_table(product_catalog_table, catalog_file.name)
+
+    priced, constraints = None, None
+    if run_optimizer:
+        constraints = PricingConstraints(
+            min_margin_pct=parse_margin_target(target_margin), max_change_pct=max_change,
+            below_competitor_pct=below_comp, above_competitor_pct=above_comp,
+            ladder_gap_pct=ladder_gap, revenue_weight=revenue_weight,
+        )
+        try:
+            catalog = normalize_catalog(product_catalog_table if product_catalog_table is not None
+                                        else parse_catalog_text(product_catalog,
+                                                                ["product", "price", "cost", "units", "category"]))
+            catalog = apply_competitor_matrix(catalog, competitor_data)
+            elasticities = None
+            if history_file is not None:
+                elasticities = fit_elasticities(
+                    load_session_table(st.session_state, history_file.name, history_file, history_file.size))
+            priced = optimize_prices(catalog, constraints, elasticities)
+        except Exception as e:
+            st.warning(f"Price optimizer skipped: {e}")
+
+    if priced is not None:
+        summary = optimization_summary(priced)
+        st.subheader("Optimized Prices")
+        st.caption(f"Min margin {constraints.min_margin_pct:g}% (from target margin), max change "
+                   f"±{constraints.max_change_pct:g}%, competitor band -{constraints.below_competitor_pct:g}% / "
+                   f"+{constraints.above_competitor_pct:g}%.")
+        op1, op2, op3, op4 = st.columns(4)
+        op1.metric("Products Priced", f"{summary['skus']:,}",
+                   help=f"{summary['price_increases']:,} up, {summary['price_decreases']:,} down")
+        op2.metric("Monthly Revenue", f"${summary['expected_revenue']:,.0f}", delta=f"{summary['revenue_change_pct']:+.1f}%")
+        op3.metric("Monthly Gross Profit", f"${summary['expected_profit']:,.0f}",
+                   delta=f"{summary['profit_change_pct']:+.1f}%")
+        op4.metric("Gross Margin", f"{summary['expected_margin_pct']}%",
+                   delta=f"{summary['expected_margin_pct'] - summary['current_margin_pct']:+.1f} pts")
+        if summary["conflicts"]:
+            st.warning(f"{len(summary['conflicts']):,} products kept their current price: their margin floor is above "
+                       f"the max-change or competitor cap, so no price meets every constraint — "
+                       f"{', '.join(summary['conflicts'][:10])}{' ...' if len(summary['conflicts']) > 10 else ''}. "
+                       "Relax one of the constraints to reprice them.")
+        fig_bind = go.Figure(go.Bar(x=list(summary["binding"].values()), y=list(summary["binding"].keys()),
+                                    orientation="h", marker_color="#e91e63"))
+        fig_bind.update_layout(title="What Sets Each Price", height=250, xaxis_title="Products")
+        st.plotly_chart(fig_bind, use_container_width=True)
+        st.dataframe(priced[["product", "category", "price", "cost", "recommended_price", "price_change_pct",
+                             "elasticity", "elasticity_source", "competitor_min", "competitor_max",
+                             "binding_constraint", "expected_margin_pct", "expected_units"]],
+                     use_container_width=True, hide_index=True)
+        st.download_button("Download Optimized Prices (CSV)", priced.to_csv(index=False),
+                           "optimized_prices.csv", "text/csv")
+
     if not api_key:
-        st.error("API key required.")
+        if priced is None:
+            st.error("API key required.")
+        else:
+            st.info("Add an Anthropic API key for the AI pricing strategy and promotion plan.")
         st.stop()
 
     config = dict(
@@ -110,7 +195,7 @@ if submitted:
 
     with st.spinner("Analyzing pricing and generating strategy..."):
         try:
-            result = analyze_pricing(config, api_key)
+            result = analyze_pricing(config, api_key, priced, constraints)
         except Exception as e:
             st.error(f"Analysis failed: {e}")
             st.stop()
@@ -2,12 +2,14 @@
 
 import os
 import json
+import time
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
-from engines.triage_engine import triage_incident
+from engines.alert_tail import ALERT_LOG_DIR, FileTail, LiveTriageSession, StreamTail, resolve_log_path
+from engines.triage_engine import retriage_incident, triage_clusters, triage_incident
 
 load_dotenv()
 
@@ -50,50 +52,9 @@ try:
 except FileNotFoundError:
     pass
 
-with st.form("triage_form"):
-    alerts = st.text_area("Alerts, Logs & Error Traces",
-                           value=sample_alerts, height=250,
-                           placeholder="Paste alerts from Datadog, PagerDuty, CloudWatch, Sentry, etc.")
-
-    c1, c2 = st.columns(2)
-    with c1:
-        environment = st.selectbox("Environment",
-            ["Production", "Staging", "Development", "DR / Failover"])
-        architecture = st.text_input("Architecture Overview",
-            value="Microservices on AWS EKS. PostgreSQL RDS primary + 2 read replicas. "
-                  "Redis cache cluster. ALB load balancer. Services: payment-service, "
-                  "inventory-service, user-service, notification-service.")
-    with c2:
-        recent_changes = st.text_area("Recent Changes (deploys, config, infra)",
-            value="- 2025-01-14 23:45 - Deployed payment-service v2.4.1 (new connection pool config)\n"
-                  "- 2025-01-14 22:00 - RDS parameter group updated (max_connections: 150 -> 200)\n"
-                  "- 2025-01-13 - Added 2 new read replicas for inventory-service",
-            height=100)
-        oncall_team = st.text_input("On-call Team",
-            value="Platform Engineering (primary), Database Team (secondary)")
-
-    context = st.text_input("Additional Context",
-        value="This is peak transaction hour (2-3 AM UTC = evening US East). ~5,000 transactions/min.")
-
-    submitted = st.form_submit_button("Triage Incident", type="primary", use_container_width=True)
-
-if submitted:
-    if not api_key:
-        st.error("API key required.")
-        st.stop()
-
-    config = dict(
-        alerts=alerts, environment=environment, architecture=architecture,
-        recent_changes=recent_changes, oncall_team=oncall_team, context=context,
-    )
-
-    with st.spinner("Analyzing alerts and correlating signals..."):
-        try:
-            result = triage_incident(config, api_key)
-        except Exception as e:
-            st.error(f"Triage failed: {e}")
-            st.stop()
 
+def show_triage(result: dict):
+    """Render a triage result (one-shot or the latest live re-triage)."""
     # Incident Summary
     inc = result.get("incident_summary", {})
     sev = inc.get("severity", "SEV3")
@@ -107,6 +68,23 @@ if submitted:
         <strong>Affected:</strong> {', '.join(inc.get('affected_services', []))}
     </div>""", unsafe_allow_html=True)
 
+    # Local alert clusters
+    clusters = result.get("alert_clusters", [])
+    if clusters:
+        stats = result.get("alert_stats", {})
+        with st.expander(f"Alert Clusters ({stats.get('alerts', 0):,} alerts → {stats.get('clusters', 0):,} clusters)"):
+            cl_df = pd.DataFrame([{
+                "Rank": i,
+                "Severity": c["severity"],
+                "Alerts": c["count"],
+                "Distinct": len(c["templates"]),
+                "First Seen": c["first_seen"],
+                "Last Seen": c["last_seen"],
+                "Entities": ", ".join(c["entities"][:5]),
+                "Top Alert": c["templates"][0]["example"] if c["templates"] else "",
+            } for i, c in enumerate(clusters, 1)])
+            st.dataframe(cl_df, use_container_width=True, hide_index=True)
+
     # Alert Correlation
     groups = result.get("alert_correlation", [])
     if groups:
@@ -249,3 +227,130 @@ if submitted:
     st.divider()
     st.download_button("Download Triage Report (JSON)", json.dumps(result, indent=2),
                        "incident_triage.json", "application/json")
+
+
+mode = st.radio("Mode", ["Paste alerts", "Live tail"], horizontal=True,
+                help="Live tail follows a growing log file (or stdin) and re-triages when the alert picture changes.")
+
+
+@st.cache_resource
+def stdin_tail() -> StreamTail:
+    # stdin can only be drained by one reader per server process.
+    return StreamTail()
+
+
+with st.form("triage_form"):
+    if mode == "Paste alerts":
+        alerts = st.text_area("Alerts, Logs & Error Traces",
+                               value=sample_alerts, height=250,
+                               placeholder="Paste alerts from Datadog, PagerDuty, CloudWatch, Sentry, etc.")
+    else:
+        alerts = ""
+        lt1, lt2 = st.columns([3, 1])
+        with lt1:
+            log_path = st.text_input("Alert Log File", value="sample_alerts.txt",
+                help=f"File name inside the server's `{ALERT_LOG_DIR}/` directory (set ALERT_LOG_DIR to change it), "
+                     "in TIMESTAMP | SOURCE | SEVERITY | ALERT format.")
+        with lt2:
+            use_stdin = st.checkbox("Read from stdin", value=False,
+                help="For `tail -f alerts.log | streamlit run app.py`.")
+            poll_seconds = st.number_input("Poll (s)", min_value=1, max_value=60, value=5)
+
+    c1, c2 = st.columns(2)
+    with c1:
+        environment = st.selectbox("Environment",
+            ["Production", "Staging", "Development", "DR / Failover"])
+        architecture = st.text_input("Architecture Overview",
+            value="Microservices on AWS EKS. PostgreSQL RDS primary + 2 read replicas. "
+                  "Redis cache cluster. ALB load balancer. Services: payment-service, "
+                  "inventory-service, user-service, notification-service.")
+    with c2:
+        recent_changes = st.text_area("Recent Changes (deploys, config, infra)",
+            value="- 2025-01-14 23:45 - Deployed payment-service v2.4.1 (new connection pool config)\n"
+                  "- 2025-01-14 22:00 - RDS parameter group updated (max_connections: 150 -> 200)\n"
+                  "- 2025-01-13 - Added 2 new read replicas for inventory-service",
+            height=100)
+        oncall_team = st.text_input("On-call Team",
+            value="Platform Engineering (primary), Database Team (secondary)")
+        window_minutes = st.slider("Correlation Window (minutes)", 1, 30, 5,
+            help="Alerts sharing a host, service, or endpoint within this window are clustered together.")
+
+    context = st.text_input("Additional Context",
+        value="This is peak transaction hour (2-3 AM UTC = evening US East). ~5,000 transactions/min.")
+
+    submitted = st.form_submit_button("Triage Incident" if mode == "Paste alerts" else "Start Live Tail",
+                                      type="primary", use_container_width=True)
+
+if submitted:
+    if not api_key:
+        st.error("API key required.")
+        st.stop()
+
+    config = dict(
+        alerts=alerts, environment=environment, architecture=architecture,
+        recent_changes=recent_changes, oncall_team=oncall_team, context=context,
+        window_minutes=window_minutes,
+    )
+
+    if mode == "Paste alerts":
+        with st.spinner("Analyzing alerts and correlating signals..."):
+            try:
+                result = triage_incident(config, api_key)
+            except Exception as e:
+                st.error(f"Triage failed: {e}")
+                st.stop()
+        show_triage(result)
+    else:
+        if use_stdin:
+            source = stdin_tail()
+        else:
+            try:
+                source = FileTail(resolve_log_path(log_path))
+            except ValueError as e:
+                st.error(str(e))
+                st.stop()
+        st.session_state["live_triage"] = dict(
+            session=LiveTriageSession(window_minutes=window_minutes),
+            source=source, config=config, poll=poll_seconds, notes=[],
+        )
+
+live = st.session_state.get("live_triage")
+if mode == "Live tail" and live:
+    session = live["session"]
+    if st.button("Stop Live Tail"):
+        st.session_state.pop("live_triage")
+        st.rerun()
+
+    session.ingest(live["source"].read_new())
+    snapshot = session.snapshot()
+    notes = session.changes(snapshot)
+    if session.should_retriage(notes):
+        clusters = session.top_clusters()
+        with st.spinner("Alert picture changed — re-triaging..."):
+            try:
+                if session.last_result is None:
+                    result = triage_clusters(live["config"], clusters, session.clusterer.alert_count,
+                                             list(session.other_lines), api_key)
+                else:
+                    result = retriage_incident(live["config"], session.last_result, notes, clusters,
+                                               session.clusterer.alert_count, list(session.other_lines), api_key)
+                session.record_triage(result, snapshot)
+                live["notes"] = notes
+            except Exception as e:
+                st.error(f"Re-triage failed (will retry on the next change): {e}")
+
+    lm1, lm2, lm3, lm4 = st.columns(4)
+    lm1.metric("Alerts Ingested", f"{session.clusterer.alert_count:,}")
+    lm2.metric("Open Clusters", f"{len(session.clusterer.clusters):,}")
+    lm3.metric("Triage Calls", session.triage_count)
+    lm4.metric("Last Triage", time.strftime("%H:%M:%S", time.localtime(session.last_triage_at))
+               if session.triage_count else "—")
+    if live["notes"]:
+        st.info("**Changes behind the last triage:**\n" + "\n".join(f"- {n}" for n in live["notes"]))
+    if session.last_result:
+        show_triage(session.last_result)
+    else:
+        st.caption("Waiting for alerts...")
+
+    time.sleep(live["poll"])
+    st.rerun()
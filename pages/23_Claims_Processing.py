@@ -8,6 +8,7 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from engines.claims_engine import review_claims
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_uploaded_table, summarize_table
 
 load_dotenv()
 
@@ -51,6 +52,7 @@ with st.form("claims_form"):
     claims = st.text_area("Claims to Review",
                            value=sample_claims, height=300,
                            placeholder="Paste claim details: ID, patient, diagnosis codes, procedures, amounts...")
+    claims_file = st.file_uploader("Or upload a claims export (CSV, XLSX, Parquet)", type=SUPPORTED_TABLE_TYPES)
     c1, c2 = st.columns(2)
     with c1:
         policy_context = st.selectbox("Policy Type Context",
@@ -71,17 +73,41 @@ if submitted:
         st.error("API key required.")
         st.stop()
 
+    if claims_file is not None:
+        claims_table = load_uploaded_table(st, claims_file)
+        st.caption(f"Loaded {len(claims_table):,} claims from {claims_file.name}.")
+        claims = summarize_table(claims_table, claims_file.name)
+
     config = dict(
         claims=claims, policy_context=policy_context,
         focus=", ".join(focus), context=context,
     )
 
-    with st.spinner("Reviewing claims..."):
-        try:
-            result = review_claims(config, api_key)
-        except Exception as e:
-            st.error(f"Review failed: {e}")
-            st.stop()
+    progress = st.progress(0.0, text="Reviewing claims...")
+    live = st.empty()
+    live_rows = []
+
+    def show_claim(done, total, part):
+        progress.progress(done / total, text=f"Reviewed {done}/{total} claims")
+        for c in part.get("claim_reviews", []) or [{"claim_id": part["record"], "recommendation": f"Failed: {part.get('error', '')}"}]:
+            live_rows.append({
+                "Claim": c.get("claim_id", part["record"]),
+                "Claimant": c.get("claimant", ""),
+                "Decision": c.get("recommendation", ""),
+                "Payout": f"${c.get('recommended_payout', 0):,.0f}",
+                "Risk": f"{c.get('risk_score', 0)}/10",
+            })
+        live.dataframe(pd.DataFrame(live_rows), use_container_width=True, hide_index=True)
+
+    try:
+        result = review_claims(config, api_key, on_result=show_claim)
+    except Exception as e:
+        st.error(f"Review failed: {e}")
+        st.stop()
+    progress.empty()
+    live.empty()
+    for err in result.get("record_errors", []):
+        st.warning(f"{err['record']} could not be reviewed: {err['error']}")
 
     # Batch Summary
     batch = result.get("batch_summary", {})
@@ -7,7 +7,14 @@ import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
-from engines.mortgage_engine import analyze_mortgage
+from engines.mortgage_calc import (
+    DEFAULT_MARKET_RATE,
+    amortization_schedule,
+    extra_for_payoff,
+    extra_payment_table,
+    refinance_breakeven,
+)
+from engines.mortgage_engine import analyze_mortgage, local_analysis
 
 load_dotenv()
 
@@ -74,13 +81,24 @@ with st.form("mortgage_form"):
         value="Married, dual income. Spouse earns $85K. Currently renting at $2,100/month. "
               "Want good school district. No VA eligibility.")
 
+    with st.expander("Rate, cost, and refinance assumptions"):
+        a1, a2, a3 = st.columns(3)
+        with a1:
+            market_rate = st.number_input("Today's 30-yr Rate (%)", value=DEFAULT_MARKET_RATE, step=0.125, format="%.3f")
+            extra_monthly = st.number_input("Extra Monthly Principal ($)", value=200, step=50, min_value=0)
+        with a2:
+            tax_rate = st.number_input("Property Tax (% of price / yr)", value=1.0, step=0.1)
+            insurance_rate = st.number_input("Insurance (% of price / yr)", value=0.35, step=0.05)
+            hoa_monthly = st.number_input("HOA ($/mo)", value=0, step=25, min_value=0)
+        with a3:
+            refi_balance = st.number_input("Current Loan Balance (refinance, $)", value=0, step=10_000, min_value=0)
+            refi_rate = st.number_input("Current Loan Rate (%)", value=7.5, step=0.125, format="%.3f")
+            refi_remaining = st.number_input("Years Remaining", value=28, step=1, min_value=1)
+            refi_costs = st.number_input("Refinance Closing Costs ($)", value=6_000, step=500, min_value=0)
+
     submitted = st.form_submit_button("Analyze My Mortgage Options", type="primary", use_container_width=True)
 
 if submitted:
-    if not api_key:
-        st.error("API key required.")
-        st.stop()
-
     config = dict(
         buyer_type=buyer_type, income=income, monthly_debts=monthly_debts,
         credit_score=credit_score, savings=savings, location=location,
@@ -88,9 +106,77 @@ if submitted:
         timeline=timeline, employment=employment, context=context,
     )
 
-    with st.spinner("Analyzing your mortgage options..."):
+    # Local calculator: instant, no API call
+    local = local_analysis(config, market_rate, tax_rate=tax_rate, insurance_rate=insurance_rate,
+                           hoa_monthly=hoa_monthly)
+    inputs, snap = local["inputs"], local["snapshot"]
+    st.subheader("Affordability Calculator")
+    st.caption(f"Parsed income ${inputs.annual_income:,.0f}/yr, debts ${inputs.monthly_debts:,.0f}/mo, "
+               f"savings ${inputs.savings:,.0f}; 30-yr rate {snap['rate_pct']:.3f}% for your credit tier.")
+    lc1, lc2, lc3, lc4 = st.columns(4)
+    lc1.metric("Comfortable Price", f"${snap['comfortable_home_price']:,.0f}", help=f"Limited by {snap['limited_by']}")
+    lc2.metric("Max Price (43% DTI)", f"${snap['max_home_price']:,.0f}")
+    lc3.metric("Monthly Payment", f"${snap['monthly_budget_for_housing']:,.0f}")
+    lc4.metric("Projected DTI", f"{snap['dti_ratio_projected']:.1f}%", delta=f"{snap['dti_ratio_current']:.1f}% today",
+               delta_color="off")
+
+    max_prices = local["max_prices"]
+    thirty = max_prices[max_prices["term_years"] == 30]
+    heat = thirty.pivot(index="rate_pct", columns="down_pct", values="comfortable_price")
+    fig_heat = go.Figure(go.Heatmap(
+        z=heat.values, x=[f"{d:g}% down" for d in heat.columns], y=[f"{r:.3f}%" for r in heat.index],
+        colorscale="Purples", text=[[f"${v:,.0f}" for v in row] for row in heat.values], texttemplate="%{text}",
+    ))
+    fig_heat.update_layout(title="Comfortable Price by Rate and Down Payment (30-yr)", height=380)
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+    grid = local["grid"]
+    with st.expander(f"All {len(grid):,} rate x term x down payment x price scenarios"):
+        st.dataframe(grid, use_container_width=True, hide_index=True)
+        st.download_button("Download Scenario Grid (CSV)", grid.to_csv(index=False),
+                           "mortgage_scenarios.csv", "text/csv")
+
+    loan_amount = snap["breakdown"]["loan_amount"]
+    am1, am2 = st.columns(2)
+    with am1:
+        schedule = amortization_schedule(loan_amount, snap["rate_pct"], 30)
+        accelerated = amortization_schedule(loan_amount, snap["rate_pct"], 30, extra_monthly)
+        fig_am = go.Figure()
+        fig_am.add_trace(go.Scatter(x=schedule["month"] / 12, y=schedule["closing_balance"], name="Scheduled"))
+        fig_am.add_trace(go.Scatter(x=accelerated["month"] / 12, y=accelerated["closing_balance"],
+                                    name=f"+${extra_monthly:,.0f}/mo"))
+        fig_am.update_layout(title=f"Loan Balance (${loan_amount:,.0f} at {snap['rate_pct']:.3f}%)",
+                             xaxis_title="Years", yaxis_tickprefix="$", height=320)
+        st.plotly_chart(fig_am, use_container_width=True)
+    with am2:
+        extras = extra_payment_table(loan_amount, snap["rate_pct"], 30,
+                                     sorted({0, 100, 250, 500, 1000, int(extra_monthly)}))
+        st.markdown("**Extra Payment Impact**")
+        st.dataframe(extras, use_container_width=True, hide_index=True)
+        st.caption(f"Paying off in 15 years takes an extra "
+                   f"${extra_for_payoff(loan_amount, snap['rate_pct'], 30, 15):,.0f}/mo.")
+    st.download_button("Download Amortization Schedule (CSV)", accelerated.to_csv(index=False),
+                       "amortization_schedule.csv", "text/csv")
+
+    if refi_balance:
+        st.markdown("**Refinance Break-even**")
+        refi = refinance_breakeven(refi_balance, refi_rate, refi_remaining * 12,
+                                   inputs.rate_for(30, [-1.0, -0.5, -0.25, 0.0]), 30, refi_costs)
+        refi15 = refinance_breakeven(refi_balance, refi_rate, refi_remaining * 12, [inputs.rate_for(15)], 15, refi_costs)
+        st.dataframe(pd.concat([refi.assign(new_term_years=30), refi15.assign(new_term_years=15)]),
+                     use_container_width=True, hide_index=True)
+        st.caption("Break-even months of -1 mean the refinance never recovers its costs on that measure.")
+
+    if not api_key:
+        st.info("Add an Anthropic API key for personalized loan recommendations and an action plan.")
+        st.stop()
+
+    st.divider()
+    st.subheader("Your Mortgage Advisor")
+    narrative_box = st.empty()
+    with st.spinner("Writing your personalized plan..."):
         try:
-            result = analyze_mortgage(config, api_key)
+            result = analyze_mortgage(config, api_key, local=local, on_narrative=narrative_box.markdown)
         except Exception as e:
             st.error(f"Analysis failed: {e}")
             st.stop()
@@ -8,6 +8,8 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from engines.kyc_risk_engine import assess_risk
+from engines.sanctions_index import load_session_watchlist, subjects_from_table
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_uploaded_table, summarize_table
 
 load_dotenv()
 
@@ -59,6 +61,10 @@ with st.form("risk_form"):
                               value=sample_customers, height=300,
                               placeholder="Paste customer details: name, nationality, occupation, "
                                           "source of funds, PEP status, transaction patterns...")
+    customers_file = st.file_uploader("Or upload a customer export (CSV, XLSX, Parquet)",
+                                      type=SUPPORTED_TABLE_TYPES)
+    watchlist_files = st.file_uploader("Watchlists to screen against (OFAC-style CSV / XML, optional)",
+                                       type=["csv", "xml"], accept_multiple_files=True)
     c1, c2 = st.columns(2)
     with c1:
         risk_appetite = st.selectbox("Institutional Risk Appetite",
@@ -80,17 +86,56 @@ if submitted:
         st.error("API key required.")
         st.stop()
 
+    subjects = None
+    if customers_file is not None:
+        customers_table = load_uploaded_table(st, customers_file)
+        st.caption(f"Loaded {len(customers_table):,} customer records from {customers_file.name}.")
+        customers = summarize_table(customers_table, customers_file.name)
+        try:
+            subjects = subjects_from_table(customers_table)
+        except ValueError as e:
+            st.warning(f"Watchlist screening skipped for {customers_file.name}: {e}")
+
+    watchlist = None
+    if watchlist_files:
+        with st.spinner("Indexing watchlists..."):
+            try:
+                watchlist = load_session_watchlist(st.session_state, [(f.name, f, f.size) for f in watchlist_files])
+            except Exception as e:
+                st.error(f"Could not load watchlists: {e}")
+                st.stop()
+        st.caption(f"Indexed {len(watchlist):,} watchlist names: "
+                   + ", ".join(f"{name} ({count:,} entries)" for name, count in watchlist.lists.items()))
+
     config = dict(
         customers=customers, risk_appetite=risk_appetite,
         industry=industry, jurisdiction=jurisdiction, context=context,
     )
 
-    with st.spinner("Running risk assessment..."):
-        try:
-            result = assess_risk(config, api_key)
-        except Exception as e:
-            st.error(f"Assessment failed: {e}")
-            st.stop()
+    progress = st.progress(0.0, text="Running risk assessment...")
+    live = st.empty()
+    live_rows = []
+
+    def show_customer(done, total, part):
+        progress.progress(done / total, text=f"Assessed {done}/{total} customers")
+        for a in part.get("customer_assessments", []) or [{"customer_id": part["record"], "recommendation": f"Failed: {part.get('error', '')}"}]:
+            live_rows.append({
+                "Customer": a.get("customer_id", part["record"]),
+                "Risk": a.get("risk_classification", ""),
+                "Score": f"{a.get('risk_score', 0)}/100",
+                "Recommendation": a.get("recommendation", ""),
+            })
+        live.dataframe(pd.DataFrame(live_rows), use_container_width=True, hide_index=True)
+
+    try:
+        result = assess_risk(config, api_key, watchlist=watchlist, subjects=subjects, on_result=show_customer)
+    except Exception as e:
+        st.error(f"Assessment failed: {e}")
+        st.stop()
+    progress.empty()
+    live.empty()
+    for err in result.get("record_errors", []):
+        st.warning(f"{err['record']} could not be assessed: {err['error']}")
 
     # Batch Summary
     batch = result.get("batch_summary", {})
@@ -114,6 +159,23 @@ if submitted:
     st.plotly_chart(fig_risk, use_container_width=True)
     st.info(batch.get("key_findings", ""))
 
+    # Local watchlist screening
+    screening = result.get("watchlist_screening")
+    if screening:
+        st.divider()
+        st.subheader("Watchlist Screening")
+        w1, w2, w3 = st.columns(3)
+        w1.metric("Names Screened", f"{screening['subjects_screened']:,}")
+        w2.metric("Likely Matches", screening["likely_matches"])
+        w3.metric("Possible Matches", screening["possible_matches"])
+        hits_df = pd.DataFrame(screening["hits"])
+        if hits_df.empty:
+            st.success("No candidate hits against the uploaded watchlists.")
+        else:
+            st.dataframe(hits_df, use_container_width=True, hide_index=True)
+            st.download_button("Download Watchlist Hits (CSV)", hits_df.to_csv(index=False),
+                               "watchlist_hits.csv", "text/csv")
+
     # Customer Assessments
     assessments = result.get("customer_assessments", [])
     if assessments:
@@ -8,6 +8,7 @@ import streamlit as st
 from dotenv import load_dotenv
 
 from engines.spend_engine import analyze_spend
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_uploaded_table
 
 load_dotenv()
 
@@ -56,6 +57,7 @@ except FileNotFoundError:
 with st.form("spend_form"):
     spend_data = st.text_area("Spend Data", value=sample_data, height=350,
                                placeholder="Paste vendor spend logs, invoices, or billing summaries...")
+    spend_file = st.file_uploader("Or upload a spend export (CSV, XLSX, Parquet)", type=SUPPORTED_TABLE_TYPES)
     c1, c2 = st.columns(2)
     with c1:
         period = st.text_input("Analysis Period", value="January 2025")
@@ -79,6 +81,12 @@ if submitted:
         st.error("API key required.")
         st.stop()
 
+    spend_table = None
+    if spend_file is not None:
+        spend_table = load_uploaded_table(st, spend_file)
+        st.caption(f"Loaded {len(spend_table):,} line items from {spend_file.name}.")
+        spend_data = spend_file.name
+
     config = dict(
         spend_data=spend_data, period=period, budget=budget,
         department=department, threshold=threshold,
@@ -87,7 +95,7 @@ if submitted:
 
     with st.spinner("Analysing spend data..."):
         try:
-            result = analyze_spend(config, api_key)
+            result = analyze_spend(config, api_key, items=spend_table)
         except Exception as e:
             st.error(f"Analysis failed: {e}")
             st.stop()
@@ -173,6 +181,19 @@ if submitted:
                 st.markdown(f"**Recommended Action:** {a.get('recommended_action', '')}")
                 st.markdown(f"**Category:** {a.get('category', '')}")
 
+    detected = result.get("detected_anomalies", [])
+    if detected:
+        with st.expander(f"Statistical checks ({len(detected)} findings, ranked by impact)"):
+            det_df = pd.DataFrame(detected)[[
+                "anomaly_type", "vendor", "category", "period", "amount", "expected_amount",
+                "variance_pct", "robust_z", "impact", "severity", "detail",
+            ]]
+            det_df.columns = ["Type", "Vendor", "Category", "Period", "Amount", "Expected",
+                              "Variance %", "Robust Z", "Impact", "Severity", "Detail"]
+            st.dataframe(det_df, use_container_width=True, hide_index=True)
+            st.download_button("Download Findings (CSV)", det_df.to_csv(index=False),
+                               "spend_findings.csv", "text/csv")
+
     # Vendor Analysis
     vendors = result.get("vendor_analysis", [])
     if vendors:
@@ -2,12 +2,16 @@
 
 import os
 import json
+from datetime import date
+
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
 from engines.lease_engine import analyze_leases
+from engines.lease_schedule import portfolio_from_records
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_uploaded_table
 
 load_dotenv()
 
@@ -80,13 +84,20 @@ with st.form("lease_form"):
               "Maintenance: Included in lease payments\n"
               "Insurance: Lessee responsible\n")
 
+    terms_file = st.file_uploader("Or upload abstracted lease terms (CSV, XLSX, Parquet: lease_id, commencement, "
+                                  "term_months, payment, frequency, escalation_pct, incentives, discount_rate...)",
+                                  type=SUPPORTED_TABLE_TYPES)
+
     c1, c2 = st.columns(2)
     with c1:
         company = st.text_input("Company Name", value="GlobalTech Solutions Inc.")
         standard = st.selectbox("Accounting Standard",
-            ["IFRS 16", "ASC 842", "Both"])
+            ["IFRS 16", "ASC 842", "Both"],
+            help="Both: schedules follow ASC 842 classifications, with IFRS 16 totals shown alongside")
     with c2:
-        discount_rate = st.number_input("Discount Rate (%)", value=5.0, step=0.5)
+        discount_rate = st.number_input("Discount Rate (%)", value=5.0, step=0.5,
+                                        help="Incremental borrowing rate for leases without their own rate.")
+        as_of = st.date_input("Reporting Date", value=date.today())
         focus = st.text_input("Analysis Focus",
             value="Critical date management, upcoming expirations, IFRS 16 compliance gaps")
 
@@ -102,9 +113,14 @@ if submitted:
         discount_rate=discount_rate, focus=focus,
     )
 
+    terms_table = None
+    if terms_file is not None:
+        terms_table = load_uploaded_table(st, terms_file)
+        st.caption(f"Loaded {len(terms_table):,} leases from {terms_file.name}.")
+
     with st.spinner("Analysing lease portfolio..."):
         try:
-            result = analyze_leases(config, api_key)
+            result = analyze_leases(config, api_key, terms_table=terms_table, as_of=as_of)
         except Exception as e:
             st.error(f"Analysis failed: {e}")
             st.stop()
@@ -172,6 +188,9 @@ if submitted:
         fc1.metric("Total Commitment", fin.get("total_commitment", ""))
         fc2.metric("Lease Liability (PV)", fin.get("lease_liability_estimate", ""))
         fc3.metric("ROU Asset", fin.get("right_of_use_asset", ""))
+        if fin.get("source") == "model estimate":
+            st.warning("No lease had complete schedule terms, so these are the model's estimates, "
+                       "not computed balances. See the unscheduled leases below.")
 
         annual = fin.get("annual_breakdown", [])
         if annual:
@@ -186,6 +205,49 @@ if submitted:
             fig_fin.update_layout(title="Annual Lease Obligations", height=300)
             st.plotly_chart(fig_fin, use_container_width=True)
 
+    # Computed lease accounting
+    schedule = result.get("lease_schedule", {})
+    if schedule.get("leases"):
+        totals = schedule["totals"]
+        st.divider()
+        st.subheader(f"Lease Accounting Schedule — {schedule['standard']} (as of {totals['as_of']})")
+        sc1, sc2, sc3, sc4 = st.columns(4)
+        sc1.metric("Current Liability", f"${totals['current_liability']:,.0f}")
+        sc2.metric("Non-current Liability", f"${totals['non_current_liability']:,.0f}")
+        sc3.metric("ROU Asset", f"${totals['rou_asset']:,.0f}")
+        sc4.metric("Active / Not Commenced", f"{totals['active_leases']:,} / {totals['not_commenced']:,}")
+        ifrs = schedule.get("ifrs16_totals")
+        if ifrs:
+            st.caption(f"Schedules below follow ASC 842 classifications. Under IFRS 16 (every lease on the finance "
+                       f"model): liability ${ifrs['lease_liability']:,.0f} (current ${ifrs['current_liability']:,.0f}), "
+                       f"ROU asset ${ifrs['rou_asset']:,.0f}.")
+
+        leases_df = pd.DataFrame(schedule["leases"])
+        st.dataframe(leases_df, use_container_width=True, hide_index=True)
+
+        mc1, mc2 = st.columns(2)
+        with mc1:
+            st.markdown("**Maturity Analysis (undiscounted)**")
+            st.dataframe(pd.DataFrame(schedule["maturity"]), use_container_width=True, hide_index=True)
+        with mc2:
+            annual_df = pd.DataFrame(schedule["annual"])
+            fig_cost = go.Figure()
+            fig_cost.add_trace(go.Bar(x=annual_df["year"], y=annual_df["interest"], name="Interest"))
+            fig_cost.add_trace(go.Bar(x=annual_df["year"], y=annual_df["lease_cost"] - annual_df["interest"],
+                                      name="ROU Amortization / Straight-line Balance"))
+            fig_cost.update_layout(title="Lease Cost by Year", barmode="stack", height=300)
+            st.plotly_chart(fig_cost, use_container_width=True)
+
+        portfolio = portfolio_from_records(schedule["terms"], as_of)
+        dl1, dl2 = st.columns(2)
+        dl1.download_button("Download Lease Summary (CSV)", leases_df.to_csv(index=False),
+                            "lease_summary.csv", "text/csv")
+        dl2.download_button("Download Monthly Schedules (CSV)", portfolio.schedule_frame().to_csv(index=False),
+                            "lease_schedules.csv", "text/csv")
+
+    for issue in schedule.get("issues", []):
+        st.warning(f"{issue['lease_id']} not scheduled: {issue['issue']}")
+
     # Critical Dates
     dates = result.get("critical_dates_calendar", [])
     if dates:
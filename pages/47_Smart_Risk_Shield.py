@@ -7,6 +7,7 @@ import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
+from engines.sanctions_index import load_session_watchlist
 from engines.smart_risk_engine import screen_customer
 
 load_dotenv()
@@ -71,6 +72,9 @@ with st.form("risk_form"):
               "- Reports monthly wire transfers of $200K-$500K between Dubai and Cyprus\n"
               "- Recent $2.8M property purchase in London (via BVI holding company)")
 
+    watchlist_files = st.file_uploader("Watchlists to screen against (OFAC-style CSV / XML, optional)",
+                                       type=["csv", "xml"], accept_multiple_files=True)
+
     c1, c2 = st.columns(2)
     with c1:
         business_relationship = st.selectbox("Business Relationship Type",
@@ -102,6 +106,17 @@ if submitted:
         st.error("API key required.")
         st.stop()
 
+    watchlist = None
+    if watchlist_files:
+        with st.spinner("Indexing watchlists..."):
+            try:
+                watchlist = load_session_watchlist(st.session_state, [(f.name, f, f.size) for f in watchlist_files])
+            except Exception as e:
+                st.error(f"Could not load watchlists: {e}")
+                st.stop()
+        st.caption(f"Indexed {len(watchlist):,} watchlist names: "
+                   + ", ".join(f"{name} ({count:,} entries)" for name, count in watchlist.lists.items()))
+
     config = dict(
         customer_profile=customer_profile,
         business_relationship=business_relationship,
@@ -113,7 +128,7 @@ if submitted:
 
     with st.spinner("Screening customer against sanctions, PEP, and adverse media databases..."):
         try:
-            result = screen_customer(config, api_key)
+            result = screen_customer(config, api_key, watchlist=watchlist)
         except Exception as e:
             st.error(f"Screening failed: {e}")
             st.stop()
@@ -170,6 +185,17 @@ if submitted:
                     st.markdown(f'<div class="{cls}"><strong>{o.get("list_name", "")}:</strong> '
                                f'{icon} — {o.get("details", "")}</div>', unsafe_allow_html=True)
 
+    screening = result.get("watchlist_screening")
+    if screening:
+        hits_df = pd.DataFrame(screening["hits"])
+        with st.expander(f"Local watchlist evidence ({screening['likely_matches']} likely, "
+                         f"{screening['possible_matches']} possible)", expanded=not hits_df.empty):
+            st.caption("Lists checked: " + ", ".join(f"{n} ({c:,} entries)" for n, c in screening["lists"].items()))
+            if hits_df.empty:
+                st.success("No candidate hits against the uploaded watchlists.")
+            else:
+                st.dataframe(hits_df, use_container_width=True, hide_index=True)
+
     # PEP Screening & Country Risk side by side
     pc1, pc2 = st.columns(2)
     pep = result.get("pep_screening", {})
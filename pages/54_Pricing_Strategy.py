@@ -7,7 +7,10 @@ import plotly.graph_objects as go
 import streamlit as st
 from dotenv import load_dotenv
 
+from engines.price_optimizer import (PricingConstraints, fit_elasticities, normalize_catalog, optimization_summary,
+                                     optimize_prices, parse_catalog_text, parse_margin_target)
 from engines.strategy_pricing_engine import analyze_pricing
+from engines.table_parser import SUPPORTED_TABLE_TYPES, load_session_table, load_uploaded_table, summarize_table
 
 load_dotenv()
 
@@ -50,6 +53,7 @@ with st.form("pricing_form"):
               "LG 27\" 4K Monitor | $449.99 | $270.00 | 210 units | Best Buy: $429.99, Amazon: $439.99\n"
               "Bose SoundLink Max Speaker | $279.99 | $145.00 | 180 units | Best Buy: $279.99, Amazon: $269.99\n"
               "Logitech MX Master 3S Mouse | $99.99 | $42.00 | 410 units | Best Buy: $89.99, Amazon: $94.99")
+    catalog_file = st.file_uploader("Or upload a catalog export (CSV, XLSX, Parquet)", type=SUPPORTED_TABLE_TYPES)
 
     c1, c2 = st.columns(2)
     with c1:
@@ -63,11 +67,85 @@ with st.form("pricing_form"):
                   "New product launches from Samsung and Apple expected next month. "
                   "Supply chain stable, inflation moderating to 3.2%.")
 
+    with st.expander("Price optimizer limits", expanded=True):
+        st.caption("Recommended prices are solved locally from per-product elasticities; the AI only justifies them.")
+        o1, o2, o3 = st.columns(3)
+        run_optimizer = o1.checkbox("Compute optimal prices", value=True)
+        revenue_weight = o1.slider("Revenue vs Margin", 0.0, 1.0, 0.0, step=0.1,
+                                   help="0 = maximize gross profit, 1 = maximize revenue")
+        max_change = o2.number_input("Max Price Change (%)", 0.0, 100.0, 10.0, step=1.0)
+        ladder_gap = o2.number_input("Price Ladder Gap (%)", 0.0, 50.0, 0.0, step=1.0,
+                                     help="> 0 keeps products with ladder_group / ladder_rank columns (in an "
+                                          "upload) in ladder order, at least this far apart")
+        below_comp = o3.number_input("Max Below Cheapest Competitor (%)", 0.0, 100.0, 5.0, step=1.0)
+        above_comp = o3.number_input("Max Above Dearest Competitor (%)", 0.0, 100.0, 3.0, step=1.0)
+        history_file = st.file_uploader("Optional sales history for elasticity fitting (product, price, units)",
+                                        type=SUPPORTED_TABLE_TYPES, key="strategy_price_history")
+
     submitted = st.form_submit_button("Generate Pricing Strategy", type="primary", use_container_width=True)
 
 if submitted:
+    product_catalog_table = None
+    if catalog_file is not None:
+        product_catalog_table = load_uploaded_table(st, catalog_file)
+        st.caption(f"Loaded {len(product_catalog_table):,} products from {catalog_file.name}.")
+        product_catalog = summarize_table(product_catalog_table, catalog_file.name)
+
+    priced, constraints = None, None
+    if run_optimizer:
+        constraints = PricingConstraints(
+            min_margin_pct=parse_margin_target(margin_target), max_change_pct=max_change,
+            below_competitor_pct=below_comp, above_competitor_pct=above_comp,
+            ladder_gap_pct=ladder_gap, revenue_weight=revenue_weight,
+        )
+        try:
+            catalog = normalize_catalog(
+                product_catalog_table if product_catalog_table is not None
+                else parse_catalog_text(product_catalog, ["product", "price", "cost", "inventory", "competitor_price"]))
+            elasticities = None
+            if history_file is not None:
+                elasticities = fit_elasticities(
+                    load_session_table(st.session_state, history_file.name, history_file, history_file.size))
+            priced = optimize_prices(catalog, constraints, elasticities)
+        except Exception as e:
+            st.warning(f"Price optimizer skipped: {e}")
+
+    if priced is not None:
+        summary = optimization_summary(priced)
+        st.subheader("Optimized Prices")
+        st.caption(f"Gross margin floor {constraints.min_margin_pct:g}% (from the margin target). "
+                   f"Revenue and profit are at the listed unit quantities.")
+        op1, op2, op3 = st.columns(3)
+        op1.metric("Products Priced", f"{summary['skus']:,}",
+                   help=f"{summary['price_increases']:,} up, {summary['price_decreases']:,} down")
+        op2.metric("Gross Profit", f"${summary['expected_profit']:,.0f}", delta=f"{summary['profit_change_pct']:+.1f}%")
+        op3.metric("Avg Gross Margin", f"{summary['expected_margin_pct']}%",
+                   delta=f"{summary['expected_margin_pct'] - summary['current_margin_pct']:+.1f} pts")
+        if summary["conflicts"]:
+            st.warning(f"{len(summary['conflicts']):,} products kept their current price: their margin floor is above "
+                       f"the max-change or competitor cap, so no price meets every constraint — "
+                       f"{', '.join(summary['conflicts'][:10])}{' ...' if len(summary['conflicts']) > 10 else ''}. "
+                       "Relax one of the constraints to reprice them.")
+        st.dataframe(pd.DataFrame({
+            "Product": priced["product"],
+            "Current": priced["price"].map("${:,.2f}".format),
+            "Optimized": priced["recommended_price"].map("${:,.2f}".format),
+            "Change": priced["price_change_pct"].map("{:+.1f}%".format),
+            "Elasticity": priced["elasticity"],
+            "Source": priced["elasticity_source"],
+            "Competitors": [f"${lo:,.2f} – ${hi:,.2f}" if lo == lo else "—"
+                            for lo, hi in zip(priced["competitor_min"], priced["competitor_max"])],
+            "Set By": priced["binding_constraint"],
+            "Margin": priced["expected_margin_pct"].map("{:.1f}%".format),
+        }), use_container_width=True, hide_index=True)
+        st.download_button("Download Optimized Prices (CSV)", priced.to_csv(index=False),
+                           "optimized_prices.csv", "text/csv")
+
     if not api_key:
-        st.error("API key required.")
+        if priced is None:
+            st.error("API key required.")
+        else:
+            st.info("Add an Anthropic API key for the full AI pricing strategy.")
         st.stop()
 
     config = dict(product_catalog=product_catalog, margin_target=margin_target,
@@ -76,7 +154,7 @@ if submitted:
 
     with st.spinner("Analyzing pricing data and generating strategy..."):
         try:
-            result = analyze_pricing(config, api_key)
+            result = analyze_pricing(config, api_key, priced, constraints)
         except Exception as e:
             st.error(f"Analysis failed: {e}")
             st.stop()
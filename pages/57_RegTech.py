@@ -128,6 +128,12 @@ if submitted:
             st.error(f"Analysis failed: {e}")
             st.stop()
 
+    normalization = result.get("normalization", {})
+    if normalization.get("tokens_saved", 0) > 0:
+        with st.expander(f"Normalization removed ~{normalization['tokens_saved']:,} tokens of repeated headers, "
+                         "footers, and boilerplate"):
+            st.dataframe(pd.DataFrame([normalization]), use_container_width=True, hide_index=True)
+
     # Board Reporting / Executive Summary
     board = result.get("board_reporting", {})
     st.subheader("Executive Summary")
@@ -0,0 +1,35 @@
+"""Regression checks for watchlist screening recall on transliterated names."""
+
+import random
+
+import pandas as pd
+import pytest
+
+from engines.sanctions_index import POSSIBLE_MATCH, WatchlistIndex
+
+TRANSLITERATIONS = [
+    ("Muammar Qadhafi", "Moammar Gaddafi"),
+    ("Muammar Qadhafi", "Moamar Kadhafi"),
+    ("Sergei Volkov", "Sergey Wolkow"),
+    ("Usama bin Ladin", "Osama bin Laden"),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    rng = random.Random(0)
+
+    def filler():
+        return " ".join("".join(rng.choice("abdefghiklmnorstuvz") for _ in range(rng.randint(4, 8))).capitalize()
+                        for _ in range(2))
+
+    names = [filler() for _ in range(20_000)] + sorted({listed for listed, _ in TRANSLITERATIONS})
+    return WatchlistIndex(pd.DataFrame({"entry_id": [str(i) for i in range(len(names))], "name": names,
+                                        "variant": names, "list_name": "SDN"}))
+
+
+@pytest.mark.parametrize("listed, query", TRANSLITERATIONS)
+def test_transliteration_is_reported(index, listed, query):
+    hits = index.screen([{"name": query}])
+    assert listed in set(hits["listed_name"]), f"{query} should match {listed}"
+    assert hits["score"].max() >= POSSIBLE_MATCH